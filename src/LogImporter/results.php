@@ -22,8 +22,12 @@
 ###############################################################################
 <?php
 
-# place to store the files
-$target_path = "results/${_SERVER['REMOTE_ADDR']}-" . rand(1,1000000000) . ".xml";
+# place to store the files, reports uploaded gzip compressed keep their .gz
+$extension = ".xml";
+if (substr($_FILES["file"]["name"], -3) == ".gz") {
+	$extension = ".xml.gz";
+}
+$target_path = "results/${_SERVER['REMOTE_ADDR']}-" . rand(1,1000000000) . $extension;
 
 if ($_FILES["file"]["error"] > 0) {
 	# just return the code. script will check for OK or code
@@ -38,10 +42,12 @@ else {
 	if (file_exists($target_path)) {
 		echo $target_path . " already exists. \n";
 	}
-	else {
-		move_uploaded_file($_FILES["file"]["tmp_name"], $target_path);
+	else if (move_uploaded_file($_FILES["file"]["tmp_name"], $target_path)) {
 		echo "ok $target_path\n";
 	}
+	else {
+		echo "unable to store " . $target_path . "\n";
+	}
 }
 
 ?>
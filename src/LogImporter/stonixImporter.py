@@ -32,6 +32,7 @@ STONIX reports. It processes the XML and inserts the results into a database.
 
 # from xml.dom.minidom import parseString
 import xml.etree.ElementTree as ET
+import gzip
 import os
 import errno
 import sys
@@ -57,7 +58,21 @@ class ReportParser(object):
         self.path = path
         self.tree = ''
         if self.path is not None:
-            self.tree = ET.parse(self.path)
+            self.tree = self.parsefile(self.path)
+
+    def parsefile(self, path):
+        '''Return the ElementTree of a report file. Clients upload their
+        reports gzip compressed, those files end in .gz.
+
+        @param path: path to the report file
+        '''
+        if path.endswith('.gz'):
+            report = gzip.open(path, 'rb')
+            try:
+                return ET.parse(report)
+            finally:
+                report.close()
+        return ET.parse(path)
 
     def openreport(self, path):
         '''ReportParser.openReport will open a report file and load the data
@@ -67,7 +82,7 @@ class ReportParser(object):
         @author: dkennel
         '''
         if os.path.exists(path):
-            self.tree = ET.parse(path)
+            self.tree = self.parsefile(path)
 
     def parsereport(self):
         '''ReportParser.parseReport() will parse the xml report and return a
@@ -87,9 +87,13 @@ The following options control the running of the script:
  -G  --gui  Use the GUI interface.
  -c  --gui  Use the Console interface.
  -X  --rollback  Will rollback file changes to pre-STONIX state.
+ --undorun  With -X, only roll back the changes of one run, "last" for
+         the newest run.
  -h  --help  or no arguments will display this help message and exit.
  -v  --verbose print verbose information about what stor is doing.
  -R  --rule run a single stonix rule. Requires -f, -X or -r.
+ -D  --daemon  Keep running and audit rules again when the files they
+         depend on change.
 
 WARNING! If run with the -f flag THIS PROGAM WILL MODIFY
 SYSTEM SETTINGS!
@@ -123,6 +127,8 @@ import re
 import traceback
 import time
 import subprocess
+import cProfile
+import signal
 
 # Local imports
 
@@ -132,6 +138,16 @@ from stonix_resources.environment import Environment
 from stonix_resources.StateChgLogger import StateChgLogger
 from stonix_resources.logdispatcher import LogPriority, LogDispatcher
 from stonix_resources.program_arguments import ProgramArguments
+from stonix_resources.rulescheduler import RuleScheduler
+from stonix_resources.rulemanifest import RuleManifest
+from stonix_resources.filetransaction import TRANSACTION
+from stonix_resources.instrumentation import INSTRUMENTATION
+from stonix_resources.sysctlservice import SYSCTL
+from stonix_resources.homeinventory import HOMES
+from stonix_resources.pkghelper import resetinstalled
+from stonix_resources.ServiceHelper import resetstates
+from stonix_resources.filewatcher import getwatcher
+from stonix_resources.sysquery import pidalive, getcmdline
 from stonix_resources.cli import Cli
 try:
     from stonix_resources.gui import GUI
@@ -146,7 +162,10 @@ class Controller(Observable):
     """
     def __init__(self):
         Observable.__init__(self)
+        INSTRUMENTATION.install()
+        starttime = time.time()
         self.environ = Environment()
+        INSTRUMENTATION.addphase('environment', time.time() - starttime)
         self.mode = "gui"
         self.fix = False
         self.report = False
@@ -155,6 +174,15 @@ class Controller(Observable):
         self.pcf = False
         self.pcs = False
         self.list = False
+        self.gcarchive = False
+        self.jobs = 1
+        self.daemon = False
+        self.daemoninterval = 1440
+        self.undorun = None
+        self.profiler = None
+        self.manifest = None
+        self.rulesloaded = False
+        self.installedrules = []
         if not self.safetycheck():
             self.logger.log(LogPriority.CRITICAL,
                             ['SafetyCheck',
@@ -177,7 +205,9 @@ class Controller(Observable):
         if not self.mode == 'test':
             self.prog_args = ProgramArguments()
             self.processargs()
+        starttime = time.time()
         self.config = Configuration(self.environ)
+        INSTRUMENTATION.addphase('config', time.time() - starttime)
         self.numrulesrunning = 0
         self.numrulescomplete = 0
         self.currulename = ''
@@ -227,12 +257,26 @@ class Controller(Observable):
                         'State Logger Started')
         self.logger.log(LogPriority.DEBUG,
                         'Running in ' + self.mode)
+        if self.list:
+            # The listing is served from the rule manifest so that we do not
+            # import every rule just to print their names.
+            self.__listrules()
+            return
+        if self.gcarchive:
+            self.__gcarchive()
+            return
         starttime = time.time()
         allrules = self.getrules(self.config, self.environ)
         etime = time.time() - starttime
         self.logger.log(LogPriority.DEBUG,
                         'Rules Processed in ' + str(etime))
+        phasestart = time.time()
         self.installedrules = self.findapplicable(allrules)
+        INSTRUMENTATION.addphase('isapplicable', time.time() - phasestart)
+        # Sort by declared dependencies and rule number so that every host
+        # runs the rules in the same order.
+        self.installedrules = \
+            RuleScheduler(self.logger).orderrules(self.installedrules)
         etime = time.time() - starttime
         self.logger.log(LogPriority.DEBUG,
                         'Rules Applicable in ' + str(etime))
@@ -249,11 +293,8 @@ class Controller(Observable):
                         ['OSType', self.environ.getostype()])
         self.logger.log(LogPriority.DEBUG,
                         ['OSVersion', self.environ.getosver()])
-        self.list = self.prog_args.getList()
 
-        if self.list:
-            self.__listrules()
-        elif self.mode == 'cli':
+        if self.mode == 'cli':
             self.__clirun()
         elif self.mode == 'gui':
             myui = GUI(self, self.environ, self.logger)
@@ -270,10 +311,34 @@ class Controller(Observable):
         @return: list : a list of instantiated rule classes
         @author: D. Kennel
         """
-        instruleclasses = []
-        validrulefiles = []
-        initlist = ['__init__.py', '__init__.pyc', '__init__.pyo']
+        manifest = self.__loadmanifest()
+        modulenames = []
+        for module in manifest.listmodules():
+            # The manifest lets us skip importing rules that cannot apply to
+            # this platform or EUID. Rules it cannot decide on are imported
+            # and filtered by findapplicable as before.
+            if manifest.isapplicable(module, environ) is False:
+                self.logger.log(LogPriority.DEBUG,
+                                'Not loading ' + module +
+                                ' not applicable per manifest')
+                continue
+            modulenames.append(module)
+        self.logger.log(LogPriority.DEBUG,
+                        ['Module names:', str(modulenames)])
+        instruleclasses = self.__importrules(modulenames, config, environ)
+        self.rulesloaded = True
+        return instruleclasses
+
+    def __loadmanifest(self):
+        """
+        Private method to set up the import path for the rules and load the
+        rule manifest. The manifest is only loaded once per run.
 
+        @return: RuleManifest instance
+        """
+        if self.manifest is not None:
+            return self.manifest
+        starttime = time.time()
         stonixPath = self.environ.get_resources_path()
         self.logger.log(LogPriority.DEBUG,
                         ['STONIX Path:', str(stonixPath)])
@@ -287,32 +352,25 @@ class Controller(Observable):
         for path in sys.path:
             self.logger.log(LogPriority.DEBUG,
                             ['Sys Path Element:', str(path)])
+        self.manifest = RuleManifest(str(rulesPath), self.logger)
+        INSTRUMENTATION.addphase('manifest', time.time() - starttime)
+        return self.manifest
 
-        rulefiles = os.listdir(str(rulesPath))
-        # print str(rulefiles)
-
-        for rfile in rulefiles:
-            if rfile in initlist:
-                continue
-            else:
-                validrulefiles.append(rfile)
-        self.logger.log(LogPriority.DEBUG,
-                        ['validrulefiles:', str(validrulefiles)])
+    def __importrules(self, modulenames, config, environ):
+        """
+        Private method to import and instantiate the named rule modules.
 
-        # This is a list comprehension to build a list of module names to
-        # import based on the names of valid rule files from stonix/rules
-        # destination list = [ *transform* *source* *filter* ]
-        modulenames = [mod.replace('.py', '') for mod in validrulefiles
-                        if re.search("\.py$", mod)]
-        self.logger.log(LogPriority.DEBUG,
-                        ['Module names:', str(modulenames)])
+        @param modulenames: list of rule module names
+        @param config: Configuration instance
+        @param environ: Environment instance
+        @return: list : a list of instantiated rule classes
+        """
+        instruleclasses = []
 
         # The output of this section is a list of valid, fully qualified,
         # rule class names.
         classnames = []
         for module in modulenames:
-            module = module.split("/")[-1]
-            # print module
             classname = 'stonix_resources.rules.' + module + '.' + module
             classnames.append(classname)
 
@@ -335,6 +393,11 @@ class Controller(Observable):
                 self.logger.log(LogPriority.ERROR,
                                 "Error importing rule: " + trace)
                 continue
+            finally:
+                etime = time.time() - starttime
+                INSTRUMENTATION.addphase('import', etime)
+                INSTRUMENTATION.addrulephase(parts[-1], 'import', etime)
+            inststart = time.time()
             # Recurse down the class name until we get a reference to the class
             # itself. Then we instantiate using the reference.
             for component in parts[1:]:
@@ -349,6 +412,10 @@ class Controller(Observable):
             try:
                 clinst = mod(config, environ, self.logger, self.statechglogger)
                 instruleclasses.append(clinst)
+                etime = time.time() - inststart
+                INSTRUMENTATION.addphase('instantiate', etime)
+                INSTRUMENTATION.addrulephase(parts[-1], 'instantiate', etime)
+                INSTRUMENTATION.instrument(clinst)
                 etime = time.time() - starttime
                 self.logger.log(LogPriority.DEBUG,
                                 'load time: ' + str(etime))
@@ -407,6 +474,8 @@ class Controller(Observable):
         @return: Dictionary of lists
         @author: D. Kennel
         """
+        if not self.rulesloaded:
+            return self.__getmanifestrulesdata()
         rulesdata = {}
         for rule in self.installedrules:
             rulenum = rule.getrulenum()
@@ -418,6 +487,32 @@ class Controller(Observable):
             rulesdata[rulenum] = ruledetails
         return rulesdata
 
+    def __getmanifestrulesdata(self):
+        """
+        Private method returning the same data as getallrulesdata for the
+        rules applicable to this platform without loading the rule set.
+        Only rules the manifest cannot describe statically are imported.
+
+        @return: Dictionary of lists
+        """
+        manifest = self.__loadmanifest()
+        rulesdata = {}
+        undecided = []
+        for entry in manifest.getentries():
+            applicable = manifest.isapplicable(entry['module'], self.environ)
+            if applicable is None or \
+               (applicable and entry['helptext'] is None):
+                undecided.append(entry['module'])
+            elif applicable:
+                rulesdata[entry['rulenumber']] = [entry['rulename'],
+                                                  entry['helptext']]
+        if undecided:
+            rules = self.__importrules(undecided, self.config, self.environ)
+            for rule in self.findapplicable(rules):
+                rulesdata[rule.getrulenum()] = [rule.getrulename(),
+                                                rule.gethelptext()]
+        return rulesdata
+
     def getrulenumbyname(self, name):
         """
         This method takes a name associated with a rule as an argument and
@@ -458,92 +553,78 @@ class Controller(Observable):
 
     def hardensystem(self):
         """
-        Call all rules in fix(harden) mode
+        Call all rules in fix(harden) mode. When more than one job was
+        requested on the command line the rules are run concurrently by a
+        RuleScheduler, results are still logged in rule order. A rule is not
+        started before the rules it declares it runs after have finished.
+        Configuration file edits are staged in the FileTransaction and each
+        file is written, and its services reloaded, once at the end.
 
         @return void :
         @author D. Kennel
         """
         self.numrulesrunning = self.numexecutingrules
         self.numrulescomplete = 0
-        for rule in self.installedrules:
-            self.currulenum = rule.getrulenum()
-            self.currulename = rule.getrulename()
-            try:
-                starttime = time.time()
-                rule.report()
-                if not rule.getrulesuccess():
-                    self.logger.log(LogPriority.ERROR,
-                                    [rule.getrulename(),
-                                     rule.getdetailedresults()])
-                elif not rule.iscompliant():
-                    rule.fix()
-                    if rule.getrulesuccess():
-                        rule.report()
-                        if not rule.getrulesuccess():
-                            self.logger.log(LogPriority.ERROR,
-                                            [rule.getrulename(),
-                                             rule.getdetailedresults()])
-                        elif not rule.iscompliant():
-                            self.logger.log(LogPriority.WARNING,
-                                            [rule.getrulename(),
-                                            rule.getdetailedresults()])
-                        else:
-                            self.logger.log(LogPriority.INFO,
-                                            [rule.getrulename(),
-                                            rule.getdetailedresults()])
-                else:
-                    self.logger.log(LogPriority.INFO,
-                                    [rule.getrulename(),
-                                    rule.getdetailedresults()])
-                etime = time.time() - starttime
-                self.logger.log(LogPriority.DEBUG,
-                                [rule.getrulename(),
-                                'Elapsed Time: ' + str(etime)])
-            except (KeyboardInterrupt, SystemExit):
-            # User initiated exit
-                raise
-            except Exception:
-                trace = traceback.format_exc()
-                self.logger.log(LogPriority.ERROR, [rule.getrulename(),
-                                "Controller caught rule death: "
-                                + trace])
-            self.numrulescomplete = self.numrulescomplete + 1
-            self.set_dirty()
-            self.notify_check()
+        self.__invalidatecaches()
+        scheduler = RuleScheduler(self.logger, self.jobs)
+        starttime = time.time()
+        TRANSACTION.begin()
+        try:
+            scheduler.run(self.installedrules, self.__hardenrule,
+                          self.__hardencomplete, honordeps=True)
+        finally:
+            INSTRUMENTATION.addphase('fix', time.time() - starttime)
+            starttime = time.time()
+            TRANSACTION.commit(self.logger)
+            INSTRUMENTATION.addphase('commit', time.time() - starttime)
 
-    def auditsystem(self):
+    def __hardenrule(self, rule):
         """
-        Call all rules in audit(report) mode
+        Private method run by the scheduler for each rule in a full fix run.
+        Runs report and, if the rule is not compliant, fix followed by a
+        second report. The change events of the fix are committed to the
+        event log together.
 
+        @param rule: Rule instance
         @return void :
-        @author D. Kennel
         """
-        self.numrulesrunning = self.numexecutingrules
-        self.numrulescomplete = 0
-        for rule in self.installedrules:
+        # In a serial run the current rule is the one executing, in a
+        # concurrent run it is updated as results come back.
+        if self.jobs == 1:
             self.currulenum = rule.getrulenum()
             self.currulename = rule.getrulename()
+        rule.report()
+        if rule.getrulesuccess() and not rule.iscompliant():
+            self.statechglogger.beginbatch()
             try:
-                starttime = time.time()
+                rule.fix()
+            finally:
+                self.statechglogger.endbatch()
+            if rule.getrulesuccess():
                 rule.report()
-                etime = time.time() - starttime
-                self.logger.log(LogPriority.DEBUG,
-                                [rule.getrulename(),
-                                'Elapsed Time: ' + str(etime)])
-            except (KeyboardInterrupt, SystemExit):
-                # User initiated exit
-                raise
-            except Exception:
-                trace = traceback.format_exc()
-                self.logger.log(LogPriority.ERROR, [rule.getrulename(),
-                                "Controller caught rule death: "
-                                + trace])
-            self.numrulescomplete = self.numrulescomplete + 1
+
+    def __hardencomplete(self, rule, etime, trace):
+        """
+        Private method called in rule order once a rule has been processed
+        by __hardenrule. Logs the results and updates the progress counters.
+
+        @param rule: Rule instance
+        @param etime: float - time spent running the rule
+        @param trace: string - traceback if the rule died, else None
+        @return void :
+        """
+        self.currulenum = rule.getrulenum()
+        self.currulename = rule.getrulename()
+        if trace is not None:
+            self.logger.log(LogPriority.ERROR, [rule.getrulename(),
+                            "Controller caught rule death: "
+                            + trace])
+        else:
             if not rule.getrulesuccess():
                 self.logger.log(LogPriority.ERROR,
                                 [rule.getrulename(),
-                                rule.getdetailedresults()])
-            if not rule.iscompliant():
+                                 rule.getdetailedresults()])
+            elif not rule.iscompliant():
                 self.logger.log(LogPriority.WARNING,
                                 [rule.getrulename(),
                                 rule.getdetailedresults()])
@@ -551,8 +632,180 @@ class Controller(Observable):
                 self.logger.log(LogPriority.INFO,
                                 [rule.getrulename(),
                                 rule.getdetailedresults()])
-            self.set_dirty()
-            self.notify_check()
+            self.logger.log(LogPriority.DEBUG,
+                            [rule.getrulename(),
+                            'Elapsed Time: ' + str(etime)])
+        self.numrulescomplete = self.numrulescomplete + 1
+        self.set_dirty()
+        self.notify_check()
+
+    def __invalidatecaches(self):
+        """
+        Private method to drop the system state the helpers share between
+        rules, so that every report or fix reads the kernel parameters, home
+        directories, installed packages and service states again. A daemon
+        would otherwise keep seeing the state of its first audit.
+
+        @return: void
+        """
+        SYSCTL.invalidate()
+        HOMES.invalidate()
+        resetinstalled()
+        resetstates()
+
+    def auditsystem(self):
+        """
+        Call all rules in audit(report) mode. When more than one job was
+        requested on the command line the rules are run concurrently by a
+        RuleScheduler, results are still logged in rule order.
+
+        @return void :
+        @author D. Kennel
+        """
+        self.numrulesrunning = self.numexecutingrules
+        self.numrulescomplete = 0
+        self.__invalidatecaches()
+        scheduler = RuleScheduler(self.logger, self.jobs)
+        starttime = time.time()
+        scheduler.run(self.installedrules, self.__auditrule,
+                      self.__auditcomplete)
+        INSTRUMENTATION.addphase('report', time.time() - starttime)
+
+    def __auditrule(self, rule):
+        """
+        Private method run by the scheduler for each rule in a full report
+        run.
+
+        @param rule: Rule instance
+        @return void :
+        """
+        # In a serial run the current rule is the one executing, in a
+        # concurrent run it is updated as results come back.
+        if self.jobs == 1:
+            self.currulenum = rule.getrulenum()
+            self.currulename = rule.getrulename()
+        rule.report()
+
+    def __auditcomplete(self, rule, etime, trace):
+        """
+        Private method called in rule order once a rule has been processed
+        by __auditrule. Logs the results and updates the progress counters.
+
+        @param rule: Rule instance
+        @param etime: float - time spent running the rule
+        @param trace: string - traceback if the rule died, else None
+        @return void :
+        """
+        self.currulenum = rule.getrulenum()
+        self.currulename = rule.getrulename()
+        if trace is not None:
+            self.logger.log(LogPriority.ERROR, [rule.getrulename(),
+                            "Controller caught rule death: "
+                            + trace])
+        else:
+            self.logger.log(LogPriority.DEBUG,
+                            [rule.getrulename(),
+                            'Elapsed Time: ' + str(etime)])
+        self.numrulescomplete = self.numrulescomplete + 1
+        if not rule.getrulesuccess():
+            self.logger.log(LogPriority.ERROR,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        if not rule.iscompliant():
+            self.logger.log(LogPriority.WARNING,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        else:
+            self.logger.log(LogPriority.INFO,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        self.set_dirty()
+        self.notify_check()
+
+    def auditrules(self, rulenames):
+        """
+        Run the report of some of the rules again, as the daemon mode does
+        when files they watch change. Rules whose compliance changed are
+        logged as ComplianceChange findings so that drift shows up in the
+        report as it happens.
+
+        @param rulenames: collection of rule names
+        @return: void
+        """
+        rules = [rule for rule in self.installedrules
+                 if rule.getrulename() in rulenames]
+        before = dict([(rule.getrulename(), rule.iscompliant())
+                       for rule in rules])
+        self.numrulesrunning = len(rules)
+        self.numrulescomplete = 0
+        self.__invalidatecaches()
+        scheduler = RuleScheduler(self.logger, self.jobs)
+        starttime = time.time()
+        scheduler.run(rules, self.__auditrule, self.__auditcomplete)
+        INSTRUMENTATION.addphase('report', time.time() - starttime)
+        for rule in rules:
+            if rule.iscompliant() == before[rule.getrulename()]:
+                continue
+            if rule.iscompliant():
+                state = 'compliant'
+            else:
+                state = 'not compliant'
+            self.logger.log(LogPriority.WARNING,
+                            ['ComplianceChange',
+                             rule.getrulename() + ' is now ' + state])
+
+    def daemonrun(self):
+        """
+        Keep the rules loaded and audit continuously until stopped with
+        SIGTERM or an interrupt. All rules are audited at start and every
+        daemoninterval minutes (--interval), each full audit is posted as a report like a -r
+        run. In between, the rules are audited again as soon as one of the
+        paths they declare in getwatchedpaths changes and the results go to
+        a new report. Rules that declare no paths are only checked by the
+        full audits.
+
+        @return: void
+        """
+        watcher = getwatcher()
+        watched = 0
+        for rule in self.installedrules:
+            for path in rule.getwatchedpaths():
+                watcher.add(path, rule.getrulename())
+                watched += 1
+        self.logger.log(LogPriority.INFO,
+                        ['Controller.daemonrun',
+                         'Watching ' + str(watched) + ' paths with ' +
+                         watcher.__class__.__name__])
+        previous = signal.signal(signal.SIGTERM, self.__daemonstop)
+        try:
+            try:
+                while True:
+                    self.auditsystem()
+                    self.logger.postreport()
+                    self.logger.openreports()
+                    nextaudit = time.time() + self.daemoninterval * 60
+                    remaining = self.daemoninterval * 60
+                    while remaining > 0:
+                        changed = watcher.wait(remaining)
+                        if changed:
+                            self.logger.log(LogPriority.DEBUG,
+                                            ['Controller.daemonrun',
+                                             'Auditing ' +
+                                             ', '.join(sorted(changed))])
+                            self.auditrules(changed)
+                        remaining = nextaudit - time.time()
+            except (KeyboardInterrupt, SystemExit):
+                self.logger.log(LogPriority.INFO,
+                                ['Controller.daemonrun', 'Stopping'])
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            watcher.close()
+
+    def __daemonstop(self, signum, frame):
+        """
+        Private SIGTERM handler of the daemon mode.
+        """
+        raise SystemExit(0)
 
     def runruleharden(self, ruleid):
         """
@@ -697,15 +950,39 @@ class Controller(Observable):
                     self.set_dirty()
                     self.notify_check()
 
+    def selectundorun(self):
+        """
+        Restrict the undo to the run given with --undorun, if any.
+
+        @return: bool - False if the run is unknown and nothing should be
+            undone
+        """
+        if self.undorun is None:
+            return True
+        try:
+            runid = self.statechglogger.setundorun(self.undorun)
+        except ValueError, err:
+            self.logger.log(LogPriority.ERROR,
+                            ['Controller.selectundorun', str(err)])
+            return False
+        self.logger.log(LogPriority.INFO,
+                        ['Controller.selectundorun',
+                         'Undoing the changes of run ' + runid])
+        return True
+
     def undochangessystem(self):
         """
-        Undo all changes to the system.
+        Undo all changes to the system, or those of the run selected with
+        --undorun.
 
         @return void :
         @author D. Kennel
         """
+        if not self.selectundorun():
+            return
         self.numrulesrunning = self.numexecutingrules
         self.numrulescomplete = 0
+        starttime = time.time()
         for rule in self.installedrules:
             self.currulenum = rule.getrulenum()
             self.currulename = rule.getrulename()
@@ -731,6 +1008,7 @@ class Controller(Observable):
                                  rule.getdetailedresults()])
             self.set_dirty()
             self.notify_check()
+        INSTRUMENTATION.addphase('undo', time.time() - starttime)
 
     def undorule(self, ruleid):
         """
@@ -741,6 +1019,8 @@ class Controller(Observable):
         @return void :
         @author D. Kennel
         """
+        if not self.selectundorun():
+            return
         self.numrulesrunning = 1
         self.numrulescomplete = 0
         for rule in self.installedrules:
@@ -993,45 +1273,30 @@ ABORTING EXECUTION!"""
                             ['TryAcquireLock',
                              'Found lock for PID: ' + lockpid])
             try:
-                if int(lockpid) == os.getpid():
-                    # PID is the same, reuse PID file
-                    return
+                pid = int(lockpid)
             except (TypeError, ValueError):
                 self.logger.log(LogPriority.DEBUG,
                                 ['TryAcquireLock',
                                  'Could not coerce PID to INT: ' + lockpid])
-            command = None
-            if self.environ.getosfamily() == 'freebsd':
-                command = '/bin/ps -aux'
-            elif self.environ.getosfamily() == 'solaris':
-                command = '/usr/bin/ps -ef'
-            else:
-                command = '/bin/ps -ef'
-            self.logger.log(LogPriority.DEBUG,
-                            ['TryAcquireLock',
-                             'PS command is: ' + str(command)])
-            if not type(command) is None:
-                pscom = subprocess.Popen(command, stdout=subprocess.PIPE,
-                                         stderr=subprocess.PIPE,
-                                         shell=True, close_fds=True)
-                psout = pscom.stdout.readlines()
-                for line in psout:
-                    if re.search('stonix', line):
-                        splits = line.split()
-                        pspid = splits[1]
-                        self.logger.log(LogPriority.DEBUG,
-                                        ['TryAcquireLock',
-                                         'Checking PIDs: ' + lockpid + ' ' + \
-                                         pspid])
-                        if pspid == lockpid:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['TryAcquireLock',
-                                             'Matched PIDs: ' + lockpid + ' ' \
-                                             + pspid])
-                            self.logger.log(LogPriority.CRITICAL,
-                                            ['TryAcquireLock', lockmessage])
-                            rw_lockfile.close()
-                            sys.exit(2)
+                pid = 0
+            if pid == os.getpid():
+                # PID is the same, reuse PID file
+                return
+            running = False
+            if pidalive(pid):
+                cmdline = getcmdline(pid)
+                if cmdline is None:
+                    running = self.__pslookup(lockpid)
+                else:
+                    running = re.search('stonix', ' '.join(cmdline)) is not None
+            if running:
+                self.logger.log(LogPriority.DEBUG,
+                                ['TryAcquireLock',
+                                 'Found running stonix with PID: ' + lockpid])
+                self.logger.log(LogPriority.CRITICAL,
+                                ['TryAcquireLock', lockmessage])
+                rw_lockfile.close()
+                sys.exit(2)
             self.logger.log(LogPriority.DEBUG,
                             ['TryAcquireLock',
                              'Truncating existing Lockfile'])
@@ -1046,6 +1311,38 @@ ABORTING EXECUTION!"""
             rw_lockfile.write(str(os.getpid()))
             rw_lockfile.close()
 
+    def __pslookup(self, lockpid):
+        """
+        Look for a stonix process with the given PID in the output of ps. Only
+        used where the command line of a process cannot be read from /proc.
+
+        @param lockpid: string - PID read from the lock file
+        @return: bool True if a stonix process has that PID
+        """
+        if self.environ.getosfamily() == 'freebsd':
+            command = '/bin/ps -aux'
+        elif self.environ.getosfamily() == 'solaris':
+            command = '/usr/bin/ps -ef'
+        else:
+            command = '/bin/ps -ef'
+        self.logger.log(LogPriority.DEBUG,
+                        ['TryAcquireLock',
+                         'PS command is: ' + str(command)])
+        pscom = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE,
+                                 shell=True, close_fds=True)
+        psout = pscom.stdout.readlines()
+        pscom.wait()
+        for line in psout:
+            if re.search('stonix', line):
+                pspid = line.split()[1]
+                self.logger.log(LogPriority.DEBUG,
+                                ['TryAcquireLock',
+                                 'Checking PIDs: ' + lockpid + ' ' + pspid])
+                if pspid == lockpid:
+                    return True
+        return False
+
     def safetycheck(self):
         """
         Check that the installation of STONIX is safe from a security
@@ -1057,6 +1354,34 @@ ABORTING EXECUTION!"""
         safe = True
         return safe
 
+    def writeinstrumentation(self):
+        """
+        Write the phase and per rule timings of the run to
+        stonix-timing.json in the log directory and, if --profile was given,
+        the profile of the run to stonix-profile.pstats. The profile only
+        covers the main thread.
+
+        @return: void
+        """
+        logpath = self.environ.get_log_path()
+        timingreport = os.path.join(logpath, 'stonix-timing.json')
+        try:
+            INSTRUMENTATION.write(timingreport,
+                                  {'runtime': self.environ.getruntime(),
+                                   'jobs': self.jobs})
+        except (IOError, OSError), err:
+            self.logger.log(LogPriority.ERROR,
+                            ['Controller.writeinstrumentation',
+                             'Could not write ' + timingreport + ': ' +
+                             str(err)])
+        if self.profiler is not None:
+            self.profiler.disable()
+            profile = os.path.join(logpath, 'stonix-profile.pstats')
+            self.profiler.dump_stats(profile)
+            self.profiler = None
+            self.logger.log(LogPriority.INFO,
+                            ['Controller', 'Profile written to ' + profile])
+
     def releaselock(self):
         """
         Cleans up the stonix lock file in the event of normal program
@@ -1090,6 +1415,16 @@ ABORTING EXECUTION!"""
         self.environ.setinstallmode(self.prog_args.get_install())
         self.pcf = self.prog_args.getPrintConfigFull()
         self.pcs = self.prog_args.getPrintConfigSimple()
+        self.jobs = self.prog_args.getJobs()
+        self.list = self.prog_args.getList()
+        self.gcarchive = self.prog_args.getGcArchive()
+        self.daemon = self.prog_args.getDaemon()
+        self.daemoninterval = self.prog_args.getInterval()
+        self.undorun = self.prog_args.getUndoRun()
+        if self.prog_args.getProfile():
+            INSTRUMENTATION.install(countstats=True)
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
 
         if self.prog_args.get_update():
             # update(debug)
@@ -1157,9 +1492,9 @@ ABORTING EXECUTION!"""
         @return: void
         """
         rulelist = []
-        for rule in self.installedrules:
-            rulenum = rule.getrulenum()
-            rulename = rule.getrulename()
+        rulesdata = self.getallrulesdata()
+        for rulenum in rulesdata:
+            rulename = rulesdata[rulenum][0]
             rulestring = rulename + ' (' + str(rulenum) + ')'
             rulelist.append(rulestring)
         rulelist.sort(key=str.lower)
@@ -1172,6 +1507,26 @@ ABORTING EXECUTION!"""
             pass
         self.releaselock()
 
+    def __gcarchive(self):
+        """
+        Private method that removes the archived copies of configuration
+        files no longer referenced by the change event log and prints what
+        was freed.
+
+        @return: void
+        """
+        if self.environ.geteuid() != 0:
+            print "Removing archived files requires root privileges"
+        else:
+            removed, freed = self.statechglogger.gcarchive()
+            print "Removed %d archived files, %d bytes freed" % (removed,
+                                                                 freed)
+        try:
+            self.logger.closereports()
+        except:
+            pass
+        self.releaselock()
+
     def __clirun(self):
         """
         This private method performs a cli run based on the passed flags.
@@ -1185,15 +1540,23 @@ ABORTING EXECUTION!"""
         myui = Cli(self.environ)
         # self.logger.register_listener(myui)
         self.register_listener(myui)
+        # Progress is redrawn at most four times a second from a dispatcher
+        # thread so that the rules never wait on the terminal.
+        self.set_throttle(0.25)
         if not self.runrule:
             self.logger.log(LogPriority.DEBUG,
                             'Entering full system run')
-            if self.fix:
+            if self.daemon:
+                self.logger.log(LogPriority.DEBUG,
+                                'Mode is Daemon')
+                self.daemonrun()
+                self.logger.closereports()
+            elif self.fix:
                 self.logger.log(LogPriority.DEBUG,
                                 'Mode is Fix')
                 self.hardensystem()
                 self.logger.closereports()
-            if self.report:
+            if self.report and not self.daemon:
                 self.logger.log(LogPriority.DEBUG,
                                 'Mode is Report')
                 self.auditsystem()
@@ -1214,7 +1577,7 @@ ABORTING EXECUTION!"""
                 self.regenerateconfig(True)
                 self.logger.closereports()
             if not self.fix and not self.report and not self.undo and \
-            not self.pcf and not self.pcs:
+            not self.pcf and not self.pcs and not self.daemon:
                 self.logger.log(LogPriority.INFO,
                                 'No action specified. Please check command syntax')
                 self.logger.closereports()
@@ -1222,6 +1585,10 @@ ABORTING EXECUTION!"""
         elif isinstance(self.runrule, list):
             self.logger.log(LogPriority.DEBUG,
                             'Running rules: ' + ", ".join(self.runrule))
+            # Run the requested rules in dependency order
+            ordernames = [rule.getrulename() for rule in self.installedrules]
+            self.runrule.sort(key=lambda name: ordernames.index(name)
+                              if name in ordernames else len(ordernames))
             for rule in self.runrule:
                 self.logger.log(LogPriority.DEBUG,
                                'Entering single rule run for ' + rule)
@@ -1272,6 +1639,9 @@ ABORTING EXECUTION!"""
                 self.logger.log(LogPriority.INFO,
                                 'No action specified. Please pass the -r, -f, or -u flag')
                 self.logger.closereports()
+        self.stop_throttle()
+        self.writeinstrumentation()
+        self.logger.waitreport()
         self.releaselock()
 
 if __name__ == '__main__':
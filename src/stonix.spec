@@ -29,7 +29,7 @@ License: GPL v. 2.0
 Group: System administration tools
 Source0: %{name}-%{version}.tgz
 BuildRoot: %{_builddir}/%{name}-%{version}-%{release}-root
-Requires: python, curl
+Requires: python
 BuildArch: noarch
 
 %description
@@ -32,12 +32,16 @@
 @change: 2014/04/15 ekkehard made logging more intelligent
 @change: 2014/10/20 ekkehard fix pep8 viloation
 @change: 2015/09/22 ekkehard Uniform logging
+@change: 2026/10/18 Run commands through commandrunner: concurrent pipe
+    draining, timeouts, line callbacks and runMany
+@change: 2026/10/18 Count the commands executed, per helper and per rule
 '''
 import re
-import subprocess
 import traceback
 import types
 from logdispatcher import LogPriority
+from commandrunner import runcommand, runmany, WORKERS
+from instrumentation import INSTRUMENTATION
 
 
 class CommandHelper(object):
@@ -72,6 +76,12 @@ class CommandHelper(object):
 
         # set this to False if you need to run a command that has no return code
         self.wait = True
+        self.timeout = None
+        self.timedout = False
+        self.stdoutcallback = None
+        self.stderrcallback = None
+        self.keepoutput = True
+        self.forks = 0
 
 ###############################################################################
 
@@ -362,6 +372,24 @@ class CommandHelper(object):
         '''
         return self.returncode
 
+###############################################################################
+
+    def getTimedOut(self):
+        '''
+        Get whether the last executed command was killed by the timeout
+        @return: bool
+        '''
+        return self.timedout
+
+###############################################################################
+
+    def getForkCount(self):
+        '''
+        Get the number of commands this helper has executed
+        @return: int
+        '''
+        return self.forks
+
 ###############################################################################
 
     def setCommand(self, command):
@@ -468,6 +496,33 @@ class CommandHelper(object):
         if flag in self.flags:
             self.flag = flag
 
+###############################################################################
+
+    def setTimeout(self, timeout=None):
+        '''
+        Set the number of seconds after which executed commands are killed.
+        A command that times out makes executeCommand return False.
+        @param timeout: int or float seconds, None to wait indefinitely
+        '''
+        self.timeout = timeout
+
+###############################################################################
+
+    def setLineCallback(self, stdoutcallback=None, stderrcallback=None,
+                        keepoutput=True):
+        '''
+        Hand every output line of executed commands to callbacks as it is
+        read. Commands with large outputs can be processed without keeping
+        the output by passing keepoutput=False. Call without arguments to
+        reset.
+        @param stdoutcallback: function called with every stdout line
+        @param stderrcallback: function called with every stderr line
+        @param keepoutput: bool, keep the output for getOutput and friends
+        '''
+        self.stdoutcallback = stdoutcallback
+        self.stderrcallback = stderrcallback
+        self.keepoutput = keepoutput
+
 ###############################################################################
 
     def executeCommand(self, command=None):
@@ -480,8 +535,8 @@ class CommandHelper(object):
         '''
 
         try:
-            commandobj = None
             success = True
+            self.timedout = False
             if (type(command) is not None):
                 success = self.setCommand(command)
             else:
@@ -497,30 +552,24 @@ class CommandHelper(object):
                                      "".join(self.command) + ")")
 
             if (success):
-                commandobj = subprocess.Popen(self.command,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, 
-                               shell=self.shell)
-                outlines = []
-                errlines = []
-                for line in iter(commandobj.stdout.readline, ''):
-                    outlines.append(line)
-                commandobj.stdout.close()
-                for line in iter(commandobj.stderr.readline, ''):
-                    errlines.append(line)
-                commandobj.stderr.close()
-
-                if self.wait:
-                    commandobj.wait()
-
-                if commandobj is not None:
-                    self.stdout = outlines
-                    self.stderr = errlines
-                    self.output = self.stderr + self.stdout
-
-                    self.returncode = commandobj.returncode
-                    msg = "returncode: " + str(self.returncode)
-                    self.logdispatcher.log(self.logpriority, msg)
+                self.forks += 1
+                INSTRUMENTATION.count('commands')
+                result = runcommand(self.command, self.shell, self.timeout,
+                                    self.wait, self.stdoutcallback,
+                                    self.stderrcallback, self.keepoutput)
+                self.stdout = result.stdout
+                self.stderr = result.stderr
+                self.output = self.stderr + self.stdout
+                self.returncode = result.returncode
+                self.timedout = result.timedout
+                self.logdispatcher.log(self.logpriority, "returncode: %s",
+                                       self.returncode)
+                if self.timedout:
+                    success = False
+                    self.logdispatcher.log(LogPriority.WARNING,
+                                           "Command %s killed after %s " +
+                                           "seconds", self.command,
+                                           self.timeout)
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception, err:
@@ -528,22 +577,54 @@ class CommandHelper(object):
             msg = str(err) + " - " + str(traceback.format_exc())
             self.logdispatcher.log(LogPriority.ERROR, msg)
             raise
-        else:
-            if commandobj is not None:
-                if commandobj.stdout is not None:
-                    commandobj.stdout.close()
-                if commandobj.stderr is not None:
-                    commandobj.stderr.close()
         finally:
-            msg = "You should not see this. CommandHelper.executeCommand()"
-            if self.returncode is not None:
-                msg = "returncode:(" + str(self.returncode) + ") output:(" + str(self.output) + "); command:(" + str(self.command) + ")"
-            else:
-                msg = "returncode:(None) output:(" + str(self.output) + "); command:(" + str(self.command) + ")"
-            self.logdispatcher.log(LogPriority.DEBUG, msg)
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   "returncode:(%s) output:(%s); " +
+                                   "command:(%s)", self.returncode,
+                                   self.output, self.command)
 
         return success
 
+###############################################################################
+
+    def runMany(self, commands, workers=WORKERS):
+        '''
+        Execute independent commands on a pool of worker threads. Commands
+        are validated like setCommand does, the timeout set with setTimeout
+        applies to each of them. The output of the batch is returned, the
+        get methods keep referring to the last executeCommand.
+        @param commands: list of commands, each a string or list
+        @param workers: int, number of commands executed at the same time
+        @return: list of commandrunner.CommandResult in the order of commands
+        '''
+        batch = []
+        for command in commands:
+            if type(command) is types.StringType:
+                if len(command.strip()) == 0:
+                    raise ValueError("Command '" + command + "' is blank!")
+                batch.append(command.strip())
+            elif type(command) is types.ListType and len(command) > 0:
+                for item in command:
+                    if type(item) is not types.StringType:
+                        raise TypeError("Command List Item '" + str(item) +
+                                        "' has in invalid type of '" +
+                                        str(type(item)) + "'")
+                batch.append([item.strip() for item in command])
+            else:
+                raise TypeError("Command '" + str(command) +
+                                "' has in invalid type of '" +
+                                str(type(command)) + "'")
+        self.forks += len(batch)
+        INSTRUMENTATION.count('commands', len(batch))
+        results = runmany(batch, workers, self.timeout)
+        for result in results:
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   "returncode:(%s) output:(%s); " +
+                                   "command:(%s)", result.returncode,
+                                   result.stderr + result.stdout,
+                                   result.command)
+        return results
+
 ###############################################################################
 
     def findInOutput(self, expression, searchgroup="output", dtype="list"):
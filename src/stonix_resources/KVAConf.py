@@ -27,9 +27,14 @@ Created on May 6, 2013
 '''
 from logdispatcher import LogPriority
 from stonixutilityfunctions import writeFile
+from filecache import FILECACHE
 import traceback
 import re
 
+# A key without any of these characters matches itself only when used as a
+# regular expression, so it can be looked up in the index directly
+METACHARS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
 class KVAConf():
     '''This class checks files for correctness that consist of key:value pairs
     either in the form of closed equal separated (k=v), open separated (k = v),
@@ -51,12 +56,16 @@ class KVAConf():
     in which the dictionary would be in the form of: 
     {"blacklist:["bluetooth",
                  "rivafb",
-                 "hisax"]}'''
+                 "hisax"]}
+    The file is parsed once into an index of key to lines (see getIndex) that
+    validation and update consult instead of scanning every line for every
+    key.'''
 ###############################################################################
     def __init__(self, path, tmpPath, intent, configType, logger):
         self.fixables = {}
         self.removeables = {}
         self.contents = []
+        self.index = None
         self.logger = logger
         self.path = path
         self.tmpPath = tmpPath
@@ -124,6 +133,7 @@ class KVAConf():
 ###############################################################################
     def setConfigType(self, configType):
         self.configType = configType
+        self.index = None
         return True
 ###############################################################################
     def getConfigType(self):
@@ -163,34 +173,25 @@ class KVAConf():
         @return: Bool
         '''
         if self.contents:
+            entries = self.getKeyEntries(key)
             if self.intent == "present":  # self.data contains key val pairs we want in the file
                 found = False
-                for line in self.contents:
-                    if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
+                for lineno, val in entries:  # every line that has the key, in file order
+                    if val == value:  # and the value is correct
+                        found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
                         continue
-                    elif re.search("=", line):  # examine line if there is an = sign
-                        temp = line.split("=")  # split line into key val list [key, val]
-                        if re.match("^" + key + "$", temp[0].strip()):  # it contains the current key we're looking for
-                            if temp[1].strip() == value:  # and the value is correct
-                                found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
-                                continue
-                            else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
-                                found = False
-                                break
+                    else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
+                        found = False
+                        break
                 if found:  # return True or False value
                     return True
                 else:
                     return False
             elif self.intent == "notpresent":  # self.data contains key val pairs we don't want in the file
                 found = True
-                for line in self.contents:
-                    if re.match("^#", line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                        continue
-                    elif re.search("=", line):  # examine line if there is an = sign
-                        temp = line.split("=")  # split line into key val list [key, val]
-                        if re.match("^" + key + "$", temp[0].strip()):  # it contains the current key we're looking for
-                            found = True  # no need to check value, it's irrelevant
-                            break
+                for lineno, val in entries:
+                    found = True  # no need to check value, it's irrelevant
+                    break
                 return found
 ###############################################################################
 
@@ -212,27 +213,25 @@ class KVAConf():
         fixables = []
         removeables = []
         if self.contents:
+            # lines whose first field is the key
+            candidates = []
+            for lineno, temp in self.getIndex().get(key, []):
+                if re.search(key, self.contents[lineno]):
+                    candidates.append((lineno, temp))
             if self.intent == "present":  #self.data contains key val pairs we want in the file
                 if isinstance(value, list):  # value can be a list in cases, see init pydoc
                     for item in value:
                         foundalready = False
-                        for line in self.contents:
-                            if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                                continue
-                            elif re.search(key, line):  # we found the key, which in this case can be repeatable
-                                temp = line.strip()  # strip off all trailing and leading whitespace
-                                temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                                temp = temp.split()  # separate contents into list separated by spaces
-                                if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                    try:
-                                        if len(temp) > 2:  # this could indicate the file's format may be corrupted but that's not our issue
-                                            continue
-                                        elif temp[1] == item:  # value is correct
-                                            foundalready = True
-                                    except IndexError:
-                                        self.detailedresults += "Index error\n"
-                                        #maybe should continue instead of raising
-                                        raise(self.detailedresults)
+                        for lineno, temp in candidates:
+                            try:
+                                if len(temp) > 2:  # this could indicate the file's format may be corrupted but that's not our issue
+                                    continue
+                                elif temp[1] == item:  # value is correct
+                                    foundalready = True
+                            except IndexError:
+                                self.detailedresults += "Index error\n"
+                                #maybe should continue instead of raising
+                                raise(self.detailedresults)
                         if not foundalready:
                             fixables.append(item)
                     if fixables:
@@ -241,49 +240,35 @@ class KVAConf():
                         return True
                 else:  # value must be a string, normal case
                     found = False
-                    for line in self.contents:
-                        if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                            continue
-                        elif re.search(key, line):  # the key is in this line
-                            temp = line.strip()  # strip off all trailing and leading whitespace
-                            temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                            temp = temp.split()  # separate contents into list separated by spaces
-                            if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                try:
-                                    if len(temp) > 2:
-                                        continue  # this could indicate the file's format may be corrupted but that's not our issue
-                                    elif temp[1] == value:  # the value is correct
-                                        found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
-                                        continue
-                                    else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
-                                        found = False
-                                        break
-                                except IndexError:
-                                    found = False
-                                    self.detailedresults += "Index error\n"
-                                    break
+                    for lineno, temp in candidates:
+                        try:
+                            if len(temp) > 2:
+                                continue  # this could indicate the file's format may be corrupted but that's not our issue
+                            elif temp[1] == value:  # the value is correct
+                                found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
+                                continue
+                            else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
+                                found = False
+                                break
+                        except IndexError:
+                            found = False
+                            self.detailedresults += "Index error\n"
+                            break
                     return found
             elif self.intent == "notpresent":  # self.data contains key val pairs we don't want in the file
                 if isinstance(value, list):  # value can be a list in cases, see init pydoc
                     for item in value:
                         foundalready = False
-                        for line in self.contents:
-                            if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                                continue
-                            elif re.search(key, line):  # we found the key, which in this case can be repeatable
-                                temp = line.strip()  # strip off all trailing and leading whitespace
-                                temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                                temp = temp.split()  # separate contents into list separated by spaces
-                                if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                    try:
-                                        if len(temp) > 2:
-                                            continue  # this could indicate the file's format may be corrupted but that's not our issue
-                                        elif temp[1] == item:  # the value is correct
-                                            foundalready = True
-                                    except IndexError:
-                                        self.detailedresults += "Index error\n"
-                                        #maybe continue instead of raising
-                                        raise(self.detailedresults)
+                        for lineno, temp in candidates:
+                            try:
+                                if len(temp) > 2:
+                                    continue  # this could indicate the file's format may be corrupted but that's not our issue
+                                elif temp[1] == item:  # the value is correct
+                                    foundalready = True
+                            except IndexError:
+                                self.detailedresults += "Index error\n"
+                                #maybe continue instead of raising
+                                raise(self.detailedresults)
                         if foundalready:
                             removeables.append(item)
                     if removeables:
@@ -292,16 +277,12 @@ class KVAConf():
                         return False
                 else:  # value must be a string, normal case
                     found = False
-                    for line in self.contents:
-                        if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore is comment or blank line
-                            continue
-                        elif re.match("^" + key, line):  # we found the key
-                            temp = line.strip()  # strip off all trailing and leading whitespace
-                            temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                            temp = temp.split()  # separate contents into list separated by spaces
-                            if re.match("^" + key + "$", temp[0]):  # a more specific check of the key in case is shares a similar key name with another key up to a point
-                                found = True
-                                break
+                    # a more specific check of the key in case is shares a
+                    # similar key name with another key up to a point
+                    for lineno, temp in self.getKeyEntries(key):
+                        if re.match("^" + key, self.contents[lineno]):  # we found the key
+                            found = True
+                            break
                     return found
 ###############################################################################
 
@@ -338,36 +319,19 @@ class KVAConf():
         @return: Bool
         '''
         self.storeContents(self.path)  # re-read the contents of the desired file
-        contents = self.contents
+        drop = set()  # line numbers that will not be kept
         if removeables:  # we have items that need to be removed from file
             for key in removeables:
-                i = 0  # variable to keep our place in the list, will be used for removing items
-                for line in contents:
-                    if re.search("^#", line) or re.match("^\s*$", line):  # ignore if comment or blank line
-                        i += 1
-                    elif re.search("=", line.strip()):  # line contains an = sign
-                        temp = line.split("=")
-                        if re.match("^" + key + "$", temp[0].strip()):  # found the key
-                            contents.pop(i)  # not concerned with the value because we don't want the key either way
-                        i += 1
-                    else:
-                        i += 1
+                for lineno, val in self.getKeyEntries(key):
+                    drop.add(lineno)  # not concerned with the value because we don't want the key either way
         if fixables:  # we have items that either had the wrong value or don't exist in the file
             for key in fixables:
-                i = 0  # variable to keep our place in the list, will be used for removing items
-                for line in contents:
-                    if re.search("^#", line) or re.match("^\s*$", line):  # ignore if comment or blank line
-                        i += 1
-                    elif re.search("=", line.strip()):  # line contains an = sign
-                        temp = line.split("=")
-                        if re.match("^" + key + "$", temp[0].strip()):  # found the key
-                            contents.pop(i)  # we pop it out but down below we add the correct line unlike above
-                        i += 1
-                    else:
-                        i += 1
-            self.contents = []
-            for line in contents:  # contents should now have a list of items we are ok with having in the file but will still be missing the fixables
-                self.contents.append(line)  # make self.contents contain the correct file contents before fixing
+                for lineno, val in self.getKeyEntries(key):
+                    drop.add(lineno)  # we drop it but down below we add the correct line unlike above
+        contents = [line for lineno, line in enumerate(self.contents)
+                    if lineno not in drop]
+        if fixables:
+            self.contents = contents  # contents should now have a list of items we are ok with having in the file but will still be missing the fixables
             self.contents.append("\n" + self.universal)  # add our universal line to show line(s) were added by stonix to self.contents
             for key in fixables:
                 if self.configType == "openeq":  # construct the appropriate line and add to bottom of self.contents
@@ -376,6 +340,9 @@ class KVAConf():
                 elif self.configType == "closedeq":
                     temp = key + "=" + fixables[key] + "\n"
                     self.contents.append(temp)
+        else:
+            self.contents = contents
+        self.index = None
         return True
 ###############################################################################
 
@@ -393,67 +360,30 @@ class KVAConf():
         '''
 #       re-read the contents of the desired file
         self.storeContents(self.path)
-        contents = self.contents
+        drop = set()  # line numbers that will not be kept
         if removeables:  # we have items that need to be removed from file
             for key, val in removeables.iteritems():
-                i = 0
 #               we have a list where the key can repeat itself
                 if isinstance(val, list):
                     for key2 in removeables[key]:
-                        for line in contents:
-                            if re.search("^#", line) or re.match("^\s*$",
-                                                                 line):
-                                i += 1
-                            else:
-                                temp = line.strip()
-                                temp = re.sub("\s+", " ", temp)
-                                temp = line.split()
-                                if len(temp) > 2:
-                                    i += 1
-                                    continue
-                                elif re.search("^" + key + "$", temp[0]):
-                                    if re.search("^" + key2 + "$", temp[1]):
-                                        contents.pop(i)
-                                else:
-                                    i += 1
+                        for lineno, temp in self.getKeyEntries(key):
+                            if len(temp) == 2 and \
+                               re.search("^" + key2 + "$", temp[1]):
+                                drop.add(lineno)
                 else:
-                    for line in contents:
-                        if re.search("^#", line) or re.match("^\s*$", line):
-                            i += 1
-                        elif re.search(key, line.strip()):
-                            temp = line.strip().split(" ")
-                            if re.match("^" + key + "$", temp[0].strip()):
-                                contents.pop(i)
-                        else:
-                            i += 1
-            self.contents = contents
-            contents = self.contents
+                    for lineno, temp in self.getKeyEntries(key):
+                        drop.add(lineno)
         if fixables:
-            contents.append(self.universal)
             for key, val in fixables.iteritems():
                 if isinstance(val, list):
                     continue
-                    for key2 in fixables[key]:
-                        contents.append(key + " " + key2 + "\n")
-                else:
-                    i = 0
-                    for line in contents:
-                        if re.search("^#", line) or re.match("^\s*$", line):
-                            i += 1
-                        elif re.search(key, line):
-                            temp = line.strip()
-                            temp = re.sub("\s+", " ", temp)
-                            temp = line.split()
-                            if len(temp) > 2:
-                                i += 1
-                                continue
-                            #temp = line.strip().split()
-                            elif re.match("^" + key + "$", temp[0].strip()):
-                                contents.pop(i)
-                            else:
-                                i += 1
-                        else:
-                            i += 1
+                for lineno, temp in self.getKeyEntries(key):
+                    if len(temp) <= 2:
+                        drop.add(lineno)
+        contents = [line for lineno, line in enumerate(self.contents)
+                    if lineno not in drop]
+        if fixables:
+            contents.append(self.universal)
             for key, val in fixables.iteritems():
                 if isinstance(val, list):
                     for key2 in fixables[key]:
@@ -461,19 +391,7 @@ class KVAConf():
                 else:
                     contents.append(key + " " + val + "\n")
         self.contents = contents
-#             if listPresent:
-#                 self.contents = contents
-#                 return True
-#             else:
-#                 self.contents = []
-#                 for line in contents:  # reconstruct the self.contents list to contain the most updated list
-#                     self.contents.append(line)
-#                 self.contents.append("\n" + self.universal)
-#                 if fixables:  # if there are fixables, we need to then add those, removeables have already been taken care of above
-#                     for key in fixables:
-#                         temp = key + " " + fixables[key] + "\n"
-#                         self.contents.append(temp)
-#                 return True
+        self.index = None
         return True
 ###############################################################################
 
@@ -499,18 +417,61 @@ class KVAConf():
         @author: dwalker
         @param path: The path which contents need to be read
         '''
+        self.index = None
         try:
-            f = open(path, 'r')
+            self.contents = FILECACHE.getlines(path)
         except IOError:
             self.detailedresults = "KVAConf: unable to open the" \
                 "specified file"
             self.detailedresults += traceback.format_exc()
             self.logger.log(LogPriority.DEBUG, self.detailedresults)
             return False
-        self.contents = []
-        for line in f:
-            self.contents.append(line)
-        f.close()
+###############################################################################
+
+    def getIndex(self):
+        '''
+        Private method that parses self.contents once into a dictionary of
+        key to the lines holding that key, in file order.  For openeq and
+        closedeq files each entry is a tuple of (line number, stripped
+        value), for space files (line number, list of fields).  Comments
+        and blank lines are not indexed.  The index is rebuilt on first use
+        after the contents or the config type change.
+        @return: dict
+        '''
+        if self.index is not None:
+            return self.index
+        index = {}
+        for lineno, line in enumerate(self.contents):
+            if line.startswith("#") or not line.strip():  # ignore if comment or blank line
+                continue
+            if self.configType == "space":
+                temp = line.split()
+                index.setdefault(temp[0], []).append((lineno, temp))
+            elif "=" in line:  # examine line if there is an = sign
+                temp = line.split("=")  # split line into key val list [key, val]
+                index.setdefault(temp[0].strip(), []).append((lineno,
+                                                              temp[1].strip()))
+        self.index = index
+        return index
+###############################################################################
+
+    def getKeyEntries(self, key):
+        '''
+        Private method to retrieve the index entries whose key matches key in
+        its entirety.  Keys are regular expressions, so a key containing
+        regex syntax is matched against every indexed key.
+        @param key: the key to look up
+        @return: list of index entries sorted by line number
+        '''
+        index = self.getIndex()
+        if not METACHARS.search(key):
+            return index.get(key, [])
+        entries = []
+        for indexed in index:
+            if re.match("^" + key + "$", indexed):
+                entries.extend(index[indexed])
+        entries.sort()
+        return entries
 ###############################################################################
 
     def getValue(self):
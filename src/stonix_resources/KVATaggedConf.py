@@ -26,6 +26,7 @@ Created on Jul 23, 2013
 @author: dwalker
 '''
 from logdispatcher import LogPriority
+from filecache import FILECACHE
 import traceback
 import re
 
@@ -59,6 +60,8 @@ class KVATaggedConf():
         self.path = path
         self.tmpPath = tmpPath
         self.contents = []
+        self.sections = {}
+        self.sectionindexes = {}
         self.intent = intent
         self.configType = configType
         self.logger = logger
@@ -94,76 +97,101 @@ class KVATaggedConf():
             return self.getSpaceValue(tag, dict1, "space")
         if self.configType == "spaceeq":
             return self.getSpaceEqValue(tag, dict1,)
+###############################################################################
+    def getSection(self, tag):
+        '''Return a tuple of whether tag was found and the lines of its
+        section.  Sections are remembered until the contents change.'''
+        if tag in self.sections:
+            return self.sections[tag]
+        contents = self.contents
+        foundtag = False
+        contents2 = []
+        iter1 = 0
+        for line in contents:
+            if re.search("^#", line) or re.match('^\s*$', line):
+                iter1 += 1
+            elif re.search("^\[" + tag + "\]", line.strip()):
+                foundtag = True
+                temp = contents[iter1 + 1:]
+                iter2 = 0
+                length = len(temp) - 1
+                for line2 in temp:
+                    if re.search("^#", line2) or re.match('^\s*$', line2):
+                        iter2 += 1
+                    elif re.search("^\[.*\]$", line2):
+                        contents2 = temp[:iter2]
+                        break
+                    elif iter2 == length:
+                        contents2 = temp[:iter2 + 1]
+                    else:
+                        iter2 += 1
+            else:
+                iter1 += 1
+        self.sections[tag] = (foundtag, contents2)
+        return self.sections[tag]
+###############################################################################
+    def getSectionIndex(self, tag):
+        '''Return a tuple of a dictionary of key to (position, value) entries
+        for the key = value lines in the section of tag, and the position of
+        the first line that does not split into exactly one key and value,
+        or None.'''
+        if tag in self.sectionindexes:
+            return self.sectionindexes[tag]
+        index = {}
+        invalid = None
+        for pos, line in enumerate(self.getSection(tag)[1]):
+            if re.search("^#", line) or re.match('^\s*$', line):
+                continue
+            elif re.search("=", line):
+                temp = line.strip().split("=")
+                if len(temp) != 2:
+                    if invalid is None:
+                        invalid = pos
+                    continue
+                index.setdefault(temp[0].strip(), []).append((pos,
+                                                             temp[1].strip()))
+        self.sectionindexes[tag] = (index, invalid)
+        return self.sectionindexes[tag]
 ###############################################################################
     def getOpenClosedValue(self, tag, dict1):
         if self.contents:
-            contents = self.contents
-            foundtag = False
-            length = len(contents) - 1
-            iter1 = 0
             missing = {}
             present = {}
-            for line in contents:
-                if re.search("^#", line) or re.match('^\s*$', line):
-                    iter1 += 1
-                elif re.search("^\[" + tag + "\]", line.strip()):
-                    foundtag = True
-                    temp = contents[iter1 + 1:]
-                    iter2 = 0
-                    length = len(temp) - 1
-                    for line2 in temp:
-                        if re.search("^#", line2) or re.match('^\s*$', line2):
-                            iter2 += 1
-                        elif re.search("^\[.*\]$", line2):
-                            contents2 = temp[:iter2]
-                            break
-                        elif iter2 == length:
-                            contents2 = temp[:iter2 + 1]
-                        else:
-                            iter2 += 1
-                else:
-                    iter1 += 1
+            foundtag, contents2 = self.getSection(tag)
             if not foundtag:
                 return dict1
             if contents2:
-                if self.intent == "present":
-                    for key in dict1:
-                        found = False
-                        for line in contents2:
-                            if re.search("^#", line) or re.match('^\s*$', line):
-                                continue
-                            elif re.search("=", line):
-                                temp = line.strip().split("=")
-                                if len(temp) != 2:
-                                    return "invalid"
-                                if re.match("^" + key + "$", temp[0].strip()):
-                                    if temp[1].strip() == dict1[key]:
-                                        found = True
-                                        continue
-                                    else:
-                                        found = False
-                                        break
-                        if not found:
+                index, invalid = self.getSectionIndex(tag)
+                if invalid is None:
+                    invalid = len(contents2)
+                for key in dict1:
+                    entries = []
+                    for indexed in index:
+                        if re.match("^" + key + "$", indexed):
+                            entries.extend(index[indexed])
+                    entries.sort()
+                    if self.intent == "present":
+                        # lines after the first wrong value are not examined
+                        stop = len(contents2)
+                        for pos, value in entries:
+                            if value != dict1[key]:
+                                stop = pos
+                                break
+                        if invalid < stop:
+                            return "invalid"
+                        if not entries or stop < len(contents2):
                             missing[key] = dict1[key]
+                    elif self.intent == "notpresent":
+                        stop = len(contents2)
+                        if entries:
+                            stop = entries[0][0]
+                        if invalid < stop:
+                            return "invalid"
+                        if entries:
+                            present[key] = dict1[key]
+                if self.intent == "present":
                     return missing
                 elif self.intent == "notpresent":
-                    for key in dict1:
-                        found = False
-                        for line in contents2:
-                            if re.search("^#", line) or re.match('^\s*$', line):
-                                continue
-                            elif re.search("=", line):
-                                temp = line.strip().split("=")
-                                if len(temp) != 2:
-                                    return "invalid"
-                                if re.search("^" + key + "$", temp[0].strip()):
-                                    found = True
-                                    break
-                                else:
-                                    found = False
-                                    continue
-                        if found:
-                            present[key] = dict1[key]
                     return present
         else:
             return dict1
@@ -242,6 +270,8 @@ class KVATaggedConf():
             return dict1
 ###############################################################################
     def setValue(self, fixables, removeables):
+        self.sections = {}
+        self.sectionindexes = {}
         if self.configType == "openeq":
             return self.setOpenClosedValue(fixables, removeables)
         if self.configType == "closedeq":
@@ -510,16 +540,15 @@ class KVATaggedConf():
         return True
 ###############################################################################
     def storeContents(self, path):
+        self.sections = {}
+        self.sectionindexes = {}
         try:
-            f = open(path, 'r')
+            self.contents.extend(FILECACHE.getlines(path))
         except IOError:
             self.detailedresults = "KVATaggedConf: unable to open the " \
             "specified file"
             self.detailedresults += traceback.format_exc()
             return False
-        for line in f:
-            self.contents.append(line)
-        f.close()
 ###############################################################################
     def checkConfigType(self):
         for item in self.contents:
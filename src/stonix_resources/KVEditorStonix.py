@@ -27,6 +27,8 @@ Created on Jun 12, 2013
 '''
 from KVEditor import KVEditor
 from logdispatcher import LogPriority
+from filecache import FILECACHE
+from filetransaction import TRANSACTION
 import os
 
 
@@ -49,7 +51,10 @@ class KVEditorStonix(KVEditor):
        those four actions in that order as many times as needed.
     4. Once all reports and fixes have been run, finally run the commit.
        Running the commit only once at the end ensure that only one statechange
-       event is recorded.'''
+       event is recorded.
+    5. While the FileTransaction is open (a full fix run) the commit of a file
+       shared by several rules (sshd_config) is staged in memory and written
+       together with the edits of the other rules when the run completes.'''
 
     '''If kvtype is defaults or plist, upon instantiation of the kveditorstonix
     object, id's will be created for each item in the data variable and passed
@@ -107,6 +112,13 @@ class KVEditorStonix(KVEditor):
                      'startstate': 'notconfigured',
                      'endstate': 'configured',
                      'filepath': self.path}
+            if self.kvtype in ("conf", "tagconf") and \
+               TRANSACTION.isstaging(self.path):
+                if self.getEventID():
+                    self.stchlgr.recordchgevent(self.getEventID(), event)
+                TRANSACTION.stage(self.path, self.tmpPath, self.stchlgr,
+                                  self.getEventID())
+                return True
             if self.getEventID():
                 self.stchlgr.recordchgevent(self.getEventID(), event)
                 self.stchlgr.recordfilechange(self.path, self.tmpPath, self.eid)
@@ -116,6 +128,8 @@ class KVEditorStonix(KVEditor):
                 self.detailedresults = "couldn't rename file"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 raise
+            finally:
+                FILECACHE.invalidate(self.path)
             return True
         else:
             return False
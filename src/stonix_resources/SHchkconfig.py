@@ -216,3 +216,32 @@ class SHchkconfig(object):
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHchkconfig.listservices' + str(svclist))
         return svclist
+
+    def statekey(self, service):
+        '''
+        Return the name chkconfig lists a service under.
+
+        @param string: Name of the service
+        @return: string
+        '''
+        return service
+
+    def getstates(self):
+        '''
+        Read the enabled state of all services with a single chkconfig --list.
+        xinetd services and services that are not listed are absent from the
+        enabled dict. Running state is not available in bulk.
+
+        @return: tuple of dicts (enabled, running), running is always None
+        '''
+        self.logdispatcher.log(LogPriority.DEBUG, 'SHchkconfig.getstates')
+        enabled = {}
+        chk = subprocess.Popen(self.cmd + '--list', stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=True,
+                               close_fds=True)
+        for line in chk.stdout.readlines():
+            fields = line.split()
+            if len(fields) < 2 or fields[0].endswith(':'):
+                continue
+            enabled[fields[0]] = ':on' in line
+        return enabled, None
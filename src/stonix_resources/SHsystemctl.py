@@ -30,6 +30,12 @@ import re
 import os
 from logdispatcher import LogPriority
 
+# Unit file states for which systemctl is-enabled exits with 0
+ENABLEDSTATES = ['enabled', 'enabled-runtime', 'static', 'indirect',
+                 'generated', 'transient', 'alias']
+UNITTYPES = ['.service', '.socket', '.target', '.timer', '.path', '.mount',
+             '.automount', '.swap', '.slice', '.scope', '.device']
+
 
 class SHsystemctl(object):
     '''
@@ -213,4 +219,58 @@ class SHsystemctl(object):
         svclist = [service for service in svclist if service not in metaentries]
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.listservices ' + str(svclist))
-        return svclist
\ No newline at end of file
+        return svclist
+
+    def statekey(self, service):
+        '''
+        Return the unit name systemctl uses for a service name, which is the
+        name with .service appended when it has no unit type suffix.
+
+        @param string: Name of the service
+        @return: string
+        '''
+        if os.path.splitext(service)[1] in UNITTYPES:
+            return service
+        return service + '.service'
+
+    def getstates(self):
+        '''
+        Read the enabled state of all service unit files and the running state
+        of all loaded service units with one systemctl call each. Units that
+        are not listed are absent from the returned dicts, and a dict is None
+        when systemctl could not produce it (no running systemd).
+
+        @return: tuple of dicts (enabled, running) keyed by unit name
+        '''
+        self.logdispatcher.log(LogPriority.DEBUG, 'SHsystemctl.getstates')
+        enabled = None
+        running = None
+        chk = subprocess.Popen(self.cmd + '--no-pager --no-legend ' +
+                               'list-unit-files --type=service',
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=True,
+                               close_fds=True)
+        lines = chk.stdout.readlines()
+        chk.stderr.read()
+        if chk.wait() == 0:
+            enabled = {}
+            for line in lines:
+                line = line.split()
+                if len(line) < 2:
+                    continue
+                enabled[line[0]] = line[1] in ENABLEDSTATES
+        chk = subprocess.Popen(self.cmd + '--no-pager --no-legend --plain ' +
+                               'list-units --type=service --all',
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=True,
+                               close_fds=True)
+        lines = chk.stdout.readlines()
+        chk.stderr.read()
+        if chk.wait() == 0:
+            running = {}
+            for line in lines:
+                line = line.split()
+                if len(line) < 4:
+                    continue
+                running[line[0]] = 'running' in line[3]
+        return enabled, running
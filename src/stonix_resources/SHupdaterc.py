@@ -207,4 +207,33 @@ class SHupdaterc(object):
         svclist = [service for service in svclist if service not in metafiles]
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHupdaterc.listservices ' + str(svclist))
-        return svclist
\ No newline at end of file
+        return svclist
+
+    def statekey(self, service):
+        '''
+        Return the name update-rc.d links a service under.
+
+        @param string: Name of the service
+        @return: string
+        '''
+        return service
+
+    def getstates(self):
+        '''
+        Read the start links of runlevels 2 to 5 once. Only services that have
+        a start link are present in the enabled dict, all other names are
+        left to auditservice. Running state is not available in bulk.
+
+        @return: tuple of dicts (enabled, running), running is always None
+        '''
+        self.logdispatcher.log(LogPriority.DEBUG, 'SHupdaterc.getstates')
+        enabled = {}
+        try:
+            for rcdir in ['/etc/rc2.d', '/etc/rc3.d', '/etc/rc4.d',
+                          '/etc/rc5.d']:
+                for entry in os.listdir(rcdir):
+                    if re.search('^S..', entry):
+                        enabled[entry[3:]] = True
+        except OSError:
+            return None, None
+        return enabled, None
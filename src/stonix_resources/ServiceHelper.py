@@ -28,6 +28,7 @@ Created on Aug 9, 2012
 @change: 2015/10/15 eball disableservice now checks audit and isrunning
 '''
 import os
+import threading
 import types
 import SHchkconfig
 import SHrcupdate
@@ -38,6 +39,25 @@ import SHrcconf
 import SHlaunchd
 from logdispatcher import LogPriority
 
+# Service states read in bulk by the service helpers that support it, keyed
+# by helper class name and shared by all ServiceHelper instances for the run.
+# enableservice and disableservice keep the entries current.
+STATES = {}
+STATELOCK = threading.RLock()
+
+
+def resetstates():
+    '''
+    Discard the service states read in bulk so they are read again on the
+    next audit. The Controller calls this before every audit, services may
+    have been changed outside stonix since the last one.
+    '''
+    STATELOCK.acquire()
+    try:
+        STATES.clear()
+    finally:
+        STATELOCK.release()
+
 
 class ServiceHelper(object):
     '''
@@ -321,8 +341,12 @@ class ServiceHelper(object):
                                             'Audit Successful (' + service + ')'])
                     chksecond = False
                     chksingle = self.svchelper.disableservice(self.getService())
+                    self.__setstate(self.svchelper, self.getService(),
+                                    chksingle, False)
                     if self.ishybrid:
                         chksecond = self.secondary.disableservice(self.getService())
+                        self.__setstate(self.secondary, self.getService(),
+                                        chksecond, False)
                     if chksingle or chksecond:
                         servicesuccess = True
                     else:
@@ -371,8 +395,12 @@ class ServiceHelper(object):
                     # print 'Audit returned False'
                     chksecond = False
                     chksingle = self.svchelper.enableservice(self.getService())
+                    self.__setstate(self.svchelper, self.getService(),
+                                    chksingle, True)
                     if self.ishybrid:
                         chksecond = self.secondary.enableservice(self.getService())
+                        self.__setstate(self.secondary, self.getService(),
+                                        chksecond, True)
                     if chksingle or chksecond:
                         servicesuccess = True
                     else:
@@ -424,11 +452,12 @@ class ServiceHelper(object):
                 self.logdispatcher.log(LogPriority.DEBUG,
                                '--auditing single parameter service ('
                                + service + ')')
-                chksingle = self.svchelper.auditservice(self.getService())
+                chksingle = self.__audit(self.svchelper, self.getService())
                 if self.ishybrid:
                     self.logdispatcher.log(LogPriority.DEBUG,
                                '--Service is a hybrid')
-                    chksecond = self.secondary.auditservice(self.getService())
+                    chksecond = self.__audit(self.secondary,
+                                             self.getService())
                 if chksingle or chksecond:
                     servicesuccess = True
                 else:
@@ -471,9 +500,10 @@ class ServiceHelper(object):
                 else:
                     servicesuccess = False
             else:
-                runpri = self.svchelper.isrunning(self.getService())
+                runpri = self.__isrunning(self.svchelper, self.getService())
                 if self.ishybrid:
-                    runsecond = self.secondary.isrunning(self.getService())
+                    runsecond = self.__isrunning(self.secondary,
+                                                 self.getService())
                 if runpri or runsecond:
                     servicesuccess = True
                 else:
@@ -545,12 +575,130 @@ class ServiceHelper(object):
         '''
         self.logdispatcher.log(LogPriority.DEBUG, '--START')
 
-        servicelist = self.svchelper.listservices()
+        servicelist = self.__listservices(self.svchelper)
         if self.ishybrid:
-            secondary = self.secondary.listservices()
+            secondary = self.__listservices(self.secondary)
             for svc in secondary:
                 servicelist.append(svc)
 
         self.logdispatcher.log(LogPriority.DEBUG,
                                '-- END = ' + str(servicelist))
         return servicelist
+
+    def resetstates(self):
+        '''
+        Discard the service states read in bulk so they are read again on the
+        next audit. Rules that change services without going through this
+        class must call this.
+        '''
+        resetstates()
+
+    def __getstates(self, helper):
+        '''
+        Return the service states of a service helper, reading them in bulk
+        on first use.
+
+        @param helper: SH* service helper object
+        @return: dict with 'enabled', 'running' and 'services' entries, or
+            None if the helper cannot read service states in bulk
+        '''
+        if not hasattr(helper, 'getstates'):
+            return None
+        name = helper.__class__.__name__
+        STATELOCK.acquire()
+        try:
+            if name not in STATES:
+                enabled, running = helper.getstates()
+                STATES[name] = {'enabled': enabled, 'running': running,
+                                'services': None}
+            return STATES[name]
+        finally:
+            STATELOCK.release()
+
+    def __getstate(self, helper, state, service):
+        '''
+        Look up the cached state of a service.
+
+        @param helper: SH* service helper object
+        @param state string: 'enabled' or 'running'
+        @param service string: Name of the service
+        @return: bool, or None if the state is not cached
+        '''
+        states = self.__getstates(helper)
+        if states is None or states[state] is None:
+            return None
+        return states[state].get(helper.statekey(service))
+
+    def __setstate(self, helper, service, success, enabled):
+        '''
+        Record the result of enabling or disabling a service. After a failure
+        the cached states of the service are dropped and read from the helper
+        on the next audit.
+
+        @param helper: SH* service helper object
+        @param service string: Name of the service
+        @param success bool: return value of the enable or disable call
+        @param enabled bool: True for enable, False for disable
+        '''
+        STATELOCK.acquire()
+        try:
+            states = STATES.get(helper.__class__.__name__)
+            if states is None:
+                return
+            key = helper.statekey(service)
+            for state in ['enabled', 'running']:
+                if states[state] is None:
+                    continue
+                if success and (state == 'enabled' or not enabled):
+                    states[state][key] = enabled
+                else:
+                    states[state].pop(key, None)
+        finally:
+            STATELOCK.release()
+
+    def __audit(self, helper, service):
+        '''
+        Audit a service from the cached states, asking the helper when the
+        service is not cached.
+
+        @param helper: SH* service helper object
+        @param service string: Name of the service
+        @return: bool, True if the service is configured to run
+        '''
+        enabled = self.__getstate(helper, 'enabled', service)
+        if enabled is None:
+            enabled = helper.auditservice(service)
+        return enabled
+
+    def __isrunning(self, helper, service):
+        '''
+        Check whether a service is running from the cached states, asking the
+        helper when the service is not cached.
+
+        @param helper: SH* service helper object
+        @param service string: Name of the service
+        @return: bool, True if the service is running
+        '''
+        running = self.__getstate(helper, 'running', service)
+        if running is None:
+            running = helper.isrunning(service)
+        return running
+
+    def __listservices(self, helper):
+        '''
+        List the services of a helper, once per run for helpers that read
+        service states in bulk.
+
+        @param helper: SH* service helper object
+        @return: list of strings
+        '''
+        states = self.__getstates(helper)
+        if states is None:
+            return helper.listservices()
+        STATELOCK.acquire()
+        try:
+            if states['services'] is None:
+                states['services'] = helper.listservices()
+            return list(states['services'])
+        finally:
+            STATELOCK.release()
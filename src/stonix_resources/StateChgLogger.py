@@ -29,18 +29,30 @@ Created on Aug 22, 2012
 prompt and wait issues during undo.
 @change: 2015/07/08 eball - Updated documentation for recordchgevent method
 @change: 2015/11/18 eball - Fixed recording of deletion event
+@change: 2026/10/18 Added recordfilediff for edits staged in memory
+@change: 2026/10/18 Moved the event log from shelve to an indexed SQLite
+    EventStore, with run ids and batched commits
+@change: 2026/10/18 Archive original files in a content addressed BlobStore
+    and generate diffs of large files with diff(1)
+@change: 2026/10/18 Added setundorun so that undo can target a single run
+@change: 2026/10/18 Restore the permissions and ownership of deleted files
 '''
-import shelve
 import shutil
 import os
+import stat
 import re
 import traceback
-import filecmp
 import time
 import difflib
 import weakref
 import subprocess
 from logdispatcher import LogPriority
+from eventstore import EventStore
+from blobstore import BlobStore
+
+# Files larger than this (in bytes) are diffed with diff(1) instead of being
+# read into memory for difflib
+DIFFSIZE = 4 * 1024 * 1024
 
 
 class StateChgLogger(object):
@@ -63,15 +75,35 @@ class StateChgLogger(object):
          The eventlog database. This file contains a record of change events.
          The change event record can be referenced to determine whether or not a
          change occured and/or the initial value of objects before the change
-         occured.
+         occured. Events recorded in an older shelve based event log are
+         imported when it is first opened.
 
         eventlog  (public)
 
-         This is the location where the original copies of config files are
-         stored in case they are needed by system admins.
+         Identifier of this run, recorded with every change event so that the
+         changes of one run can be told apart from those of earlier runs.
+
+        runid  (public)
+
+         Run whose changes are undone, see setundorun. None undoes the
+         changes of every run.
+
+        undorunid  (public)
+
+         This is the location where the original copies of config files were
+         stored by earlier versions. It is still searched when restoring a
+         deleted file that has no copy in the blob store.
 
         archive  (public)
 
+         Content addressed, compressed store of the original copies of config
+         files, in case they are needed by system admins or to restore a
+         deleted file. The event log holds the manifest of which copy belongs
+         to which file and event. Unreferenced copies are removed by
+         gcarchive.
+
+        blobs  (public)
+
          The logdispatcher object, available so that debug messages may be
          sent as appropriate.
 
@@ -85,17 +117,21 @@ class StateChgLogger(object):
         self.debug = self.environment.getdebugmode()
         self.diffdir = '/var/db/stonix/diffdir'
         self.archive = '/var/db/stonix/archive'
+        self.blobdir = '/var/db/stonix/blobs'
+        self.runid = time.strftime('%Y%m%d%H%M%S') + '.' + str(os.getpid())
+        self.undorunid = None
         self.privmode = True
         try:
             if not os.path.exists('/var/db/stonix') and \
                self.environment.geteuid() == 0:
                 os.makedirs('/var/db/stonix', 0700)
             if self.environment.geteuid() == 0:
-                self.eventlog = shelve.open('/var/db/stonix/eventlog', 'c',
-                                            None, True)
+                self.eventlog = EventStore('/var/db/stonix/eventlog.sqlite',
+                                           '/var/db/stonix/eventlog')
+                self.blobs = BlobStore(self.blobdir)
             else:
                 self.privmode = False
-            for node in [self.diffdir, self.archive]:
+            for node in [self.diffdir]:
                 if not os.path.exists(node) and self.environment.geteuid() == 0:
                     os.makedirs(node, 0700)
         except(OSError):
@@ -153,32 +189,118 @@ are an end user please report a bug.''')
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger',
                          "Recording changes in %s" % oldfile])
-        self.archivefile(oldfile)
+        self.archivefile(oldfile, eventid)
+        if os.path.getsize(oldfile) + os.path.getsize(newfile) > DIFFSIZE \
+           and os.path.exists('/usr/bin/diff'):
+            return self.writelargepatch(oldfile, newfile, eventid)
         oldfilehandle = open(oldfile, 'r')
         newfilehandle = open(newfile, 'r')
         oldfiledata = oldfilehandle.readlines()
         newfiledata = newfilehandle.readlines()
         oldfilehandle.close()
         newfilehandle.close()
+        self.writepatch(oldfile, oldfiledata, newfile, newfiledata, eventid)
+        return True
+
+    def recordfilediff(self, oldfile, oldfiledata, newfiledata, eventid):
+        """
+        Store the diff needed to undo a change to a file whose pre and post
+        change contents are held in memory, as done by a FileTransaction. The
+        caller is responsible for archiving the unaltered original file with
+        archivefile.
+
+        @param string oldfile : The canonical location for the file on disk.
+        @param list oldfiledata : The lines of the file pre-change.
+        @param list newfiledata : The lines of the file post-change.
+        @param string: eventid : The change event id associated with this file
+        change
+        @return  : Bool for success
+        """
+        if not self.privmode:
+            raise RuntimeError('''recordfilediff method called without privilege.
+If you are a rule developer you should guard against this. If you
+are an end user please report a bug.''')
+        if not oldfile or not eventid:
+            self.logger.log(LogPriority.ERROR,
+                            ['StateChgLogger',
+                             "recordfilediff called without filename or eventid"])
+            return False
+        if self.environment.geteuid() != 0:
+            self.logger.log(LogPriority.ERROR,
+                            ['StateChgLogger',
+                             "Can't handle " + oldfile + " running unprivileged"])
+            return False
+        self.writepatch(oldfile, oldfiledata, oldfile, newfiledata, eventid)
+        return True
+
+    def getpatchpath(self, oldfile, eventid):
+        """
+        Private method returning the path of the patch file of oldfile and
+        eventid, creating its directory if needed.
+
+        @param string oldfile : The canonical location for the file on disk.
+        @param string: eventid : The change event id
+        @return  : string
+        """
         path, filename = os.path.split(oldfile)
+        patchpath = self.diffdir + path
+        if not os.path.exists(patchpath):
+            os.makedirs(patchpath, 448)
+        return os.path.join(patchpath, filename) + ".patch-" + eventid
+
+    def writelargepatch(self, oldfile, newfile, eventid):
+        """
+        Private method to write the patch that turns newfile back into
+        oldfile with diff(1), which streams the files instead of holding
+        both in memory.
+
+        @param string oldfile : The canonical location for the file on disk.
+        @param string newfile : The path to the post-change file.
+        @param string: eventid : The change event id
+        @return  : Bool for success
+        """
+        patchdest = self.getpatchpath(oldfile, eventid)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger',
-                         "Finding patch path elements: " + path + ' ' + filename])
-        patchpath = self.diffdir + path
-        patchdest = os.path.join(patchpath, filename)
-        patchdest = patchdest + ".patch-" + eventid
+                         "Complete path to patchfile: %s" % patchdest])
+        patchhandle = open(patchdest, 'w')
+        try:
+            # diff exits 1 when the files differ
+            retcode = subprocess.call(['/usr/bin/diff', '-u', newfile,
+                                       oldfile], stdout=patchhandle,
+                                      close_fds=True)
+        finally:
+            patchhandle.close()
+        if retcode not in (0, 1):
+            self.logger.log(LogPriority.ERROR,
+                            ['StateChgLogger',
+                             "diff failed for %s" % oldfile])
+            return False
+        return True
+
+    def writepatch(self, oldfile, oldfiledata, newfile, newfiledata, eventid):
+        """
+        Private method to write the unified diff that turns newfiledata back
+        into oldfiledata to the patch file of oldfile and eventid.
+
+        @param string oldfile : The canonical location for the file on disk.
+        @param list oldfiledata : The lines of the file pre-change.
+        @param string newfile : Name of the post-change file for the diff
+        header.
+        @param list newfiledata : The lines of the file post-change.
+        @param string: eventid : The change event id
+        @return  : void
+        """
+        patchdest = self.getpatchpath(oldfile, eventid)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger',
                          "Complete path to patchfile: %s" % patchdest])
-        if not os.path.exists(patchpath):
-            os.makedirs(patchpath, 448)
         patchhandle = open(patchdest, 'w')
         for line in difflib.unified_diff(newfiledata, oldfiledata,
                                          fromfile=newfile,
                                          tofile=oldfile):
             patchhandle.write(line)
         patchhandle.close()
-        return True
 
     def revertfilechanges(self, filename, eventid):
         """
@@ -274,7 +396,7 @@ are an end user please report a bug.''')
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger',
                          "Recording deletion of %s" % filename])
-        self.archivefile(filename)
+        self.archivefile(filename, eventid)
         mytype = 'deletion'
         mydict = {'eventtype': mytype,
                   'filepath': filename}
@@ -298,6 +420,22 @@ are an end user please report a bug.''')
             raise RuntimeError('''revertfiledelete method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
+        info = self.eventlog.getarchiveinfo(filepath)
+        if info is not None and self.blobs.exists(info[0]):
+            digest, mode, uid, gid = info
+            self.logger.log(LogPriority.DEBUG,
+                            ['StateChgLogger.revertfiledelete',
+                             "Restoring " + filepath + " from " + digest])
+            try:
+                self.blobs.get(digest, filepath, mode, uid, gid)
+            except (IOError, OSError):
+                self.logger.log(LogPriority.ERROR,
+                                ['StateChgLogger.revertfiledelete',
+                                 "Problem reading file: " +
+                                 traceback.format_exc()])
+                return False
+            return True
+        # Copies archived by earlier versions
         path, filename = os.path.split(filepath)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.revertfiledelete',
@@ -312,6 +450,11 @@ are an end user please report a bug.''')
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.revertfiledelete',
                          "Recovery file: " + str(recoveryfile)])
+        if not os.path.isdir(recoverypath):
+            self.logger.log(LogPriority.ERROR,
+                            ['StateChgLogger.revertfiledelete',
+                             "No archived copy of " + filepath])
+            return False
         possibles1 = os.listdir(recoverypath)
         possibles2 = []
         hinum = None
@@ -390,8 +533,7 @@ are an end user please report a bug.''')
             raise RuntimeError('''recordfilechange method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
-        self.eventlog[eventcode] = eventdict
-        self.eventlog.sync()
+        self.eventlog.record(eventcode, eventdict, self.runid)
 
     def getchgevent(self, eventcode):
         """
@@ -408,7 +550,7 @@ are an end user please report a bug.''')
             raise RuntimeError('''recordfilechange method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
-        eventdict = self.eventlog[eventcode]
+        eventdict = self.eventlog.get(eventcode)
         return eventdict
 
     def closelog(self):
@@ -424,12 +566,14 @@ If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
         self.eventlog.close()
 
-    def archivefile(self, oldfile):
+    def archivefile(self, oldfile, eventid=None):
         """
-        Private method to archive a copy of a file into the file archive. This
-        is intended to be called by the recordfilechanges method.
+        Private method to archive a copy of a file into the blob store. This
+        is intended to be called by the recordfilechanges method. A copy with
+        the same content as one already archived only adds a manifest entry.
 
         @param string: oldfile - full path to the file to be archived
+        @param string: eventid - change event the copy is taken for
         @return: True unless an error was encountered
         @author: D. Kennel
         """
@@ -442,46 +586,52 @@ are an end user please report a bug.''')
                             ['StateChgLogger',
                              "archivefile called but no filename received"])
             return False
-        path, filename = os.path.split(oldfile)
-        self.logger.log(LogPriority.DEBUG,
-                        ['StateChgLogger',
-                         "Finding backup path elements: " + path + ' ' +
-                         filename])
-        backuppath = self.archive + path
-        backupdest = os.path.join(backuppath, filename)
-        backupdest = backupdest + ".ovf"
-        self.logger.log(LogPriority.DEBUG,
-                        ['StateChgLogger',
-                         "Complete backup path: %s" % backuppath])
-        if not os.path.exists(backuppath):
-            os.makedirs(backuppath, 448)
         if not os.path.exists(oldfile):
             self.logger.log(LogPriority.DEBUG,
                             ['StateChgLogger',
                              "Source file doesn't exist skipping backup."])
             return True
-        if not os.path.exists(backupdest):
-            self.logger.log(LogPriority.DEBUG,
-                            ['StateChgLogger',
-                             'Copying ' + oldfile + ' to ' + backupdest])
-            shutil.copy(oldfile, backupdest)
-        else:
-            if not filecmp.cmp(oldfile, backupdest):
-                backupdest = backupdest + str(time.time())
-                self.logger.log(LogPriority.DEBUG,
-                                ['StateChgLogger',
-                                 'Copying ' + oldfile + ' to ' + backupdest])
-                shutil.copy(oldfile, backupdest)
+        info = os.stat(oldfile)
+        digest = self.blobs.put(oldfile)
+        self.logger.log(LogPriority.DEBUG,
+                        ['StateChgLogger',
+                         'Archived ' + oldfile + ' as ' + digest])
+        self.eventlog.addarchive(oldfile, digest, eventid,
+                                 stat.S_IMODE(info.st_mode), info.st_uid,
+                                 info.st_gid)
         return True
 
-    def findrulechanges(self, ruleid):
+    def gcarchive(self):
+        """
+        Remove the archived copies of files that are no longer referenced by
+        the event log. The first and the newest copy of every file are always
+        kept.
+
+        @return: tuple of (number of copies removed, bytes freed)
+        """
+        if not self.privmode:
+            raise RuntimeError('''gcarchive method called without privilege.
+If you are a rule developer you should guard against this. If you
+are an end user please report a bug.''')
+        referenced = self.eventlog.prunearchive()
+        removed, freed = self.blobs.gc(referenced)
+        self.logger.log(LogPriority.DEBUG,
+                        ['StateChgLogger.gcarchive',
+                         "Removed %d archived copies, %d bytes" %
+                         (removed, freed)])
+        return removed, freed
+
+    def findrulechanges(self, ruleid, runid=None):
         '''Public method that when called will search for all state change
         events known to the state change logger for the identified rule.
         Requires a rule id either formatted as a 4 digit zero padded string or
         as an integer. The return will be a list of strings that are full event
-        identifiers. Missing or invalid rule ids will result in a TypeError.
+        identifiers, in the order they were recorded. Missing or invalid rule
+        ids will result in a TypeError.
 
         @param string|int: ruleid number
+        @param string: runid - only return the events of this run (see
+            getruns), defaults to the run selected with setundorun
         @return: list of strings - eventids
         @author: D. Kennel
         '''
@@ -490,7 +640,6 @@ are an end user please report a bug.''')
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
         myruleid = ''
-        eventlist = []
         if not ruleid:
             raise TypeError('Null Rule ID')
         if type(ruleid) == int:
@@ -502,23 +651,69 @@ are an end user please report a bug.''')
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.findrulechanges',
                          "Searching for: %s" % ruleid])
-        for key in self.eventlog:
-            try:
-                keyruleid = key[0:4]
-                self.logger.log(LogPriority.DEBUG,
-                                ['StateChgLogger.findrulechanges',
-                                 "Comparing to keyruleid: %s" % keyruleid])
-                if keyruleid == myruleid:
-                    eventlist.append(key)
-            except(IndexError):
-                self.logger.log(LogPriority.ERROR,
-                                ['StateChgLogger.findrulechanges',
-                                 'Bad key detected in eventlog: ' + key])
+        if runid is None:
+            runid = self.undorunid
+        eventlist = self.eventlog.findrule(myruleid, runid)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.findrulechanges',
                          "returning eventlist: %s" % eventlist])
         return eventlist
 
+    def getrunid(self):
+        '''Return the id of this run, which is recorded with every change
+        event.
+
+        @return: string
+        '''
+        return self.runid
+
+    def getruns(self):
+        '''Public method returning the ids of the runs that recorded the
+        change events still in the event log, oldest first. Events imported
+        from a shelve event log belong to the run "migrated".
+
+        @return: list of strings - run ids
+        '''
+        if not self.privmode:
+            raise RuntimeError('''getruns method called without privilege.
+If you are a rule developer you should guard against this. If you
+are an end user please report a bug.''')
+        return self.eventlog.getruns()
+
+    def setundorun(self, runid):
+        '''Public method to restrict the changes found by findrulechanges,
+        and thus undone by the rules, to those of one run. The keyword "last"
+        selects the newest run that recorded changes. None selects every run
+        again.
+
+        @param string: runid - a run id returned by getruns, "last" or None
+        @return: string - the selected run id, None for every run
+        @raise ValueError: if no run with that id recorded changes
+        '''
+        if runid is not None:
+            runs = self.getruns()
+            if runid == 'last' and runs:
+                runid = runs[-1]
+            if runid not in runs:
+                raise ValueError('No changes recorded for run ' + str(runid))
+        self.undorunid = runid
+        return runid
+
+    def beginbatch(self):
+        '''Public method to group the change events recorded or deleted until
+        the matching endbatch into one commit of the event log. The Controller
+        opens a batch around each rule's fix.
+        '''
+        if self.privmode:
+            self.eventlog.beginbatch()
+
+    def endbatch(self):
+        '''Public method to end a batch opened by beginbatch and commit its
+        change events.
+        '''
+        if self.privmode:
+            self.eventlog.endbatch()
+
     def deleteentry(self, eventid):
         '''Public method to delete records from the event log. This is required
         for rules that have sections that make N+1 number of changes. We only
@@ -541,10 +736,7 @@ are an end user please report a bug.''')
         if not eventid or not type(eventid) == str:
             raise TypeError('Null eventid or wrong type')
         try:
-            del self.eventlog[eventid]
-        except(KeyError):
-            # key was not found in the event log
-            return True
+            self.eventlog.delete(eventid)
         except Exception:
             self.logger.log(LogPriority.ERROR,
                             ['StateChgLogger.deleteentry',
@@ -0,0 +1,299 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Password aging policy for the local accounts of a shadow file. The passwd
+and shadow files are read once, the aging fields of every account checked
+in memory and all the changes needed written back with a single rewrite of
+the shadow file, made while holding the password database lock like
+lckpwdf(3) does. Accounts whose shadow entry cannot be parsed are left to
+chage, one account at a time.
+'''
+import errno
+import fcntl
+import os
+import re
+import time
+from filecache import FILECACHE
+from sysquery import getuid
+from stonixutilityfunctions import resetsecon
+
+# Accounts below this uid belong to the system
+MINUID = 500
+# Password fields of accounts that cannot log in with a password
+LOCKEDPASSWORDS = '^\*LK\*|^!|^\*|^x$'
+# Seconds to wait for the password database lock, like lckpwdf(3)
+LOCKTIMEOUT = 15
+SHADOWFIELDS = 9
+
+
+class AccountPolicy(object):
+    '''
+    Password aging settings enforced on the shadow file: at least mindays
+    between changes, at most maxdays before a change is required, warndays
+    of warning and at most inactive days to change an expired password.
+    Accounts out of policy get these values and their last change set to
+    today, as chage -d today would.
+    '''
+
+    def __init__(self, shadowpath='/etc/shadow', passwdpath='/etc/passwd',
+                 minuid=MINUID, lockedpwds=LOCKEDPASSWORDS, mindays=7,
+                 maxdays=180, warndays=28, inactive=7):
+        '''
+        @param shadowpath: string - path of the shadow file
+        @param passwdpath: string - path of the passwd file giving the uids
+        @param minuid: int - accounts with a lower uid are not checked
+        @param lockedpwds: string - regex matching locked password fields,
+            whose accounts are not checked
+        @param mindays: int - minimum days between password changes
+        @param maxdays: int - maximum days a password is valid
+        @param warndays: int - days of warning before a password expires
+        @param inactive: int - days after expiry the account stays usable
+        '''
+        self.shadowpath = shadowpath
+        self.passwdpath = passwdpath
+        self.lockpath = os.path.join(os.path.dirname(shadowpath), '.pwd.lock')
+        self.minuid = minuid
+        self.lockedpwds = lockedpwds
+        self.mindays = mindays
+        self.maxdays = maxdays
+        self.warndays = warndays
+        self.inactive = inactive
+
+    def getuids(self):
+        '''
+        Return the uids of the accounts of the passwd file.
+
+        @return: dict of user name: uid
+        '''
+        uids = {}
+        for fields in FILECACHE.getpasswd(self.passwdpath):
+            if fields[2].isdigit():
+                uids.setdefault(fields[0], int(fields[2]))
+        return uids
+
+    def ischecked(self, fields, uids):
+        '''
+        Return whether the policy applies to a shadow entry: the account is
+        not a system account and its password is not locked.
+
+        @param fields: list - fields of the shadow entry, at least two
+        @param uids: dict - as returned by getuids
+        @return: bool
+        '''
+        uid = uids.get(fields[0])
+        if uid is None:
+            uid = getuid(fields[0])
+        if uid is None or uid < self.minuid:
+            return False
+        return not re.search(self.lockedpwds, fields[1])
+
+    def check(self, fields):
+        '''
+        Return how a shadow entry breaks the policy. Missing or non numeric
+        values count as 0, except the inactive period which counts as
+        unlimited.
+
+        @param fields: list - the nine fields of a shadow entry
+        @return: list of strings, empty if the entry is compliant
+        '''
+        values = []
+        for index in [3, 4, 5, 6]:
+            if fields[index].isdigit():
+                values.append(int(fields[index]))
+            elif index == 6:
+                values.append(None)
+            else:
+                values.append(0)
+        mindays, maxdays, warndays, inactive = values
+        problems = []
+        if mindays < self.mindays:
+            problems.append("minimum password age is less than " +
+                            str(self.mindays) + " days")
+        if maxdays > self.maxdays:
+            problems.append("maximum password age is more than " +
+                            str(self.maxdays) + " days")
+        if warndays < self.warndays:
+            problems.append("password warning is less than " +
+                            str(self.warndays) + " days")
+        if inactive is None or inactive > self.inactive:
+            problems.append("account lock is more than " +
+                            str(self.inactive) + " days after expiry")
+        return problems
+
+    def getnoncompliant(self):
+        '''
+        Check every account of the shadow file.
+
+        @return: list of (user name, list of problems) for the accounts out
+            of policy, in file order
+        '''
+        uids = self.getuids()
+        noncompliant = []
+        for line in FILECACHE.readlines(self.shadowpath):
+            if re.search("^\#", line) or ':' not in line:
+                continue
+            fields = line.rstrip('\n').split(':')
+            if not self.ischecked(fields, uids):
+                continue
+            if len(fields) != SHADOWFIELDS:
+                noncompliant.append((fields[0], ["malformed shadow entry"]))
+                continue
+            problems = self.check(fields)
+            if problems:
+                noncompliant.append((fields[0], problems))
+        return noncompliant
+
+    def getfixedlines(self, lines, today):
+        '''
+        Return the lines of a shadow file with the accounts out of policy
+        brought into it.
+
+        @param lines: list - lines of the shadow file
+        @param today: int - days since the epoch, the new last change date
+        @return: tuple (new lines, users changed, users whose entry could
+            not be parsed)
+        '''
+        uids = self.getuids()
+        newlines = []
+        changed = []
+        malformed = []
+        for line in lines:
+            if re.search("^\#", line) or ':' not in line:
+                newlines.append(line)
+                continue
+            fields = line.rstrip('\n').split(':')
+            if not self.ischecked(fields, uids):
+                newlines.append(line)
+            elif len(fields) != SHADOWFIELDS:
+                malformed.append(fields[0])
+                newlines.append(line)
+            elif not self.check(fields):
+                newlines.append(line)
+            else:
+                fields[2:7] = [str(today), str(self.mindays),
+                               str(self.maxdays), str(self.warndays),
+                               str(self.inactive)]
+                newlines.append(':'.join(fields) + '\n')
+                changed.append(fields[0])
+        return newlines, changed, malformed
+
+    def lock(self):
+        '''
+        Take the password database lock, the lock lckpwdf(3) takes, so that
+        passwd, chage and useradd do not change the shadow file meanwhile.
+
+        @return: int - descriptor to give to unlock
+        @raise IOError: if the lock is not obtained within LOCKTIMEOUT
+        '''
+        fd = os.open(self.lockpath, os.O_WRONLY | os.O_CREAT, 0600)
+        deadline = time.time() + LOCKTIMEOUT
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except IOError, err:
+                if err.errno not in [errno.EACCES, errno.EAGAIN] or \
+                   time.time() > deadline:
+                    os.close(fd)
+                    raise
+            time.sleep(0.1)
+
+    def unlock(self, fd):
+        '''
+        Release the password database lock.
+
+        @param fd: int - as returned by lock
+        '''
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def apply(self, stchlgr=None, eventid=''):
+        '''
+        Bring every account into policy with a single rewrite of the shadow
+        file. The file is read again under the lock, so changes made since
+        the report are kept. The new file replaces the old one with a rename
+        and keeps its owner and mode.
+
+        @param stchlgr: StateChgLogger - records the change for undo
+        @param eventid: string - change event id, required with stchlgr
+        @return: tuple (users changed, users left to applyeach)
+        @raise IOError: if the shadow file cannot be locked, read or written
+        @raise OSError: likewise
+        '''
+        fd = self.lock()
+        try:
+            FILECACHE.invalidate(self.shadowpath)
+            lines = FILECACHE.getlines(self.shadowpath)
+            today = int(time.time() / 86400)
+            newlines, changed, malformed = self.getfixedlines(lines, today)
+            if not changed:
+                return changed, malformed
+            if stchlgr is not None:
+                stchlgr.recordchgevent(eventid, {'eventtype': 'conf',
+                                                 'filepath': self.shadowpath})
+                stchlgr.archivefile(self.shadowpath, eventid)
+                stchlgr.recordfilediff(self.shadowpath, lines, newlines,
+                                       eventid)
+            st = os.stat(self.shadowpath)
+            tmppath = self.shadowpath + '.stonixtmp'
+            handle = os.fdopen(os.open(tmppath, os.O_WRONLY | os.O_CREAT |
+                                       os.O_TRUNC, 0600), 'w')
+            try:
+                handle.writelines(newlines)
+                handle.flush()
+                os.fsync(handle.fileno())
+            finally:
+                handle.close()
+            os.chown(tmppath, st.st_uid, st.st_gid)
+            os.chmod(tmppath, st.st_mode & 07777)
+            os.rename(tmppath, self.shadowpath)
+            resetsecon(self.shadowpath)
+            FILECACHE.invalidate(self.shadowpath)
+            return changed, malformed
+        finally:
+            self.unlock(fd)
+
+    def applyeach(self, users, commandhelper):
+        '''
+        Bring accounts into policy one at a time with chage.
+
+        @param users: list of user names
+        @param commandhelper: CommandHelper to run chage with
+        @return: list of the users chage failed for
+        '''
+        date = time.strftime("%Y-%m-%d")
+        failed = []
+        for user in users:
+            cmd = ["chage", "-d", date, "-m", str(self.mindays),
+                   "-M", str(self.maxdays), "-W", str(self.warndays),
+                   "-I", str(self.inactive), user]
+            if not commandhelper.executeCommand(cmd) or \
+               commandhelper.getReturnCode() != 0:
+                failed.append(user)
+        FILECACHE.invalidate(self.shadowpath)
+        return failed
@@ -26,6 +26,7 @@ from re import search
 import traceback
 from logdispatcher import LogPriority
 from CommandHelper import CommandHelper
+from pkgfiles import dpkgfileowners, dpkginstalled
 
 
 class AptGet(object):
@@ -144,6 +145,22 @@ class AptGet(object):
             raise(self.detailedresults)
 ###############################################################################
 
+    def getInstalledPackages(self):
+        '''Returns the names of all installed packages, read with a single
+        dpkg-query call.
+
+        @return: set of package names or None if the query failed
+        '''
+        try:
+            return dpkginstalled(self.ch)
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+
     def checkAvailable(self, package):
         try:
             found = False
@@ -200,6 +217,27 @@ misspelled"
             raise(self.detailedresults)
 ###############################################################################
 
+    def getPackagesFromFiles(self, filenames):
+        '''Returns the names of the packages that provide the given
+        filenames/paths, using one dpkg query per batch of files.
+
+        @param: list filenames : The names or paths of the files to resolve
+        @return: dict of filename: name of package if found, None otherwise
+        '''
+        try:
+            owners = dpkgfileowners(self.ch, filenames)
+            packages = {}
+            for filename in filenames:
+                packages[filename] = owners.get(filename)
+            return packages
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+
     def getInstall(self):
         return self.install
 ###############################################################################
@@ -0,0 +1,191 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Content addressed store for the original copies of files archived by the
+StateChgLogger. Every blob is named after the SHA-256 digest of the file it
+holds and stored gzip compressed, so archiving a file whose content was seen
+before costs nothing. Which blob belongs to which file and change event is
+recorded in the manifest kept by the EventStore; blobs the manifest no longer
+references are removed by gc.
+'''
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Read size used when hashing, compressing and restoring files
+CHUNKSIZE = 65536
+
+
+class BlobStore(object):
+    '''
+    Compressed file contents keyed on their SHA-256 digest. Blobs live in
+    root/<first two digest characters>/<digest>.gz.
+    '''
+
+    def __init__(self, root):
+        '''
+        @param root: string - directory of the store, created if missing
+        '''
+        self.root = root
+        if not os.path.exists(root):
+            os.makedirs(root, 0700)
+
+    def getpath(self, digest):
+        '''
+        Return the path of the blob of a digest.
+
+        @param digest: string - SHA-256 hex digest
+        @return: string
+        '''
+        return os.path.join(self.root, digest[0:2], digest + '.gz')
+
+    def put(self, path):
+        '''
+        Store the contents of a file, unless a blob with the same content is
+        already present. The file is read once, hashing and compressing it
+        in the same pass.
+
+        @param path: string - file to store
+        @return: string - SHA-256 hex digest naming the blob
+        @raise IOError: if the file cannot be read
+        '''
+        digest = hashlib.sha256()
+        fd, tmppath = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            tmpfile = os.fdopen(fd, 'wb')
+            compressed = gzip.GzipFile(fileobj=tmpfile, mode='wb')
+            source = open(path, 'rb')
+            try:
+                chunk = source.read(CHUNKSIZE)
+                while chunk:
+                    digest.update(chunk)
+                    compressed.write(chunk)
+                    chunk = source.read(CHUNKSIZE)
+            finally:
+                source.close()
+                compressed.close()
+                tmpfile.close()
+            hexdigest = digest.hexdigest()
+            blobpath = self.getpath(hexdigest)
+            if os.path.exists(blobpath):
+                os.remove(tmppath)
+            else:
+                if not os.path.exists(os.path.dirname(blobpath)):
+                    os.makedirs(os.path.dirname(blobpath), 0700)
+                os.rename(tmppath, blobpath)
+            return hexdigest
+        except Exception:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            raise
+
+    def exists(self, digest):
+        '''
+        Return whether the blob of a digest is present.
+
+        @param digest: string - SHA-256 hex digest
+        @return: bool
+        '''
+        return os.path.exists(self.getpath(digest))
+
+    def get(self, digest, dest, mode=None, uid=None, gid=None):
+        '''
+        Write the contents of a blob to a file.
+
+        @param digest: string - SHA-256 hex digest
+        @param dest: string - file to write
+        @param mode: int - permission bits given to dest before any content
+            is written, by default a new file gets the umask default
+        @param uid: int - owner given to dest along with mode
+        @param gid: int - group given to dest along with mode
+        @raise IOError: if the blob is missing or dest cannot be written
+        '''
+        compressed = gzip.open(self.getpath(digest), 'rb')
+        try:
+            if mode is None and uid is None:
+                target = open(dest, 'wb')
+            else:
+                perms = 0666
+                if mode is not None:
+                    perms = mode & 0777
+                try:
+                    fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                                 perms)
+                    try:
+                        # Changing the owner clears the set-user-ID and
+                        # set-group-ID bits, so it has to come first
+                        if uid is not None:
+                            os.fchown(fd, uid, gid)
+                        if mode is not None:
+                            os.fchmod(fd, mode)
+                    except OSError:
+                        os.close(fd)
+                        raise
+                except OSError, err:
+                    raise IOError(err.errno, err.strerror, dest)
+                target = os.fdopen(fd, 'wb')
+            try:
+                shutil.copyfileobj(compressed, target, CHUNKSIZE)
+            finally:
+                target.close()
+        finally:
+            compressed.close()
+
+    def digests(self):
+        '''
+        Return the digests of all blobs in the store.
+
+        @return: list of strings
+        '''
+        found = []
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith('.gz'):
+                    found.append(name[:-3])
+        return found
+
+    def gc(self, referenced):
+        '''
+        Remove every blob whose digest is not in referenced.
+
+        @param referenced: set of digests to keep
+        @return: tuple of (number of blobs removed, bytes freed)
+        '''
+        removed = 0
+        freed = 0
+        for digest in self.digests():
+            if digest in referenced:
+                continue
+            blobpath = self.getpath(digest)
+            freed += os.path.getsize(blobpath)
+            os.remove(blobpath)
+            removed += 1
+        return removed, freed
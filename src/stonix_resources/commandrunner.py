@@ -0,0 +1,175 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Execution layer used by CommandHelper. runcommand drains the output pipes of
+a command concurrently, so a command that fills its stderr pipe cannot
+block, enforces an optional timeout and can hand every output line to a
+callback instead of keeping it. runmany runs a batch of independent commands
+on a bounded pool of worker threads.
+'''
+import os
+import signal
+import subprocess
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+# Seconds to wait for the output readers after a timed out command has been
+# killed. Children that left the process group may keep the pipes open
+# indefinitely.
+DRAINWAIT = 5
+WORKERS = 4
+
+
+class CommandResult(object):
+    '''
+    Return code and output of one command run by runcommand.
+
+    @ivar command: the command as it was run
+    @ivar returncode: int, None if the command was not waited for
+    @ivar stdout: list of lines, empty if the output was not kept
+    @ivar stderr: list of lines, empty if the output was not kept
+    @ivar timedout: bool, True if the command was killed by the timeout
+    '''
+
+    def __init__(self, command):
+        self.command = command
+        self.returncode = None
+        self.stdout = []
+        self.stderr = []
+        self.timedout = False
+
+
+def drain(pipe, lines, callback):
+    '''
+    Read a pipe line by line until it is closed.
+
+    @param pipe: file object to read
+    @param lines: list to append the lines to, None to discard them
+    @param callback: function called with every line, may be None
+    '''
+    try:
+        for line in iter(pipe.readline, ''):
+            if callback is not None:
+                callback(line)
+            if lines is not None:
+                lines.append(line)
+    finally:
+        pipe.close()
+
+
+def runcommand(command, shell=False, timeout=None, wait=True,
+               stdoutcallback=None, stderrcallback=None, keepoutput=True):
+    '''
+    Run a command, reading stdout and stderr at the same time.
+
+    @param command: list of arguments, or string if shell is True
+    @param shell: bool, run the command through the shell
+    @param timeout: seconds after which the command and its process group
+        are killed, None to wait indefinitely
+    @param wait: bool, reap the command and record its return code
+    @param stdoutcallback: function called with every stdout line
+    @param stderrcallback: function called with every stderr line
+    @param keepoutput: bool, keep the output lines in the result
+    @return: CommandResult
+    '''
+    result = CommandResult(command)
+    preexec = None
+    if timeout is not None:
+        # Own process group so the timeout also reaches the children of a
+        # shell command
+        preexec = os.setsid
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, shell=shell,
+                            preexec_fn=preexec)
+
+    def kill():
+        result.timedout = True
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, kill)
+        timer.daemon = True
+        timer.start()
+    if keepoutput:
+        outlines, errlines = result.stdout, result.stderr
+    else:
+        outlines, errlines = None, None
+    # Both pipes are drained by helper threads so that a timed out command
+    # whose pipes are held open by an escaped child cannot block this thread
+    readers = []
+    for pipe, lines, callback in ((proc.stdout, outlines, stdoutcallback),
+                                  (proc.stderr, errlines, stderrcallback)):
+        reader = threading.Thread(target=drain, args=(pipe, lines, callback))
+        reader.daemon = True
+        readers.append(reader)
+    try:
+        for reader in readers:
+            reader.start()
+        # join() without a timeout cannot be interrupted on Python 2
+        for reader in readers:
+            while reader.is_alive() and not result.timedout:
+                reader.join(1)
+        if result.timedout:
+            deadline = time.time() + DRAINWAIT
+            for reader in readers:
+                reader.join(max(0, deadline - time.time()))
+        if wait:
+            proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+            timer.join()
+    result.returncode = proc.returncode
+    return result
+
+
+def runmany(commands, workers=WORKERS, timeout=None):
+    '''
+    Run independent commands on a pool of worker threads. String commands
+    are run through the shell, lists are run directly.
+
+    @param commands: list of commands
+    @param workers: int, number of commands run at the same time
+    @param timeout: per command timeout in seconds, None for no timeout
+    @return: list of CommandResult in the order of commands
+    '''
+    def run(command):
+        return runcommand(command, isinstance(command, str), timeout)
+
+    if len(commands) == 0:
+        return []
+    pool = ThreadPool(min(workers, len(commands)))
+    try:
+        # map_async().get() with a timeout stays interruptible on Python 2
+        return pool.map_async(run, commands).get(1e9)
+    finally:
+        pool.close()
+        pool.join()
@@ -39,17 +39,24 @@ Created on Aug 24, 2010
 
 @author: dkennel
 @change: 2014/05/29 - ekkehard j. koch - pep8 and comment updates
+@change: 2026/10/18 OS, network and hardware facts are collected when first
+    used, hardware and OS facts are cached on disk between runs
 '''
+import fcntl
 import os
 import re
 import sys
 import socket
+import struct
 import subprocess
+import threading
 import types
 import platform
 import pwd
 import time
 from localize import CORPORATENETWORKSERVERS, STONIXVERSION
+from filecache import FILECACHE
+from factcache import FactCache
 if os.geteuid() == 0:
     try:
         import dmidecode
@@ -59,6 +66,26 @@ if os.geteuid() == 0:
 else:
     DMI = False
 
+# Attributes computed on first access and the method that sets them
+LAZYFACTS = {'operatingsystem': 'discoveros',
+             'osreportstring': 'discoveros',
+             'osversion': 'discoveros',
+             'hostname': 'guessnetwork',
+             'ipaddress': 'guessnetwork',
+             'macaddress': 'guessnetwork'}
+# Files the OS type and version are read from. The cached OS facts are
+# dropped when one of them changes.
+OSRELEASEFILES = ['/etc/lsb-release', '/etc/os-release',
+                  '/etc/redhat-release', '/etc/gentoo-release',
+                  '/etc/debian_version',
+                  '/System/Library/CoreServices/SystemVersion.plist']
+# SMBIOS data exported by the Linux kernel
+DMIPATH = '/sys/class/dmi/id'
+# SMBIOS chassis types of portable systems
+MOBILECHASSIS = [8, 9, 10, 11, 14]
+SYSNETPATH = '/sys/class/net'
+SIOCGIFADDR = 0x8915
+
 
 class Environment:
 
@@ -70,13 +97,9 @@ class Environment:
     """
 
     def __init__(self):
-        self.operatingsystem = ''
-        self.osreportstring = ''
+        # operatingsystem, osreportstring, osversion, hostname, ipaddress
+        # and macaddress are set on first access, see __getattr__.
         self.osfamily = ''
-        self.hostname = ''
-        self.ipaddress = ''
-        self.macaddress = ''
-        self.osversion = ''
         self.numrules = 0
         self.stonixversion = STONIXVERSION
         self.euid = os.geteuid()
@@ -89,8 +112,29 @@ class Environment:
         self.verbosemode = False
         self.debugmode = False
         self.runtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        self.factlock = threading.RLock()
+        self.profile = None
         self.collectinfo()
 
+    def __getattr__(self, name):
+        """
+        Compute the facts in LAZYFACTS the first time they are asked for.
+        Only called for attributes that are not set yet.
+
+        @param name: string - attribute name
+        @return: value of the attribute
+        """
+        loader = LAZYFACTS.get(name)
+        if loader is None:
+            raise AttributeError(name)
+        self.factlock.acquire()
+        try:
+            if name not in self.__dict__:
+                getattr(self, loader)()
+        finally:
+            self.factlock.release()
+        return self.__dict__[name]
+
     def setinstallmode(self, installmode):
         """
         Set the install mode bool value. Should be true if the prog should run
@@ -260,18 +304,90 @@ class Environment:
 
     def collectinfo(self):
         """
-        Private method to populate data.
+        Private method to populate data. The OS and network facts are
+        collected when first used.
 
         @return: void
         @author D. Kennel
         """
-        # print 'Environment Running discoveros'
-        self.discoveros()
         # print 'Environment running setosfamily'
         self.setosfamily()
-        # print 'Environment running guessnetwork'
-        self.guessnetwork()
         self.collectpaths()
+        if self.euid == 0:
+            factpath = '/var/db/stonix/facts.json'
+        else:
+            factpath = os.path.join(self.log_path, 'facts.json')
+        self.facts = FactCache(factpath)
+
+    def __getfact(self, name, probe, stamp=None):
+        """
+        Return a fact from the fact cache, calling probe to compute and cache
+        it if it is missing or stale.
+
+        @param name: string - name of the fact
+        @param probe: function returning the value of the fact
+        @param stamp: list - stamp the cached value must match
+        @return: value of the fact
+        """
+        self.factlock.acquire()
+        try:
+            try:
+                return self.facts.get(name, stamp)
+            except KeyError:
+                value = probe()
+                self.facts.set(name, value, stamp)
+                return value
+        finally:
+            self.factlock.release()
+
+    def __getstamp(self, paths):
+        """
+        Return the modification times of a list of files, None for those
+        that do not exist, for use as a fact cache stamp.
+
+        @param paths: list of strings
+        @return: list
+        """
+        stamp = []
+        for path in paths:
+            try:
+                stamp.append(int(os.stat(path).st_mtime))
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def __readdmi(self, name):
+        """
+        Return an SMBIOS field from sysfs, or None if the field is missing,
+        empty or not readable by this user.
+
+        @param name: string - file name under /sys/class/dmi/id
+        @return: string
+        """
+        try:
+            handle = open(os.path.join(DMIPATH, name))
+            try:
+                value = handle.read().strip()
+            finally:
+                handle.close()
+        except (IOError, OSError):
+            return None
+        return value or None
+
+    def __hardwareprofile(self):
+        """
+        Return the output of system_profiler SPHardwareDataType, running it
+        at most once.
+
+        @return: list of strings
+        """
+        if self.profile is None:
+            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
+            cmd3 = subprocess.Popen(profilerfetch, shell=True,
+                                    stdout=subprocess.PIPE,
+                                    close_fds=True)
+            self.profile = cmd3.stdout.readlines()
+        return self.profile
 
     def discoveros(self):
         """
@@ -279,6 +395,23 @@ class Environment:
         @return : void
         @author: D. Kennel
         """
+        self.factlock.acquire()
+        try:
+            facts = self.__getfact('os', self.__probeos,
+                                   self.__getstamp(OSRELEASEFILES))
+            self.operatingsystem, self.osreportstring, self.osversion = facts
+        finally:
+            self.factlock.release()
+
+    def __probeos(self):
+        """
+        Read the operating system type and version from the system.
+
+        @return: list - [operatingsystem, osreportstring, osversion]
+        """
+        self.operatingsystem = ''
+        self.osreportstring = ''
+        self.osversion = ''
         # Alternative (better) implementation for Linux
         if os.path.exists('/usr/bin/lsb_release'):
             proc = subprocess.Popen('/usr/bin/lsb_release -dr',
@@ -337,6 +470,18 @@ class Environment:
                 else:
                     index = index + 1
             self.osversion = osver
+        elif os.path.exists('/etc/os-release'):
+            osrelease = {}
+            relfile = open('/etc/os-release')
+            for line in relfile:
+                key, sep, value = line.strip().partition('=')
+                if sep:
+                    osrelease[key] = value.strip('"\'')
+            relfile.close()
+            self.operatingsystem = osrelease.get('NAME', '')
+            self.osreportstring = osrelease.get('PRETTY_NAME',
+                                                self.operatingsystem)
+            self.osversion = osrelease.get('VERSION_ID', '')
         elif os.path.exists('/usr/bin/sw_vers'):
             proc1 = subprocess.Popen('/usr/bin/sw_vers -productName',
                                      shell=True, stdout=subprocess.PIPE,
@@ -357,6 +502,7 @@ class Environment:
             build = build.strip()
             opsys = description + ' ' + release + ' ' + build
             self.osreportstring = opsys
+        return [self.operatingsystem, self.osreportstring, self.osversion]
 
     def setosfamily(self):
         """
@@ -403,32 +549,136 @@ class Environment:
             # a valid hostname and gethostbyname errored.
             ipaddress = self.getdefaultip()
 
-        # In ifconfig output macaddresses are always one line before the ip
-        # address.
-        if sys.platform == 'linux2':
-            cmd = '/sbin/ifconfig'
-        elif os.path.exists('/usr/sbin/ifconfig'):
-            cmd = '/usr/sbin/ifconfig -a'
+        if sys.platform == 'linux2' and os.path.isdir(SYSNETPATH):
+            # Use the address of the interface holding the ip address, or
+            # failing that of the interface of the default route.
+            routeiface = self.__defaultroute()[0]
+            for iface in self.__interfaces():
+                mac = self.__ifmac(iface)
+                if mac and self.__ifaddr(iface) == ipaddress:
+                    macaddress = mac
+                    break
+                elif mac and iface == routeiface:
+                    macaddress = mac
         else:
-            cmd = '/sbin/ifconfig -a'
-        proc = subprocess.Popen(cmd, shell=True,
-                                stdout=subprocess.PIPE, close_fds=True)
-        netdata = proc.stdout.readlines()
-
-        for line in netdata:
-            # print "processing: " + line
-            match = re.search(macre, line)
-            if match is not None:
-                # print 'Matched MAC address'
-                macaddress = match.group()
-            if re.search(ipaddress, line):
-                # print 'Found ipaddress'
-                break
+            # In ifconfig output macaddresses are always one line before the
+            # ip address.
+            if os.path.exists('/usr/sbin/ifconfig'):
+                cmd = '/usr/sbin/ifconfig -a'
+            else:
+                cmd = '/sbin/ifconfig -a'
+            proc = subprocess.Popen(cmd, shell=True,
+                                    stdout=subprocess.PIPE, close_fds=True)
+            netdata = proc.stdout.readlines()
+
+            for line in netdata:
+                # print "processing: " + line
+                match = re.search(macre, line)
+                if match is not None:
+                    # print 'Matched MAC address'
+                    macaddress = match.group()
+                if re.search(ipaddress, line):
+                    # print 'Found ipaddress'
+                    break
 
         self.hostname = hostname
         self.ipaddress = ipaddress
         self.macaddress = macaddress
 
+    def __interfaces(self):
+        """
+        Return the names of the network interfaces that are up on a Linux
+        system, as ifconfig without -a lists them.
+
+        @return: list of strings
+        """
+        try:
+            ifaces = sorted(os.listdir(SYSNETPATH))
+        except OSError:
+            return []
+        upifaces = []
+        for iface in ifaces:
+            try:
+                handle = open(os.path.join(SYSNETPATH, iface, 'flags'))
+                try:
+                    flags = int(handle.read().strip(), 16)
+                finally:
+                    handle.close()
+            except (IOError, OSError, ValueError):
+                continue
+            # IFF_UP
+            if flags & 0x1:
+                upifaces.append(iface)
+        return upifaces
+
+    def __defaultroute(self):
+        """
+        Return the interface and gateway of the default route from the Linux
+        kernel routing table, in which destination and gateway are little
+        endian hex. The default route has destination 0 and the gateway flag
+        (0x2) set.
+
+        @return: tuple - (interface, gateway), both None if there is no
+            default route
+        """
+        try:
+            routefile = open('/proc/net/route')
+            try:
+                routedata = routefile.readlines()[1:]
+            finally:
+                routefile.close()
+        except(IOError):
+            return None, None
+        for line in routedata:
+            line = line.split()
+            try:
+                if line[1] == '00000000' and int(line[3], 16) & 0x2:
+                    return line[0], socket.inet_ntoa(struct.pack('<L',
+                                                     int(line[2], 16)))
+            except(IndexError, ValueError):
+                continue
+        return None, None
+
+    def __ifmac(self, iface):
+        """
+        Return the hardware address of a Linux network interface, or None if
+        it has no ethernet style address.
+
+        @param iface: string - interface name
+        @return: string
+        """
+        try:
+            handle = open(os.path.join(SYSNETPATH, iface, 'address'))
+            try:
+                mac = handle.read().strip()
+            finally:
+                handle.close()
+        except (IOError, OSError):
+            return None
+        if re.match('^([0-9a-f]{2}:){5}[0-9a-f]{2}$', mac) and \
+           mac != '00:00:00:00:00:00':
+            return mac
+        return None
+
+    def __ifaddr(self, iface):
+        """
+        Return the IPv4 address of a Linux network interface, or None if it
+        has none.
+
+        @param iface: string - interface name
+        @return: string
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            try:
+                ifreq = fcntl.ioctl(sock.fileno(), SIOCGIFADDR,
+                                    struct.pack('256s', iface[:15]))
+            except IOError:
+                return None
+        finally:
+            sock.close()
+        return socket.inet_ntoa(ifreq[20:24])
+
     def getdefaultip(self):
         """
         This method will return the ip address of the interface
@@ -440,20 +690,7 @@ class Environment:
         ipaddr = '127.0.0.1'
         gateway = ''
         if sys.platform == 'linux2':
-            try:
-                routecmd = subprocess.Popen('/sbin/route -n', shell=True,
-                                            stdout=subprocess.PIPE,
-                                            close_fds=True)
-                routedata = routecmd.stdout.readlines()
-            except(OSError):
-                return ipaddr
-            for line in routedata:
-                if re.search('^default', line):
-                    line = line.split()
-                    try:
-                        gateway = line[1]
-                    except(IndexError):
-                        return ipaddr
+            gateway = self.__defaultroute()[1] or ''
         else:
             try:
                 if os.path.exists('/usr/sbin/route'):
@@ -521,23 +758,10 @@ class Environment:
         """
         iplist = []
         if sys.platform == 'linux2':
-            try:
-                ifcmd = subprocess.Popen('/sbin/ifconfig', shell=True,
-                                         stdout=subprocess.PIPE,
-                                         close_fds=True)
-                ifdata = ifcmd.stdout.readlines()
-            except(OSError):
-                return iplist
-            for line in ifdata:
-                if re.search('inet addr:', line):
-                    try:
-                        line = line.split()
-                        addr = line[1]
-                        addr = addr.split(':')
-                        addr = addr[1]
-                        iplist.append(addr)
-                    except(IndexError):
-                        continue
+            for iface in self.__interfaces():
+                addr = self.__ifaddr(iface)
+                if addr is not None:
+                    iplist.append(addr)
         else:
             try:
                 if os.path.exists('/usr/sbin/ifconfig'):
@@ -566,6 +790,15 @@ class Environment:
         Property number of the local machine
         @author: scmcleni
         @author: D. Kennel
+        @return: int
+        """
+        return self.__getfact('propertynumber', self.__propertynumber,
+                              self.__getstamp(['/etc/property-number']))
+
+    def __propertynumber(self):
+        """
+        Read the property number from the system.
+
         @return: int
         """
         propnum = 0
@@ -575,6 +808,8 @@ class Environment:
                 propnum = propertynumberfile.readline()
                 propnum = propnum.strip()
                 propertynumberfile.close()
+            elif self.__readdmi('chassis_asset_tag'):
+                propnum = self.__readdmi('chassis_asset_tag')
             elif DMI and self.euid == 0:
                 chassis = dmidecode.chassis()
                 for key in chassis:
@@ -600,10 +835,20 @@ class Environment:
         Find and return the
         Serial number of the local machine
         @author: dkennel
+        @return: string
+        """
+        return self.__getfact('systemserial', self.__systemserial)
+
+    def __systemserial(self):
+        """
+        Read the system serial number from the system.
+
         @return: string
         """
         systemserial = '0'
-        if DMI and self.euid == 0:
+        if self.__readdmi('product_serial'):
+            systemserial = self.__readdmi('product_serial')
+        elif DMI and self.euid == 0:
             try:
                 system = dmidecode.system()
                 for key in system:
@@ -615,12 +860,7 @@ class Environment:
                 # got unexpected data back from dmidecode
                 pass
         elif os.path.exists('/usr/sbin/system_profiler'):
-            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
-            cmd3 = subprocess.Popen(profilerfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmd3output = cmd3.stdout.readlines()
-            for line in cmd3output:
+            for line in self.__hardwareprofile():
                 if re.search('Serial Number (system):', line):
                     line = line.split(':')
                     try:
@@ -637,8 +877,18 @@ class Environment:
         @author: dkennel
         @requires: string
         """
+        return self.__getfact('chassisserial', self.__chassisserial)
+
+    def __chassisserial(self):
+        """
+        Read the chassis serial number from the system.
+
+        @return: string
+        """
         chassisserial = '0'
-        if DMI and self.euid == 0:
+        if self.__readdmi('chassis_serial'):
+            chassisserial = self.__readdmi('chassis_serial')
+        elif DMI and self.euid == 0:
             try:
                 chassis = dmidecode.chassis()
                 for key in chassis:
@@ -654,10 +904,20 @@ class Environment:
         Find and return the
         System manufacturer
         @author: D. Kennel
+        @return: string
+        """
+        return self.__getfact('systemmanufacturer', self.__systemmanufacturer)
+
+    def __systemmanufacturer(self):
+        """
+        Read the system manufacturer from the system.
+
         @return: string
         """
         systemmfr = 'Unk'
-        if DMI and self.euid == 0:
+        if self.__readdmi('sys_vendor'):
+            systemmfr = self.__readdmi('sys_vendor')
+        elif DMI and self.euid == 0:
             try:
                 system = dmidecode.system()
                 for key in system:
@@ -676,10 +936,21 @@ class Environment:
         Find and return the
         Chassis manufacterer
         @author: D. Kennel
+        @return: string
+        """
+        return self.__getfact('chassismanufacturer',
+                              self.__chassismanufacturer)
+
+    def __chassismanufacturer(self):
+        """
+        Read the chassis manufacturer from the system.
+
         @return: string
         """
         chassismfr = 'Unk'
-        if DMI and self.euid == 0:
+        if self.__readdmi('chassis_vendor'):
+            chassismfr = self.__readdmi('chassis_vendor')
+        elif DMI and self.euid == 0:
             try:
                 chassis = dmidecode.chassis()
                 for key in chassis:
@@ -697,10 +968,21 @@ class Environment:
         a number that is _hopefully_ unique as that platform doesn't have
         UUID numbers.
         @author: D. Kennel
+        @return: string
+        """
+        return self.__getfact('uuid', self.__sysuuid)
+
+    def __sysuuid(self):
+        """
+        Read the system UUID, or its nearest equivalent, from the system.
+
         @return: string
         """
         uuid = '0'
-        if DMI and self.euid == 0:
+        if self.__readdmi('product_uuid'):
+            # dmidecode prints the UUID in upper case, newer kernels do not
+            uuid = self.__readdmi('product_uuid').upper()
+        elif DMI and self.euid == 0:
             try:
                 system = dmidecode.system()
                 for key in system:
@@ -731,12 +1013,7 @@ class Environment:
                     except(IndexError, KeyError):
                         pass
         elif os.path.exists('/usr/sbin/system_profiler'):
-            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
-            cmd3 = subprocess.Popen(profilerfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmd3output = cmd3.stdout.readlines()
-            for line in cmd3output:
+            for line in self.__hardwareprofile():
                 if re.search('UUID:', line):
                     line = line.split()
                     try:
@@ -760,10 +1037,21 @@ class Environment:
         @author: dkennel
         @regturn: bool - true if system is a laptop
         '''
+        return self.__getfact('mobile', self.__ismobile)
+
+    def __ismobile(self):
+        '''
+        Read from the system whether or not it is a laptop.
+
+        @return: bool
+        '''
         ismobile = False
         dmitypes = ['LapTop', 'Portable', 'Notebook', 'Hand Held',
                     'Sub Notebook']
-        if DMI and self.euid == 0:
+        chassistype = self.__readdmi('chassis_type')
+        if chassistype and chassistype.isdigit():
+            ismobile = int(chassistype) in MOBILECHASSIS
+        elif DMI and self.euid == 0:
             try:
                 chassis = dmidecode.chassis()
                 for key in chassis:
@@ -774,12 +1062,7 @@ class Environment:
                 # got unexpected data back from dmidecode
                 pass
         elif os.path.exists('/usr/sbin/system_profiler'):
-            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
-            cmd3 = subprocess.Popen(profilerfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmd3output = cmd3.stdout.readlines()
-            for line in cmd3output:
+            for line in self.__hardwareprofile():
                 if re.search('Book', line):
                     ismobile = True
                     break
@@ -1019,4 +1302,14 @@ class Environment:
         '''
         return self.numrules
 
+    def getfilecache(self):
+        '''
+        Return the file cache shared by all rules for this run. Rules should
+        read common configuration files such as /etc/passwd through it
+        instead of opening them themselves.
+
+        @return: filecache.FileCache
+        '''
+        return FILECACHE
+
     
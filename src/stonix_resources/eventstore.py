@@ -0,0 +1,370 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+SQLite backed store for the change events recorded by the StateChgLogger.
+Events are kept in a single table indexed on rule id and run id, so looking
+up the events of one rule does not scan the whole log, and writes can be
+batched into one transaction per rule. The database runs in WAL mode. Events
+of an existing shelve event log are imported the first time the store is
+opened. The store also holds the manifest of the BlobStore, mapping archived
+files and their change events to blobs.
+'''
+import cPickle
+import os
+import shelve
+import sqlite3
+import threading
+import time
+import whichdb
+
+SCHEMA = ['''CREATE TABLE IF NOT EXISTS events (
+             seq INTEGER PRIMARY KEY AUTOINCREMENT,
+             eventid TEXT UNIQUE NOT NULL,
+             ruleid TEXT NOT NULL,
+             runid TEXT NOT NULL,
+             event BLOB NOT NULL)''',
+          'CREATE INDEX IF NOT EXISTS events_rule ON events (ruleid, seq)',
+          'CREATE INDEX IF NOT EXISTS events_run ON events (runid, ruleid)',
+          '''CREATE TABLE IF NOT EXISTS archive (
+             seq INTEGER PRIMARY KEY AUTOINCREMENT,
+             path TEXT NOT NULL,
+             eventid TEXT,
+             digest TEXT NOT NULL,
+             stamp REAL NOT NULL,
+             mode INTEGER,
+             uid INTEGER,
+             gid INTEGER)''',
+          'CREATE INDEX IF NOT EXISTS archive_path ON archive (path, seq)',
+          '''CREATE TABLE IF NOT EXISTS meta (
+             name TEXT PRIMARY KEY,
+             value TEXT)''']
+
+# Columns added to the archive table after it was first created
+ARCHIVECOLUMNS = ['mode', 'uid', 'gid']
+
+# Run id given to the events imported from a shelve event log
+MIGRATEDRUN = 'migrated'
+
+
+class EventStore(object):
+    '''
+    Change event records keyed on event id. The first four characters of an
+    event id are the zero padded rule number. Every record also carries the
+    id of the run that recorded it.
+
+    Writes are committed immediately unless a batch is open, see beginbatch.
+    The store may be shared between threads.
+    '''
+
+    def __init__(self, path, legacypath=None):
+        '''
+        @param path: string - path of the SQLite database
+        @param legacypath: string - path of a shelve event log to import
+        '''
+        self.lock = threading.RLock()
+        self.batches = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.text_factory = str
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        columns = [row[1] for row in
+                   self.conn.execute('PRAGMA table_info(archive)')]
+        for column in ARCHIVECOLUMNS:
+            if column not in columns:
+                self.conn.execute('ALTER TABLE archive ADD COLUMN ' +
+                                  column + ' INTEGER')
+        self.conn.commit()
+        if legacypath:
+            self.migrate(legacypath)
+
+    def migrate(self, legacypath):
+        '''
+        Import the events of a shelve event log, once. Events already present
+        in the store are kept.
+
+        @param legacypath: string - path given to shelve.open for the log
+        @return: int - number of events imported
+        '''
+        self.lock.acquire()
+        try:
+            row = self.conn.execute('SELECT value FROM meta WHERE name = ?',
+                                    ('migrated',)).fetchone()
+            if row is not None or not whichdb.whichdb(legacypath):
+                return 0
+            legacy = shelve.open(legacypath, 'r')
+            try:
+                count = 0
+                for eventid in legacy.keys():
+                    self.conn.execute('''INSERT OR IGNORE INTO events
+                                         (eventid, ruleid, runid, event)
+                                         VALUES (?, ?, ?, ?)''',
+                                      (eventid, eventid[0:4], MIGRATEDRUN,
+                                       self.__dump(legacy[eventid])))
+                    count += 1
+            finally:
+                legacy.close()
+            self.conn.execute('INSERT INTO meta (name, value) VALUES (?, ?)',
+                              ('migrated', legacypath))
+            self.conn.commit()
+            return count
+        finally:
+            self.lock.release()
+
+    def __dump(self, eventdict):
+        '''
+        Private method to serialize an event.
+
+        @param eventdict: dict - event
+        @return: sqlite3.Binary
+        '''
+        return sqlite3.Binary(cPickle.dumps(eventdict,
+                                            cPickle.HIGHEST_PROTOCOL))
+
+    def __commit(self):
+        '''
+        Private method to commit unless a batch is open. Caller holds the
+        lock.
+        '''
+        if not self.batches:
+            self.conn.commit()
+
+    def beginbatch(self):
+        '''
+        Open a batch. Writes are committed together when the last open batch
+        is ended. Batches nest.
+        '''
+        self.lock.acquire()
+        try:
+            self.batches += 1
+        finally:
+            self.lock.release()
+
+    def endbatch(self):
+        '''
+        End a batch opened by beginbatch, committing the writes once no batch
+        remains open.
+        '''
+        self.lock.acquire()
+        try:
+            if self.batches:
+                self.batches -= 1
+            self.__commit()
+        finally:
+            self.lock.release()
+
+    def record(self, eventid, eventdict, runid):
+        '''
+        Store an event, replacing any event with the same id.
+
+        @param eventid: string - event id
+        @param eventdict: dict - event
+        @param runid: string - id of the run recording the event
+        '''
+        self.lock.acquire()
+        try:
+            self.conn.execute('DELETE FROM events WHERE eventid = ?',
+                              (eventid,))
+            self.conn.execute('''INSERT INTO events
+                                 (eventid, ruleid, runid, event)
+                                 VALUES (?, ?, ?, ?)''',
+                              (eventid, eventid[0:4], runid,
+                               self.__dump(eventdict)))
+            self.__commit()
+        finally:
+            self.lock.release()
+
+    def get(self, eventid):
+        '''
+        Return an event.
+
+        @param eventid: string - event id
+        @return: dict - event
+        @raise KeyError: if there is no such event
+        '''
+        self.lock.acquire()
+        try:
+            row = self.conn.execute('SELECT event FROM events '
+                                    'WHERE eventid = ?',
+                                    (eventid,)).fetchone()
+        finally:
+            self.lock.release()
+        if row is None:
+            raise KeyError(eventid)
+        return cPickle.loads(str(row[0]))
+
+    def delete(self, eventid):
+        '''
+        Remove an event.
+
+        @param eventid: string - event id
+        @return: bool - True if the event existed
+        '''
+        self.lock.acquire()
+        try:
+            cursor = self.conn.execute('DELETE FROM events WHERE eventid = ?',
+                                       (eventid,))
+            self.__commit()
+            return cursor.rowcount > 0
+        finally:
+            self.lock.release()
+
+    def findrule(self, ruleid, runid=None):
+        '''
+        Return the ids of the events of a rule in the order they were
+        recorded.
+
+        @param ruleid: string - four digit zero padded rule number
+        @param runid: string - only return events of this run
+        @return: list of event ids
+        '''
+        self.lock.acquire()
+        try:
+            if runid is None:
+                rows = self.conn.execute('SELECT eventid FROM events '
+                                         'WHERE ruleid = ? ORDER BY seq',
+                                         (ruleid,))
+            else:
+                rows = self.conn.execute('SELECT eventid FROM events '
+                                         'WHERE ruleid = ? AND runid = ? '
+                                         'ORDER BY seq', (ruleid, runid))
+            return [row[0] for row in rows]
+        finally:
+            self.lock.release()
+
+    def getruns(self):
+        '''
+        Return the ids of the runs that have events in the store, oldest
+        first.
+
+        @return: list of run ids
+        '''
+        self.lock.acquire()
+        try:
+            rows = self.conn.execute('SELECT runid FROM events '
+                                     'GROUP BY runid ORDER BY MIN(seq)')
+            return [row[0] for row in rows]
+        finally:
+            self.lock.release()
+
+    def addarchive(self, path, digest, eventid=None, mode=None, uid=None,
+                   gid=None):
+        '''
+        Record that a copy of a file was archived as a blob, together with
+        the permissions and ownership the file had.
+
+        @param path: string - path of the archived file
+        @param digest: string - digest of the blob holding the copy
+        @param eventid: string - change event the copy was taken for
+        @param mode: int - permission bits of the file
+        @param uid: int - owner of the file
+        @param gid: int - group of the file
+        '''
+        self.lock.acquire()
+        try:
+            self.conn.execute('''INSERT INTO archive
+                                 (path, eventid, digest, stamp, mode, uid,
+                                  gid)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                              (path, eventid, digest, time.time(), mode, uid,
+                               gid))
+            self.__commit()
+        finally:
+            self.lock.release()
+
+    def getarchive(self, path):
+        '''
+        Return the digest of the newest archived copy of a file.
+
+        @param path: string - path of the archived file
+        @return: string digest, None if the file was never archived
+        '''
+        info = self.getarchiveinfo(path)
+        if info is None:
+            return None
+        return info[0]
+
+    def getarchiveinfo(self, path):
+        '''
+        Return the digest, permission bits and ownership of the newest
+        archived copy of a file. The permissions and ownership are None for
+        copies archived before they were recorded.
+
+        @param path: string - path of the archived file
+        @return: tuple of (digest, mode, uid, gid), None if the file was
+            never archived
+        '''
+        self.lock.acquire()
+        try:
+            row = self.conn.execute('SELECT digest, mode, uid, gid '
+                                    'FROM archive WHERE path = ? '
+                                    'ORDER BY seq DESC LIMIT 1',
+                                    (path,)).fetchone()
+        finally:
+            self.lock.release()
+        if row is None:
+            return None
+        return tuple(row)
+
+    def prunearchive(self):
+        '''
+        Drop the manifest entries of archived copies whose change event is no
+        longer in the event log, keeping the first and the newest copy of
+        every file, and return the digests still referenced.
+
+        @return: set of digests
+        '''
+        self.lock.acquire()
+        try:
+            self.conn.execute('''DELETE FROM archive
+                                 WHERE eventid IS NOT NULL
+                                 AND eventid NOT IN
+                                     (SELECT eventid FROM events)
+                                 AND seq NOT IN
+                                     (SELECT MIN(seq) FROM archive
+                                      GROUP BY path)
+                                 AND seq NOT IN
+                                     (SELECT MAX(seq) FROM archive
+                                      GROUP BY path)''')
+            self.__commit()
+            rows = self.conn.execute('SELECT DISTINCT digest FROM archive')
+            return set([row[0] for row in rows])
+        finally:
+            self.lock.release()
+
+    def close(self):
+        '''
+        Commit any pending writes and close the database.
+        '''
+        self.lock.acquire()
+        try:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+        finally:
+            self.lock.release()
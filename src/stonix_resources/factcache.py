@@ -0,0 +1,155 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+On disk cache of the facts the Environment collects about the host. Facts
+such as serial numbers do not change while the system is up but some of
+them cost a fork of dmidecode or system_profiler to learn, so they are kept
+between runs. The whole cache is dropped when the boot id changes and each
+fact expires after a time to live. A fact may also carry a stamp, for
+instance the modification time of the file it was read from, and is
+recomputed when the stamp no longer matches.
+'''
+import json
+import os
+import tempfile
+import time
+
+# Seconds a cached fact stays valid
+FACTTTL = 86400
+# Changes every boot on Linux. Elsewhere only the time to live applies.
+BOOTIDPATH = '/proc/sys/kernel/random/boot_id'
+
+
+def getbootid():
+    '''
+    Return the id of the current boot, or an empty string where the system
+    does not provide one.
+
+    @return: string
+    '''
+    try:
+        handle = open(BOOTIDPATH)
+        try:
+            return handle.read().strip()
+        finally:
+            handle.close()
+    except (IOError, OSError):
+        return ''
+
+
+def native(value):
+    '''
+    Return a value loaded from JSON with its unicode strings encoded back to
+    the byte strings the rest of stonix uses.
+
+    @param value: value loaded from JSON
+    @return: the value with str in place of unicode
+    '''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [native(item) for item in value]
+    return value
+
+
+class FactCache(object):
+    '''
+    JSON file of facts, each stored with the time it was learned and its
+    stamp. An unreadable or stale file is treated as an empty cache and
+    write errors are ignored; the cache only ever saves work.
+    '''
+
+    def __init__(self, path, ttl=FACTTTL):
+        '''
+        @param path: string - cache file, None to keep facts in memory only
+        @param ttl: int - seconds a fact stays valid
+        '''
+        self.path = path
+        self.ttl = ttl
+        self.bootid = getbootid()
+        self.facts = {}
+        if path is None:
+            return
+        try:
+            handle = open(path)
+            try:
+                data = json.load(handle)
+            finally:
+                handle.close()
+            if data.get('bootid') == self.bootid:
+                self.facts = data.get('facts', {})
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+
+    def get(self, name, stamp=None):
+        '''
+        Return a cached fact.
+
+        @param name: string - name of the fact
+        @param stamp: stamp the fact must have been stored with, stamps
+            that are not None must be lists
+        @return: the value of the fact
+        @raise KeyError: the fact is not cached, has expired or its stamp
+            does not match
+        '''
+        value, learned, oldstamp = self.facts[name]
+        if oldstamp != stamp or \
+           not 0 <= time.time() - learned < self.ttl:
+            raise KeyError(name)
+        return native(value)
+
+    def set(self, name, value, stamp=None):
+        '''
+        Cache a fact and save the cache. Values and stamps must be JSON
+        serializable.
+
+        @param name: string - name of the fact
+        @param value: value of the fact
+        @param stamp: stamp to store with the fact
+        '''
+        self.facts[name] = [value, time.time(), stamp]
+        self.save()
+
+    def save(self):
+        '''
+        Write the cache file. The file is replaced atomically and is only
+        readable by its owner since it holds serial numbers.
+        '''
+        if self.path is None:
+            return
+        try:
+            cachedir = os.path.dirname(self.path)
+            if not os.path.exists(cachedir):
+                os.makedirs(cachedir, 0700)
+            fd, tmppath = tempfile.mkstemp(dir=cachedir, prefix='.facts')
+            try:
+                os.write(fd, json.dumps({'bootid': self.bootid,
+                                         'facts': self.facts}))
+            finally:
+                os.close(fd)
+            os.rename(tmppath, self.path)
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,267 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Run scoped cache of configuration files. Many rules read the same files
+(/etc/passwd, /etc/shadow, sshd_config, sysctl.conf); the cache reads each
+file once and hands out its lines and parsed views until the file changes.
+A file is considered changed when its inode, size or mtime differ from when
+it was read, and writers that go through KVEditorStonix or writeFile drop
+the cached copy explicitly as well. Contents staged by a FileTransaction
+are served in place of the file on disk until the transaction writes them.
+'''
+import os
+import threading
+
+
+class FileCache(object):
+    '''
+    Cache of file contents keyed on path and validated with a stat on every
+    access. Use the instance returned by Environment.getfilecache so that all
+    rules share it.
+    '''
+
+    def __init__(self):
+        self.entries = {}
+        self.staged = {}
+        self.lock = threading.RLock()
+
+    def __getentry(self, path):
+        '''
+        Return the cache entry of a file, reading the file if it is not cached
+        or has changed.
+
+        @param path: string - path of the file
+        @return: dict with 'lines' and 'views' entries
+        @raise IOError: if the file cannot be read
+        '''
+        self.lock.acquire()
+        try:
+            entry = self.staged.get(path)
+            if entry is not None:
+                return entry
+        finally:
+            self.lock.release()
+        try:
+            st = os.stat(path)
+        except OSError, err:
+            self.invalidate(path)
+            raise IOError(err.errno, err.strerror, path)
+        key = (st.st_ino, st.st_size, st.st_mtime)
+        self.lock.acquire()
+        try:
+            entry = self.entries.get(path)
+            if entry is not None and entry['key'] == key:
+                return entry
+            self.entries.pop(path, None)
+            handle = open(path, 'r')
+            try:
+                lines = handle.readlines()
+            finally:
+                handle.close()
+            entry = {'key': key, 'lines': lines, 'views': {}}
+            self.entries[path] = entry
+            return entry
+        finally:
+            self.lock.release()
+
+    def getlines(self, path):
+        '''
+        Return the lines of a file.
+
+        @param path: string - path of the file
+        @return: list of lines
+        @raise IOError: if the file cannot be read
+        '''
+        return list(self.__getentry(path)['lines'])
+
+    def readlines(self, path):
+        '''
+        Return the lines of a file, like stonixutilityfunctions.readFile.
+
+        @param path: string - path of the file
+        @return: list of lines, empty if the file cannot be read
+        '''
+        try:
+            return self.getlines(path)
+        except IOError:
+            return []
+
+    def getrecords(self, path, numfields, separator=':'):
+        '''
+        Return the records of a colon separated database like /etc/passwd.
+        Blank lines, comments and lines without exactly numfields fields are
+        skipped.
+
+        @param path: string - path of the file
+        @param numfields: int - number of fields of a valid record
+        @param separator: string - field separator
+        @return: list of lists of fields
+        '''
+        try:
+            entry = self.__getentry(path)
+        except IOError:
+            return []
+        viewkey = ('records', numfields, separator)
+        self.lock.acquire()
+        try:
+            records = entry['views'].get(viewkey)
+            if records is None:
+                records = []
+                for line in entry['lines']:
+                    line = line.rstrip('\n')
+                    if not line.strip() or line.lstrip().startswith('#'):
+                        continue
+                    fields = line.split(separator)
+                    if len(fields) == numfields:
+                        records.append(fields)
+                entry['views'][viewkey] = records
+        finally:
+            self.lock.release()
+        return [list(record) for record in records]
+
+    def getpasswd(self, path='/etc/passwd'):
+        '''
+        Return the entries of the passwd file as lists of seven fields.
+
+        @param path: string - path of the passwd file
+        @return: list of lists of fields
+        '''
+        return self.getrecords(path, 7)
+
+    def getgroup(self, path='/etc/group'):
+        '''
+        Return the entries of the group file as lists of four fields.
+
+        @param path: string - path of the group file
+        @return: list of lists of fields
+        '''
+        return self.getrecords(path, 4)
+
+    def getshadow(self, path='/etc/shadow'):
+        '''
+        Return the entries of the shadow file as lists of nine fields.
+
+        @param path: string - path of the shadow file
+        @return: list of lists of fields
+        '''
+        return self.getrecords(path, 9)
+
+    def getkeyvalues(self, path, separator=None):
+        '''
+        Return the settings of a key value configuration file such as
+        sshd_config (whitespace separated) or sysctl.conf ('=' separated).
+        Blank lines and comments are skipped. Keys that appear several times
+        keep all their values in file order; sshd uses the first one, sysctl
+        the last one.
+
+        @param path: string - path of the file
+        @param separator: string - separator between key and value, None for
+            whitespace
+        @return: dict of key: list of values
+        '''
+        try:
+            entry = self.__getentry(path)
+        except IOError:
+            return {}
+        viewkey = ('keyvalues', separator)
+        self.lock.acquire()
+        try:
+            settings = entry['views'].get(viewkey)
+            if settings is None:
+                settings = {}
+                for line in entry['lines']:
+                    line = line.strip()
+                    if not line or line[0] in '#;':
+                        continue
+                    fields = line.split(separator, 1)
+                    key = fields[0].strip()
+                    if len(fields) == 2:
+                        value = fields[1].strip()
+                    else:
+                        value = ''
+                    settings.setdefault(key, []).append(value)
+                entry['views'][viewkey] = settings
+        finally:
+            self.lock.release()
+        return dict([(key, list(values))
+                     for key, values in settings.items()])
+
+    def invalidate(self, path=None):
+        '''
+        Drop the cached copy of a file, or of all files.
+
+        @param path: string - path of the file, None for all files
+        '''
+        self.lock.acquire()
+        try:
+            if path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(path, None)
+        finally:
+            self.lock.release()
+
+    def stage(self, path, lines):
+        '''
+        Serve lines as the contents of a file until unstage is called,
+        whatever the file on disk holds.
+
+        @param path: string - path of the file
+        @param lines: list of lines
+        '''
+        self.lock.acquire()
+        try:
+            self.staged[path] = {'key': None, 'lines': list(lines),
+                                 'views': {}}
+        finally:
+            self.lock.release()
+
+    def unstage(self, path):
+        '''
+        Stop serving staged contents for a file.
+
+        @param path: string - path of the file
+        '''
+        self.lock.acquire()
+        try:
+            self.staged.pop(path, None)
+            self.entries.pop(path, None)
+        finally:
+            self.lock.release()
+
+    def isstaged(self, path):
+        '''
+        Return whether staged contents are served for a file.
+
+        @param path: string - path of the file
+        @return: bool
+        '''
+        return path in self.staged
+
+
+# Shared by all rules through Environment.getfilecache and invalidated by the
+# file writers in KVEditorStonix and stonixutilityfunctions
+FILECACHE = FileCache()
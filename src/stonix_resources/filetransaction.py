@@ -0,0 +1,236 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Transactional write-back of configuration files. Several rules edit the same
+file (sshd_config is touched by SecureSSH, SSHTimeout, RestrictAdminSSH,
+ConsoleRootOnly, InstallBanners and DisableIPV6). While a transaction is open
+a commit of one of its files through KVEditorStonix stages the new contents
+in memory instead of renaming a temporary file into place, and every reader
+going through the FileCache sees the staged document. Other files are written
+straight away as before, since rules may act on them (sysctl -p, service
+restarts) right after editing them. Committing the transaction writes each
+changed file once, archives its original once and reloads each affected
+service once.
+'''
+import os
+import threading
+from logdispatcher import LogPriority
+from filecache import FILECACHE
+from stonixutilityfunctions import resetsecon
+
+# Configuration files edited by more than one rule
+SHAREDFILES = ['/etc/ssh/sshd_config', '/etc/sshd_config',
+               '/private/etc/sshd_config', '/private/etc/ssh/sshd_config']
+
+
+class FileTransaction(object):
+    '''
+    Staged configuration file edits for one run. Use the module level
+    TRANSACTION; Controller.hardensystem opens it before running the rules
+    and commits it once they are done.
+    '''
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.active = False
+        self.paths = set()
+        self.originals = {}
+        self.edits = {}
+        self.reloads = {}
+
+    def begin(self, paths=SHAREDFILES):
+        '''
+        Open the transaction. Commits of the given files made through
+        KVEditorStonix are staged until commit is called.
+
+        @param paths: list of paths of the files to stage
+        '''
+        self.lock.acquire()
+        try:
+            self.active = True
+            self.paths = set(paths)
+        finally:
+            self.lock.release()
+
+    def isactive(self):
+        '''
+        Return whether the transaction is open.
+
+        @return: bool
+        '''
+        return self.active
+
+    def isstaging(self, path):
+        '''
+        Return whether edits of path are staged by the open transaction.
+
+        @param path: string - path of the file
+        @return: bool
+        '''
+        return self.active and path in self.paths
+
+    def stage(self, path, tmppath, stchlgr=None, eventid=''):
+        '''
+        Stage the contents of tmppath as the new contents of path and remove
+        tmppath. When eventid is set the change is recorded against it so that
+        the undo patch of the event only covers this edit.
+
+        @param path: string - path of the file being edited
+        @param tmppath: string - path of the file holding the new contents
+        @param stchlgr: StateChgLogger - logger to record the change with
+        @param eventid: string - change event id, may be empty
+        @raise IOError: if tmppath cannot be read
+        '''
+        handle = open(tmppath, 'r')
+        try:
+            after = handle.readlines()
+        finally:
+            handle.close()
+        self.lock.acquire()
+        try:
+            before = FILECACHE.readlines(path)
+            if path not in self.originals:
+                self.originals[path] = before
+                self.edits[path] = []
+            if eventid and stchlgr is not None:
+                self.edits[path].append((stchlgr, eventid, before, after))
+            FILECACHE.stage(path, after)
+        finally:
+            self.lock.release()
+        os.remove(tmppath)
+
+    def reloadservice(self, servicehelper, path, service, servicename=''):
+        '''
+        Reload a service whose configuration file path was changed. While
+        the file is staged the reload is deferred to commit, where each
+        service is reloaded once and only if one of its files really changed.
+
+        @param servicehelper: ServiceHelper - helper to reload the service with
+        @param path: string - configuration file that was changed
+        @param service: string - service to reload
+        @param servicename: string - short name of the service
+        @return: bool - True if the reload was deferred or succeeded
+        '''
+        self.lock.acquire()
+        try:
+            if self.isstaging(path):
+                key = (service, servicename)
+                if key not in self.reloads:
+                    self.reloads[key] = (servicehelper, set())
+                self.reloads[key][1].add(path)
+                return True
+        finally:
+            self.lock.release()
+        return servicehelper.reloadservice(service, servicename)
+
+    def commit(self, logger):
+        '''
+        Write every staged file that differs from its original, record the
+        staged edits, reload the affected services and close the transaction.
+
+        @param logger: LogDispatcher
+        @return: bool - False if any file or the reload of a running
+            service failed
+        '''
+        self.lock.acquire()
+        try:
+            success = True
+            changed = set()
+            for path in self.originals:
+                try:
+                    if self.__write(path):
+                        changed.add(path)
+                except (KeyboardInterrupt, SystemExit):
+                    raise
+                except Exception, err:
+                    success = False
+                    logger.log(LogPriority.ERROR,
+                               ['FileTransaction',
+                                'Unable to write %s: %s' % (path, err)])
+                finally:
+                    FILECACHE.unstage(path)
+            for key in sorted(self.reloads):
+                servicehelper, paths = self.reloads[key]
+                if not paths & changed:
+                    continue
+                # reloadservice skips stopped services and returns False,
+                # they read the new configuration when they are started
+                if not servicehelper.isrunning(key[0], key[1]):
+                    logger.log(LogPriority.DEBUG,
+                               ['FileTransaction',
+                                '%s is not running, not reloading' % key[0]])
+                    continue
+                logger.log(LogPriority.DEBUG,
+                           ['FileTransaction',
+                            'Reloading %s' % key[0]])
+                if not servicehelper.reloadservice(key[0], key[1]):
+                    success = False
+                    logger.log(LogPriority.ERROR,
+                               ['FileTransaction',
+                                'Unable to reload %s' % key[0]])
+            return success
+        finally:
+            self.active = False
+            self.paths = set()
+            self.originals = {}
+            self.edits = {}
+            self.reloads = {}
+            self.lock.release()
+
+    def __write(self, path):
+        '''
+        Private method to write the staged contents of path with a single
+        rename, archive its original and record one undo patch per staged
+        edit.
+
+        @param path: string - path of the file
+        @return: bool - True if the file was changed
+        '''
+        lines = FILECACHE.getlines(path)
+        if lines == self.originals[path]:
+            return False
+        edits = self.edits[path]
+        if edits:
+            edits[0][0].archivefile(path, edits[0][1])
+        for stchlgr, eventid, before, after in edits:
+            stchlgr.recordfilediff(path, before, after, eventid)
+        tmppath = path + '.stonixtmp'
+        handle = open(tmppath, 'w')
+        try:
+            handle.writelines(lines)
+        finally:
+            handle.close()
+        if os.path.exists(path):
+            st = os.stat(path)
+            os.chown(tmppath, st.st_uid, st.st_gid)
+            os.chmod(tmppath, st.st_mode & 07777)
+        os.rename(tmppath, path)
+        resetsecon(path)
+        return True
+
+
+# Opened by Controller.hardensystem and used by KVEditorStonix.commit
+TRANSACTION = FileTransaction()
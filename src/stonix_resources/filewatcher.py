@@ -0,0 +1,317 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Watches the files and directories the rules depend on for the daemon mode.
+On Linux the kernel inotify interface is used through ctypes. Every path is
+watched through its parent directory so that files replaced by a rename,
+which is how stonix and most editors write configuration files, are still
+seen, and paths that do not exist yet are watched from their nearest
+existing ancestor. Where inotify is not available the paths are polled.
+'''
+import ctypes
+import errno
+import os
+import select
+import stat
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 04000
+IN_CLOEXEC = 02000000
+WATCHMASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | \
+    IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | \
+    IN_ONLYDIR
+EVENTHEADER = struct.Struct('iIII')
+
+# Seconds to keep collecting events after the first one so that a burst of
+# writes triggers a single audit
+SETTLE = 0.5
+POLLINTERVAL = 5
+
+
+class FileWatcher(object):
+    '''
+    Common part of the watchers. Paths are registered together with the keys
+    they are watched for, typically rule names. Each watcher defines
+    wait(timeout), which returns the keys of the paths that changed.
+    '''
+
+    def __init__(self):
+        self.paths = {}
+
+    def add(self, path, key):
+        '''
+        Watch a file or directory.
+
+        @param path: string - absolute path, it does not need to exist
+        @param key: value returned by wait() when the path changes
+        '''
+        self.paths.setdefault(os.path.normpath(path), set()).add(key)
+
+    def getkeys(self, paths):
+        '''
+        @param paths: iterable of watched paths
+        @return: set of the keys the paths are watched for
+        '''
+        keys = set()
+        for path in paths:
+            keys.update(self.paths.get(path, ()))
+        return keys
+
+    def close(self):
+        '''
+        Release the resources held by the watcher.
+        '''
+        pass
+
+
+class InotifyWatcher(FileWatcher):
+    '''
+    Linux watcher. One inotify watch is kept per directory holding watched
+    paths, plus one per watched directory for changes to its entries.
+    '''
+
+    def __init__(self, libc):
+        '''
+        Constructor
+
+        @param libc: ctypes library exposing the inotify calls
+        @raise OSError: if no inotify instance can be created
+        '''
+        FileWatcher.__init__(self)
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.wds = {}
+        self.dirs = {}
+        self.dirty = True
+
+    def add(self, path, key):
+        FileWatcher.add(self, path, key)
+        self.dirty = True
+
+    def wait(self, timeout):
+        '''
+        Wait for inotify events on the watched paths. Events arriving within
+        SETTLE seconds of the first one are collected with it.
+
+        @param timeout: float - seconds to wait at most
+        @return: set of the keys of the changed paths, empty on timeout
+        '''
+        if self.dirty:
+            self.__arm()
+        changed = set()
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                ready = select.select([self.fd], [], [], remaining)[0]
+            except select.error, err:
+                if err[0] == errno.EINTR:
+                    continue
+                raise
+            if not ready:
+                break
+            found = self.__readevents()
+            if found and not changed:
+                deadline = min(deadline, time.time() + SETTLE)
+            changed.update(found)
+        return self.getkeys(changed)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __arm(self):
+        '''
+        Private method to set the watches needed for the registered paths
+        and drop those no longer needed. Called again whenever a directory
+        on the way to a watched path appears or goes away.
+        '''
+        dirs = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                dirs.setdefault(path, (set(), {}))[0].add(path)
+            parent, name = os.path.split(path)
+            while not os.path.isdir(parent) and parent != os.sep:
+                parent, name = os.path.split(parent)
+            if name:
+                names = dirs.setdefault(parent, (set(), {}))[1]
+                names.setdefault(name, set()).add(path)
+        wds = {}
+        for directory in dirs:
+            wd = self.libc.inotify_add_watch(self.fd, directory, WATCHMASK)
+            if wd >= 0:
+                wds[wd] = directory
+        for wd in self.wds:
+            if wd not in wds:
+                self.libc.inotify_rm_watch(self.fd, wd)
+        self.wds = wds
+        self.dirs = dirs
+        self.dirty = False
+
+    def __readevents(self):
+        '''
+        Private method to read the pending events.
+
+        @return: set of the watched paths that changed
+        '''
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError, err:
+            if err.errno in (errno.EAGAIN, errno.EINTR):
+                return set()
+            raise
+        changed = set()
+        offset = 0
+        while offset + EVENTHEADER.size <= len(data):
+            wd, mask, _, length = EVENTHEADER.unpack_from(data, offset)
+            offset += EVENTHEADER.size
+            name = data[offset:offset + length].rstrip('\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, assume everything changed
+                changed.update(self.paths)
+                self.dirty = True
+                continue
+            directory = self.wds.get(wd)
+            if directory is None:
+                continue
+            allpaths, names = self.dirs[directory]
+            changed.update(allpaths)
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                self.dirty = True
+            if name in names:
+                changed.update(names[name])
+                if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM |
+                           IN_MOVED_TO):
+                    self.dirty = True
+        if self.dirty:
+            self.__arm()
+        return changed
+
+
+class PollingWatcher(FileWatcher):
+    '''
+    Portable watcher comparing the stat signatures of the watched paths,
+    and of the entries of watched directories, every few seconds.
+    '''
+
+    def __init__(self, interval=POLLINTERVAL):
+        '''
+        Constructor
+
+        @param interval: float - seconds between two polls
+        '''
+        FileWatcher.__init__(self)
+        self.interval = interval
+        self.signatures = {}
+
+    def add(self, path, key):
+        FileWatcher.add(self, path, key)
+        path = os.path.normpath(path)
+        self.signatures[path] = getsignature(path)
+
+    def wait(self, timeout):
+        '''
+        Poll the watched paths until one of them changes.
+
+        @param timeout: float - seconds to wait at most
+        @return: set of the keys of the changed paths, empty on timeout
+        '''
+        deadline = time.time() + timeout
+        while True:
+            changed = set()
+            for path, signature in self.signatures.items():
+                current = getsignature(path)
+                if current != signature:
+                    self.signatures[path] = current
+                    changed.add(path)
+            remaining = deadline - time.time()
+            if changed or remaining <= 0:
+                return self.getkeys(changed)
+            time.sleep(min(self.interval, remaining))
+
+
+def getsignature(path):
+    '''
+    Return what the polling watcher compares to detect a change: the stat
+    of the path and, for a directory, the lstat of its entries.
+
+    @param path: string
+    @return: tuple, None if the path does not exist
+    '''
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    signature = [(info.st_ino, info.st_mode, info.st_uid, info.st_gid,
+                  info.st_size, info.st_mtime, info.st_ctime)]
+    if stat.S_ISDIR(info.st_mode):
+        try:
+            names = sorted(os.listdir(path))
+        except OSError:
+            names = []
+        for name in names:
+            try:
+                entry = os.lstat(os.path.join(path, name))
+            except OSError:
+                continue
+            signature.append((name, entry.st_ino, entry.st_mode,
+                              entry.st_size, entry.st_mtime, entry.st_ctime))
+    return tuple(signature)
+
+
+def getwatcher():
+    '''
+    Return an inotify watcher where the kernel supports it, a polling watcher
+    elsewhere.
+
+    @return: FileWatcher
+    '''
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1
+        return InotifyWatcher(libc)
+    except (AttributeError, OSError):
+        return PollingWatcher()
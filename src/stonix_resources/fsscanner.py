@@ -0,0 +1,428 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Single pass file system scanner used by FilePermissions. Each entry is
+lstat'ed exactly once, mount points are detected by comparing device numbers
+and owner lookups are memoized so that every uid and gid is resolved once per
+scan no matter how many files carry it.
+
+The scanner can keep an index of the directories it has scanned (FSIndex).
+On later runs a directory whose inode, mtime and ctime are unchanged is not
+listed again, the results recorded for its files are reused instead. Only
+its subdirectories are lstat'ed so that changed parts of the tree are still
+found. Mode or owner changes of files in otherwise unchanged directories are
+not visible to such a scan, which is why the index is periodically rebuilt
+by a full scan.
+'''
+import grp
+import multiprocessing
+import os
+import pwd
+import sqlite3
+import stat
+import time
+
+WW = 'ww'
+SUID = 'suid'
+UNOWNED = 'unowned'
+# Directories recorded by an FSIndex between two commits. The worker
+# processes of a parallel scan share the index database and each one holds
+# its write lock until it commits, so none may keep it for a whole walk.
+INDEXBATCH = 200
+
+
+class FSScanner(object):
+    '''
+    Walks local file systems without crossing mount points and reports
+    world writable files and directories, SUID/SGID files and files whose
+    owner or group does not resolve. Results are produced as a stream of
+    (category, path) tuples where category is one of WW, SUID or UNOWNED.
+    '''
+
+    def __init__(self, limit=0, processes=1, index=None):
+        '''
+        Constructor
+
+        @param limit: int - stop scanning once any category has more than
+            this many results, 0 for no limit
+        @param processes: int - number of worker processes. With more than
+            one, each file system is walked in its own process.
+        @param index: FSIndex instance used for incremental scans or None
+        '''
+        self.limit = limit
+        self.processes = processes
+        self.index = index
+        self.overrun = False
+        self.counts = {WW: 0, SUID: 0, UNOWNED: 0}
+        self.uids = {}
+        self.gids = {}
+
+    def scan(self, filesystems):
+        '''
+        Scan the passed file systems. Check self.overrun once the generator
+        is exhausted to find out whether the scan stopped at the limit. When
+        an index is used and the scan completes, index records for
+        directories that were not seen are removed.
+
+        @param filesystems: list of file system mount points
+        @return: generator of (category, path) tuples
+        '''
+        if self.processes > 1 and len(filesystems) > 1:
+            results = self.__scanparallel(filesystems)
+        else:
+            results = self.__scanserial(filesystems)
+        try:
+            for category, path in results:
+                self.counts[category] += 1
+                yield category, path
+                if self.limit and self.counts[category] > self.limit:
+                    self.overrun = True
+                    results.close()
+                    return
+            if self.index is not None:
+                self.index.prune()
+        finally:
+            if self.index is not None:
+                self.index.commit()
+
+    def __scanserial(self, filesystems):
+        '''
+        Scan the file systems one after another in this process.
+
+        @param filesystems: list of file system mount points
+        @return: generator of (category, path) tuples
+        '''
+        for filesystem in filesystems:
+            for result in self.scanfilesystem(filesystem):
+                yield result
+
+    def __scanparallel(self, filesystems):
+        '''
+        Scan each file system in a worker process. Results of a file system
+        are delivered once its walk completes.
+
+        @param filesystems: list of file system mount points
+        @return: generator of (category, path) tuples
+        '''
+        indexargs = None
+        if self.index is not None:
+            # Workers write their records through their own connection,
+            # committing every INDEXBATCH directories
+            self.index.commit()
+            indexargs = (self.index.path, self.index.runid, self.index.full)
+        pool = multiprocessing.Pool(min(self.processes, len(filesystems)))
+        try:
+            jobs = [(filesystem, self.limit, indexargs)
+                    for filesystem in filesystems]
+            for results in pool.imap(scanworker, jobs):
+                for result in results:
+                    yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def scanfilesystem(self, filesystem):
+        '''
+        Walk one file system. Directories on other devices (mount points)
+        and symbolic links are not followed. Directories are only checked
+        for world write, all other entries are checked for world write,
+        SUID/SGID and unresolvable owners.
+
+        @param filesystem: string - mount point of the file system
+        @return: generator of (category, path) tuples
+        '''
+        try:
+            fsstat = os.lstat(filesystem)
+        except OSError:
+            return
+        pending = [(filesystem, fsstat)]
+        while pending:
+            directory, dirstat = pending.pop()
+            record = None
+            if self.index is not None:
+                record = self.index.lookup(directory, dirstat)
+            # Owners may have been added or removed since the directory was
+            # recorded, rescan it if that changes its results.
+            if record is not None and \
+               all([self.isknownuid(uid) for uid in record['uids']]) and \
+               all([self.isknowngid(gid) for gid in record['gids']]) and \
+               UNOWNED not in [result[0] for result in record['results']]:
+                names = record['subdirs']
+                fileresults = record['results']
+            else:
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                fileresults = None
+            subdirs = []
+            results = []
+            uids = set()
+            gids = set()
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    fstat = os.lstat(path)
+                except OSError:
+                    continue
+                mode = fstat.st_mode
+                if stat.S_ISLNK(mode):
+                    continue
+                if stat.S_ISDIR(mode):
+                    if fstat.st_dev != fsstat.st_dev:
+                        continue
+                    if mode & stat.S_IWOTH:
+                        yield WW, path
+                    subdirs.append(name)
+                    pending.append((path, fstat))
+                    continue
+                if fileresults is not None:
+                    # Cached directory, names only holds the subdirectories
+                    continue
+                uids.add(fstat.st_uid)
+                gids.add(fstat.st_gid)
+                if mode & stat.S_IWOTH:
+                    results.append((WW, name))
+                if mode & (stat.S_ISUID | stat.S_ISGID):
+                    results.append((SUID, name))
+                if not self.isknownuid(fstat.st_uid) or \
+                   not self.isknowngid(fstat.st_gid):
+                    results.append((UNOWNED, name))
+            if fileresults is None:
+                fileresults = results
+                if self.index is not None:
+                    self.index.store(directory, dirstat, subdirs,
+                                     fileresults, uids, gids)
+            for category, name in fileresults:
+                yield category, os.path.join(directory, name)
+
+    def isknownuid(self, uid):
+        '''
+        Return whether the uid resolves to an account. Lookups are cached.
+
+        @param uid: int
+        @return: bool
+        '''
+        known = self.uids.get(uid)
+        if known is None:
+            try:
+                pwd.getpwuid(uid)
+                known = True
+            except KeyError:
+                known = False
+            self.uids[uid] = known
+        return known
+
+    def isknowngid(self, gid):
+        '''
+        Return whether the gid resolves to a group. Lookups are cached.
+
+        @param gid: int
+        @return: bool
+        '''
+        known = self.gids.get(gid)
+        if known is None:
+            try:
+                grp.getgrgid(gid)
+                known = True
+            except KeyError:
+                known = False
+            self.gids[gid] = known
+        return known
+
+
+def scanworker(job):
+    '''
+    Worker process entry point for FSScanner. Walks one file system and
+    returns its results as a list. Only stops early at the limit so the
+    parent still sees more than limit results for the overrun category.
+
+    @param job: tuple of (file system, limit, index arguments or None)
+    @return: list of (category, path) tuples
+    '''
+    filesystem, limit, indexargs = job
+    index = None
+    if indexargs is not None:
+        index = FSIndex(*indexargs)
+    try:
+        scanner = FSScanner(limit)
+        scanner.index = index
+        return list(scanner.scanfilesystem(filesystem))
+    finally:
+        if index is not None:
+            index.close()
+
+
+class FSIndex(object):
+    '''
+    SQLite backed index of scanned directories used by FSScanner for
+    incremental scans. For each directory it records the inode, mtime and
+    ctime at scan time, the names of its subdirectories, the uids and gids
+    of its files and the scan results for its files.
+    '''
+
+    def __init__(self, path, runid=None, full=False, timeout=60,
+                 batch=INDEXBATCH):
+        '''
+        Constructor
+
+        @param path: string - path of the index database
+        @param runid: int - identifier of the current scan, directories seen
+            during the scan are tagged with it
+        @param full: bool - ignore the recorded data and rebuild the index
+        @param timeout: float - seconds to wait for another process holding
+            the database lock
+        @param batch: int - directories recorded between two commits
+        '''
+        self.path = path
+        self.runid = runid
+        if self.runid is None:
+            self.runid = int(time.time())
+        self.full = full
+        self.batch = batch
+        self.pending = 0
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.text_factory = str
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS dirs
+                             (path TEXT PRIMARY KEY, ino INTEGER,
+                              mtime REAL, ctime REAL, subdirs TEXT,
+                              results TEXT, uids TEXT, gids TEXT,
+                              runid INTEGER)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS meta
+                             (key TEXT PRIMARY KEY, value TEXT)''')
+        self.conn.commit()
+        os.chmod(path, 0600)
+
+    def getlastfull(self):
+        '''
+        Return the time the index was last rebuilt by a complete full scan.
+
+        @return: float - seconds since the epoch, 0 if never
+        '''
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?',
+                                ('lastfull',)).fetchone()
+        if row is None:
+            return 0
+        return float(row[0])
+
+    def lookup(self, path, dirstat):
+        '''
+        Return the recorded data for a directory if the directory has not
+        changed since it was recorded, otherwise None.
+
+        @param path: string - directory path
+        @param dirstat: lstat result of the directory
+        @return: dict with the keys subdirs, results, uids and gids or None
+        '''
+        if self.full:
+            return None
+        row = self.conn.execute('''SELECT ino, mtime, ctime, subdirs,
+                                  results, uids, gids FROM dirs
+                                  WHERE path = ?''', (path,)).fetchone()
+        if row is None or row[0] != dirstat.st_ino or \
+           row[1] != dirstat.st_mtime or row[2] != dirstat.st_ctime:
+            return None
+        self.conn.execute('UPDATE dirs SET runid = ? WHERE path = ?',
+                          (self.runid, path))
+        self.__written()
+        results = []
+        for result in splitfield(row[4]):
+            category, name = result.split('/', 1)
+            results.append((category, name))
+        return {'subdirs': splitfield(row[3]),
+                'results': results,
+                'uids': [int(uid) for uid in row[5].split()],
+                'gids': [int(gid) for gid in row[6].split()]}
+
+    def store(self, path, dirstat, subdirs, results, uids, gids):
+        '''
+        Record the scan data for a directory.
+
+        @param path: string - directory path
+        @param dirstat: lstat result of the directory
+        @param subdirs: list of subdirectory names
+        @param results: list of (category, file name) tuples
+        @param uids: iterable of the uids owning files in the directory
+        @param gids: iterable of the gids owning files in the directory
+        '''
+        self.conn.execute('''INSERT OR REPLACE INTO dirs VALUES
+                             (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                          (path, dirstat.st_ino, dirstat.st_mtime,
+                           dirstat.st_ctime, '\0'.join(subdirs),
+                           '\0'.join([category + '/' + name
+                                      for category, name in results]),
+                           ' '.join([str(uid) for uid in uids]),
+                           ' '.join([str(gid) for gid in gids]),
+                           self.runid))
+        self.__written()
+
+    def __written(self):
+        '''
+        Private method counting the directories recorded since the last
+        commit and committing once there are batch of them.
+        '''
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.commit()
+
+    def prune(self):
+        '''
+        Remove the records of directories not seen by the current scan. Only
+        call this after a complete scan. Completes the full scan bookkeeping
+        if this was a full scan.
+        '''
+        self.conn.execute('DELETE FROM dirs WHERE runid != ?',
+                          (self.runid,))
+        if self.full:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                              ('lastfull', repr(time.time())))
+
+    def commit(self):
+        '''
+        Write pending changes to the index database.
+        '''
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        '''
+        Commit and close the index database.
+        '''
+        self.conn.commit()
+        self.conn.close()
+
+
+def splitfield(value):
+    '''
+    Split a NUL separated index field.
+
+    @param value: string
+    @return: list of strings
+    '''
+    if not value:
+        return []
+    return value.split('\0')
@@ -295,6 +295,7 @@ class GUI (View, QMainWindow, main_window.Ui_MainWindow):
 
         @author: D. Kennel
         """
+        self.controller.writeinstrumentation()
         self.controller.releaselock()
         self.logger.postreport()
         sys.exit()
@@ -0,0 +1,316 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Run scoped inventory of the accounts and their home directories, shared by
+the rules that look at homes and dot files. Accounts are enumerated once,
+each distinct home is stat'ed and listed once, and the dot files found in it
+are lstat'ed once. Homes are scanned by a small pool of threads so that one
+slow NFS server does not hold up the others. A mount that does not answer
+within the timeout is marked unreachable and the remaining homes on it are
+skipped for the rest of the run instead of blocking every rule in turn.
+Each automounted home counts as its own mount.
+'''
+import errno
+import os
+import pwd
+import stat
+import threading
+import time
+from sysquery import getmounts
+
+STATTIMEOUT = 5
+WORKERS = 8
+
+
+class HomeDir(object):
+    '''
+    Snapshot of one home directory.
+
+    @ivar path: string - path of the home directory
+    @ivar reachable: bool - False if the file system holding the home did
+        not answer
+    @ivar stat: os.stat result of the home, None if it does not exist or is
+        unreachable
+    @ivar dotfiles: dict of dot file name: os.lstat result, empty if the home
+        could not be listed
+    '''
+
+    def __init__(self, path, reachable=True):
+        self.path = path
+        self.reachable = reachable
+        self.stat = None
+        self.dotfiles = {}
+
+    def exists(self):
+        '''
+        @return: bool - whether the home exists and is a directory
+        '''
+        return self.stat is not None and stat.S_ISDIR(self.stat.st_mode)
+
+    def getdotfiles(self):
+        '''
+        @return: list of the full paths of the dot files in the home
+        '''
+        return [os.path.join(self.path, name)
+                for name in sorted(self.dotfiles)]
+
+
+def stathome(path):
+    '''
+    Stat a home directory, list it and lstat its dot files.
+
+    @param path: string - path of the home directory
+    @return: HomeDir
+    '''
+    homedir = HomeDir(path)
+    try:
+        homedir.stat = os.stat(path)
+    except OSError, err:
+        if err.errno not in (errno.ENOENT, errno.ENOTDIR):
+            homedir.reachable = False
+        return homedir
+    if not stat.S_ISDIR(homedir.stat.st_mode):
+        return homedir
+    try:
+        names = os.listdir(path)
+    except OSError:
+        # root cannot list root squashed NFS homes
+        return homedir
+    for name in names:
+        if not name.startswith('.'):
+            continue
+        try:
+            homedir.dotfiles[name] = os.lstat(os.path.join(path, name))
+        except OSError:
+            pass
+    return homedir
+
+
+class HomeInventory(object):
+    '''
+    Accounts and home directory snapshots shared by all rules during a run.
+    The Controller invalidates the inventory before each report or fix pass,
+    rules that change a home or its dot files invalidate that home.
+    '''
+
+    def __init__(self, timeout=STATTIMEOUT, workers=WORKERS):
+        '''
+        Constructor
+
+        @param timeout: float - seconds to wait for a home before its mount
+            is considered unreachable
+        @param workers: int - number of threads scanning homes
+        '''
+        self.timeout = timeout
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.accounts = None
+        self.mounts = None
+        self.homes = {}
+        self.dead = set()
+
+    def invalidate(self, path=None):
+        '''
+        Forget a home so that it is scanned again on the next request, or
+        everything when no path is given.
+
+        @param path: string - path of the home directory or None
+        '''
+        self.lock.acquire()
+        try:
+            if path is None:
+                self.accounts = None
+                self.mounts = None
+                self.homes.clear()
+                self.dead.clear()
+            else:
+                self.homes.pop(path, None)
+        finally:
+            self.lock.release()
+
+    def getaccounts(self):
+        '''
+        Return the accounts of the system, enumerated once per run.
+
+        @return: list of pwd.struct_passwd
+        '''
+        self.lock.acquire()
+        try:
+            if self.accounts is None:
+                try:
+                    self.accounts = pwd.getpwall()
+                except (KeyError, OSError):
+                    self.accounts = []
+            return list(self.accounts)
+        finally:
+            self.lock.release()
+
+    def getuseraccounts(self, minuid=500):
+        '''
+        Return the accounts of regular users, which have a uid of at least
+        minuid, are not nfsnobody and have an absolute home path.
+
+        @param minuid: int
+        @return: list of pwd.struct_passwd
+        '''
+        accounts = []
+        for account in self.getaccounts():
+            if account.pw_uid >= minuid and account.pw_uid != 65534 and \
+               account.pw_name != 'nfsnobody' and \
+               account.pw_dir.startswith('/'):
+                accounts.append(account)
+        return accounts
+
+    def getmountkey(self, path):
+        '''
+        Return the mount a path belongs to for timeout purposes: the longest
+        mount point containing it, or the path itself when it lives under an
+        automounter or the mount table is not available.
+
+        @param path: string
+        @return: string
+        '''
+        if self.mounts is None:
+            self.mounts = [(mount[1], mount[2])
+                           for mount in getmounts() or []]
+        best, fstype = None, None
+        for mountpoint, mountfstype in self.mounts:
+            if path == mountpoint or \
+               path.startswith(mountpoint.rstrip('/') + '/'):
+                if best is None or len(mountpoint) > len(best):
+                    best, fstype = mountpoint, mountfstype
+        if best is None or fstype == 'autofs':
+            return path
+        return best
+
+    def gethomes(self, paths=None):
+        '''
+        Return snapshots of home directories, scanning those not scanned yet
+        during this run.
+
+        @param paths: list of paths, the homes of all accounts when None
+        @return: dict of path: HomeDir
+        '''
+        if paths is None:
+            paths = [account.pw_dir for account in self.getaccounts()
+                     if account.pw_dir.startswith('/')]
+        self.lock.acquire()
+        try:
+            missing = [path for path in set(paths) if path not in self.homes]
+            if missing:
+                self.homes.update(self.__scan(missing))
+            return dict([(path, self.homes[path]) for path in paths])
+        finally:
+            self.lock.release()
+
+    def gethome(self, path):
+        '''
+        Return the snapshot of a single home directory.
+
+        @param path: string
+        @return: HomeDir
+        '''
+        return self.gethomes([path])[path]
+
+    def __scan(self, paths):
+        '''
+        Private method to scan homes on the worker threads. A home that takes
+        longer than the timeout marks its mount dead and is reported
+        unreachable, its worker is written off and replaced.
+
+        @param paths: list of paths
+        @return: dict of path: HomeDir
+        '''
+        state = {'jobs': [(path, self.getmountkey(path))
+                          for path in sorted(paths)],
+                 'started': {},
+                 'results': {}}
+        cond = threading.Condition()
+        for _ in range(min(self.workers, len(paths))):
+            self.__startworker(state, cond)
+        homes = {}
+        cond.acquire()
+        try:
+            while len(homes) < len(paths):
+                for path, homedir in state['results'].items():
+                    if path not in homes:
+                        homes[path] = homedir
+                state['results'].clear()
+                now = time.time()
+                for path, (key, start) in state['started'].items():
+                    if now - start > self.timeout:
+                        del state['started'][path]
+                        self.dead.add(key)
+                        homes[path] = HomeDir(path, reachable=False)
+                        self.__startworker(state, cond)
+                if len(homes) < len(paths):
+                    # A timed wait keeps the main thread responsive to
+                    # KeyboardInterrupt under python 2.
+                    cond.wait(min(0.5, self.timeout))
+        finally:
+            state['jobs'] = []
+            cond.release()
+        return homes
+
+    def __startworker(self, state, cond):
+        '''
+        Private method to start a scanning thread.
+        '''
+        worker = threading.Thread(target=self.__worker, args=(state, cond))
+        worker.daemon = True
+        worker.start()
+
+    def __worker(self, state, cond):
+        '''
+        Worker thread body. Takes the next home, skipping those on dead
+        mounts, and scans it.
+        '''
+        while True:
+            cond.acquire()
+            try:
+                if not state['jobs']:
+                    return
+                path, key = state['jobs'].pop(0)
+                if key in self.dead:
+                    state['results'][path] = HomeDir(path, reachable=False)
+                    cond.notify()
+                    continue
+                state['started'][path] = (key, time.time())
+            finally:
+                cond.release()
+            homedir = stathome(path)
+            cond.acquire()
+            try:
+                # A late answer from a home already written off is dropped
+                if state['started'].pop(path, None) is not None:
+                    state['results'][path] = homedir
+                    cond.notify()
+            finally:
+                cond.release()
+
+
+# Shared by the rules that look at home directories and dot files
+HOMES = HomeInventory()
@@ -0,0 +1,348 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Timing and resource instrumentation for a stonix run. The Controller adds
+the wall clock time of each phase of the run (environment discovery,
+configuration, rule import and instantiation, applicability checks, report,
+fix and undo). The rule methods are wrapped so that the time each rule
+spends in them is recorded along with the subprocesses it started, the
+commands it ran through CommandHelper and the bytes it read. Profiled runs
+also count the files each rule stat'ed. The results are written as JSON at
+the end of the run.
+'''
+import json
+import os
+import subprocess
+import threading
+import time
+
+# Rule methods that are timed, see Instrumentation.instrument
+RULEPHASES = ['isapplicable', 'report', 'fix', 'undo']
+# Per thread I/O accounting, Linux 3.17 and later
+THREADIO = '/proc/thread-self/io'
+
+
+def readbytes():
+    '''
+    Return the number of bytes read so far by the calling thread, or None
+    where the system does not account for it.
+
+    @return: int
+    '''
+    try:
+        handle = open(THREADIO)
+        try:
+            for line in handle:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+        finally:
+            handle.close()
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+class Instrumentation(object):
+    '''
+    Collects the phase timings and per rule counters of a run. Counters are
+    charged to the rule running on the calling thread, or to the only rule
+    running when the call comes from a helper thread such as a
+    commandrunner worker.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.phases = {}
+        self.phaseorder = []
+        self.rules = {}
+        self.active = {}
+        self.installed = False
+        self.countingstats = False
+        self.realpopen = None
+        self.realstat = None
+        self.reallstat = None
+
+    def reset(self):
+        '''
+        Forget everything recorded so far.
+        '''
+        self.lock.acquire()
+        try:
+            self.phases = {}
+            self.phaseorder = []
+            self.rules = {}
+        finally:
+            self.lock.release()
+
+    def addphase(self, phase, elapsed):
+        '''
+        Add time to a phase of the run.
+
+        @param phase: string - name of the phase
+        @param elapsed: float - seconds
+        '''
+        self.lock.acquire()
+        try:
+            if phase not in self.phases:
+                self.phases[phase] = 0.0
+                self.phaseorder.append(phase)
+            self.phases[phase] += elapsed
+        finally:
+            self.lock.release()
+
+    def getrulestats(self, rulename):
+        '''
+        Return the statistics of a rule, creating them if needed. Must be
+        called with the lock held.
+
+        @param rulename: string
+        @return: dict
+        '''
+        stats = self.rules.get(rulename)
+        if stats is None:
+            stats = {'subprocesses': 0, 'commands': 0, 'bytesread': 0}
+            if self.countingstats:
+                stats['stats'] = 0
+            self.rules[rulename] = stats
+        return stats
+
+    def addrulephase(self, rulename, phase, elapsed):
+        '''
+        Add time to a phase of a rule.
+
+        @param rulename: string
+        @param phase: string - name of the phase
+        @param elapsed: float - seconds
+        '''
+        self.lock.acquire()
+        try:
+            stats = self.getrulestats(rulename)
+            stats[phase] = stats.get(phase, 0.0) + elapsed
+        finally:
+            self.lock.release()
+
+    def count(self, counter, amount=1):
+        '''
+        Charge a counter to the rule that is running.
+
+        @param counter: string - subprocesses, commands, stats or bytesread
+        @param amount: int
+        '''
+        rulename = getattr(self.local, 'rule', None)
+        self.lock.acquire()
+        try:
+            if rulename is None and len(self.active) == 1:
+                rulename = self.active.keys()[0]
+            if rulename is not None:
+                stats = self.getrulestats(rulename)
+                stats[counter] = stats.get(counter, 0) + amount
+        finally:
+            self.lock.release()
+
+    def begin(self, rulename):
+        '''
+        Mark a rule as running on the calling thread.
+
+        @param rulename: string
+        @return: bool - False if a rule was already running on this thread,
+            in which case end must not be called
+        '''
+        if getattr(self.local, 'rule', None) is not None:
+            return False
+        self.local.rule = rulename
+        self.local.stats = 0
+        self.local.bytes = readbytes()
+        self.local.start = time.time()
+        self.lock.acquire()
+        try:
+            self.active[rulename] = self.active.get(rulename, 0) + 1
+        finally:
+            self.lock.release()
+        return True
+
+    def end(self, phase):
+        '''
+        Mark the end of the rule running on the calling thread and charge
+        its time to a phase.
+
+        @param phase: string - name of the phase
+        '''
+        rulename = self.local.rule
+        elapsed = time.time() - self.local.start
+        bytesread = readbytes()
+        if bytesread is not None and self.local.bytes is not None:
+            self.count('bytesread', bytesread - self.local.bytes)
+        if self.countingstats:
+            self.count('stats', self.local.stats)
+        del self.local.stats
+        self.addrulephase(rulename, phase, elapsed)
+        self.local.rule = None
+        self.lock.acquire()
+        try:
+            self.active[rulename] -= 1
+            if not self.active[rulename]:
+                del self.active[rulename]
+        finally:
+            self.lock.release()
+
+    def instrument(self, rule):
+        '''
+        Replace the methods of a rule instance listed in RULEPHASES with
+        wrappers that time them. Calls a rule method makes while another one
+        is being timed, fix calling report for instance, are part of the
+        outer call.
+
+        @param rule: Rule instance
+        '''
+        rulename = rule.getrulename()
+        for phase in RULEPHASES:
+            method = getattr(rule, phase, None)
+            if method is not None:
+                setattr(rule, phase, self.wrap(rulename, phase, method))
+
+    def wrap(self, rulename, phase, method):
+        '''
+        Return a wrapper timing calls to a rule method.
+
+        @param rulename: string
+        @param phase: string - name of the phase
+        @param method: bound method
+        @return: function
+        '''
+        def timed(*args, **kwargs):
+            outer = self.begin(rulename)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                if outer:
+                    self.end(phase)
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def install(self, countstats=False):
+        '''
+        Start counting subprocesses by replacing subprocess.Popen with a
+        counting version, and stat calls if asked to by replacing os.stat
+        and os.lstat. Code that looks these up when it calls them, which
+        includes subprocess.call and the os.path functions, is counted.
+        Counting stat calls slows down the file system scans, so it is only
+        done for profiled runs. The count is kept per thread while a rule
+        runs and added to the rule when it ends; only helper threads take
+        the lock.
+
+        @param countstats: bool - also count stat calls, may be given on a
+            later call
+        '''
+        instrumentation = self
+        if not self.installed:
+            self.installed = True
+            self.realpopen = subprocess.Popen
+
+            class CountingPopen(self.realpopen):
+                def __init__(self, *args, **kwargs):
+                    instrumentation.count('subprocesses')
+                    instrumentation.realpopen.__init__(self, *args,
+                                                       **kwargs)
+
+            subprocess.Popen = CountingPopen
+        if not countstats or self.countingstats:
+            return
+        self.countingstats = True
+        local = self.local
+        realstat = self.realstat = os.stat
+        reallstat = self.reallstat = os.lstat
+
+        def countingstat(path):
+            try:
+                local.stats += 1
+            except AttributeError:
+                instrumentation.count('stats')
+            return realstat(path)
+
+        def countinglstat(path):
+            try:
+                local.stats += 1
+            except AttributeError:
+                instrumentation.count('stats')
+            return reallstat(path)
+
+        os.stat = countingstat
+        os.lstat = countinglstat
+
+    def uninstall(self):
+        '''
+        Put back the functions replaced by install.
+        '''
+        if self.countingstats:
+            os.stat = self.realstat
+            os.lstat = self.reallstat
+            self.countingstats = False
+        if not self.installed:
+            return
+        subprocess.Popen = self.realpopen
+        self.installed = False
+
+    def getreport(self):
+        '''
+        Return the recorded timings and counters.
+
+        @return: dict
+        '''
+        self.lock.acquire()
+        try:
+            phases = [[phase, round(self.phases[phase], 6)]
+                      for phase in self.phaseorder]
+            rules = {}
+            for rulename, stats in self.rules.iteritems():
+                rules[rulename] = dict((key, round(value, 6))
+                                       if isinstance(value, float)
+                                       else (key, value)
+                                       for key, value in stats.iteritems())
+            return {'phases': phases, 'rules': rules}
+        finally:
+            self.lock.release()
+
+    def write(self, path, extra=None):
+        '''
+        Write the timing report as JSON.
+
+        @param path: string - report file
+        @param extra: dict - additional top level entries, e.g. the run time
+        '''
+        report = self.getreport()
+        if extra:
+            report.update(extra)
+        tmppath = path + '.stonixtmp'
+        handle = open(tmppath, 'w')
+        try:
+            json.dump(report, handle, indent=1, sort_keys=True)
+        finally:
+            handle.close()
+        os.rename(tmppath, path)
+
+
+INSTRUMENTATION = Instrumentation()
@@ -59,6 +59,11 @@ REPORTSERVER = 'foo.bar.com'
 # sendreports = False
 SENDREPORTS = True
 
+# The run report is always written as XML. Set JSONREPORT to True to also
+# write each report entry as a line of JSON to stonix-report.jsonl in the log
+# directory. Please note no quotes.
+JSONREPORT = False
+
 # The SoftwarePatching rule will check to see if local update sources are being
 # used. If you have local update sources list them here. This check will be
 # skipped if the list is empty. The list is in python list format:
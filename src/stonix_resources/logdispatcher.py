@@ -40,19 +40,25 @@ Created on Aug 24, 2010
 '''
 
 from observable import Observable
+from reportspool import ReportSpool
 import logging
 import localize
 import logging.handlers
 import os.path
 import os
 import socket
-import inspect
+import sys
 import traceback
 import weakref
 import smtplib
-import subprocess
-import xml.etree.ElementTree as ET
-from shutil import move
+import threading
+import gzip
+import json
+from shutil import copyfileobj, move
+from xml.sax.saxutils import escape
+
+# Seconds the end of a run waits for the report upload to finish
+REPORTWAIT = 10
 
 
 class LogDispatcher (Observable):
@@ -71,25 +77,34 @@ class LogDispatcher (Observable):
         self.verbose = self.environment.getverbosemode()
         reportfile = 'stonix-report.log'
         xmlfile = 'stonix-xmlreport.xml'
+        jsonfile = 'stonix-report.jsonl'
         self.logpath = self.environment.get_log_path()
         self.reportlog = os.path.join(self.logpath, reportfile)
         self.xmllog = os.path.join(self.logpath, xmlfile)
+        if localize.JSONREPORT:
+            self.jsonlog = os.path.join(self.logpath, jsonfile)
+        else:
+            self.jsonlog = None
         if self.debug:
             print 'LOGDISPATCHER: xml log path: ' + self.xmllog
-        if os.path.isfile(self.xmllog):
-            try:
-                if os.path.exists(self.xmllog + '.old'):
-                    os.remove(self.xmllog + '.old')
-                move(self.xmllog, self.xmllog + '.old')
-            except (KeyboardInterrupt, SystemExit):
-                # User initiated exit
-                raise
-            except Exception, err:
-                print 'logdispatcher: '
-                print traceback.format_exc()
-                print err
-        self.xmlreport = xmlReport(self.xmllog, self.debug)
+        self.__rotatereports()
+        self.xmlreport = xmlReport(self.xmllog, self.debug, self.jsonlog)
+        self.spooldir = os.path.join(self.logpath, 'reportspool')
+        self.reporturl = 'https://' + localize.REPORTSERVER + \
+            '/stonix/results.php'
+        self.spool = None
         self.metadataopen = False
+        # Messages below this level are dropped before any formatting is
+        # done. This mirrors the levels configured in __initializelogs.
+        if self.debug:
+            self.minlevel = logging.DEBUG
+        elif self.verbose:
+            self.minlevel = logging.INFO
+        else:
+            self.minlevel = logging.WARNING
+        # Rules may log from several threads when the controller runs them
+        # concurrently.
+        self.loglock = threading.RLock()
         self.__initializelogs()
         self.last_message_received = ""
         self.last_prio = LogPriority.ERROR
@@ -108,7 +123,10 @@ class LogDispatcher (Observable):
         """postreport()
 
         Sends the XML formatted stor report file to the server
-        responsible for gathering and processing them.
+        responsible for gathering and processing them. The report is gzip
+        compressed and queued in the report spool, which is uploaded in the
+        background so that the run does not wait on the server. Reports that
+        could not be sent are retried by the next run.
 
         @author: dkennel
         """
@@ -116,35 +134,17 @@ class LogDispatcher (Observable):
             return
         self.xmlreport.closeReport()
         xmlreport = self.xmllog
-        resolvable = True
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.connect((localize.REPORTSERVER, 80))
-            sock.close()
-        except (socket.gaierror, socket.timeout, socket.error):
-            resolvable = False
+        if not localize.SENDREPORTS:
+            return
         try:
-            if resolvable:
-                curlcommand = 'curl -k -s -G -F "file=@' + xmlreport + \
-                ';type=text/xml" https://' + localize.REPORTSERVER + \
-                '/stonix/results.php'
-                if self.debug:
-                    self.log(LogPriority.DEBUG,
-                             ['LogDispatcher.postreport',
-                              'Upload command: ' + curlcommand])
-                cmd = subprocess.Popen(curlcommand, shell=True, close_fds=True,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
-                uploadstatus = cmd.stdout.read()
-                uploadstatus = uploadstatus + cmd.stderr.read()
-                if self.debug:
-                    self.log(LogPriority.DEBUG,
-                             ['LogDispatcher.postreport',
-                              'Upload status: ' + uploadstatus])
-            if self.debug and not resolvable:
+            self.spool = ReportSpool(self.spooldir, self.reporturl)
+            gzreport = self.xmlreport.compressReport()
+            spooled = self.spool.add(gzreport)
+            if self.debug:
                 self.log(LogPriority.DEBUG,
                          ['LogDispatcher.postreport',
-                          'Could not resolve upload host'])
+                          'Uploading ' + spooled + ' to ' + self.reporturl])
+            self.spool.start()
             if not self.debug and os.path.exists(xmlreport):
                 os.remove(xmlreport)
 
@@ -157,7 +157,7 @@ class LogDispatcher (Observable):
             self.log(LogPriority.ERROR,
                      ['LogDispatcher.postreport', trace])
 
-    def log(self, priority, msg_data):
+    def log(self, priority, msg_data, *args):
         """
         Handles all writing of logger data to files. `msg_data` should be
         passed as an array of [tag, message_details] where tag is a
@@ -167,6 +167,12 @@ class LogDispatcher (Observable):
 
         If msg_data is passed as only a string then it will be tagged as "None"
 
+        Any further arguments are interpolated into the message details with
+        the % operator. This is only done if the message is actually going to
+        be logged, so callers logging in loops should prefer
+        log(LogPriority.DEBUG, ['Tag', 'Checking %s'], path) to building the
+        string themselves.
+
         For STONIX logging purposes all essential notifications should come in
         on the "WARNING" channel. All informational notifications should come
         in on the "INFO" channel. Debug messages should use "DEBUG". Program
@@ -175,72 +181,77 @@ class LogDispatcher (Observable):
 
         @param: enum priority
         @param: string msg_data
+        @param: args - optional values for the message details format string
         @return: void
         @author scmcleni
         @author: dkennel
         """
+        level = LEVELS.get(priority)
+        if level is None:
+            # Invalid log priority
+            return
+        if level < self.minlevel and not self.listeners:
+            return
+        if args:
+            if isinstance(msg_data, list):
+                msg_data = [msg_data[0], str(msg_data[1]) % args]
+            else:
+                msg_data = msg_data % args
 
-        entry = self.format_message_data(msg_data)
+        self.loglock.acquire()
+        try:
+            entry = self.format_message_data(msg_data)
 
-        self.last_message_received = entry
-        self.last_prio = priority
-        if isinstance(msg_data, list):
-            msg = str(msg_data[0]).strip() + ':' + str(msg_data[1]).strip()
-        else:
-            # msg = 'none' + ':' + msg_data.strip()
-            msg = msg_data.strip()
-        if self.debug:
-            #####
-            # Set up inspect to use stack variables to log file and
-            # method/function that is being called. Message to be in the
-            # format:
-            # DEBUG:<name_of_module>:<name of function>(<line number>): <message to print>
-            stack1 = inspect.stack()[1]
-            mod = inspect.getmodule(stack1[0])
-            if mod:
-                prefix = mod.__name__ + \
-                      ":" + stack1[3] + \
-                      "(" + str(stack1[2]) + "): "
-            else:
-                prefix = stack1[3] + \
-                      "(" + str(stack1[2]) + "): "
-        else:
-            stack1 = inspect.stack()[1]
-            mod = inspect.getmodule(stack1[0])
-            if mod:
-                prefix = mod.__name__ + \
-                      ":" + stack1[3] + ":"
-            else:
-                prefix = stack1[3] + ":"
-
-        if priority == LogPriority.INFO:
-            logging.info('INFO:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-        elif priority == LogPriority.WARNING:
-            logging.warning('WARNING:' + msg)
-            if self.metadataopen:
-                # self.writemetadataentry(entry)
-                self.xmlreport.writeMetadata(entry)
+            self.last_message_received = entry
+            self.last_prio = priority
+            if isinstance(msg_data, list):
+                msg = str(msg_data[0]).strip() + ':' + str(msg_data[1]).strip()
             else:
-                # self.write_xml_log(entry)
-                self.xmlreport.writeFinding(entry)
-        elif priority == LogPriority.ERROR:
-            logging.error('ERROR:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-            self.reporterr(msg, prefix)
-        elif priority == LogPriority.CRITICAL:
-            logging.critical('CRITICAL:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-            self.reporterr(msg, prefix)
-        elif priority == LogPriority.DEBUG:
-            logging.debug('DEBUG:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-        else:
-            # Invalid log priority
-            pass
+                # msg = 'none' + ':' + msg_data.strip()
+                msg = msg_data.strip()
+
+            if priority == LogPriority.WARNING:
+                logging.warning('WARNING:' + msg)
+                if self.metadataopen:
+                    # self.writemetadataentry(entry)
+                    self.xmlreport.writeMetadata(entry)
+                else:
+                    # self.write_xml_log(entry)
+                    self.xmlreport.writeFinding(entry)
+            elif level >= self.minlevel:
+                prefix = self.__callerprefix()
+                logging.log(level, priority + ':' + prefix + msg)
+                if level >= logging.ERROR:
+                    self.reporterr(msg, prefix)
+
+            self.set_dirty()
+            self.notify_check()
+        finally:
+            self.loglock.release()
+
+    def __callerprefix(self):
+        """
+        Return the prefix identifying the code that called log. In debug
+        mode the prefix has the format <module>:<function>(<line number>):
+        otherwise <module>:<function>:
+
+        sys._getframe is used rather than inspect.stack() because the latter
+        reads the source context of every frame on the stack.
 
-        self.set_dirty()
-        self.notify_check()
+        @return: string
+        """
+        try:
+            # 0 is this method, 1 is log, 2 is the caller
+            frame = sys._getframe(2)
+        except ValueError:
+            return ''
+        prefix = frame.f_code.co_name
+        modname = frame.f_globals.get('__name__')
+        if modname:
+            prefix = modname + ':' + prefix
+        if self.debug:
+            return prefix + '(' + str(frame.f_lineno) + '): '
+        return prefix + ':'
 
     def reporterr(self, errmsg, prefix):
         """reporterr(errmsg)
@@ -314,12 +325,24 @@ Subject: STONIX Error Report: ''' + prefix + '''
         """
         return self.last_prio
 
+    def waitreport(self, timeout=REPORTWAIT):
+        '''
+        Give the background report upload a bounded time to finish before
+        the process exits. Reports not sent in time stay in the spool and
+        are sent by the next run.
+
+        @param timeout: float - seconds to wait
+        @return: bool - True if no upload is still running
+        '''
+        if self.spool is None:
+            return True
+        return self.spool.wait(timeout)
+
     def closereports(self):
         '''
         This method is intended for use by the single rule and undo methods
-        which don't post a report as a part of their workflow. Failure to call
-        this may result in the element tree dying in an exceedingly ugly
-        manner when it goes out of scope.
+        which don't post a report as a part of their workflow. It closes the
+        report files, which are written as the run goes.
 
         @author: dkennel
         '''
@@ -355,15 +378,93 @@ Subject: STONIX Error Report: ''' + prefix + '''
     def logRuleCount(self):
         '''
         This method logs the rule count. This is part of the run metadata but
-        is processed seperately due to timing issues in the controller's init
+        is processed seperately due to timing issues in the controller's init.
+        The machine specific metadata is written along with it, so runs that
+        never load the rules (-l, -g) do not discover the OS, network and
+        hardware facts only the report needs.
 
         @author: dkennel
         '''
+        self.__logmetadata()
         self.metadataopen = True
         self.log(LogPriority.WARNING,
                  ['RuleCount', self.environment.getnumrules()])
         self.metadataopen = False
 
+    def __rotatereports(self):
+        """
+        Keep the XML and JSON reports of the previous run as .old files.
+        """
+        for report in [self.xmllog, self.jsonlog]:
+            if report is None or not os.path.isfile(report):
+                continue
+            try:
+                if os.path.exists(report + '.old'):
+                    os.remove(report + '.old')
+                move(report, report + '.old')
+            except (KeyboardInterrupt, SystemExit):
+                # User initiated exit
+                raise
+            except Exception, err:
+                print 'logdispatcher: '
+                print traceback.format_exc()
+                print err
+
+    def openreports(self):
+        """
+        Start new report files after the current ones were posted or closed.
+        Used by the daemon mode, which starts a report for every full audit
+        and adds the compliance changes found in between to it. The run
+        metadata is written again at the head of the new report by
+        logRuleCount.
+        """
+        self.loglock.acquire()
+        try:
+            self.xmlreport.closeReport()
+            self.__rotatereports()
+            self.xmlreport = xmlReport(self.xmllog, self.debug, self.jsonlog)
+            self.logRuleCount()
+        finally:
+            self.loglock.release()
+
+    def __logmetadata(self):
+        """
+        Write the machine specific information at the head of the report.
+        The metadata section is closed by logRuleCount.
+        """
+        self.metadataopen = True
+        self.log(LogPriority.WARNING,
+                 ["Hostname", self.environment.hostname])
+        self.log(LogPriority.WARNING,
+                 ["IPAddress", self.environment.ipaddress])
+        self.log(LogPriority.WARNING,
+                 ["MACAddress", self.environment.macaddress])
+        self.log(LogPriority.WARNING,
+                 ["OS", str(self.environment.getosreportstring())])
+        self.log(LogPriority.WARNING,
+                 ["STONIXversion", self.environment.getstonixversion()])
+        self.log(LogPriority.WARNING,
+                 ['RunTime', self.environment.getruntime()])
+        self.log(LogPriority.WARNING,
+                 ['PropertyNumber',
+                  str(self.environment.get_property_number())])
+        self.log(LogPriority.WARNING,
+                 ['SystemSerialNo',
+                  self.environment.get_system_serial_number()])
+        self.log(LogPriority.WARNING,
+                 ['ChassisSerialNo',
+                  self.environment.get_chassis_serial_number()])
+        self.log(LogPriority.WARNING,
+                 ['SystemManufacturer',
+                  self.environment.get_system_manufacturer()])
+        self.log(LogPriority.WARNING,
+                 ['ChassisManufacturer',
+                  self.environment.get_chassis_manfacturer()])
+        self.log(LogPriority.WARNING,
+                 ['UUID', self.environment.get_sys_uuid()])
+        self.log(LogPriority.WARNING,
+                 ['PropertyNumber', self.environment.get_property_number()])
+
     def __initializelogs(self):
         """
         Open a handle to a text file (stonix.log) making it available for
@@ -434,38 +535,7 @@ Subject: STONIX Error Report: ''' + prefix + '''
                      ['LogDispatcher',
                       'SYSLOG not accepting connections!'])
 
-        self.metadataopen = True
-        self.log(LogPriority.WARNING,
-                 ["Hostname", self.environment.hostname])
-        self.log(LogPriority.WARNING,
-                 ["IPAddress", self.environment.ipaddress])
-        self.log(LogPriority.WARNING,
-                 ["MACAddress", self.environment.macaddress])
-        self.log(LogPriority.WARNING,
-                 ["OS", str(self.environment.getosreportstring())])
-        self.log(LogPriority.WARNING,
-                 ["STONIXversion", self.environment.getstonixversion()])
-        self.log(LogPriority.WARNING,
-                 ['RunTime', self.environment.getruntime()])
-        self.log(LogPriority.WARNING,
-                 ['PropertyNumber',
-                  str(self.environment.get_property_number())])
-        self.log(LogPriority.WARNING,
-                 ['SystemSerialNo',
-                  self.environment.get_system_serial_number()])
-        self.log(LogPriority.WARNING,
-                 ['ChassisSerialNo',
-                  self.environment.get_chassis_serial_number()])
-        self.log(LogPriority.WARNING,
-                 ['SystemManufacturer',
-                  self.environment.get_system_manufacturer()])
-        self.log(LogPriority.WARNING,
-                 ['ChassisManufacturer',
-                  self.environment.get_chassis_manfacturer()])
-        self.log(LogPriority.WARNING,
-                 ['UUID', self.environment.get_sys_uuid()])
-        self.log(LogPriority.WARNING,
-                 ['PropertyNumber', self.environment.get_property_number()])
+        # The machine specific information is written by logRuleCount
         self.log(LogPriority.DEBUG,
                  ['ScriptPath', self.environment.get_script_path()])
         self.log(LogPriority.DEBUG,
@@ -508,13 +578,28 @@ class LogPriority:
     CRITICAL = "CRITICAL"
 
 
+# Map of LogPriority values to python logging levels
+LEVELS = {LogPriority.DEBUG: logging.DEBUG,
+          LogPriority.INFO: logging.INFO,
+          LogPriority.WARNING: logging.WARNING,
+          LogPriority.ERROR: logging.ERROR,
+          LogPriority.CRITICAL: logging.CRITICAL}
+
+
 class xmlReport:
     '''
     Simple class to manage the STONIX XML report formatting.
 
+    Entries are streamed to disk as they are logged rather than being held in
+    an ElementTree until the end of the run. The file always ends with the
+    closing tags so that the report on disk is well formed XML even if the
+    run is killed part way through. Metadata entries are few and are kept in
+    memory so that the metadata section can stay at the head of the report.
+    Each entry may also be written as a line of JSON to a second file.
+
     @author: dkennel
     '''
-    def __init__(self, path, debug=False):
+    def __init__(self, path, debug=False, jsonpath=None):
         '''
         xmlReport.__init__(path): The xmlReport constructor. Requires a string
         version of the fully qualified path to the file where the XML version
@@ -522,14 +607,29 @@ class xmlReport:
 
         @param path: string - fully qualified path to the report file
         @param debug: Bool - whether or not to run in debug mode
+        @param jsonpath: string - fully qualified path to the JSON lines
+            report file, None for no JSON lines report
         @author: dkennel
         '''
         self.path = path
         self.debug = debug
-        self.root = ET.Element('run')
-        self.meta = ET.SubElement(self.root, 'metadata')
-        self.findings = ET.SubElement(self.root, 'findings')
+        self.jsonpath = jsonpath
+        self.meta = []
         self.closed = False
+        self.handle = None
+        self.jsonhandle = None
+        # Offsets of the start and end of the findings entries in the file
+        self.findingsstart = 0
+        self.findingsend = 0
+        try:
+            self.handle = open(self.path, 'w+b')
+            self.__writehead()
+            if self.jsonpath:
+                self.jsonhandle = open(self.jsonpath, 'wb')
+        except Exception, err:
+            if self.debug:
+                print 'logdispatcher.xmlReport: Error opening report files'
+                print err
 
     def __del__(self):
         """
@@ -544,6 +644,83 @@ class xmlReport:
             pass
             #
 
+    def __element(self, entry):
+        '''
+        Return the serialized XML element for a log entry, escaped the same
+        way ElementTree escapes attribute values.
+
+        @param entry: Formatted version of the log data.
+        @return: string
+        '''
+        detail = entry.Detail
+        if isinstance(detail, unicode):
+            detail = detail.encode('ascii', 'xmlcharrefreplace')
+        detail = escape(detail, {'"': '&quot;', '\n': '&#10;'})
+        return '<' + entry.Tag + ' val="' + detail + '" />'
+
+    def __writejson(self, section, entry):
+        '''
+        Append an entry to the JSON lines report if one is being kept.
+
+        @param section: string - metadata or findings
+        @param entry: Formatted version of the log data.
+        '''
+        if self.jsonhandle is None:
+            return
+        self.jsonhandle.write(json.dumps({'section': section,
+                                          'tag': entry.Tag,
+                                          'val': entry.Detail},
+                                         separators=(',', ':')) + '\n')
+        self.jsonhandle.flush()
+
+    def __writehead(self):
+        '''
+        Write the run and metadata elements followed by the closing tags to
+        the start of an empty report file.
+        '''
+        head = '<run><metadata>' + ''.join(self.meta) + \
+            '</metadata><findings>'
+        self.handle.write(head + '</findings></run>')
+        self.handle.flush()
+        self.findingsstart = len(head)
+        self.findingsend = len(head)
+
+    def __rewrite(self):
+        '''
+        Rewrite the report with the current metadata, copying the findings
+        written so far. Used when metadata arrives after the first finding,
+        which only happens a handful of times per run.
+        '''
+        tmppath = self.path + '.stonixtmp'
+        oldhandle = self.handle
+        oldstart = self.findingsstart
+        oldend = self.findingsend
+        newhandle = open(tmppath, 'w+b')
+        try:
+            self.handle = newhandle
+            self.__writehead()
+            oldhandle.seek(oldstart)
+            remaining = oldend - oldstart
+            while remaining > 0:
+                chunk = oldhandle.read(min(remaining, 65536))
+                if not chunk:
+                    break
+                newhandle.seek(self.findingsend)
+                newhandle.write(chunk)
+                self.findingsend += len(chunk)
+                remaining -= len(chunk)
+            newhandle.write('</findings></run>')
+            newhandle.flush()
+        except Exception:
+            self.handle = oldhandle
+            self.findingsstart = oldstart
+            self.findingsend = oldend
+            newhandle.close()
+            os.remove(tmppath)
+            raise
+        os.rename(tmppath, self.path)
+        oldhandle.close()
+
     def writeMetadata(self, entry):
         '''
         xmlReport.writeMetadata(entry): The xmlReport method to add a metadata
@@ -553,7 +730,21 @@ class xmlReport:
         @param entry: Formatted version of the log data.
         @author: dkennel
         '''
-        ET.SubElement(self.meta, entry.Tag, val=entry.Detail)
+        if self.closed or self.handle is None:
+            return
+        element = self.__element(entry)
+        self.meta.append(element)
+        if self.findingsend == self.findingsstart:
+            # No findings yet, so the metadata can be extended in place
+            self.handle.seek(self.findingsstart - len('</metadata><findings>'))
+            self.handle.write(element + '</metadata><findings></findings>' +
+                              '</run>')
+            self.handle.flush()
+            self.findingsstart += len(element)
+            self.findingsend = self.findingsstart
+        else:
+            self.__rewrite()
+        self.__writejson('metadata', entry)
         if self.debug:
             print 'xmlReport.writeMetadata: Added entry ' + entry.Tag + \
             ' ' + entry.Detail
@@ -567,27 +758,57 @@ class xmlReport:
         @param entry: Formatted version of the log data.
         @author: dkennel
         '''
-        ET.SubElement(self.findings, entry.Tag, val=entry.Detail)
+        if self.closed or self.handle is None:
+            return
+        element = self.__element(entry)
+        # The entry and the closing tags go out in one write so that the file
+        # is well formed after every finding.
+        self.handle.seek(self.findingsend)
+        self.handle.write(element + '</findings></run>')
+        self.handle.flush()
+        self.findingsend += len(element)
+        self.__writejson('findings', entry)
         if self.debug:
             print 'xmlReport.writeFinding: Added entry ' + entry.Tag + \
             ' ' + entry.Detail
 
     def closeReport(self):
         '''
-        xmlReport.closeReport(): This method will write the xmlReport to disk.
+        xmlReport.closeReport(): This method will close the report files. The
+        report on disk is already complete.
 
         @author: dkennel
         '''
         try:
             if not self.closed:
-                ET.ElementTree(self.root).write(self.path)
                 self.closed = True
+                for handle in [self.handle, self.jsonhandle]:
+                    if handle is not None:
+                        handle.close()
             if self.debug:
-                print 'xmlReport.closeReport: dumping the ElementTree: '
-                ET.dump(self.root)
+                print 'xmlReport.closeReport: report written to ' + self.path
         except Exception, err:
             if self.debug:
                 print 'logdispatcher.xmlReport.closeReport: Error encountered processing xml'
                 print err
                 trace = traceback.format_exc()
                 print trace
+
+    def compressReport(self):
+        '''
+        Write a gzip compressed copy of the closed report next to it for
+        upload.
+
+        @return: string - path to the compressed report
+        '''
+        gzpath = self.path + '.gz'
+        report = open(self.path, 'rb')
+        try:
+            compressed = gzip.open(gzpath, 'wb')
+            try:
+                copyfileobj(report, compressed)
+            finally:
+                compressed.close()
+        finally:
+            report.close()
+        return gzpath
@@ -36,8 +36,16 @@
 # ============================================================================#
 """ Base class for objects implementing the observer pattern.
 This class should be inherited only, no direct invocations.
+
+Notifications are delivered synchronously by default. Calling set_throttle
+coalesces them so that listeners are updated at most once per interval from
+a dispatcher thread, or once every so many notifications. Listeners pull the
+current state from the subject in update() so only the latest state is seen.
 """
 
+import threading
+import time
+
 
 class Observable:
 
@@ -49,6 +57,15 @@ class Observable:
     def __init__(self):
         self.dirty = False
         self.listeners = []
+        # Throttling state, see set_throttle
+        self.interval = 0
+        self.batch = 0
+        self.pending = 0
+        self.lastnotify = 0
+        self.dispatcher = None
+        self.notifycond = None
+        self.deliverlock = None
+        self.stopping = False
 
     def register_listener(self, listener):
         """
@@ -110,6 +127,127 @@ class Observable:
         @return:
         @author
         """
-        if self.dirty:
+        if not self.dirty:
+            return
+        self.set_clean()
+        if not self.listeners:
+            return
+        if self.notifycond is None:
+            self.notify_observers()
+            return
+        self.notifycond.acquire()
+        try:
+            self.pending += 1
+            due = self.batch and self.pending >= self.batch
+            if not due:
+                self.notifycond.notify()
+        finally:
+            self.notifycond.release()
+        if due:
+            self.flush_notifications()
+
+    def set_throttle(self, interval=0.25, batch=0):
+        """
+        Coalesce notifications. With an interval listeners are updated at
+        most once per interval seconds by a dispatcher thread. With a batch
+        count listeners are updated in the calling thread once that many
+        notifications are pending. Both may be given.
+
+        @param interval: float - minimum seconds between updates, 0 for none
+        @param batch: int - notifications per update, 0 for none
+        @return: void
+        """
+        if self.notifycond is None:
+            self.notifycond = threading.Condition()
+            self.deliverlock = threading.RLock()
+        self.interval = interval
+        self.batch = batch
+        self.stopping = False
+        if interval > 0 and self.dispatcher is None:
+            self.dispatcher = threading.Thread(target=self.__dispatch,
+                                               name='ObservableDispatcher')
+            self.dispatcher.daemon = True
+            self.dispatcher.start()
+
+    def flush_notifications(self):
+        """
+        Deliver any pending notification now, in the calling thread.
+
+        @return: void
+        """
+        if self.notifycond is None:
+            return
+        self.notifycond.acquire()
+        try:
+            pending = self.pending
+            self.pending = 0
+        finally:
+            self.notifycond.release()
+        if pending:
+            self.__deliver()
+
+    def stop_throttle(self):
+        """
+        Deliver any pending notification and go back to synchronous
+        notification.
+
+        @return: void
+        """
+        if self.notifycond is None:
+            return
+        dispatcher = self.dispatcher
+        self.notifycond.acquire()
+        try:
+            self.stopping = True
+            self.notifycond.notify()
+        finally:
+            self.notifycond.release()
+        if dispatcher is not None and \
+           dispatcher is not threading.currentThread():
+            dispatcher.join()
+        self.dispatcher = None
+        self.flush_notifications()
+        self.notifycond = None
+
+    def __deliver(self):
+        """
+        Call notify_observers, one delivery at a time.
+        """
+        self.deliverlock.acquire()
+        try:
+            self.lastnotify = time.time()
             self.notify_observers()
-            self.set_clean()
+        finally:
+            self.deliverlock.release()
+
+    def __dispatch(self):
+        """
+        Dispatcher thread body. Waits for a notification, holds it until the
+        interval since the last update has passed and then delivers every
+        notification that arrived in the meantime as one update.
+        """
+        cond = self.notifycond
+        while True:
+            cond.acquire()
+            try:
+                while not self.pending and not self.stopping:
+                    cond.wait()
+                while self.pending and not self.stopping:
+                    delay = self.lastnotify + self.interval - time.time()
+                    if delay <= 0:
+                        break
+                    cond.wait(delay)
+                if self.stopping:
+                    return
+                # A flush may have delivered while we were waiting
+                pending = self.pending
+                self.pending = 0
+            finally:
+                cond.release()
+            if not pending:
+                continue
+            try:
+                self.__deliver()
+            except Exception:
+                # A failing listener must not stop later updates
+                pass
@@ -0,0 +1,201 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Batch queries of the rpm and dpkg databases used by the package manager
+classes. The file functions resolve a list of files with one package manager
+invocation per BATCHSIZE files instead of one invocation per file, the
+installed package functions list every installed package with one
+invocation.
+'''
+import os
+import stat
+
+# Number of files passed to a single rpm or dpkg invocation
+BATCHSIZE = 200
+
+# Results of verifyFiles. The values match those historically returned by
+# FilePermissions.rpmcheck.
+VERIFYCHANGED = 0
+VERIFYOK = 1
+VERIFYNOTFOUND = 3
+VERIFYUNSUPPORTED = 4
+# Not returned by verifyFiles, for callers that could not query the database
+VERIFYERROR = 5
+
+
+def batches(filenames):
+    '''
+    Split a list of files into lists of at most BATCHSIZE entries.
+
+    @param filenames: list of strings
+    @return: generator of lists of strings
+    '''
+    for start in range(0, len(filenames), BATCHSIZE):
+        yield filenames[start:start + BATCHSIZE]
+
+
+def pathmap(filenames):
+    '''
+    Map the passed paths, and the paths they resolve to, back to the passed
+    paths. Package databases record the resolved path, e.g. /usr/bin/su for
+    /bin/su on systems where /bin is a link to /usr/bin.
+
+    @param filenames: list of strings
+    @return: dict
+    '''
+    paths = {}
+    for filename in filenames:
+        paths[os.path.realpath(filename)] = filename
+    for filename in filenames:
+        paths[filename] = filename
+    return paths
+
+
+def rpmfileinfo(cmdhelper, rpm, filenames):
+    '''
+    Look up the owning package and the recorded mode of files in the rpm
+    database. Files not owned by any package are not in the result.
+
+    @param cmdhelper: CommandHelper instance
+    @param rpm: string - path to the rpm executable
+    @param filenames: list of file paths
+    @return: dict of path: (package name, mode)
+    '''
+    info = {}
+    wanted = pathmap(filenames)
+    for batch in batches(filenames):
+        cmdhelper.executeCommand([rpm, '-qf', '--qf',
+                                  '[%{FILENAMES}\t%{FILEMODES}\t%{NAME}\n]']
+                                 + batch)
+        for line in cmdhelper.getOutput():
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) != 3 or fields[0] not in wanted:
+                continue
+            path = wanted[fields[0]]
+            if path not in info:
+                try:
+                    info[path] = (fields[2], int(fields[1]))
+                except ValueError:
+                    continue
+    return info
+
+
+def dpkgfileowners(cmdhelper, filenames):
+    '''
+    Look up the package owning each file in the dpkg database. Files not
+    owned by any package are not in the result.
+
+    @param cmdhelper: CommandHelper instance
+    @param filenames: list of file paths
+    @return: dict of path: package name
+    '''
+    owners = {}
+    wanted = pathmap(filenames)
+    for batch in batches(filenames):
+        cmdhelper.executeCommand(['dpkg', '-S'] + batch)
+        for line in cmdhelper.getOutput():
+            if line.startswith('diversion by') or ': ' not in line:
+                continue
+            packages, path = line.rstrip('\n').split(': ', 1)
+            if path not in wanted or wanted[path] in owners:
+                continue
+            owners[wanted[path]] = packages.split(',')[0].split(':')[0]
+    return owners
+
+
+def rpmverifyfiles(cmdhelper, rpm, filenames):
+    '''
+    Compare the mode of files with the mode recorded in the rpm database,
+    the same check rpm -V reports with the M flag.
+
+    @param cmdhelper: CommandHelper instance
+    @param rpm: string - path to the rpm executable
+    @param filenames: list of file paths
+    @return: dict of path: VERIFYCHANGED, VERIFYOK or VERIFYNOTFOUND
+    '''
+    info = rpmfileinfo(cmdhelper, rpm, filenames)
+    results = {}
+    for filename in filenames:
+        try:
+            mode = os.lstat(filename).st_mode
+        except OSError:
+            results[filename] = VERIFYNOTFOUND
+            continue
+        if filename not in info:
+            results[filename] = VERIFYNOTFOUND
+        elif stat.S_IMODE(mode) != stat.S_IMODE(info[filename][1]) or \
+                stat.S_IFMT(mode) != stat.S_IFMT(info[filename][1]):
+            results[filename] = VERIFYCHANGED
+        else:
+            results[filename] = VERIFYOK
+    return results
+
+
+def rpminstalled(cmdhelper, rpm):
+    '''
+    List the installed packages in the rpm database. Every package is listed
+    under each of the names rpm -q accepts for it: name, name.arch,
+    name-version, name-version-release and name-version-release.arch.
+
+    @param cmdhelper: CommandHelper instance
+    @param rpm: string - path to the rpm executable
+    @return: set of strings or None if the database could not be read
+    '''
+    cmdhelper.executeCommand([rpm, '-qa', '--qf',
+                              '%{NAME}\t%{VERSION}\t%{RELEASE}\t%{ARCH}\\n'])
+    if cmdhelper.getReturnCode() != 0:
+        return None
+    installed = set()
+    for line in cmdhelper.getOutput():
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) != 4:
+            continue
+        name, version, release, arch = fields
+        nvr = name + '-' + version + '-' + release
+        installed.update([name, name + '.' + arch, name + '-' + version,
+                          nvr, nvr + '.' + arch])
+    return installed
+
+
+def dpkginstalled(cmdhelper):
+    '''
+    List the installed packages in the dpkg database, under both their name
+    and name:arch.
+
+    @param cmdhelper: CommandHelper instance
+    @return: set of strings or None if the database could not be read
+    '''
+    cmdhelper.executeCommand(['/usr/bin/dpkg-query', '-W', '-f',
+                              '${Package}\t${Architecture}\t${Status}\\n'])
+    if cmdhelper.getReturnCode() != 0:
+        return None
+    installed = set()
+    for line in cmdhelper.getOutput():
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) != 3 or not fields[2].endswith(' installed'):
+            continue
+        installed.update([fields[0], fields[0] + ':' + fields[1]])
+    return installed
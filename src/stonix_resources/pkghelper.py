@@ -23,8 +23,35 @@
 
 import re
 import yum,aptGet,portage,zypper,freebsd,solaris
+import threading
 import traceback
 from logdispatcher import LogPriority
+from pkgfiles import VERIFYUNSUPPORTED
+
+# Package managers hold an exclusive lock on their database, so installs and
+# removals issued by rules running concurrently must be serialized.
+PKGLOCK = threading.RLock()
+
+# Names of the installed packages, shared by all Pkghelper instances so the
+# package database is listed once per run. Reset after every install or
+# removal and before every audit, see resetinstalled.
+INSTALLED = None
+
+
+def resetinstalled():
+    '''
+    Discard the installed package list shared by the Pkghelper instances so
+    the next check reads the package database again. The Controller calls
+    this before every audit, packages may have been changed outside stonix
+    since the last one.
+    '''
+    global INSTALLED
+    PKGLOCK.acquire()
+    try:
+        INSTALLED = None
+    finally:
+        PKGLOCK.release()
+
 
 class Pkghelper(object):
     '''
@@ -122,11 +149,17 @@ class Pkghelper(object):
         
         try:
             if self.enviro.geteuid() is 0 and self.pckgr :
-                if self.pckgr.installpackage(package):
-                    return True
-                else:
-                    return False
-                return False    
+                PKGLOCK.acquire()
+                try:
+                    try:
+                        if self.pckgr.installpackage(package):
+                            return True
+                        else:
+                            return False
+                    finally:
+                        self.resetPackageCache()
+                finally:
+                    PKGLOCK.release()
             else:
                 msg = "Not running as root, only root can use the pkghelper \
 install command"
@@ -147,10 +180,17 @@ install command"
         @author Derek T Walker July 2012'''
         try:
             if self.enviro.geteuid() == 0:
-                if self.pckgr.removepackage(package):
-                    return True
-                else:
-                    return False
+                PKGLOCK.acquire()
+                try:
+                    try:
+                        if self.pckgr.removepackage(package):
+                            return True
+                        else:
+                            return False
+                    finally:
+                        self.resetPackageCache()
+                finally:
+                    PKGLOCK.release()
             else:
                 msg = "Not running as root, only root can use the pkghelper \
 remove command"
@@ -170,8 +210,13 @@ remove command"
             is to be checked. Must be recognizable to the underlying package 
             manager.
         @return bool :
-        @author Derek T Walker July 2012'''
+        @author Derek T Walker July 2012
+        @change: 2026/10/18 - Served from the installed package list when
+            the package manager can provide one'''
         try:
+            installed = self.getInstalledPackages()
+            if installed is not None:
+                return package in installed
             if self.pckgr.checkInstall(package):
                 return True
             else:
@@ -182,6 +227,40 @@ remove command"
             info = traceback.format_exc()
             self.logger.log(LogPriority.ERROR,info)
             raise
+###############################################################################
+    def getInstalledPackages(self):
+        '''Returns the names of all installed packages. The list is read
+        from the package manager once and shared until a package is installed
+        or removed.
+
+        @return: set of package names or None if the package manager cannot
+            list its installed packages
+        '''
+        global INSTALLED
+        try:
+            if self.pckgr is None or \
+               not hasattr(self.pckgr, "getInstalledPackages"):
+                return None
+            PKGLOCK.acquire()
+            try:
+                if INSTALLED is None:
+                    INSTALLED = self.pckgr.getInstalledPackages()
+                return INSTALLED
+            finally:
+                PKGLOCK.release()
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def resetPackageCache(self):
+        '''Discards the installed package list so the next check reads the
+        package database again. Rules that change packages without going
+        through install or remove must call this.
+        '''
+        resetinstalled()
 ###############################################################################
     def checkAvailable(self,package):
         try:
@@ -212,6 +291,56 @@ remove command"
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR, self.detailedresults)
             raise(self.detailedresults)
+###############################################################################
+    def getPackagesFromFiles(self, filenames):
+        '''Returns the names of the packages that provide the given
+        filenames/paths. Package managers that support it resolve all files
+        with a single query per batch of files instead of one per file.
+
+        @param: list filenames : The names or paths of the files to resolve
+        @return: dict of filename: name of package if found, None otherwise
+        '''
+        try:
+            if self.pckgr is None:
+                return dict([(filename, None) for filename in filenames])
+            if hasattr(self.pckgr, "getPackagesFromFiles"):
+                return self.pckgr.getPackagesFromFiles(filenames)
+            packages = {}
+            for filename in filenames:
+                if hasattr(self.pckgr, "getPackageFromFile"):
+                    packages[filename] = \
+                        self.pckgr.getPackageFromFile(filename)
+                else:
+                    packages[filename] = None
+            return packages
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def verifyFiles(self, filenames):
+        '''Checks whether the given files still have the mode recorded for
+        them in the package database.
+
+        @param: list filenames : The paths of the files to verify
+        @return: dict of filename: pkgfiles.VERIFYCHANGED if the mode
+            differs, VERIFYOK if it matches, VERIFYNOTFOUND if the file is
+            missing or not in the package database and VERIFYUNSUPPORTED if
+            the package manager does not record file modes
+        '''
+        try:
+            if self.pckgr is None or not hasattr(self.pckgr, "verifyFiles"):
+                return dict([(filename, VERIFYUNSUPPORTED)
+                             for filename in filenames])
+            return self.pckgr.verifyFiles(filenames)
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
 ###############################################################################
     def getInstall(self):
         return self.pckgr.getInstall()
@@ -102,6 +102,36 @@ class ProgramArguments(object):
                           default=False,
                           help="List all installed rules that stonix will run on this platform.")
 
+        self.parser.add_option("-g", "--gcarchive", action="store_true",
+                          dest="gcarchive",
+                          default=False,
+                          help="Remove archived copies of configuration files that are no longer needed to undo changes.")
+
+        self.parser.add_option("-j", "--jobs", action="store", type="int",
+                          dest="jobs",
+                          default=1,
+                          help="Number of rules to run concurrently during full system report and fix runs. Defaults to 1 (serial).")
+
+        self.parser.add_option("--profile", action="store_true",
+                          dest="profile",
+                          default=False,
+                          help="Profile the run with cProfile and write the statistics to stonix-profile.pstats in the log directory.")
+
+        self.parser.add_option("--undorun", action="store", type="string",
+                          dest="undorun",
+                          default=None,
+                          help="With -X, only roll back the changes made by this run. Takes a run id or 'last' for the newest run. Defaults to all runs.")
+
+        self.parser.add_option("-D", "--daemon", action="store_true",
+                          dest="daemon",
+                          default=False,
+                          help="Keep running and audit continuously. Rules are audited again as soon as a file they depend on changes, and all rules are audited every --interval minutes.")
+
+        self.parser.add_option("--interval", action="store", type="int",
+                          dest="interval",
+                          default=1440,
+                          help="Minutes between two full audits in daemon mode. Defaults to 1440 (daily).")
+
         #####
         # The Self Update test will look to a development/test environment
         # to test Self Update rather than testing self update
@@ -126,6 +156,17 @@ class ProgramArguments(object):
             self.parser.error('The -p --printconfigsimple option may not be used with the fix, report, rollback, update or GUI options')
         if self.opts.list and (self.opts.fix or self.opts.report or self.opts.rollback or self.opts.pcf or self.opts.update):
             self.parser.error('The -l --list option may not be used with the fix, report, rollback, update or GUI options')
+        if self.opts.gcarchive and (self.opts.fix or self.opts.report or self.opts.rollback or self.opts.pcf or self.opts.pcs or self.opts.update or self.opts.list):
+            self.parser.error('The -g --gcarchive option may not be used with the fix, report, rollback, update, list or print config options')
+
+        if self.opts.undorun is not None and not self.opts.rollback:
+            self.parser.error('The --undorun option requires the -X --rollback option')
+        if self.opts.daemon and (self.opts.fix or self.opts.rollback or self.opts.pcf or self.opts.pcs or self.opts.update or self.opts.list or self.opts.gcarchive or self.opts.gui or self.opts.mod):
+            self.parser.error('The -D --daemon option may not be used with the fix, rollback, update, module, list, print config or GUI options')
+        if self.opts.interval < 1:
+            self.parser.error('The --interval option requires a value of 1 or more')
+        if self.opts.jobs < 1:
+            self.parser.error('The -j --jobs option requires a value of 1 or more')
 
         if self.opts.debug:
             print "Selected options: "
@@ -267,3 +308,54 @@ class ProgramArguments(object):
         @author: D. Kennel
         """
         return self.opts.list
+
+    def getGcArchive(self):
+        """
+        Return a bool for whether or not the CLI has requested the removal
+        of archived files that are no longer referenced.
+
+        @return: bool
+        """
+        return self.opts.gcarchive
+
+    def getProfile(self):
+        """
+        Return a bool for whether or not the run should be profiled.
+
+        @return: bool
+        """
+        return self.opts.profile
+
+    def getJobs(self):
+        """
+        Return the number of rules that may be run concurrently.
+
+        @return: int
+        """
+        return self.opts.jobs
+
+    def getDaemon(self):
+        """
+        Return a bool for whether or not stonix should run as a continuous
+        compliance daemon.
+
+        @return: bool
+        """
+        return self.opts.daemon
+
+    def getInterval(self):
+        """
+        Return the number of minutes between two full audits in daemon mode.
+
+        @return: int
+        """
+        return self.opts.interval
+
+    def getUndoRun(self):
+        """
+        Return the id of the run whose changes a rollback undoes, "last" for
+        the newest run or None for every run.
+
+        @return: string
+        """
+        return self.opts.undorun
@@ -0,0 +1,267 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Spool of run reports waiting to be uploaded to the report server. Reports
+are queued in a directory and sent by a background thread over a single
+kept alive HTTP(S) connection. A failed upload is retried with exponential
+backoff and jitter, so that hosts whose scheduled runs start together do not
+retry together; reports that still could not be sent stay in the spool and
+are sent by the next run. The spool is bounded in both report count and
+size, the oldest reports being dropped first.
+'''
+import httplib
+import mimetypes
+import os
+import random
+import shutil
+import socket
+import ssl
+import threading
+import time
+import urlparse
+
+# Bounds of the spool directory
+MAXREPORTS = 20
+MAXBYTES = 20 * 1024 * 1024
+# Upload attempts per report per run and the base and cap of the delay
+# between them in seconds
+ATTEMPTS = 4
+BACKOFF = 2.0
+MAXBACKOFF = 60.0
+# Socket timeout in seconds
+TIMEOUT = 15
+
+
+class ReportSpool(object):
+    '''
+    Directory of reports waiting for upload. Reports are uploaded oldest
+    first as a multipart/form-data POST with the report in the "file" field.
+    '''
+
+    def __init__(self, spooldir, url, maxreports=MAXREPORTS,
+                 maxbytes=MAXBYTES, attempts=ATTEMPTS, backoff=BACKOFF,
+                 timeout=TIMEOUT):
+        '''
+        @param spooldir: string - spool directory, created if missing
+        @param url: string - http or https URL reports are posted to
+        @param maxreports: int - most reports kept in the spool
+        @param maxbytes: int - most bytes kept in the spool
+        @param attempts: int - upload attempts per report per run
+        @param backoff: float - base delay between attempts in seconds
+        @param timeout: float - socket timeout in seconds
+        '''
+        self.spooldir = spooldir
+        self.url = urlparse.urlsplit(url)
+        self.maxreports = maxreports
+        self.maxbytes = maxbytes
+        self.attempts = attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.conn = None
+        self.thread = None
+        self.sent = []
+        self.failed = []
+        if not os.path.exists(spooldir):
+            os.makedirs(spooldir, 0700)
+
+    def add(self, path):
+        '''
+        Move a report into the spool and drop the oldest reports if the
+        spool is over its bounds.
+
+        @param path: string - report to queue
+        @return: string - path of the report in the spool
+        '''
+        name = time.strftime('%Y%m%d%H%M%S') + '.' + str(os.getpid()) + \
+            '.' + os.path.basename(path)
+        spooled = os.path.join(self.spooldir, name)
+        shutil.move(path, spooled)
+        self.trim()
+        return spooled
+
+    def reports(self):
+        '''
+        Return the paths of the spooled reports, oldest first.
+
+        @return: list of strings
+        '''
+        names = [name for name in os.listdir(self.spooldir)
+                 if not name.startswith('.')]
+        names.sort()
+        return [os.path.join(self.spooldir, name) for name in names]
+
+    def trim(self):
+        '''
+        Remove the oldest reports until the spool is within its bounds.
+
+        @return: list of strings - paths of the removed reports
+        '''
+        reports = self.reports()
+        sizes = dict((report, os.path.getsize(report)) for report in reports)
+        total = sum(sizes.values())
+        removed = []
+        # The newest report is always kept
+        while len(reports) > 1 and (len(reports) > self.maxreports or
+                                    total > self.maxbytes):
+            oldest = reports.pop(0)
+            os.remove(oldest)
+            total -= sizes[oldest]
+            removed.append(oldest)
+        return removed
+
+    def getdelay(self, attempt):
+        '''
+        Return the delay before an upload attempt. The delay doubles with
+        each attempt and is jittered over its whole range.
+
+        @param attempt: int - number of the failed attempts so far
+        @return: float - seconds
+        '''
+        return random.uniform(0, min(MAXBACKOFF,
+                                     self.backoff * (2 ** attempt)))
+
+    def __connect(self):
+        '''
+        Return the connection to the report server, opening it if needed.
+        As with curl -k the server certificate is not verified.
+        '''
+        if self.conn is None:
+            if self.url.scheme == 'https':
+                self.conn = httplib.HTTPSConnection(
+                    self.url.hostname, self.url.port, timeout=self.timeout,
+                    context=ssl._create_unverified_context())
+            else:
+                self.conn = httplib.HTTPConnection(
+                    self.url.hostname, self.url.port, timeout=self.timeout)
+        return self.conn
+
+    def __disconnect(self):
+        '''
+        Close the connection to the report server.
+        '''
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def upload(self, path):
+        '''
+        Post one report to the server. results.php answers 200 whatever
+        happened and tells in the body: "ok <path>" once the report is
+        stored, the upload error code or a message otherwise.
+
+        @param path: string - report to send
+        @return: bool - True if the server stored the report
+        '''
+        boundary = 'stonix' + ('%032x' % random.getrandbits(128))
+        ctype = mimetypes.guess_type(path)
+        if ctype[1] == 'gzip':
+            ctype = 'application/x-gzip'
+        else:
+            ctype = ctype[0] or 'application/octet-stream'
+        report = open(path, 'rb')
+        try:
+            data = report.read()
+        finally:
+            report.close()
+        body = '--' + boundary + '\r\n' + \
+            'Content-Disposition: form-data; name="file"; filename="' + \
+            os.path.basename(path) + '"\r\n' + \
+            'Content-Type: ' + ctype + '\r\n\r\n' + data + '\r\n' + \
+            '--' + boundary + '--\r\n'
+        headers = {'Content-Type': 'multipart/form-data; boundary=' +
+                   boundary}
+        selector = self.url.path or '/'
+        if self.url.query:
+            selector = selector + '?' + self.url.query
+        try:
+            conn = self.__connect()
+            conn.request('POST', selector, body, headers)
+            response = conn.getresponse()
+            answer = response.read()
+            if response.getheader('connection', '').lower() == 'close':
+                self.__disconnect()
+            return 200 <= response.status < 300 and \
+                answer.lstrip().startswith('ok')
+        except (httplib.HTTPException, socket.error, ssl.SSLError):
+            self.__disconnect()
+            return False
+
+    def flush(self):
+        '''
+        Upload every spooled report, retrying failed uploads with backoff.
+        Reports that were sent are removed from the spool; the others are
+        left for the next run. Once a report has used up its attempts the
+        server is taken to be down and the remaining reports are not tried.
+
+        @return: tuple - (list of sent reports, list of reports left)
+        '''
+        sent = []
+        reports = self.reports()
+        try:
+            while reports:
+                report = reports[0]
+                for attempt in range(self.attempts):
+                    if attempt:
+                        time.sleep(self.getdelay(attempt - 1))
+                    if self.upload(report):
+                        break
+                else:
+                    break
+                os.remove(report)
+                sent.append(reports.pop(0))
+        finally:
+            self.__disconnect()
+        self.sent = sent
+        self.failed = reports
+        return sent, reports
+
+    def start(self):
+        '''
+        Start uploading the spool in a background thread. The thread is a
+        daemon so that an unreachable server cannot keep a finished run
+        alive; the run gives it a short wait before exiting and whatever
+        was not sent by then stays in the spool for the next run.
+
+        @return: threading.Thread
+        '''
+        if self.thread is None or not self.thread.isAlive():
+            self.thread = threading.Thread(target=self.flush,
+                                           name='ReportSpool')
+            self.thread.daemon = True
+            self.thread.start()
+        return self.thread
+
+    def wait(self, timeout=None):
+        '''
+        Wait for the background upload to finish.
+
+        @param timeout: float - seconds to wait, None for no limit
+        @return: bool - True if no upload is running
+        '''
+        if self.thread is not None:
+            self.thread.join(timeout)
+            return not self.thread.isAlive()
+        return True
@@ -39,6 +39,8 @@ Created on Aug 24, 2010
 
 @author: dkennel
 @change: eball 2015/07/08 - Added pkghelper and ServiceHelper undos
+@change: 2026/10/18 Added nexteventid
+@change: 2026/10/18 Added getwatchedpaths for the daemon mode
 '''
 
 from observable import Observable
@@ -49,7 +51,7 @@ import os
 import re
 from distutils.version import LooseVersion
 
-from stonixutilityfunctions import isServerVersionHigher
+from stonixutilityfunctions import isServerVersionHigher, iterate
 from subprocess import call
 from localize import DRINITIAL
 from localize import DRREPORTCOMPIANT, DRREPORTNOTCOMPIANT, DRREPORTNOTAVAILABLE
@@ -98,6 +100,9 @@ LANL-stonix."""
         self.currstate = "notconfigured"
         self.targetstate = "configured"
         self.guidance = []
+        self.conflictgroups = []
+        self.runafter = []
+        self.watchedpaths = []
 
     def fix(self):
         """
@@ -251,6 +256,16 @@ LANL-stonix."""
         """
         return self.rulename
 
+    def nexteventid(self):
+        """
+        Return a new change event id for this rule, advancing iditerator the
+        way the rules do before recording each change event.
+
+        @return string :
+        """
+        self.iditerator = getattr(self, 'iditerator', 0) + 1
+        return iterate(self.iditerator, self.rulenumber)
+
     def getmandatory(self):
         """
         Return true if the rule in question represents a mandatory
@@ -432,26 +447,43 @@ LANL-stonix."""
         @author D. Kennel
         @change: 2015/04/13 added this method to template class
         """
+        return Rule.checkapplicable(self.applicable, self.environ,
+                                    self.logdispatch, self.rulename)
+
+    @staticmethod
+    def checkapplicable(applicable, environ, logdispatch, rulename=''):
+        """
+        Evaluate an applicability dictionary, in the format documented in
+        isapplicable, against the environment. This is separate from
+        isapplicable so that the controller can decide whether a rule applies
+        from the rule manifest without importing the rule.
+
+        @param applicable: dict - applicability dictionary
+        @param environ: Environment instance
+        @param logdispatch: LogDispatcher instance
+        @param rulename: string - name of the rule, used for logging only
+        @return bool :
+        """
         # return True
         # Shortcut if we are defaulting to true
-        self.logdispatch.log(LogPriority.DEBUG,
-                             'Check applicability for ' + self.rulename)
-        self.logdispatch.log(LogPriority.DEBUG,
-                             'Dictionary is: ' + str(self.applicable))
+        logdispatch.log(LogPriority.DEBUG,
+                        'Check applicability for ' + str(rulename))
+        logdispatch.log(LogPriority.DEBUG,
+                        'Dictionary is: ' + str(applicable))
         try:
-            if 'os' not in self.applicable and 'family' not in self.applicable:
-                amidefault = self.applicable['default']
+            if 'os' not in applicable and 'family' not in applicable:
+                amidefault = applicable['default']
                 if amidefault == 'default':
-                    self.logdispatch.log(LogPriority.DEBUG,
-                                         'Defaulting to True')
+                    logdispatch.log(LogPriority.DEBUG,
+                                    'Defaulting to True')
                     return True
         except KeyError:
             pass
 
         # Determine whether we are a blacklist or a whitelist, default to a
         # blacklist
-        if 'type' in self.applicable:
-            listtype = self.applicable['type']
+        if 'type' in applicable:
+            listtype = applicable['type']
         else:
             listtype = 'black'
         # Set the default return as appropriate to the list type
@@ -463,23 +495,23 @@ LANL-stonix."""
             applies = False
 
         # get our data in local vars
-        myosfamily = self.environ.getosfamily()
-        myosversion = self.environ.getosver()
-        myostype = self.environ.getostype()
+        myosfamily = environ.getosfamily()
+        myosversion = environ.getosver()
+        myostype = environ.getostype()
 
         # Process the os family list
-        if 'family' in self.applicable:
-            if myosfamily in self.applicable['family']:
+        if 'family' in applicable:
+            if myosfamily in applicable['family']:
                 if listtype == 'black':
                     applies = False
                 else:
                     applies = True
-                self.logdispatch.log(LogPriority.DEBUG,
-                                     'Family match, applies: ' + str(applies))
+                logdispatch.log(LogPriority.DEBUG,
+                                'Family match, applies: ' + str(applies))
 
         # Process the OS list
-        if 'os' in self.applicable:
-            for ostype, osverlist in self.applicable['os'].iteritems():
+        if 'os' in applicable:
+            for ostype, osverlist in applicable['os'].iteritems():
                 if re.search(ostype, myostype):
                     # Process version and up
                     if '+' in osverlist:
@@ -493,8 +525,8 @@ LANL-stonix."""
                                 applies = False
                             else:
                                 applies = True
-                            self.logdispatch.log(LogPriority.DEBUG,
-                                                 'Plus match, applies: ' + str(applies))
+                            logdispatch.log(LogPriority.DEBUG,
+                                            'Plus match, applies: ' + str(applies))
                     # Process version and lower
                     elif '-' in osverlist:
                         assert len(osverlist) is 2, "Wrong number of entries for a -"
@@ -507,12 +539,12 @@ LANL-stonix."""
                                 applies = False
                             else:
                                 applies = True
-                            self.logdispatch.log(LogPriority.DEBUG,
-                                                 'Minus match, applies: ' + str(applies))
+                            logdispatch.log(LogPriority.DEBUG,
+                                            'Minus match, applies: ' + str(applies))
                     # Process inclusive range
                     elif 'r' in osverlist:
                         assert len(osverlist) is 3, "Wrong number of entries for a range"
-                        vertmp = osverlist
+                        vertmp = list(osverlist)
                         vertmp.remove('r')
                         if LooseVersion(vertmp[0]) > LooseVersion(vertmp[1]):
                             highver = vertmp[0]
@@ -528,8 +560,8 @@ LANL-stonix."""
                                 applies = False
                             else:
                                 applies = True
-                            self.logdispatch.log(LogPriority.DEBUG,
-                                                 'Range match, applies: ' + str(applies))
+                            logdispatch.log(LogPriority.DEBUG,
+                                            'Range match, applies: ' + str(applies))
                     # Process explicit match
                     else:
                         if myosversion in osverlist:
@@ -537,13 +569,13 @@ LANL-stonix."""
                                 applies = False
                             else:
                                 applies = True
-                            self.logdispatch.log(LogPriority.DEBUG,
-                                                 'Version match, applies: ' + str(applies))
+                            logdispatch.log(LogPriority.DEBUG,
+                                            'Version match, applies: ' + str(applies))
 
         # Perform the rootless check
-        if applies and self.environ.geteuid() == 0:
-            if 'noroot' in self.applicable:
-                if self.applicable['noroot'] == True:
+        if applies and environ.geteuid() == 0:
+            if 'noroot' in applicable:
+                if applicable['noroot'] == True:
                     applies = False
 
         return applies
@@ -558,6 +590,40 @@ LANL-stonix."""
         """
         return self.guidance
 
+    def getconflictgroups(self):
+        """
+        This method returns the list of conflict groups the rule belongs to.
+        A conflict group is a free form name for a file or subsystem that the
+        rule modifies (e.g. 'sshd' for rules editing sshd_config). When the
+        controller runs rules concurrently, rules sharing a conflict group
+        are never run at the same time.
+
+        @return: list of strings
+        """
+        return self.conflictgroups
+
+    def getrunafter(self):
+        """
+        This method returns the names of the rules that must be run before
+        this rule in fix mode. The controller orders the rules so that each
+        rule runs after the rules named here; names of rules that are not
+        applicable to the platform are ignored.
+
+        @return: list of strings
+        """
+        return self.runafter
+
+    def getwatchedpaths(self):
+        """
+        This method returns the files and directories the report of this rule
+        depends on. In daemon mode the controller re-runs the report when one
+        of them changes. Rules that declare nothing are only checked by the
+        periodic full audit.
+
+        @return: list of strings
+        """
+        return self.watchedpaths
+
     def getcurrstate(self):
         """
         This method returns the current state. This information is only valid
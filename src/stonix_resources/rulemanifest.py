@@ -0,0 +1,314 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+The rule manifest records, for every rule module, the data the controller
+needs to decide whether the rule applies to the current platform: rule
+number, rule name, applicability dictionary, whether root is required and
+the help text. The data is extracted from the rule source with the ast module
+so no rule is imported to build it. The manifest is persisted as JSON in the
+rules directory and refreshed for any rule file whose size or modification
+time changed since it was written.
+
+Rules that override isapplicable, or whose properties are computed at run
+time, are recorded as dynamic and are always imported.
+'''
+import ast
+import json
+import os
+import traceback
+from logdispatcher import LogPriority
+from rule import Rule
+
+MANIFESTVERSION = 1
+MANIFESTNAME = 'rulemanifest.json'
+
+# Template classes whose defaults are known. Rules deriving from anything
+# else are treated as dynamic.
+KNOWNBASES = ['Rule', 'RuleKVEditor']
+
+DEFAULTAPPLICABLE = {'default': 'default'}
+
+
+class RuleManifest(object):
+    '''
+    Loads, refreshes and saves the rule manifest for a rules directory.
+    '''
+
+    def __init__(self, rulespath, logdispatcher):
+        '''
+        Constructor
+
+        @param rulespath: string - path to the stonix rules directory
+        @param logdispatcher: LogDispatcher instance
+        '''
+        self.rulespath = rulespath
+        self.logdispatcher = logdispatcher
+        self.path = os.path.join(rulespath, MANIFESTNAME)
+        self.entries = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        '''
+        Read the persisted manifest, rebuild entries that are missing or
+        stale and write the manifest back if anything changed and the rules
+        directory is writable.
+
+        @return: void
+        '''
+        stored = {}
+        try:
+            fhandle = open(self.path, 'r')
+            try:
+                data = json.load(fhandle)
+            finally:
+                fhandle.close()
+            if data.get('version') == MANIFESTVERSION:
+                stored = asstr(data.get('rules', {}))
+        except (IOError, OSError, ValueError, AttributeError):
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   ['RuleManifest',
+                                    'No usable manifest at ' + self.path])
+        self.entries = {}
+        self.changed = False
+        for module in self.listmodules():
+            filename = os.path.join(self.rulespath, module + '.py')
+            try:
+                fstat = os.stat(filename)
+            except OSError:
+                continue
+            entry = stored.get(module)
+            if entry is None or entry.get('size') != fstat.st_size or \
+               entry.get('mtime') != int(fstat.st_mtime):
+                entry = self.buildentry(module)
+                entry['size'] = fstat.st_size
+                entry['mtime'] = int(fstat.st_mtime)
+                self.changed = True
+            self.entries[module] = entry
+        if len(self.entries) != len(stored):
+            self.changed = True
+        if self.changed:
+            self.save()
+
+    def save(self):
+        '''
+        Write the manifest to the rules directory. Failure to write (e.g. a
+        non-privileged run) is not an error, the manifest is simply rebuilt
+        in memory on the next run.
+
+        @return: bool - True if the manifest was written
+        '''
+        tmpfile = self.path + '.tmp'
+        try:
+            fhandle = open(tmpfile, 'w')
+            try:
+                json.dump({'version': MANIFESTVERSION,
+                           'rules': self.entries}, fhandle, indent=1,
+                          sort_keys=True)
+            finally:
+                fhandle.close()
+            os.chmod(tmpfile, 0644)
+            os.rename(tmpfile, self.path)
+        except (IOError, OSError):
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   ['RuleManifest',
+                                    'Could not write manifest to ' +
+                                    self.path])
+            return False
+        self.changed = False
+        return True
+
+    def listmodules(self):
+        '''
+        Return the names of the rule modules in the rules directory.
+
+        @return: list of strings
+        '''
+        modules = []
+        for rfile in os.listdir(self.rulespath):
+            if rfile.endswith('.py') and not rfile.startswith('__init__'):
+                modules.append(rfile[:-3])
+        modules.sort()
+        return modules
+
+    def getentries(self):
+        '''
+        Return the manifest entries sorted by module name. Each entry is a
+        dict with the keys module, static, rulenumber, rulename,
+        rootrequired, applicable and helptext. When static is False only
+        module is meaningful.
+
+        @return: list of dicts
+        '''
+        return [self.entries[module] for module in sorted(self.entries)]
+
+    def getentry(self, module):
+        '''
+        Return the manifest entry for a rule module or None if unknown.
+
+        @param module: string - rule module name
+        @return: dict
+        '''
+        return self.entries.get(module)
+
+    def isapplicable(self, module, environ):
+        '''
+        Decide from the manifest alone whether a rule applies to this
+        platform and EUID.
+
+        @param module: string - rule module name
+        @param environ: Environment instance
+        @return: True or False, or None when the rule has to be imported to
+            decide
+        '''
+        entry = self.entries.get(module)
+        if entry is None or not entry.get('static'):
+            return None
+        if entry['rootrequired'] and environ.geteuid() != 0:
+            return False
+        try:
+            return Rule.checkapplicable(entry['applicable'], environ,
+                                        self.logdispatcher, entry['rulename'])
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   ['RuleManifest',
+                                    'Could not evaluate ' + module + ': ' +
+                                    traceback.format_exc()])
+            return None
+
+    def buildentry(self, module):
+        '''
+        Build the manifest entry for a rule module by parsing its source.
+
+        @param module: string - rule module name
+        @return: dict
+        '''
+        entry = {'module': module, 'static': False, 'rulenumber': None,
+                 'rulename': None, 'rootrequired': True,
+                 'applicable': None, 'helptext': None}
+        filename = os.path.join(self.rulespath, module + '.py')
+        try:
+            fhandle = open(filename, 'r')
+            try:
+                tree = ast.parse(fhandle.read(), filename)
+            finally:
+                fhandle.close()
+        except (IOError, SyntaxError):
+            return entry
+        ruleclass = None
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == module:
+                ruleclass = node
+        if ruleclass is None:
+            return entry
+        bases = [getattr(base, 'id', getattr(base, 'attr', None))
+                 for base in ruleclass.bases]
+        if len(bases) != 1 or bases[0] not in KNOWNBASES:
+            return entry
+        assigned = {}
+        for method in ruleclass.body:
+            if not isinstance(method, ast.FunctionDef):
+                continue
+            if method.name == 'isapplicable':
+                return entry
+            for node in ast.walk(method):
+                if not isinstance(node, ast.Assign):
+                    continue
+                for target in node.targets:
+                    if isinstance(target, ast.Attribute) and \
+                       isinstance(target.value, ast.Name) and \
+                       target.value.id == 'self':
+                        assigned.setdefault(target.attr, []).append(
+                            (method.name, node.value))
+        values = {}
+        for attr in ['rulenumber', 'rulename', 'rootrequired', 'applicable',
+                     'helptext']:
+            nodes = assigned.get(attr, [])
+            if len(nodes) > 1 or \
+               (len(nodes) == 1 and nodes[0][0] != '__init__'):
+                values[attr] = ValueError
+                continue
+            if not nodes:
+                continue
+            try:
+                values[attr] = literal(nodes[0][1])
+            except ValueError:
+                values[attr] = ValueError
+        if values.get('helptext') is not ValueError:
+            entry['helptext'] = values.get('helptext')
+        for attr in ['rulenumber', 'rulename', 'rootrequired', 'applicable']:
+            if values.get(attr) is ValueError:
+                return entry
+        if 'rulenumber' not in values or 'rulename' not in values:
+            return entry
+        entry['rulenumber'] = values['rulenumber']
+        entry['rulename'] = values['rulename']
+        entry['rootrequired'] = values.get('rootrequired', True)
+        entry['applicable'] = values.get('applicable', DEFAULTAPPLICABLE)
+        entry['static'] = True
+        return entry
+
+
+def asstr(value):
+    '''
+    Convert the unicode strings json returns back to the str values the rule
+    source produces.
+
+    @param value: decoded json value
+    @return: the value with all unicode strings encoded as utf-8
+    '''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [asstr(item) for item in value]
+    if isinstance(value, dict):
+        return dict([(asstr(key), asstr(item))
+                     for key, item in value.iteritems()])
+    return value
+
+
+def literal(node):
+    '''
+    Evaluate an ast node holding a python literal. In addition to what
+    ast.literal_eval accepts this folds string concatenation, which rules
+    commonly use for their help text.
+
+    @param node: ast node
+    @return: the literal value
+    @raise ValueError: if the node is not a literal
+    '''
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = literal(node.left)
+        right = literal(node.right)
+        if isinstance(left, basestring) and isinstance(right, basestring):
+            return left + right
+        raise ValueError('Not a string concatenation')
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, SyntaxError):
+        raise ValueError('Not a literal')
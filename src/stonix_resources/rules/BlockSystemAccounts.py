@@ -51,7 +51,7 @@ import traceback
 
 from ..rule import Rule
 from ..logdispatcher import LogPriority
-from ..stonixutilityfunctions import readFile, writeFile, iterate, checkPerms
+from ..stonixutilityfunctions import writeFile, iterate, checkPerms
 from ..stonixutilityfunctions import setPerms, resetsecon
 
 
@@ -124,7 +124,7 @@ shells set the value of this to False, or No.'''
             if self.environ.getosfamily() == 'darwin':
                 self.nologinopt = '/usr/bin/false'
 
-            contents = readFile("/etc/passwd", self.logger)
+            contents = self.environ.getfilecache().readlines("/etc/passwd")
 
             if contents:
 
@@ -191,7 +191,7 @@ shells set the value of this to False, or No.'''
                     self.statechglogger.deleteentry(event)
 
             path = "/etc/passwd"
-            contents = readFile(path, self.logger)
+            contents = self.environ.getfilecache().readlines(path)
             tempstring = ""
             tmpfile = path + ".tmp"
 
@@ -75,6 +75,7 @@ class BootloaderPerms(Rule):
             'loader config file to be root:root and 600'
         self.rootrequired = True
         self.guidance = ['NSA(2.3.5.2)', 'cce-4144-2', '3923-0, 4197-0']
+        self.conflictgroups = ['bootloader']
 
         # init CIs
         datatype = 'bool'
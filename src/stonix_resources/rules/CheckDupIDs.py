@@ -197,7 +197,7 @@ class CheckDupIDs(Rule):
                                      "Checking : " + adb])
                     namelist = []
                     idlist = []
-                    fdata = open(adb, 'r')
+                    fdata = self.environ.getfilecache().getlines(adb)
                     for line in fdata:
                         line = line.split(':')
                         try:
@@ -229,7 +229,6 @@ class CheckDupIDs(Rule):
                                     "NAMELIST: " + str(namelist))
                     self.logger.log(LogPriority.DEBUG,
                                     "IDLIST: " + str(idlist))
-                    fdata.close()
             return retval
 
         except (KeyboardInterrupt, SystemExit):
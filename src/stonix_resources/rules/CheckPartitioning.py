@@ -67,6 +67,7 @@ on their own partitions: /home, /tmp, ,/var, /var/tmp, /var/log, \
         self.rootrequired = False
         self.guidance = ['CCE 14161-4', 'CCE 14777-7', 'CCE 14011-1',
                          'CCE 14171-3', 'CCE 14559-9']
+        self.conflictgroups = ['fstab']
         self.applicable = {'family': ['darwin']}
         self.hasrunalready = False
 
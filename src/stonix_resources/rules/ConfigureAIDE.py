@@ -67,6 +67,7 @@ class ConfigureAIDE(Rule):
             'Environment (AIDE). This rule is optional and will install and ' + \
             'configure AIDE when it is run.'
         self.guidance = ['NSA(2.1.3)', 'cce-4209-3']
+        self.conflictgroups = ['crontab']
 
         # init CIs
         datatype = 'bool'
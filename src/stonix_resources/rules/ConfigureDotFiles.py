@@ -39,17 +39,19 @@ checked in fix method.
 @change: 2015/04/14 dkennel updated for new isApplicable
 @change: 2015/04/30 Breen corrected mac implementation and separated mac and linux functionality
 @change: 2015/10/07 eball Help text cleanup
+@change: 2026/10/18 Dot files come from the shared home inventory on all
+    platforms instead of listing the home per platform; chmod without a
+    shell
 '''
 
 from __future__ import absolute_import
 import os
-import re
+import stat
 import traceback
-import pwd
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..stonixutilityfunctions import isWritable
-from ..CommandHelper import CommandHelper
+from ..homeinventory import HOMES
 
 
 class ConfigureDotFiles(Rule):
@@ -107,24 +109,15 @@ being made non-world-writable, set the value of ConfigureDotFiles to False.'''
         '''
 
         # defaults
-        dotfilelist = []
         self.compliant = True
         self.detailedresults = ""
-        self.cmdhelper = CommandHelper(self.logger)
 
         try:
 
-            if self.environ.getostype() == 'Mac OS X':
-                dotfilelist = self.buildmacdotfilelist()
-            else:
-                dotfilelist = self.buildlinuxdotfilelist()
-
-            for item in dotfilelist:
-                # is item world writable?
-                if isWritable(self.logger, item, 'other'):
-                    self.compliant = False
-                    self.detailedresults += '\nFound world writable dot file: ' \
-                                            + str(item)
+            for item in self.getwritabledotfiles():
+                self.compliant = False
+                self.detailedresults += '\nFound world writable dot file: ' \
+                                        + str(item)
 
         except (KeyboardInterrupt, SystemExit):
             raise
@@ -138,98 +131,48 @@ being made non-world-writable, set the value of ConfigureDotFiles to False.'''
         self.logdispatch.log(LogPriority.INFO, self.detailedresults)
         return self.compliant
 
-    def buildlinuxdotfilelist(self):
+    def builddotfilelist(self):
         '''
-        build a list of linux dot files for the current user
-        @return: dotfilelist
-        @rtype: list
+        build a dict of the dot files of the current user, from the shared
+        home inventory. Only regular users (uid 500 and up) are considered.
+
+        @return: dotfiles
+        @rtype: dict of path: os.lstat result
         @author: Breen Malmberg
         '''
 
-        dotfilelist = []
-
-        try:
-
-            f = open('/etc/passwd', 'r')
-            contentlines = f.readlines()
-            f.close()
-
-            for line in contentlines:
-
-                line = line.split(':')
-
-                if len(line) >= 6 and line[5] and \
-                   self.environ.geteuidhome() == str(line[5]):
-
-                    line[2] = int(line[2])
-                    if line[2] >= 500 and not re.search('nfsnobody', line[0]):
-
-                        if os.path.exists(line[5]):
-                            filelist = os.listdir(line[5])
-                            for i in range(len(filelist)):
-                                if re.search('^\.', filelist[i]):
-                                    dotfilelist.append(line[5] + '/' +
-                                                       filelist[i])
-
-        except Exception:
-            raise
-        return dotfilelist
-
-    def buildmacdotfilelist(self):
+        dotfiles = {}
+        home = self.environ.geteuidhome()
+        for account in HOMES.getuseraccounts(500):
+            if account.pw_dir != home:
+                continue
+            homedir = HOMES.gethome(home)
+            if not homedir.reachable:
+                self.detailedresults += '\nHome directory ' + home + \
+                    ' is not reachable'
+                break
+            for name, info in homedir.dotfiles.items():
+                dotfiles[os.path.join(home, name)] = info
+            break
+        return dotfiles
+
+    def getwritabledotfiles(self):
         '''
-        build a list of mac dot files for the current user
-        @return: dotfilelist
-        @rtype: list
+        return the world writable dot files of the current user. Links are
+        followed.
+
+        @return: list of paths
         @author: Breen Malmberg
         '''
 
-        dotfilelist = []
-        users = []
-        homedirs = []
-
-        try:
-
-            cmd = ["/usr/bin/dscl", ".", "-list", "/Users"]
-            try:
-                self.cmdhelper.executeCommand(cmd)
-            except OSError as oser:
-                if re.search('DSOpenDirServiceErr', str(oser)):
-                    self.detailedresults += '\n' + str(oser)
-                    self.logger.log(LogPriority.DEBUG, self.detailedresults)
-            output = self.cmdhelper.getOutput()
-            error = self.cmdhelper.getError()
-            if error:
-                self.detailedresults += '\nCould not get a list of user ' + \
-                    'home directories. Returning empty list...'
-                return dotfilelist
-
-            if output:
-                for user in output:
-                    if not re.search('^_|^root|^\/$', user):
-                        users.append(user.strip())
-                        debug = "Adding user " + user.strip() + " to users " \
-                                + "list"
-                        self.logger.log(LogPriority.DEBUG, debug)
-
-            if users:
-                for user in users:
-                    try:
-                        currpwd = pwd.getpwnam(user)
-                        homedirs.append(currpwd[5])
-                    except KeyError:
-                        continue
-
-            if homedirs:
-                for homedir in homedirs:
-                    if self.environ.geteuidhome() == homedir:
-                        filelist = os.listdir(homedir)
-                        for i in range(len(filelist)):
-                            if re.search('^\.', filelist[i]):
-                                dotfilelist.append(homedir + '/' + filelist[i])
-
-        except Exception:
-            raise
-        return dotfilelist
+        writable = []
+        for item, info in sorted(self.builddotfilelist().items()):
+            if stat.S_ISLNK(info.st_mode):
+                if isWritable(self.logger, item, 'other'):
+                    writable.append(item)
+            elif info.st_mode & stat.S_IWOTH:
+                writable.append(item)
+        return writable
 
     def fix(self):
         '''
@@ -240,7 +183,6 @@ being made non-world-writable, set the value of ConfigureDotFiles to False.'''
         '''
 
         # defaults
-        dotfilelist = []
         self.detailedresults = ""
         self.rulesuccess = True
 
@@ -248,21 +190,17 @@ being made non-world-writable, set the value of ConfigureDotFiles to False.'''
 
             try:
 
-                if self.environ.getostype() == 'Mac OS X':
-                    dotfilelist = self.buildmacdotfilelist()
-                else:
-                    dotfilelist = self.buildlinuxdotfilelist()
-
-                if dotfilelist:
-                    for item in dotfilelist:
-                        if os.path.isfile(item):
-
-                            try:
-                                os.system('chmod o-w ' + item)
-                            except (OSError, IOError):
-                                self.rulesuccess = False
-                                self.detailedresults += '\nCould not chmod: ' \
-                                                        + str(item)
+                for item in self.getwritabledotfiles():
+                    if os.path.isfile(item):
+
+                        try:
+                            mode = stat.S_IMODE(os.stat(item).st_mode)
+                            os.chmod(item, mode & ~stat.S_IWOTH)
+                        except (OSError, IOError):
+                            self.rulesuccess = False
+                            self.detailedresults += '\nCould not chmod: ' \
+                                                    + str(item)
+                HOMES.invalidate(self.environ.geteuidhome())
 
             except (KeyboardInterrupt, SystemExit):
                 raise
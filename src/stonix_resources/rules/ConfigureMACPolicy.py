@@ -67,6 +67,7 @@ These programs are called Mandatory Access Control programs and are essential \
 for enforcing what certain programs are allowed and not allowed to do.'''
         self.guidance = ['NSA(2.1.1.6)(2.4.2)', 'CCE-3977-6', 'CCE-3999-0',
                          'CCE-3624-4', 'CIS 1.7']
+        self.conflictgroups = ['bootloader']
         self.setype = "targeted"
         self.universal = "#The following lines were added by stonix\n"
         self.iditerator = 0
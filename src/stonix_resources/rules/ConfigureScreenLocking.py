@@ -36,16 +36,18 @@ Created on Jul 11, 2013
 @change: 2015/08/26 ekkehard - Artifact artf37282 : ConfigureScreenLocking(74)
                              - askForPasswordDelay not set to 0
 @change: 2015/10/07 eball Help text/PEP8 cleanup
+@change: 2026/10/18 KDE users and their homes come from the shared home
+    inventory, unreachable homes are skipped
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import iterate, checkPerms, setPerms
-from ..stonixutilityfunctions import readFile, resetsecon
+from ..stonixutilityfunctions import resetsecon
 from ..ruleKVEditor import RuleKVEditor
 from ..logdispatcher import LogPriority
 from ..pkghelper import Pkghelper
-from subprocess import PIPE, Popen
 from ..KVEditorStonix import KVEditorStonix
 from ..CommandHelper import CommandHelper
+from ..homeinventory import HOMES
 import os
 import traceback
 import re
@@ -265,150 +267,65 @@ desired value after being run which is " + getcmds[cmd] + "\n"
         '''determines if kde is installed, if so, ensures kde is configured
         by enabling screenlocking, automatically going black after 14 minutes
         and if inactivity ensues after 14 minutes, screen fully locks after 1
-        additional minute of inactivity for a total of 15 minutes activity
+        additional minute of inactivity for a total of 15 minutes activity.
+        As root every user with a home under /home is checked, otherwise only
+        the current user.
         @author: dwalker
         @param self - essential if you override this definition
         @return: bool
         '''
         finalcompliant = True
         self.kdefix = []
-        debug = ""
-        if self.environ.geteuid() == 0:
-            contents = readFile("/etc/passwd", self.logger)
-            if not contents:
-                debug = "You have some serious issues, /etc/passwd is blank\n"
-                self.logger.log(LogPriority.INFO, debug)
-                self.rulesuccess = False
-                return False
-            for line in contents:
-                compliant = True
-                temp = line.split(":")
-                try:
-                    if int(temp[2]) >= 500:
-                        if temp[5] and re.search('/', temp[5]):
-                            homebase = temp[5]
-                            if not re.search("^/home/", homebase):
-                                continue
-                            homebase += '/.kde'
-                            if not os.path.exists(homebase):
-                                compliant = False
-                            else:
-                                homebase += '/share'
-                                if not os.path.exists(homebase):
-                                    compliant = False
-                                else:
-                                    homebase += '/config'
-                                    if not os.path.exists(homebase):
-                                        compliant = False
-                                    else:
-                                        kfile = homebase + '/kdesktoprc'
-                                        if not os.path.exists(kfile):
-                                            kfile = homebase + '/kscreensaverrc'
-                                            if not os.path.exists(kfile):
-                                                compliant = False
-                                            else:
-                                                uid = getpwnam(temp[0])[2]
-                                                gid = getpwnam(temp[0])[3]
-                                                if not checkPerms(kfile,
-                                                                  [uid, gid, 384],
-                                                                  self.logger):
-                                                    compliant = False
-                                                if not self.searchFile(kfile):
-                                                    compliant = False
-                            if not compliant:
-                                finalcompliant = False
-                                self.kdefix.append(temp[0])
-                        else:
-                            debug += "placeholder 6 in /etc/passwd is not a \
-directory, invalid form of /etc/passwd"
-                            self.logger.log(LogPriority.DEBUG, debug)
-                            return False
-                except IndexError:
-                    compliant = False
-                    debug += traceback.format_exc() + "\n"
-                    debug += "Index out of range\n"
-                    self.logger.log(LogPriority.DEBUG, debug)
-                    break
-                except Exception:
-                    break
-            if self.kdefix:
-                self.detailedresults += "The following users don't " + \
-                                        "have kde configured:\n"
-                for user in self.kdefix:
-                    self.detailedresults += user + "\n"
-        else:
-            if self.environ.getosfamily() == "solaris":
-                who = "/usr/bin/who"
-            else:
-                who = "/usr/bin/whoami"
-            message = Popen(who, stdout=PIPE, shell=False)
-            if self.environ.getosfamily() == "solaris":
-                info = message.stdout.read().split()
-                info = info[0]
-            else:
-                info = message.stdout.read().strip()
-            contents = readFile('/etc/passwd', self.logger)
-            if not contents:
-                debug += "You have some serious issues, /etc/passwd is blank\n"
-                self.logger.log(LogPriority.INFO, debug)
-                self.rulesuccess = False
+        euid = self.environ.geteuid()
+        accounts = []
+        for account in HOMES.getuseraccounts(500):
+            if euid == 0 or account.pw_uid == euid:
+                if re.search("^/home/", account.pw_dir):
+                    accounts.append(account)
+        homes = HOMES.gethomes([account.pw_dir for account in accounts])
+        for account in accounts:
+            homedir = homes[account.pw_dir]
+            if not homedir.reachable:
+                debug = "Skipping unreachable home " + account.pw_dir + "\n"
+                self.logger.log(LogPriority.DEBUG, debug)
+                continue
+            if not self.checkKdeHome(account, homedir):
+                finalcompliant = False
+                self.kdefix.append(account.pw_name)
+        if self.kdefix:
+            self.detailedresults += "The following users don't " + \
+                                    "have kde configured:\n"
+            for user in self.kdefix:
+                self.detailedresults += user + "\n"
+        return finalcompliant
+
+###############################################################################
+
+    def checkKdeHome(self, account, homedir):
+        '''checks the kde screensaver configuration of one user
+        @author: dwalker
+        @param account: pwd.struct_passwd of the user
+        @param homedir: HomeDir snapshot of the user's home
+        @return: bool
+        '''
+        if ".kde" not in homedir.dotfiles:
+            return False
+        homebase = os.path.join(homedir.path, ".kde", "share", "config")
+        if not os.path.exists(homebase):
+            return False
+        kfile = homebase + '/kdesktoprc'
+        if not os.path.exists(kfile):
+            kfile = homebase + '/kscreensaverrc'
+            if not os.path.exists(kfile):
                 return False
             compliant = True
-            for line in contents:
-                temp = line.split(':')
-                try:
-                    if temp[0] == info:
-                        if temp[5] and re.search('/', temp[5]):
-                            homebase = temp[5]
-                            if not re.search("^/home/", homebase):
-                                continue
-                            homebase += '/.kde'
-                            if not os.path.exists(homebase):
-                                compliant = False
-                            else:
-                                homebase += '/share'
-                                if not os.path.exists(homebase):
-                                    compliant = False
-                                else:
-                                    homebase += '/config'
-                                    if not os.path.exists(homebase):
-                                        compliant = False
-                                    else:
-                                        kfile = homebase + '/kdesktoprc'
-                                        if not os.path.exists(kfile):
-                                            kfile = homebase + '/kscreensaverrc'
-                                            if not os.path.exists(kfile):
-                                                compliant = False
-                                            else:
-                                                uid = getpwnam(temp[0])[2]
-                                                gid = getpwnam(temp[0])[3]
-                                                if not checkPerms(kfile,
-                                                                  [uid, gid, 384],
-                                                                  self.logger):
-                                                    compliant = False
-                                                if not self.searchFile(kfile):
-                                                    compliant = False
-                            if not self.searchFile(kfile):
-                                self.kdefix.append(temp[0])
-                                compliant = False
-                            if not compliant:
-                                finalcompliant = False
-                            break
-                        else:
-                            debug += "placeholder 6 in /etc/passwd is not a \
-directory, invalid form of /etc/passwd"
-                            self.logger.log(LogPriority.DEBUG, debug)
-                            return False
-                        break
-                except IndexError:
-                    compliant = False
-                    debug += traceback.format_exc() + "\n"
-                    debug += "Index out of range\n"
-                    self.logger.log(LogPriority.DEBUG, debug)
-                    break
-                except Exception:
-                    break
-        return finalcompliant
+            if not checkPerms(kfile, [account.pw_uid, account.pw_gid, 384],
+                              self.logger):
+                compliant = False
+            if not self.searchFile(kfile):
+                compliant = False
+            return compliant
+        return True
 
 ###############################################################################
 
@@ -581,10 +498,11 @@ for this portion of the rule\n"
                 homebase = "/export/home/"
             else:
                 homebase = "/home/"
-            homebase += user
-            homebase += "/.kde/share/config"
+            homedir = homebase + user
+            homebase = homedir + "/.kde/share/config"
             if not os.path.exists(homebase):
                 os.makedirs(homebase)
+                HOMES.invalidate(homedir)
             kfile = homebase + "/kdesktoprc"
             if not os.path.exists(kfile):
                 kfile = homebase + "/kscreensaverrc"
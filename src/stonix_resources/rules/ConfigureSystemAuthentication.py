@@ -106,6 +106,7 @@ for the login.defs file"""
         self.ci4 = self.initCi(datatype, key, instructions, default)
 
         self.guidance = ["NSA 2.3.3.1,", "NSA 2.3.3.2"]
+        self.conflictgroups = ['pam', 'logindefs']
         self.iditerator = 0
         self.created = False
 
@@ -68,6 +68,8 @@ class ConsoleRootOnly(Rule):
             "to console only"
         self.formatDetailedResults("initialize")
         self.guidance = ['CIS, NSA(2.3.1.1), cce3820-8, 3485-0, 4111-1']
+        self.conflictgroups = ['sshd', 'securetty']
+        self.runafter = ['SecureSSH']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd']}
 
@@ -60,6 +60,7 @@ to log into another user's active, locked session.'''
         self.ci = self.initCi(datatype, key, instructions, default)
 
         self.guidance = ["CIS 5.10"]
+        self.conflictgroups = ['pam']
         self.iditerator = 0
 
     def report(self):
@@ -98,6 +98,7 @@ enabled.'''
         self.guidance = ["NSA 3.6.1.1", "NSA 3.6.1.2", "NSA 3.6.1.3",
                          "CCE 4462-8", "CCE 4422-2", "CCE 4448-7",
                          "CCE 4074-1"]
+        self.conflictgroups = ['bootloader', 'inittab']
         self.iditerator = 0
         self.ph = Pkghelper(self.logger, self.environ)
         self.ch = CommandHelper(self.logger)
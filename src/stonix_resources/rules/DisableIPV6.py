@@ -31,6 +31,9 @@ Created on Apr 9, 2013
 @change: 2015/04/15 dkennel updated for new isApplicable
 @change: 2015/10/07 eball Help text/PEP8 cleanup
 @change: 2015/11/16 eball Moved all file creation from report to fix
+@change: 2026/10/18 Linux sysctl settings handled by the shared sysctl
+    service
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import iterate, setPerms, checkPerms, writeFile
@@ -41,6 +44,8 @@ from ..KVEditorStonix import KVEditorStonix
 from ..pkghelper import Pkghelper
 from ..CommandHelper import CommandHelper
 from ..ServiceHelper import ServiceHelper
+from ..filetransaction import TRANSACTION
+from ..sysctlservice import SYSCTL
 import traceback
 import os
 import re
@@ -58,6 +63,8 @@ class DisableIPV6(Rule):
         self.helptext = "Disables IPV6 functionality. For Solaris " + \
             "systems, only the report will be run."
         self.guidance = ["NSA 2.5.3.1"]
+        self.conflictgroups = ['sshd', 'sysctl']
+        self.runafter = ['SecureSSH']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
@@ -71,7 +78,11 @@ class DisableIPV6(Rule):
         self.ci = self.initCi(datatype, key, instructions, default)
 
         self.iditerator = 0
-        self.created = False
+        if self.environ.getosfamily() == "linux":
+            self.sysctls = {"net.ipv6.conf.all.disable_ipv6": "1",
+                            "net.ipv6.conf.default.disable_ipv6": "1"}
+            SYSCTL.declare(self.rulename, self.sysctls)
+            self.watchedpaths = SYSCTL.getwatchedpaths()
         self.created2 = False
         self.editor1, self.editor2, self.editor3 = "", "", ""
         self.sh = ServiceHelper(self.environ, self.logger)
@@ -355,7 +366,6 @@ and/or wasn't able to be created\n"
         netwrkfile = ""
         ifacefile = ""
         self.editor1, self.editor2, self.editor3 = "", "", ""
-        sysctl = "/etc/sysctl.conf"
         modprobecompliant = True
         modprobefile = "/etc/modprobe.conf"
         modprobedir = "/etc/modprobe.d/"
@@ -363,8 +373,6 @@ and/or wasn't able to be created\n"
                      "NETWORKING_IPV6": "no"}
         self.rulesuccess = True
         compliant = True
-        sysctls = {"net.ipv6.conf.all.disable_ipv6": "1",
-                   "net.ipv6.conf.default.disable_ipv6": "1"}
         self.helper = Pkghelper(self.logger, self.environ)
         if self.helper.manager == "yum":
             ifacefile = "/etc/sysconfig/network-scripts/"
@@ -407,23 +415,12 @@ and/or wasn't able to be created\n"
                     continue
                 if re.search(":", line):
                     compliant = False
-#-----------------------check /etc/sysctl.conf--------------------------------#
-        if not os.path.exists(sysctl):
-            self.detailedresults += "File " + sysctl + " does not exist\n"
+#-----------------------check sysctl settings---------------------------------#
+        SYSCTL.declare(self.rulename, self.sysctls)
+        problems = SYSCTL.check(self.rulename)
+        if problems:
+            self.detailedresults += "\n".join(problems) + "\n"
             compliant = False
-        else:
-            if not checkPerms(sysctl, [0, 0, 420], self.logger):
-                self.detailedresults += "Permissions for " + sysctl + \
-                    "are incorrect\n"
-                compliant = False
-            tmpfile = sysctl + ".tmp"
-            self.editor1 = KVEditorStonix(self.statechglogger, self.logger,
-                                          "conf", sysctl, tmpfile, sysctls,
-                                          "present", "openeq")
-            if not self.editor1.report():
-                self.detailedresults += "/etc/sysctl file doesn't contain \
-the correct contents\n"
-                compliant = False
 #---------------------check out /etc/modprobe.conf----------------------------#
         # this file is optional so if it doesn't exist, no harm done, however
         # if it does exist, it needs to be configured correctly
@@ -635,9 +632,6 @@ contain the correct contents\n"
         netwrkfile = ""
         tempstring1 = ""
         tempstring2 = ""
-        sysctl = "/etc/sysctl.conf"
-        sysctls = {"net.ipv6.conf.all.disable_ipv6": "1",
-                   "net.ipv6.conf.default.disable_ipv6": "1"}
         modprobefile = "/etc/modprobe.conf"
         modprobedir = "/etc/modprobe.d/"
         interface = {"IPV6INIT": "no",
@@ -686,57 +680,13 @@ contain the correct contents\n"
                 debug = "Unable to disable ip6tables service\n"
                 self.logger.log(LogPriority.DEBUG, debug)
 #---------------------------fix Sysctl----------------------------------------#
-        if not os.path.exists(sysctl):
-            if createFile(sysctl, self.logger):
-                self.created = True
-                setPerms(sysctl, [0, 0, 420], self.logger)
-                tmpfile = sysctl + ".tmp"
-                self.iditerator += 1
-                myid = iterate(self.iditerator, self.rulenumber)
-                event = {"eventtype": "creation",
-                         "filepath": sysctl}
-                self.statechglogger.recordchgevent(myid, event)
-            else:
-                success = False
-                debug = "Unable to create " + sysctl + "\n"
-                self.logger.log(LogPriority.DEBUG, debug)
-        if os.path.exists(sysctl):
-            self.editor1 = KVEditorStonix(self.statechglogger, self.logger,
-                                          "conf", sysctl, tmpfile, sysctls,
-                                          "present", "openeq")
-            if not self.editor1.report():
-                if self.editor1.fixables:
-                    self.iditerator += 1
-                    # If we did not create the file, set an event ID for the
-                    # KVEditor's undo event
-                    if not self.created:
-                        myid = iterate(self.iditerator, self.rulenumber)
-                        self.editor1.setEventID(myid)
-                    if not self.editor1.fix():
-                        success = False
-                        debug = "Unable to complete kveditor fix method" + \
-                            "for /etc/sysctl.conf file\n"
-                        self.logger.log(LogPriority.DEBUG, debug)
-                    elif not self.editor1.commit():
-                        success = False
-                        debug = "Unable to complete kveditor commit " + \
-                            "method for /etc/sysctl.conf file\n"
-                        self.logger.log(LogPriority.DEBUG, debug)
-                    if not checkPerms(sysctl, [0, 0, 420], self.logger):
-                        self.iditerator += 1
-                        myid = iterate(self.iditerator, self.rulenumber)
-                        if not setPerms(sysctl, [0, 0, 420], self.logger,
-                                        self.statechglogger, myid):
-                            success = False
-                            debug = "Unable to set permissions on /etc/sysctl.conf\n"
-                            self.logger.log(LogPriority.DEBUG, debug)
-                    resetsecon(sysctl)
-                    cmdhelper = CommandHelper(self.logger)
-                    cmd = ["/sbin/sysctl", "-q", "-e", "-p"]
-                    if not cmdhelper.executeCommand(cmd):
-                        success = False
-                        debug = "Unable to reset sysctl\n"
-                        self.logger.log(LogPriority.DEBUG, debug)
+        SYSCTL.declare(self.rulename, self.sysctls)
+        failed = SYSCTL.fix(self.rulename, self.statechglogger,
+                            self.nexteventid)
+        if failed:
+            success = False
+            debug = "Unable to set " + ", ".join(failed) + "\n"
+            self.logger.log(LogPriority.DEBUG, debug)
 #--------------------------fix /etc/modprobe.conf-----------------------------#
         tempstring = ""
         tmpfile = modprobefile + ".tmp"
@@ -1071,6 +1021,10 @@ the correct contents\n"
                             debug = "Unable to complete kveditor commit " + \
                                 "method for /etc/ssh/sshd_config file\n"
                             self.logger.log(LogPriority.DEBUG, debug)
+                        else:
+                            TRANSACTION.reloadservice(self.sh,
+                                                      "/etc/ssh/sshd_config",
+                                                      "sshd")
                         os.chown("/etc/ssh/sshd_config", 0, 0)
                         os.chmod("/etc/ssh/sshd_config", 420)
                         resetsecon("/etc/ssh/sshd_config")
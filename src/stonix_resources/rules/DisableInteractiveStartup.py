@@ -59,6 +59,7 @@ class DisableInteractiveStartup(Rule):
             "interactive startup/boot mode. This may also be known as " + \
             "recovery mode."
         self.guidance = ['CCE 4245-7']
+        self.conflictgroups = ['bootloader']
         self.applicable = {'type': 'white',
                            'family': ['linux']}
 
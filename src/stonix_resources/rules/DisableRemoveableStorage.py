@@ -40,6 +40,7 @@ OS X Mavericks not Mountain Lion, Lion, etc.
 @change: 2015/04/15 dkennel updated for new isApplicable
 @change: 2015/10/07 eball Help text/PEP8 cleanup
 @change: 2016/03/01 ekkehard cgi default value set to False
+@change: 2026/10/18 Get the kernel release from os.uname instead of uname -r
 '''
 
 from __future__ import absolute_import
@@ -53,6 +54,7 @@ from ..stonixutilityfunctions import readFile, setPerms, createFile, getUserGrou
 from ..stonixutilityfunctions import checkPerms, iterate, writeFile, resetsecon
 from ..logdispatcher import LogPriority
 from ..pkghelper import Pkghelper
+from ..sysquery import getkernelrelease
 import stat
 import pwd
 import grp
@@ -77,6 +79,7 @@ class DisableRemoveableStorage(Rule):
             "This rule will be mandatory for those who work on the red " + \
             "network."
         self.guidance = ['NSA 2.2.2.2, CIS, NSA(2.2.2.2), cce-4006-3,4173-1']
+        self.conflictgroups = ['bootloader']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
@@ -139,19 +142,13 @@ class DisableRemoveableStorage(Rule):
                                         compliant = False
 
                 # check if usb kernel module exists, non compliant if yes
-                self.ch.wait = False
-                self.ch.executeCommand("uname -r")
-                self.ch.wait = True
-                output = self.ch.getOutput()
-                if output:
-                    output = output[0].strip()
-                    if os.path.exists("/lib/modules/" + output +
-                                      "/kernel/drivers/usb/storage/usb-storage.ko"):
-                        debug = "Kernel module exists but shouldn't\n"
-                        self.detailedresults += "Kernel module exists " + \
-                            "but shouldn't\n"
-                        self.logger.log(LogPriority.DEBUG, debug)
-                        compliant = False
+                if os.path.exists("/lib/modules/" + getkernelrelease() +
+                                  "/kernel/drivers/usb/storage/usb-storage.ko"):
+                    debug = "Kernel module exists but shouldn't\n"
+                    self.detailedresults += "Kernel module exists " + \
+                        "but shouldn't\n"
+                    self.logger.log(LogPriority.DEBUG, debug)
+                    compliant = False
 
                 # check for existence of certain usb packages, non-compliant
                 # if any exist
@@ -640,23 +637,17 @@ if __name__ == '__main__':
                                 os.chmod(blacklistf, 420)
                                 resetsecon(blacklistf)
                     # get the current version of the kernel
-                    self.wait = False
-                    self.ch.executeCommand("uname -r")
-                    self.wait = True
-                    output = self.ch.getOutput()
-                    if output:
-                        output = output[0].strip()
-                        originalPath = "/lib/modules/" + output + \
-                            "/kernel/drivers/usb/storage/usb-storage.ko"
-                        newPath = "/usb-storage.ko"
-                        if os.path.exists(originalPath):
-                            os.rename(originalPath, newPath)
-                            cmd = self.mvcmd + " " + newPath + " " + originalPath
-                            self.iditerator += 1
-                            myid = iterate(self.iditerator, self.rulenumber)
-                            event = {"eventtype": "commandstring",
-                                         "command": cmd}
-                            self.statechglogger.recordchgevent(myid, event)
+                    originalPath = "/lib/modules/" + getkernelrelease() + \
+                        "/kernel/drivers/usb/storage/usb-storage.ko"
+                    newPath = "/usb-storage.ko"
+                    if os.path.exists(originalPath):
+                        os.rename(originalPath, newPath)
+                        cmd = self.mvcmd + " " + newPath + " " + originalPath
+                        self.iditerator += 1
+                        myid = iterate(self.iditerator, self.rulenumber)
+                        event = {"eventtype": "commandstring",
+                                 "command": cmd}
+                        self.statechglogger.recordchgevent(myid, event)
                     for item in self.pcmcialist:
                         if self.ph.check(item):
                             self.ph.remove(item)
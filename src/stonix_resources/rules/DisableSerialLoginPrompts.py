@@ -62,6 +62,7 @@ virtual console interfaces.'''
         self.ci = self.initCi(datatype, key, instructions, default)
 
         self.guidance = ["NSA 2.3.1.1", "CCE 4111-1", "CCE 4256-4"]
+        self.conflictgroups = ['securetty']
         self.iditerator = 0
         self.myos = self.environ.getostype().lower()
 
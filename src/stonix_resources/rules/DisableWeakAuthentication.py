@@ -59,6 +59,8 @@ class DisableWeakAuthentication(Rule):
                         "implemented or installed"
         self.formatDetailedResults("initialize")
         self.guidance = ["NSA 3.2.3.1"]
+        self.conflictgroups = ['pam']
+        self.runafter = ['ConfigureSystemAuthentication']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd']}
 
@@ -73,6 +73,7 @@ modifications, and authentication events."""
                          'CCE-4075-8', 'CCE-4600-3', 'CCE-4498-2',
                          'CCE-4401-6', 'CCE-4337-2', 'CCE-4606-0',
                          'CCE-4610-2']
+        self.conflictgroups = ['bootloader']
         self.iditerator = 0
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
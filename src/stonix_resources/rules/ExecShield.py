@@ -27,17 +27,17 @@ ExecShield overflow prevention and the randomize_va_space ASLR mechanism.
 @author: dkennel
 @change: 2015/04/15 dkennel updated for new isApplicable
 @change: 2015/10/07 eball Help text/PEP8 cleanup
+@change: 2026/10/18 Check and set the parameters through the shared sysctl
+    service, persisted in a sysctl.d drop-in
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 import os
-import re
 import traceback
-import subprocess
 
 from ..rule import Rule
-from ..stonixutilityfunctions import resetsecon
 from ..logdispatcher import LogPriority
-from ..KVEditorStonix import KVEditorStonix
+from ..sysctlservice import SYSCTL
 
 
 class ExecShield(Rule):
@@ -65,14 +65,10 @@ ExecShield, which prevents execution of memory locations that should only \
 hold data, and va_randomize, which randomizes the locations of various memory \
 regions.'''
         self.rootrequired = True
-        self.comment = re.compile('^#|^;')
-        self.sysctlconf = '/etc/sysctl.conf'
-        self.tmpPath = '/etc/sysctl.conf.tmp'
-        self.comment = re.compile('^#|^;')
         self.guidance = ['CCE-27007-4', 'CCE-26999-3']
+        self.conflictgroups = ['sysctl']
         self.applicable = {'type': 'white',
                            'family': ['linux']}
-        self.varandomcompliant = False
         self.shieldprocpath = '/proc/sys/kernel/exec-shield'
         if os.path.exists(self.shieldprocpath):
             self.execshieldapplies = True
@@ -81,7 +77,9 @@ regions.'''
         else:
             self.execshieldapplies = False
             self.directives = {'kernel.randomize_va_space': '2'}
-        self.execshieldcompliant = False
+        if self.environ.getosfamily() == 'linux':
+            SYSCTL.declare(self.rulename, self.directives)
+            self.watchedpaths = SYSCTL.getwatchedpaths()
         self.ExecCI = self.__initializeExecShield()
 
     def __initializeExecShield(self):
@@ -101,66 +99,24 @@ regions.'''
         myci = self.initCi(datatype, key, instructions, default)
         return myci
 
-    def checkproc(self, procpath):
-        '''
-        Check for the value of a specific key in proc. Return that value.
-        This method is designed for proc keys that only return a single value.
-
-        @param procpath string: fully qualified path to the element to be
-        checked.
-        @return: string version of the value at that proc location.
-        @author: dkennel
-        '''
-        myval = ''
-        try:
-            rhandle = open(procpath, 'r')
-            myval = rhandle.read()
-            rhandle.close()
-            myval = myval.strip()
-            return myval
-        except (KeyboardInterrupt, SystemExit):
-            # User initiated exit
-            raise
-        except Exception:
-            self.detailedresults = 'ExecShield.checkproc: '
-            self.detailedresults += traceback.format_exc()
-            self.rulesuccess = False
-            self.logdispatch.log(LogPriority.ERROR,
-                                 ['ExecShield.checkproc',
-                                  self.detailedresults])
-
     def report(self):
         '''
-        Main report method. We rely on the active values in proc to make our
-        compliant/not-compliant decision.
+        Main report method. The parameters must be set both in the running
+        kernel and in the sysctl configuration.
 
         @author dkennel
         '''
         self.detailedresults = 'Results: '
         try:
-            if self.execshieldapplies:
-                execval = int(self.checkproc(self.shieldprocpath))
-                if execval == 1:
-                    self.execshieldcompliant = True
-                    self.detailedresults += 'Exec-Shield present and ' + \
-                        'compliant\n'
-                else:
-                    self.detailedresults += 'Exec-Shield present but not ' + \
-                        'compliant. Current value: ' + str(execval) + '\n'
-            va_path = '/proc/sys/kernel/randomize_va_space'
-            vaval = int(self.checkproc(va_path))
-            if vaval == 2:
-                self.varandomcompliant = True
-                self.detailedresults += 'Randomize_va_space compliant\n'
+            SYSCTL.declare(self.rulename, self.directives)
+            problems = SYSCTL.check(self.rulename)
+            if problems:
+                self.compliant = False
+                self.detailedresults += "\n".join(problems) + "\n"
             else:
-                self.detailedresults += 'Randomize_va_space not compliant. ' + \
-                    'Current value: ' + str(vaval) + '\n'
-            if self.execshieldapplies:
-                if self.execshieldcompliant and self.varandomcompliant:
-                    self.compliant = True
-            else:
-                if self.varandomcompliant:
-                    self.compliant = True
+                self.compliant = True
+                self.detailedresults += ", ".join(sorted(self.directives)) + \
+                    " compliant\n"
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
             raise
@@ -175,10 +131,9 @@ regions.'''
 
     def fix(self):
         '''
-        Main fix method. We update the current vaules in proc via shell
-        commands and set the correct settings in /etc/sysctl.conf since our
-        assumption is that if it didn't pass it's because it's been overridden
-        in sysctl.conf.
+        Main fix method. The parameters are written to the rule's sysctl.d
+        drop-in and set in the running kernel through the shared sysctl
+        service.
 
         @author: dkennel
         '''
@@ -186,29 +141,21 @@ regions.'''
             return True
 
         try:
-            kvtype = "conf"
-            intent = "present"
-            self.editor = KVEditorStonix(self.statechglogger, self.logdispatch,
-                                         kvtype, self.sysctlconf, self.tmpPath,
-                                         self.directives, intent, "openeq")
-            if self.execshieldapplies:
-                cmdshield = '/sbin/sysctl -w kernel.exec-shield=1'
-                subprocess.call(cmdshield, shell=True)
-            cmdvarand = '/sbin/sysctl -w kernel.randomize_va_space=2'
-            subprocess.call(cmdvarand, shell=True)
-
-            if not self.editor.report():
-                if self.editor.fixables:
-                    myid = '0063001'
-                    self.editor.setEventID(myid)
-                    if not self.editor.fix():
-                        return False
-                    elif not self.editor.commit():
-                        return False
-                    os.chown(self.sysctlconf, 0, 0)
-                    os.chmod(self.sysctlconf, 420)
-                    resetsecon(self.sysctlconf)
+            self.detailedresults = ""
+            self.rulesuccess = True
+            # clear out event history so only the latest fix is recorded
+            self.iditerator = 0
+            eventlist = self.statechglogger.findrulechanges(self.rulenumber)
+            for event in eventlist:
+                self.statechglogger.deleteentry(event)
 
+            SYSCTL.declare(self.rulename, self.directives)
+            failed = SYSCTL.fix(self.rulename, self.statechglogger,
+                                self.nexteventid)
+            if failed:
+                self.rulesuccess = False
+                self.detailedresults += "Unable to set " + \
+                    ", ".join(failed) + " in the running kernel\n"
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
             raise
@@ -221,3 +168,4 @@ regions.'''
                                   self.detailedresults])
         self.formatDetailedResults("fix", self.rulesuccess,
                                    self.detailedresults)
+        return self.rulesuccess
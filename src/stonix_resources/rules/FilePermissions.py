@@ -40,18 +40,20 @@ rule class
 from __future__ import absolute_import
 import os
 import traceback
-import subprocess
 import random
 import shutil
 import stat
 import re
-import pwd
-import grp
+import sqlite3
+import time
 
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..localize import SITELOCALWWWDIRS
 from ..stonixutilityfunctions import getlocalfs
+from ..fsscanner import FSScanner, FSIndex, WW, SUID, UNOWNED
+from ..pkghelper import Pkghelper
+from ..pkgfiles import VERIFYCHANGED, VERIFYNOTFOUND, VERIFYERROR
 
 
 class FilePermissions(Rule):
@@ -121,6 +123,7 @@ run.'''
         self.noorigin = os.path.join(self.noownerdir,
                                      'no-owners-at-install.db')
         self.nolast = os.path.join(self.noownerdir, 'no-owners-previous.db')
+        self.scanindex = os.path.join(self.infodir, 'scanindex.db')
         datatype = 'bool'
         key = 'setsticky'
         instructions = '''If set to yes or true the WorldWritables rule will attempt to
@@ -146,6 +149,25 @@ users path are very dangerous.'''
         ww_default = True
         self.fixww = self.initCi(ww_datatype, ww_key, ww_instructions,
                                  ww_default)
+        sp_datatype = 'int'
+        sp_key = 'scanprocesses'
+        sp_instructions = '''The number of processes used to scan the local
+file systems. With a value greater than 1 each file system is scanned by its
+own process, which can shorten the scan on hosts with several large local file
+systems.'''
+        sp_default = 1
+        self.scanprocesses = self.initCi(sp_datatype, sp_key, sp_instructions,
+                                         sp_default)
+        fs_datatype = 'int'
+        fs_key = 'fullscandays'
+        fs_instructions = '''The FilePermissions rule keeps an index of the
+directories it scanned and on later runs only lists directories that changed
+since. Permission or owner changes to files in unchanged directories are only
+found by a full scan. FULLSCANDAYS is the number of days after which a full
+scan is done. Set it to 0 to do a full scan on every run.'''
+        fs_default = 7
+        self.fullscandays = self.initCi(fs_datatype, fs_key, fs_instructions,
+                                        fs_default)
         self.hasrunalready = False
         self.wwresults = ''
         self.suidresults = ''
@@ -190,12 +212,36 @@ users path are very dangerous.'''
                              self.detailedresults])
         return fslist
 
+    def openscanindex(self):
+        '''
+        Private method that opens the directory index used for incremental
+        scans. The index is rebuilt by a full scan when the last full scan
+        is older than the fullscandays setting.
+
+        @return: FSIndex instance or None if no index is to be used
+        '''
+        days = self.fullscandays.getcurrvalue()
+        if days <= 0 or self.environ.geteuid() != 0:
+            return None
+        try:
+            index = FSIndex(self.scanindex)
+            lastfull = index.getlastfull()
+        except (sqlite3.Error, OSError):
+            self.logger.log(LogPriority.DEBUG,
+                            ['FilePermissions.openscanindex',
+                             'Scan index unusable: ' +
+                             traceback.format_exc()])
+            return None
+        index.full = time.time() - lastfull > days * 86400
+        self.logger.log(LogPriority.DEBUG,
+                        ['FilePermissions.openscanindex',
+                         'Full scan: ' + str(index.full)])
+        return index
+
     def multifind(self):
         '''
-        Private method that runs the find command on the file system to create
-        lists of world writable, suid/sgid, and unowned files. The invocation
-        of the find shell command is a bit complex to do all of this in one
-        shot.
+        Private method that scans the local file systems to create lists of
+        world writable, suid/sgid, and unowned files in a single pass.
 
         @author: dkennel
         '''
@@ -229,8 +275,8 @@ users path are very dangerous.'''
                 if os.path.exists(dbsets[dbset]['db']):
                     os.rename(dbsets[dbset]['db'], dbsets[dbset]['last'])
 
-            fslist = self.getfilesystems()
-            for filesystem in fslist:
+            fslist = []
+            for filesystem in self.getfilesystems():
                 if filesystem in self.bypassfs.getcurrvalue():
                     self.logger.log(LogPriority.DEBUG,
                                     ['FilePermissions.multifind',
@@ -240,121 +286,29 @@ users path are very dangerous.'''
                 self.logger.log(LogPriority.DEBUG,
                                 ['FilePermissions.multifind',
                                  'Walking Filesystem: ' + str(filesystem)])
-                if self.findoverrun:
-                        break
-                for root, dirs, files in os.walk(filesystem):
-                    # check the number of hits we have if we've got 30,000
-                    # hits then this FS is so bad we don't want to continue
-                    try:
-                        if len(dbsets['ww']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'WW overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-                    try:
-                        if len(dbsets['suid']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'SUID overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-                    try:
-                        if len(dbsets['unowned']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Unowned overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-
-                    if self.findoverrun:
-                        break
-
-                    # This wacky looking snippet filters out directories that
-                    # are actually file system mount points
-                    dirs[:] = [dirname for dirname in dirs if not
-                               os.path.ismount(os.path.join(root, dirname))]
-                    for dirname in dirs:
-                        path = os.path.join(root, dirname)
-                        try:
-                            mode = os.stat(path)
-                        except OSError:
-                            continue
-                        worldwrite = mode.st_mode & stat.S_IWOTH
-                        # sticky = mode.st_mode & stat.S_ISVTX
-                        if worldwrite:
-                            dbsets['ww']['results'].append(path)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found WW Dir: ' + str(path)])
-                    for name in files:
-                        try:
-                            if len(dbsets['ww']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                 'WW overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-                        try:
-                            if len(dbsets['suid']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                 'SUID overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-                        try:
-                            if len(dbsets['unowned']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                 'Unowned overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-
-                        if self.findoverrun:
-                            break
-
-                        fpath = os.path.join(root, name)
-                        if os.path.islink(fpath):
-                            continue
-                        try:
-                            fmode = os.stat(fpath)
-                        except OSError:
-                            continue
-                        worldwrite = fmode.st_mode & stat.S_IWOTH
-                        if worldwrite:
-                            dbsets['ww']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found WW File: ' + str(fpath)])
-                        suid = fmode.st_mode & stat.S_ISUID
-                        sgid = fmode.st_mode & stat.S_ISGID
-                        if suid or sgid:
-                            dbsets['suid']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found SUID File: ' + str(fpath)])
-                        try:
-                            pwd.getpwuid(fmode.st_uid)[0]
-                        except KeyError:
-                            dbsets['unowned']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found unowned File: ' +
-                                             str(fpath)])
-                        try:
-                            grp.getgrgid(fmode.st_gid)[0]
-                        except KeyError:
-                            dbsets['unowned']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found unowned File, bad group: '
-                                             + str(fpath)])
+                fslist.append(filesystem)
+            if self.findoverrun:
+                fslist = []
+            index = self.openscanindex()
+            # Stop once any list has more than 25,000 hits. A file system
+            # that bad is not worth continuing with.
+            scanner = FSScanner(25000, self.scanprocesses.getcurrvalue(),
+                                index)
+            labels = {WW: 'Found WW Path: %s',
+                      SUID: 'Found SUID File: %s',
+                      UNOWNED: 'Found unowned File: %s'}
+            for category, path in scanner.scan(fslist):
+                dbsets[category]['results'].append(path)
+                self.logger.log(LogPriority.DEBUG,
+                                ['FilePermissions.multifind',
+                                 labels[category]], path)
+            if scanner.overrun:
+                self.logger.log(LogPriority.DEBUG,
+                                ['FilePermissions.multifind',
+                                 'Scan overflow!'])
+                self.findoverrun = True
+            if index is not None:
+                index.close()
             for myset in dbsets:
                 data = '\n'.join(dbsets[myset]['results'])
                 whandle = open(dbsets[myset]['db'], 'w')
@@ -805,17 +759,18 @@ find / -xdev -type f \( -perm -0002 -a ! -perm -1000 \) -print'''
         wrongmode = []
         # Important! lines coming from the files will have newlines unless
         # they are stripped.
+        verified = self.verifyfiles([suidfile.strip() for suidfile in lastrun])
         for suidfile in lastrun:
             suidpath = suidfile.strip()
             if suidfile not in prevrun:
                 newfilessincelast.append(suidpath)
             if suidfile not in firstrun:
                 newfilessinceorigin.append(suidpath)
-            rpmchkval = self.rpmcheck(suidfile)
-            if rpmchkval > 3:
+            verifyval = verified[suidpath]
+            if verifyval >= VERIFYNOTFOUND:
                 if suidpath not in suidlist:
                     notknown.append(suidpath)
-            if rpmchkval == 0:
+            if verifyval == VERIFYCHANGED:
                 wrongmode.append(suidpath)
         strnewfilessincelast = ''
         if len(newfilessincelast) > 15:
@@ -1003,40 +958,28 @@ find / -xdev \( -nouser -o -nogroup \) -print
 
         return compliant
 
-    def rpmcheck(self, path):
+    def verifyfiles(self, paths):
         '''
-        The rpmcheck method is a private method intended to check the status of
-        the program at the passed path in the rpm database. If the file was
-        found in the RPM database but the mode has changed we return 0. If the
-        file was found and the mode has not changed we return 1. If the file
-        was not found we return 3. If the system does not use RPM then we
-        return 4. If something weird happens we return 5.
+        The verifyfiles method is a private method intended to check the
+        status of the programs at the passed paths in the package database.
+        All paths are checked with a single package manager query. Returns a
+        dictionary with a pkgfiles VERIFY* value for every path:
+        VERIFYCHANGED if the file was found in the package database but the
+        mode has changed, VERIFYOK if the mode has not changed,
+        VERIFYNOTFOUND if the file was not found, VERIFYUNSUPPORTED if the
+        package manager does not record modes and VERIFYERROR if something
+        weird happens.
 
-        @return: int
+        @param paths: list of file paths
+        @return: dict
         @author: dkennel
         '''
-        path = path.strip()
-        if not os.path.exists('/bin/rpm'):
-            return 4
-        cmd = '/bin/rpm -Vf ' + path
         try:
-            proc = subprocess.Popen(cmd, shell=True, close_fds=True,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE)
-            output = proc.stdout.readlines()
-            errout = proc.stderr.readlines()
+            verified = Pkghelper(self.logger, self.environ).verifyFiles(paths)
             self.logger.log(LogPriority.DEBUG,
-                            ['AuditSUID.rpmcheck',
-                             'rpm -Vf Results: ' + str(output) + str(errout)])
-            if len(output) == 0:
-                for line in errout:
-                    if re.search('No such file or directory', line):
-                        return 3
-                return 5
-            for line in output:
-                if re.search('M', line):
-                    return 0
-            return 1
+                            ['AuditSUID.verifyfiles',
+                             'Verify results: %s'], verified)
+            return verified
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
             raise
@@ -1044,9 +987,9 @@ find / -xdev \( -nouser -o -nogroup \) -print
         except Exception:
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR,
-                            ['AuditSUID.rpmcheck',
+                            ['AuditSUID.verifyfiles',
                              self.detailedresults])
-            return 5
+            return dict([(path, VERIFYERROR) for path in paths])
 
     def report(self):
         '''
@@ -51,6 +51,8 @@ from ..localize import ALTWARNINGBANNER
 from ..localize import OSXSHORTWARNINGBANNER
 from ..stonixutilityfunctions import fixInflation
 from ..stonixutilityfunctions import iterate
+from ..ServiceHelper import ServiceHelper
+from ..filetransaction import TRANSACTION
 
 
 class InstallBanners(RuleKVEditor):
@@ -78,6 +80,8 @@ class InstallBanners(RuleKVEditor):
                          'CCE 4760-5', 'CCE 4301-8', 'CCE 4698-7',
                          'CCE 4222-6', 'CCE 4103-8', 'CCE 4870-2',
                          'CCE 4896-7']
+        self.conflictgroups = ['sshd']
+        self.runafter = ['SecureSSH']
         self.iditerator = 0
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
@@ -501,7 +505,14 @@ class InstallBanners(RuleKVEditor):
             else:
                 filecontents = ''
                 self.detailedresults += "\nreturntype parameter must be either 'list' or 'string!'"
-            if os.path.exists(filepath):
+            if self.environ.getfilecache().isstaged(filepath):
+                # edited earlier in this run, the file is written at the end
+                lines = self.environ.getfilecache().getlines(filepath)
+                if returntype == 'list':
+                    filecontents = lines
+                elif returntype == 'string':
+                    filecontents = ''.join(lines)
+            elif os.path.exists(filepath):
                 f = open(filepath, 'r')
                 if returntype == 'list':
                     filecontents = f.readlines()
@@ -617,9 +628,13 @@ class InstallBanners(RuleKVEditor):
             event = {'eventtype': 'conf',
                      'filepath': filepath}
             self.statechglogger.recordchgevent(myid, event)
-            self.statechglogger.recordfilechange(tmpfilepath, filepath, myid)
-
-            os.rename(tmpfilepath, filepath)
+            if TRANSACTION.isstaging(filepath) and mode == 'w':
+                TRANSACTION.stage(filepath, tmpfilepath, self.statechglogger,
+                                  myid)
+            else:
+                self.statechglogger.recordfilechange(tmpfilepath, filepath,
+                                                     myid)
+                os.rename(tmpfilepath, filepath)
             os.chmod(filepath, perms[0])
             os.chown(filepath, perms[1], perms[2])
 
@@ -1142,6 +1157,10 @@ class InstallBanners(RuleKVEditor):
         try:
             if not self.replaceFileContents(self.sshdfile, self.sshddict):
                 retval = False
+            elif self.environ.getosfamily() != 'darwin':
+                TRANSACTION.reloadservice(ServiceHelper(self.environ,
+                                                        self.logger),
+                                          self.sshdfile, 'sshd')
             if not fixInflation(self.sshdfile, self.logger, 0644, [0, 0]):
                 retval = False
             if not self.setFileContents(self.motdfile, self.motd, 'w'):
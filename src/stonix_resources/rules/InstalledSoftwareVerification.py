@@ -26,6 +26,7 @@ Report-only rule to verify package integrity
 @author: Eric Ball
 @change: 2015/08/04 eball - Original implementation
 @change: 2015/08/24 eball - Improve output, remove .pyc files from output
+@change: 2026/10/18 - Parse rpm -Va output as it is read
 '''
 
 from __future__ import absolute_import
@@ -98,6 +99,33 @@ OR
                                   'CentOS Linux': ['7.0', '+'],
                                   'Fedora': ['21', '+']}}
         self.ch = CommandHelper(self.logger)
+        self.ownerErr = []
+        self.groupErr = []
+        self.permErr = []
+        self.hashErr = []
+
+    def parseverifyline(self, line):
+        '''
+        Sort one line of rpm -Va output into the owner, group, permission and
+        hash error lists.
+
+        @param line: string - line of rpm -Va output
+        '''
+        words = line.split()
+        if len(words) >= 2:
+            if re.search("^.....U", line):
+                if not re.search(".pyc$", words[-1]):
+                    self.ownerErr.append(words[-1])
+            if re.search("^......G", line):
+                if not re.search(".pyc$", words[-1]):
+                    self.groupErr.append(words[-1])
+            if re.search("^.M", line):
+                if not re.search(".pyc$", words[-1]):
+                    self.permErr.append(words[-1])
+            if re.search("^..5", line):
+                if not re.search(".pyc$", words[-1]) \
+                   and words[1] != 'c':
+                    self.hashErr.append(words[-1])
 
     def report(self):
         '''
@@ -107,52 +135,40 @@ OR
         '''
         try:
             cmd = ["rpm", "-Va"]
-            self.ch.executeCommand(cmd)
             results = ""
-            rpmout = self.ch.getOutputString()
-            rpmoutlines = rpmout.split("\n")
-            ownerErr = []
-            groupErr = []
-            permErr = []
-            hashErr = []
-            for line in rpmoutlines:
-                words = line.split()
-                if len(words) >= 2:
-                    if re.search("^.....U", line):
-                        if not re.search(".pyc$", words[-1]):
-                            ownerErr.append(words[-1])
-                    if re.search("^......G", line):
-                        if not re.search(".pyc$", words[-1]):
-                            groupErr.append(words[-1])
-                    if re.search("^.M", line):
-                        if not re.search(".pyc$", words[-1]):
-                            permErr.append(words[-1])
-                    if re.search("^..5", line):
-                        if not re.search(".pyc$", words[-1]) \
-                           and words[1] != 'c':
-                            hashErr.append(words[-1])
+            self.ownerErr = []
+            self.groupErr = []
+            self.permErr = []
+            self.hashErr = []
+            # rpm -Va output can run to megabytes, parse it as it is read
+            # instead of keeping it
+            self.ch.setLineCallback(self.parseverifyline, keepoutput=False)
+            try:
+                self.ch.executeCommand(cmd)
+            finally:
+                self.ch.setLineCallback()
 
-            if len(ownerErr) > 0:
+            if len(self.ownerErr) > 0:
                 results += "Files with bad user ownership:\n"
-                for line in ownerErr:
+                for line in self.ownerErr:
                     results += line + "\n"
                 results += "\n"
-            if len(groupErr) > 0:
+            if len(self.groupErr) > 0:
                 results += "Files with bad group ownership:\n"
-                for line in groupErr:
+                for line in self.groupErr:
                     results += line + "\n"
                 results += "\n"
 
-            if len(permErr) > 0:
+            if len(self.permErr) > 0:
                 results += "Files with changed permissions:\n"
-                for line in permErr:
+                for line in self.permErr:
                     results += line + "\n"
                 results += "\n"
 
-            if len(hashErr) > 0:
+            if len(self.hashErr) > 0:
                 results += "Files with changed hashes (excluding those " + \
                     "marked as config files in their RPM):\n"
-                for line in hashErr:
+                for line in self.hashErr:
                     results += line + "\n"
                 results += "\n"
 
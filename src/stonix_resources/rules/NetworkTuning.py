@@ -34,6 +34,11 @@ variable.
 @change: 2015/04/15 dkennel updated for new isApplicable
 @change: 2015/10/07 eball Help text cleanup
 @change: 2015/11/09 ekkehard - make eligible of OS X El Capitan
+@change: 2026/10/18 Read the ndd-nettune link targets with readlink instead
+    of parsing ls -l
+@change: 2026/10/18 Linux parameters checked and set through the shared
+    sysctl service, only for the enabled configuration items
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import resetsecon, iterate, readFile, writeFile
@@ -41,6 +46,8 @@ from ..stonixutilityfunctions import checkPerms, setPerms, createFile
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..CommandHelper import CommandHelper
+from ..sysquery import readlink
+from ..sysctlservice import SYSCTL
 from subprocess import Popen, PIPE, call
 from ..KVEditorStonix import KVEditorStonix
 import os
@@ -79,6 +86,7 @@ class NetworkTuning(Rule):
             self.networkTuning1 = self.__InitializeNetworkTuning1()
             self.networkTuning2 = self.__InitializeNetworkTuning2()
         self.guidance = ["NSA 2.5.1.1", "NSA 2.5.1.2"]
+        self.conflictgroups = ['sysctl']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
@@ -91,6 +99,24 @@ class NetworkTuning(Rule):
         self.iditerator = 0
         self.editor = ""
         self.ch = CommandHelper(self.logger)
+        self.lfc1 = {"net.ipv4.conf.all.secure_redirects": "0",
+                     "net.ipv4.conf.all.accept_redirects": "0",
+                     "net.ipv4.conf.all.rp_filter": "1",
+                     "net.ipv4.conf.all.log_martians": "1",
+                     "net.ipv4.conf.all.accept_source_route": "0",
+                     "net.ipv4.conf.default.accept_redirects": "0",
+                     "net.ipv4.conf.default.secure_redirects": "0",
+                     "net.ipv4.conf.default.rp_filter": "1",
+                     "net.ipv4.conf.default.accept_source_route": "0",
+                     "net.ipv4.tcp_syncookies": "1",
+                     "net.ipv4.icmp_echo_ignore_broadcasts": "1",
+                     "net.ipv4.tcp_max_syn_backlog": "4096"}
+        self.lfc2 = {"net.ipv4.conf.default.send_redirects": "0",
+                     "net.ipv4.conf.all.send_redirects": "0",
+                     "net.ipv4.ip_forward": "0"}
+        if self.environ.getosfamily() == "linux":
+            self.__declareLinux()
+            self.watchedpaths = SYSCTL.getwatchedpaths()
 
 ###############################################################################
 
@@ -132,11 +158,8 @@ class NetworkTuning(Rule):
         try:
             self.detailedresults = ""
             if self.environ.getosfamily() == "linux":
-                self.path = "/etc/sysctl.conf"
-                self.tmpPath = "/etc/sysctl.conf.tmp"
-                self.original = readFile(self.path, self.logger)
-                rep1success = self.reportLinux1()
-                rep2success = self.reportLinux2()
+                rep1success = self.reportLinux()
+                rep2success = True
             elif self.environ.getosfamily() == "solaris":
                 rep1success = self.reportSolaris1()
                 rep2success = self.reportSolaris2()
@@ -211,76 +234,31 @@ class NetworkTuning(Rule):
         return self.rulesuccess
 ###############################################################################
 
-    def reportLinux1(self):
-        '''Linux specific report method that ensures the items in fileContents
-        exist in /etc/sysctl.conf.  Sets self.compliant to True if all items
-        exist in the file.  Returns True if successful in updating the file
-        @return: bool'''
-        compliant = True
-        if not os.path.exists(self.path):
-            createFile(self.path, self.logger)
-        lfc = {"net.ipv4.conf.all.secure_redirects": "0",
-               "net.ipv4.conf.all.accept_redirects": "0",
-               "net.ipv4.conf.all.rp_filter": "1",
-               "net.ipv4.conf.all.log_martians": "1",
-               "net.ipv4.conf.all.accept_source_route": "0",
-               "net.ipv4.conf.default.accept_redirects": "0",
-               "net.ipv4.conf.default.secure_redirects": "0",
-               "net.ipv4.conf.default.rp_filter": "1",
-               "net.ipv4.conf.default.accept_source_route": "0",
-               "net.ipv4.tcp_syncookies": "1",
-               "net.ipv4.icmp_echo_ignore_broadcasts": "1",
-               "net.ipv4.tcp_max_syn_backlog": "4096"}
-        kvtype = "conf"
-        intent = "present"
-        self.editor = KVEditorStonix(self.statechglogger, self.logger, kvtype,
-                                     self.path, self.tmpPath, lfc, intent,
-                                     "openeq")
-        if not self.editor.report():
-            self.detailedresults += "/etc/sysctl.conf is not configured " + \
-                "correctly for checked configuration item 1\n"
-            compliant = False
-        else:
-            self.detailedresults += "/etc/sysctl.conf is configured " + \
-                "correctly for checked configuration item 1\n"
-        if not checkPerms(self.path, [0, 0, 420], self.logger):
-            self.detailedresults += "Permissions are incorrect on " + \
-                "/etc/sysctl.con\n"
-            compliant = False
-        return compliant
+    def __declareLinux(self):
+        '''Private method declaring the kernel parameters of the enabled
+        configuration items to the shared sysctl service.'''
+        settings = {}
+        if self.networkTuning1.getcurrvalue():
+            settings.update(self.lfc1)
+        if self.networkTuning2.getcurrvalue():
+            settings.update(self.lfc2)
+        SYSCTL.declare(self.rulename, settings)
+
 ###############################################################################
 
-    def reportLinux2(self):
-        '''Linux specific report method2 that ensures the items in fileContents
-        exist in /etc/sysctl.conf.  Sets self.compliant to True if all items
-        exist in the file.  Returns True if successful in updating the file
+    def reportLinux(self):
+        '''Linux specific report method that ensures the parameters of the
+        enabled configuration items are set both in the running kernel and in
+        the sysctl configuration files.
         @return: bool'''
-        compliant = True
-        if not os.path.exists(self.path):
-            createFile(self.path, self.logger)
-        lfc = {"net.ipv4.conf.default.send_redirects": "0",
-               "net.ipv4.conf.all.send_redirects": "0",
-               "net.ipv4.ip_forward": "0"}
-        if not self.networkTuning1.getcurrvalue():
-            kvtype = "conf"
-            intent = "present"
-            self.editor = KVEditorStonix(self.statechglogger, self.logger,
-                                         kvtype, self.path, self.tmpPath, lfc,
-                                         intent, "openeq")
-        else:
-            self.editor.setData(lfc)
-        if not self.editor.report():
-            self.detailedresults += "/etc/sysctl.conf is not configured " + \
-                "correctly for checked configuration item 2\n"
-            compliant = False
-        else:
-            self.detailedresults += "/etc/sysctl.conf is configured " + \
-                "correctly for checked configuration item 2\n"
-        if not checkPerms(self.path, [0, 0, 420], self.logger):
-            self.detailedresults += "Permissions are incorrect on " + \
-                "/etc/sysctl.con\nf"
-            compliant = False
-        return compliant
+        self.__declareLinux()
+        problems = SYSCTL.check(self.rulename)
+        if problems:
+            self.detailedresults += "The network stack is not configured " + \
+                "correctly:\n" + "\n".join(problems) + "\n"
+            return False
+        self.detailedresults += "The network stack is configured correctly\n"
+        return True
 ###############################################################################
 #     def reportMac1(self,method):
 #         '''Mac specific report method1 that ensures the items in fileContents
@@ -413,24 +391,11 @@ correctly\n"
             self.detailedresults = path + " exists but is not a link"
             self.logger.log(LogPriority.DEBUG, self.detailedresults)
             compliant = False
-        else:
-            cmd = ["ls", "-l", path]
-            if not self.cmdhelper.executeCommand(cmd):
-                compliant = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if re.search("->", output[0]) and \
-                            output[0].split()[-1] != sympath:
-                        self.detailedresults = path + " is a link but \
-                        doesn't point to the correct file"
-                        self.logger.log(LogPriority.DEBUG,
-                                        self.detailedresults)
-                        compliant = False
-                elif error:
-                    compliant = False
-                    self.logger.log(LogPriority.DEBUG, error)
+        elif readlink(path) != sympath:
+            self.detailedresults = path + " is a link but \
+            doesn't point to the correct file"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            compliant = False
 
         path = "/etc/rc2.d/S70ndd-nettune"
         if not os.path.exists(path):
@@ -441,24 +406,11 @@ correctly\n"
             self.detailedresults = path + " exists but is not a link"
             self.logger.log(LogPriority.DEBUG, self.detailedresults)
             compliant = False
-        else:
-            cmd = ["ls", "-l", path]
-            if not self.cmdhelper.executeCommand(cmd):
-                compliant = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if re.search("->", output[0]) and \
-                            output[0].split()[-1] != sympath:
-                        self.detailedresults = path + " is a link but \
-                        doesn't point to the correct file"
-                        self.logger.log(LogPriority.DEBUG,
-                                        self.detailedresults)
-                        compliant = False
-                elif error:
-                    compliant = False
-                    self.logger.log(LogPriority.DEBUG, error)
+        elif readlink(path) != sympath:
+            self.detailedresults = path + " is a link but \
+            doesn't point to the correct file"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            compliant = False
 
         path = "/etc/rcS.d/K70ndd-nettune"
         if not os.path.exists(path):
@@ -469,24 +421,11 @@ correctly\n"
             self.detailedresults = path + " exists but is not a link"
             self.logger.log(LogPriority.DEBUG, self.detailedresults)
             compliant = False
-        else:
-            cmd = ["ls", "-l", path]
-            if not self.cmdhelper.executeCommand(cmd):
-                compliant = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if re.search("->", output[0]) and \
-                            output[0].split()[-1] != sympath:
-                        self.detailedresults = path + " is a link but \
-                        doesn't point to the correct file"
-                        self.logger.log(LogPriority.DEBUG,
-                                        self.detailedresults)
-                        compliant = False
-                elif error:
-                    compliant = False
-                    self.logger.log(LogPriority.DEBUG, error)
+        elif readlink(path) != sympath:
+            self.detailedresults = path + " is a link but \
+            doesn't point to the correct file"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            compliant = False
         return compliant
 ###############################################################################
 
@@ -563,35 +502,22 @@ correctly\n"
 ###############################################################################
 
     def fixLinux(self):
-        if not checkPerms(self.path, [0, 0, 420], self.logger):
-            self.iditerator += 1
-            myid = iterate(self.iditerator, self.rulenumber)
-            if not setPerms(self.path, [0, 0, 420], self.logger,
-                            self.statechglogger, myid):
-                return False
-        if self.networkTuning1.getcurrvalue() or \
-                self.networkTuning2.getcurrvalue():
-            if self.editor.fixables:
-                self.iditerator += 1
-                myid = iterate(self.iditerator, self.rulenumber)
-                self.editor.setEventID(myid)
-                if not self.editor.fix():
-                    return False
-                elif not self.editor.commit():
-                    return False
-                os.chown(self.path, 0, 0)
-                os.chmod(self.path, 420)
-                resetsecon(self.path)
-                cmd = ["/sbin/sysctl", "-q", "-e", "-p"]
-                self.ch.executeCommand(cmd)
-                if self.ch.getReturnCode() != 0:
-                    self.detailedresults += "Unable to restart sysctl\n"
-                    self.logger.log(LogPriority.DEBUG, self.detailedresults)
-                    return False
-                else:
-                    return True
-            else:
-                return True
+        '''Linux specific fix method that persists the enabled parameter
+        groups in the rule's sysctl.d drop-in and sets them in the running
+        kernel.
+        @return: bool'''
+        if not self.networkTuning1.getcurrvalue() and \
+                not self.networkTuning2.getcurrvalue():
+            return True
+        self.__declareLinux()
+        failed = SYSCTL.fix(self.rulename, self.statechglogger,
+                            self.nexteventid)
+        if failed:
+            self.detailedresults += "Unable to set " + ", ".join(failed) + \
+                "\n"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            return False
+        return True
 ##############################################################################
 
     def fixMac(self):
@@ -748,26 +674,12 @@ correctly\n"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
         # check to see if link exists but doesn't point to the right file
-        else:
-            cmdls = ["ls", "-l", path]
-            if not self.cmdhelper.executeCommand(cmdls):
-                self.detailedresults = "unable to run command: ls -l " + path
+        elif readlink(path) != sympath:
+            os.remove(path)
+            if not self.cmdhelper.executeCommand(cmd):
+                self.detailedresults = "unable to create link"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if output[-2] == "->" and output[-1] != sympath:
-                        os.remove(path)
-                        if not self.cmdhelper.executeCommand(cmd):
-                            self.detailedresults = "unable to create link"
-                            self.logger.log(LogPriority.DEBUG,
-                                            self.detailedresults)
-                            success = False
-                elif error:
-                    self.logger.log(LogPriority.DEBUG, error)
-                    success = False
         # symbolic link doesn't exist
         path = "/etc/rc2.d/S70ndd-nettune"
         cmd = ["ln", "-s", sympath, path]
@@ -786,26 +698,12 @@ correctly\n"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
         # check to see if link exists but doesn't point to the right file
-        else:
-            cmd = ["ls", "-l", path]
+        elif readlink(path) != sympath:
+            os.remove(path)
             if not self.cmdhelper.executeCommand(cmd):
-                self.detailedresults = "unable to run command: ls -l " + path
+                self.detailedresults = "unable to create link"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if output[-2] == "->" and output[-1] != sympath:
-                        os.remove(path)
-                        if not self.cmdhelper.executeCommand(cmd):
-                            self.detailedresults = "unable to create link"
-                            self.logger.log(LogPriority.DEBUG,
-                                            self.detailedresults)
-                            success = False
-                elif error:
-                    self.logger.log(LogPriority.DEBUG, error)
-                    success = False
         # symbolic link doesn't exist
         path = "/etc/rcS.d/K70ndd-nettune"
         cmd = ["ln", "-s", sympath, path]
@@ -824,25 +722,12 @@ correctly\n"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
         # check to see if link exists but doesn't point to the right file
-        else:
-            cmd = ["ls", "-l", path]
+        elif readlink(path) != sympath:
+            os.remove(path)
             if not self.cmdhelper.executeCommand(cmd):
-                self.detailedresults = "unable to run command: ls -l " + path
+                self.detailedresults = "unable to create link"
                 self.logger.log(LogPriority.DEBUG, self.detailedresults)
                 success = False
-            else:
-                output = self.cmdhelper.getOutput()
-                error = self.cmdhelper.getError()
-                if output:
-                    if output[-2] == "->" and output[-1] != sympath:
-                        if not self.cmdhelper.executeCommand(cmd):
-                            self.detailedresults = "unable to create link"
-                            self.logger.log(LogPriority.DEBUG,
-                                            self.detailedresults)
-                            success = False
-                elif error:
-                    self.logger.log(LogPriority.DEBUG, [error])
-                    success = False
         return success
 ###############################################################################
 
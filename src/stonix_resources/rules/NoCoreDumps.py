@@ -31,6 +31,9 @@ Created on Nov 21, 2012
 which conflicted with DisableIPV6 and NoCoreDumps which expected 644.
 @change: 2015/04/15 dkennel updated for new isApplicable
 @change: 2015/08/26 ekkehard [artf37775] : NoCoreDumps(49) - NCAF & Detailed Results not working correctly - OS X El Capitan 10.11
+@change: 2026/10/18 Manage fs.suid_dumpable on Linux through the shared
+    sysctl service instead of editing /etc/sysctl.conf
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import writeFile, readFile, setPerms, checkPerms
@@ -38,6 +41,7 @@ from ..stonixutilityfunctions import iterate, resetsecon
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..KVEditorStonix import KVEditorStonix
+from ..sysctlservice import SYSCTL
 from subprocess import call
 import os
 import traceback
@@ -56,6 +60,7 @@ class NoCoreDumps(Rule):
         self.helptext = "This rule disables the ability of the system to " + \
         "produce core dump images"
         self.guidance = ["NSA 2.2.4.2"]
+        self.conflictgroups = ['sysctl']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
@@ -69,7 +74,11 @@ class NoCoreDumps(Rule):
 
         self.iditerator = 0
         self.created1 = False
-        self.created2 = False
+        self.sysctls = {"fs.suid_dumpable": "0"}
+        if self.environ.getosfamily() == "linux":
+            SYSCTL.declare(self.rulename, self.sysctls)
+            self.watchedpaths = SYSCTL.getwatchedpaths() + \
+                ["/etc/security/limits.conf"]
 
 ###############################################################################
 
@@ -171,28 +180,16 @@ class NoCoreDumps(Rule):
 ###############################################################################
 
     def reportLinux2(self):
-        '''Sub report method 2 that searches the /etc/sysctl.conf file
-        for the following line "fs.suid_dumpable = 0"
+        '''Sub report method 2 that checks fs.suid_dumpable is 0 in the
+        running kernel and in the sysctl configuration
         @return: bool
         '''
-        lookfor = {"fs.suid_dumpable": "0"}
-        path = "/etc/sysctl.conf"
-        tmpPath = "/etc/sysctl.conf.tmp"
-        kvtype = "conf"
-        intent = "present"
-        compliant = True
-        if not os.path.exists(path):
-            writeFile(path, "", self.logger)
-            setPerms(path, [0, 0, 420], self.logger)
-            self.created2 = True
-        if not checkPerms(path, [0, 0, 420], self.logger):
-            compliant = False
-        self.editor = KVEditorStonix(self.statechglogger, self.logger, kvtype,
-        path, tmpPath, lookfor, intent, "openeq")
-        if not self.editor.report() or not compliant:
+        SYSCTL.declare(self.rulename, self.sysctls)
+        problems = SYSCTL.check(self.rulename)
+        if problems:
+            self.detailedresults += "\n".join(problems) + "\n"
             return False
-        else:
-            return True
+        return True
 
 ###############################################################################
 
@@ -238,16 +235,9 @@ class NoCoreDumps(Rule):
 
             osfam = self.environ.getosfamily()
             if osfam == "linux":
-                if self.fixLinux1() and self.fixLinux2():
-                    retval = call(["/sbin/sysctl", "-p"],
-                                  stdout=None,
-                                  stderr=None, shell=False)
-                    if retval != 0:
-                        self.detailedresults += "Unable to restart sysctl"
-                        self.logger.log(LogPriority.DEBUG,
-                                        self.detailedresults)
-                        success = False
-                else:
+                if not self.fixLinux1():
+                    success = False
+                if not self.fixLinux2():
                     success = False
             elif osfam == 'freebsd' or self.environ.getostype() == "Mac OS X":
                 success = self.fixFreebsdMac()
@@ -303,9 +293,9 @@ class NoCoreDumps(Rule):
             self.iditerator += 1
             myid = iterate(self.iditerator, self.rulenumber)
             event = {"eventtype": "creation",
-                     "filepath": self.kve.getPath()}
+                     "filepath": path}
             self.statechglogger.recordchgevent(myid, event)
-        elif self.editor.fixables or self.editor.removeables:
+        else:
             self.iditerator += 1
             myid = iterate(self.iditerator, self.rulenumber)
             event = {'eventtype': "conf",
@@ -321,38 +311,18 @@ class NoCoreDumps(Rule):
 ###############################################################################
 
     def fixLinux2(self):
-        '''Sub fix method 2 that searches the /etc/sysctl.conf file
-        for the following line "fs.suid_dumpable = 0"
+        '''Sub fix method 2 that sets fs.suid_dumpable to 0 in the rule's
+        sysctl.d drop-in and in the running kernel
         @return: bool
         '''
-        path = "/etc/sysctl.conf"
-        success = True
-        if not checkPerms(path, [0, 0, 420], self.logger):
-            self.iditerator += 1
-            myid = iterate(self.iditerator, self.rulenumber)
-            if not setPerms(path, [0, 0, 420], self.logger,
-                                                    self.statechglogger, myid):
-                success = False
-        if self.created2:
-            self.iditerator += 1
-            myid = iterate(self.iditerator, self.rulenumber)
-            event = {"eventtype": "creation",
-                     "filepath": self.kve.getPath()}
-            self.statechglogger.recordchgevent(myid, event)
-        elif self.editor.fixables or self.editor.removeables:
-            self.iditerator += 1
-            myid = iterate(self.iditerator, self.rulenumber)
-            self.editor.setEventID(myid)
-            if not self.editor.fix():
-                self.rulesuccess = False
-                return False
-            elif not self.editor.commit():
-                self.rulesuccess = False
-                return False
-        os.chown(path, 0, 0)
-        os.chmod(path, 420)
-        resetsecon(path)
-        return success
+        failed = SYSCTL.fix(self.rulename, self.statechglogger,
+                            self.nexteventid)
+        if failed:
+            self.detailedresults += "Unable to set " + ", ".join(failed) + \
+                " in the running kernel\n"
+            self.rulesuccess = False
+            return False
+        return True
 
 ###############################################################################
 
@@ -33,6 +33,11 @@ Created on Jun 17, 2013
 @note: No OS X Implementation blacklisted darwin
 @change: 2015/04/16 dkennel updated for new isApplicable
 @change: 2015/10/07 eball Help text/PEP8 cleanup
+@change: 2026/10/18 Look uids up with pwd instead of running id -u for each
+    account in the shadow file
+@change: 2026/10/18 Check and fix the shadow file aging fields with
+    AccountPolicy: one locked rewrite instead of chage per account
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import iterate, writeFile, readFile, resetsecon
@@ -43,8 +48,8 @@ from ..logdispatcher import LogPriority
 from ..KVEditorStonix import KVEditorStonix
 from ..CommandHelper import CommandHelper
 from ..pkghelper import Pkghelper
-from time import strftime
-from subprocess import Popen, PIPE
+from ..sysquery import getuid
+from ..accountpolicy import AccountPolicy
 import traceback
 import re
 import os
@@ -68,6 +73,13 @@ class PasswordExpiration(Rule):
             "can still be undone."
         self.iditerator = 0
         self.guidance = ["2.3.1.7"]
+        self.conflictgroups = ['pam', 'logindefs']
+        self.runafter = ['ConfigureSystemAuthentication']
+        if self.environ.getosfamily() == "linux":
+            self.watchedpaths = ["/etc/shadow", "/etc/login.defs",
+                                 "/etc/default/useradd"]
+        elif self.environ.getosfamily() == "solaris":
+            self.watchedpaths = ["/etc/shadow", "/etc/default/passwd"]
         self.applicable = {'type': 'black', 'family': ['darwin']}
         self.universal = "#The following lines were added by stonix\n"
         datatype = 'bool'
@@ -239,70 +251,14 @@ class PasswordExpiration(Rule):
             contents = readFile(self.shadowfile, self.logger)
             if self.environ.getosfamily() == "solaris" or \
                 self.environ.getosfamily() == "linux":
-                if self.environ.getosfamily() == "linux":
-                    whichid = "/usr/bin/id"
-                elif self.environ.getosfamily() == "solaris":
-                    whichid = "/usr/xpg4/bin/id"
-                for line in contents:
-                    badacct = False
-                    debug = ""
-                    if re.search("^\#", line) or re.match("^\s*$", line):
-                        continue
-                    if re.search(":", line):
-                        field = line.split(":")
-                        cmd = [whichid, "-u", field[0]]
-                        self.ch.executeCommand(cmd)
-                        output = self.ch.getOutputString().strip()
-                        error = self.ch.getError()
-                        if error:
-                            continue
-                        if output:
-                            if output.isdigit():
-                                uid = int(output)
-                            else:
-                                uid = 100
-                        else:
-                            continue
-                        try:
-                            if uid >= 500 and not re.search(self.lockedpwds, field[1]):
-                                for i in [3, 4, 5, 6]:
-                                    if field[i]:
-                                        val = field[i]
-                                        if val.isdigit():
-                                            field[i] = int(field[i])
-                                        elif i == 6:
-                                            field[i] = 99
-                                        else:
-                                            field[i] = 0
-                                    elif i == 6:
-                                        field[i] = 99
-                                    else:
-                                        field[i] = 0
-                                if field[3] < 7 or field[3] == "":
-                                    compliant = False
-                                    debug += "field 4 not equal to 7 in shadow\n"
-                                    badacct = True
-                                if field[4] > 180 or field[4] == "":
-                                    compliant = False
-                                    debug += "expiration is not 180 or less\n"
-                                    badacct = True
-                                if field[5] < 28 or field[5] == "":
-                                    compliant = False
-                                    debug += "warnings not set to 28 days\n"
-                                    badacct = True
-                                if field[6] > 7 or field[6] == "":
-                                    compliant = False
-                                    debug += "Account lock is not set to 7\n"
-                                    badacct = True
-                        except IndexError:
-                            compliant = False
-                            debug = traceback.format_exc()
-                            debug += ' Index out of range\n'
-                            badacct = True
-                        if debug:
-                            self.logger.log(LogPriority.DEBUG, debug)
-                    if badacct:
-                        self.fixusers.append(field[0])
+                self.accountpolicy = AccountPolicy(self.shadowfile,
+                                                   lockedpwds=self.lockedpwds)
+                self.fixusers = []
+                for user, problems in self.accountpolicy.getnoncompliant():
+                    compliant = False
+                    self.logger.log(LogPriority.DEBUG, user + ": " +
+                                    ", ".join(problems) + "\n")
+                    self.fixusers.append(user)
             if self.environ.getosfamily() == 'freebsd':
                 for line in contents:
                     debug = ""
@@ -310,14 +266,8 @@ class PasswordExpiration(Rule):
                         continue
                     if re.search(':', line):
                         field = line.split(':')
-                        message = Popen(['/usr/bin/id', '-u', field[0]],
-                                           stderr=PIPE, stdout=PIPE, shell=False)
-                        uid = message.stdout.readline()
-                        uid = uid.strip()
-                        message.stdout.close()
-                        if uid.isdigit():
-                            uid = int(uid)
-                        else:
+                        uid = getuid(field[0])
+                        if uid is None:
                             uid = 100
                         try:
                             if uid >= 500 and not re.search(self.lockedpwds, field[1]):
@@ -636,7 +586,6 @@ self.logdeffile + "\n"
     def fixShadow(self):
         success = True
         debug = ""
-        date = ""
         contents = readFile(self.shadowfile, self.logger)
         if not os.path.exists(self.shadowfile) or not contents:
             self.detailedresults += self.shadowfile + "doesn't exist. \
@@ -667,14 +616,25 @@ Will not perform fix on shadow file\n"
                 debug = "unable to set permisssions on " + self.shadowfile + "\n"
                 self.logger.log(LogPriority.DEBUG, debug)
                 success = False
-        tmpdate = strftime("%Y%m%d")
-        tmpdate = list(tmpdate)
-        date += tmpdate[0] + tmpdate[1] + tmpdate[2] + tmpdate[3] + "-" + \
-        tmpdate[4] + tmpdate[5] + "-" + tmpdate[6] + tmpdate[7]
         if self.fixusers:
-            for item in self.fixusers:
-                cmd = ["chage", "-d", date, "-m", "7", "-M", "180", "-W", "28", "-I", "7", item]
-                self.ch.executeCommand(cmd)
+            self.iditerator += 1
+            myid = iterate(self.iditerator, self.rulenumber)
+            try:
+                changed, leftover = self.accountpolicy.apply(
+                    self.statechglogger, myid)
+                debug = "updated the shadow entries of " + \
+                    str(len(changed)) + " accounts\n"
+            except (IOError, OSError), err:
+                debug = "unable to rewrite " + self.shadowfile + ": " + \
+                    str(err) + ", falling back to chage\n"
+                leftover = self.fixusers
+            self.logger.log(LogPriority.DEBUG, debug)
+            if leftover:
+                failed = self.accountpolicy.applyeach(leftover, self.ch)
+                if failed:
+                    self.detailedresults += "unable to set password " + \
+                        "expiration for: " + ", ".join(failed) + "\n"
+                    success = False
         #put in sections for bsd and solaris which both use passwd command
         return success
 
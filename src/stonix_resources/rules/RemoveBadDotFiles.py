@@ -28,15 +28,18 @@ Created on Jul 13, 2012
 @change: 02/13/2014 ekkehard Implemented isapplicable
 @change: 04/18/2014 dkennel Replace old-style CI invocation
 @change: 2015/04/16 dkennel upate for new isApplicable
+@change: 2026/10/18 Homes and their dot files come from the shared home
+    inventory, unreachable homes are skipped
 '''
 from __future__ import absolute_import
 
-import pwd
 import os
+import stat
 import traceback
 
 from ..rule import Rule
 from ..logdispatcher import LogPriority
+from ..homeinventory import HOMES
 from ..stonixutilityfunctions import *
 
 
@@ -81,18 +84,43 @@ class RemoveBadDotFiles(Rule):
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
-        self.homelist = ['/', '/root']
-        try:
-            mypwd = pwd.getpwall()
-            for user in mypwd:
-                home = user[5]
-                if home not in self.homelist:
-                    self.homelist.append(home)
-            if self.environ.geteuid() != 0:
-                pwdsingle = pwd.getpwuid(self.environ.geteuid())
-                self.homelist = pwdsingle[5]
-        except(IndexError, OSError):
-            pass
+        self.badfiles = ['.netrc', '.shosts', '.rhosts']
+
+    def getbadpaths(self):
+        """
+        Return the bad dot files present in the homes of all accounts, or
+        only in the home of the current user when not running as root.
+        Links to /dev/null are allowed. Homes on file systems that do not
+        answer are skipped and logged.
+
+        @return: list of paths
+        """
+        euid = self.environ.geteuid()
+        homelist = []
+        if euid == 0:
+            homelist = ['/', '/root']
+        for account in HOMES.getaccounts():
+            if euid == 0 or account.pw_uid == euid:
+                if account.pw_dir not in homelist:
+                    homelist.append(account.pw_dir)
+        badpaths = []
+        homes = HOMES.gethomes(homelist)
+        for home in homelist:
+            homedir = homes[home]
+            if not homedir.reachable:
+                self.logdispatch.log(LogPriority.DEBUG,
+                                     "Skipping unreachable home " + home)
+                continue
+            for badfile in self.badfiles:
+                info = homedir.dotfiles.get(badfile)
+                if info is None:
+                    continue
+                badpath = os.path.join(home, badfile)
+                if stat.S_ISLNK(info.st_mode) and \
+                   os.path.realpath(badpath) == '/dev/null':
+                    continue
+                badpaths.append(badpath)
+        return badpaths
 
     def report(self):
         """
@@ -106,24 +134,10 @@ class RemoveBadDotFiles(Rule):
             compliant = True
             self.detailedresults = ""
             myresults = "Bad dot files were detected: "
-            badfiles = ['.netrc', '.shosts', '.rhosts']
 
-            for home in self.homelist:
-                badpaths = []
-                for badfile in badfiles:
-                    badpaths.append(os.path.join(home, badfile))
-                try:
-                    for badpath in badpaths:
-                        if os.path.islink(badpath) and \
-                        os.path.realpath(badpath) == '/dev/null':
-                            continue
-                        elif os.path.exists(badpath):
-                            compliant = False
-                            myresults = myresults + " " + badpath
-                except OSError:
-                    # we expect failures on NFS mounted homes when running
-                    # as root
-                    pass
+            for badpath in self.getbadpaths():
+                compliant = False
+                myresults = myresults + " " + badpath
             if compliant:
                 self.detailedresults = 'No bad dot files were detected'
             else:
@@ -154,23 +168,15 @@ class RemoveBadDotFiles(Rule):
                                        self.detailedresults)
             self.logdispatch.log(LogPriority.INFO, self.detailedresults)
             return self.rulesuccess
-        badfiles = ['.netrc', '.shosts', '.rhosts']
         try:
-            for home in self.homelist:
-                badpaths = []
-                for badfile in badfiles:
-                    badpaths.append(os.path.join(home, badfile))
+            for badpath in self.getbadpaths():
                 try:
-                    for badpath in badpaths:
-                        if os.path.islink(badpath) and \
-                        os.path.realpath(badpath) == '/dev/null':
-                            continue
-                        elif os.path.exists(badpath):
-                            os.remove(badpath)
+                    os.remove(badpath)
                 except OSError:
                     # we expect failures on NFS mounted homes when running
                     # as root
                     pass
+                HOMES.invalidate(os.path.dirname(badpath))
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
             raise
@@ -61,6 +61,7 @@ directory.'''
 
         self.guidance = ["LANL 15.7"]
         self.iditerator = 0
+        self.pkgsremoved = []
         self.ph = Pkghelper(self.logger, self.environ)
 
         self.gamelist = ['/usr/bin/atlantik',
@@ -142,8 +143,9 @@ directory.'''
         return self.compliant
 
     def __cleandir(self, directory):
-        '''Recursively finds the package name for each file in a directory,
-        and all child directories, and uninstalls the package. Ignores links.
+        '''Finds the package name for each file in a directory, and all
+        child directories, and uninstalls the packages. Ignores links. All
+        files are resolved with a single package manager query.
         This is best-effort; no error checking is done for the uninstall
         requests.
 
@@ -152,7 +154,16 @@ directory.'''
                  otherwise.
         @author: Eric Ball
         '''
-        success = True
+        return self.__removepackages(self.__listfiles(directory))
+
+    def __listfiles(self, directory):
+        '''Recursively lists the files in a directory and all child
+        directories.
+
+        @param directory: Name of the directory to search
+        @return: list of file paths
+        '''
+        files = []
         dirlist = os.listdir(directory)
         if directory[-1] != '/':
             directory += '/'
@@ -160,28 +171,51 @@ directory.'''
         for path in dirlist:
             path = directory + path
             if os.path.isfile(path):
-                pkgName = self.ph.getPackageFromFile(path)
-                if pkgName is not None:
-                    if self.ph.remove(pkgName):
-                        self.iditerator += 1
-                        myid = iterate(self.iditerator, self.rulenumber)
-                        event = {"eventtype": "pkghelper",
-                                 "pkgname": pkgName,
-                                 "startstate": "installed",
-                                 "endstate": "removed"}
-                        self.statechglogger.recordchgevent(myid, event)
-                    else:
-                        debug = "Could not remove package " + pkgName
-                        self.logger.log(LogPriority.DEBUG, debug)
-                        success = False
-                else:
-                    debug = "Could not find package name for " + path
-                    self.logger.log(LogPriority.DEBUG, debug)
-                    success = False
+                files.append(path)
             elif os.path.isdir(path):
-                success &= self.__cleandir(path)
+                files += self.__listfiles(path)
+        return files
+
+    def __removepackages(self, files):
+        '''Uninstalls the packages providing the passed files.
+
+        @param files: list of file paths
+        @return: False if a package name is not found for any file or a
+                 package could not be removed, True otherwise.
+        '''
+        success = True
+        pkgNames = self.ph.getPackagesFromFiles(files)
+        for path in files:
+            pkgName = pkgNames[path]
+            if pkgName is None:
+                debug = "Could not find package name for " + path
+                self.logger.log(LogPriority.DEBUG, debug)
+                success = False
+            elif not self.__removepackage(pkgName):
+                debug = "Could not remove package " + pkgName
+                self.logger.log(LogPriority.DEBUG, debug)
+                success = False
         return success
 
+    def __removepackage(self, pkgName):
+        '''Uninstalls a package and records the change. A package that was
+        already removed during this fix is not removed again.
+
+        @param pkgName: Name of the package to remove
+        @return: True if the package was removed
+        '''
+        if pkgName in self.pkgsremoved:
+            return True
+        if not self.ph.remove(pkgName):
+            return False
+        self.pkgsremoved.append(pkgName)
+        self.iditerator += 1
+        myid = iterate(self.iditerator, self.rulenumber)
+        event = {"eventtype": "pkghelper", "pkgname": pkgName,
+                 "startstate": "installed", "endstate": "removed"}
+        self.statechglogger.recordchgevent(myid, event)
+        return True
+
     def fix(self):
         try:
             if not self.ci.getcurrvalue():
@@ -207,15 +241,11 @@ directory.'''
                 if os.path.exists(game):
                     self.gamesfound.append(game)
 
+            self.pkgsremoved = []
+            pkgNames = self.ph.getPackagesFromFiles(self.gamesfound)
             for game in self.gamesfound:
-                pkgName = self.ph.getPackageFromFile(game)
-                if pkgName is not None and self.ph.remove(pkgName):
-                    self.iditerator += 1
-                    myid = iterate(self.iditerator, self.rulenumber)
-                    event = {"eventtype": "pkghelper", "pkgname": pkgName,
-                             "startstate": "installed", "endstate": "removed"}
-                    self.statechglogger.recordchgevent(myid, event)
-                else:
+                pkgName = pkgNames[game]
+                if pkgName is None or not self.__removepackage(pkgName):
                     success = False
                     results += "Unable to remove " + game + "\n"
 
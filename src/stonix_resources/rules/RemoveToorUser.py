@@ -28,7 +28,6 @@ Created on Nov 13, 2012
 @change: 2015/04/16 dkennel updated for new isApplicable
 '''
 from __future__ import absolute_import
-from ..stonixutilityfunctions import readFile
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from subprocess import call
@@ -66,7 +65,7 @@ REMOVETOORUSER to False.'''
         try:
             found = False
             fileLocation = "/etc/passwd"
-            contents = readFile(fileLocation, self.logger)
+            contents = self.environ.getfilecache().readlines(fileLocation)
             if contents:
                 user = "^toor"
                 for line in contents:
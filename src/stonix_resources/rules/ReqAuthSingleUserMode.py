@@ -77,6 +77,7 @@ authentication for single-user mode or not, and if it does not then it makes \
 the necessary config file changes to require authentication for single-user \
 mode.'''
         self.guidance = ['CIS, NSA(2.3.5.3)']
+        self.conflictgroups = ['inittab']
         self.applicable = {'type': 'black',
                            'family': ['darwin']}
         datatype = 'bool'
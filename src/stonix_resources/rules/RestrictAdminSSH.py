@@ -57,6 +57,8 @@ RESTRICTADMINSSH to False.'''
         default = True
         self.ci = self.initCi(datatype, key, instructions, default)
         self.guidance = []
+        self.conflictgroups = ['sshd']
+        self.runafter = ['SecureSSH']
         self.ssh = {"DenyGroups": "admin"}
         self.iditerator = 0
         self.applicable = {'type': 'white',
@@ -79,6 +79,7 @@ and media.'''
 
         self.guidance = ["NSA 2.2.2.1", "NSA 2.2.2.3", "NSA 2.2.2.4",
                          "CCE 3685-5", "CCE 4072-5", "CCE 4231-7"]
+        self.conflictgroups = ['fstab']
         self.applicable = {"type": "white",
                            "family": ["linux"]}
         self.iditerator = 0
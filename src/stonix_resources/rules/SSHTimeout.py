@@ -37,6 +37,8 @@ from ..stonixutilityfunctions import createFile
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..KVEditorStonix import KVEditorStonix
+from ..ServiceHelper import ServiceHelper
+from ..filetransaction import TRANSACTION
 from ..pkghelper import Pkghelper
 import traceback
 import os
@@ -62,6 +64,8 @@ automatically logged out. '''
                               "of SSHTIMEOUT to False",
                               True)
         self.guidance = ['NSA 3.5.2.3']
+        self.conflictgroups = ['sshd']
+        self.runafter = ['SecureSSH']
         self.iditerator = 0
         self.editor = ""
         self.applicable = {'type': 'white',
@@ -211,6 +215,10 @@ automatically logged out. '''
                         debug += "kveditor fix ran successfully\n"
                         if self.editor.commit():
                             debug += "kveditor commit ran successfully\n"
+                            if self.environ.getosfamily() != "darwin":
+                                TRANSACTION.reloadservice(ServiceHelper(self.environ,
+                                                                        self.logger),
+                                                          self.path, "sshd")
                         else:
                             debug += "Unable to complete kveditor commit\n"
                             success = False
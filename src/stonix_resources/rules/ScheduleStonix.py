@@ -75,6 +75,7 @@ class ScheduleStonix(Rule):
         self.helptext = "Schedule a random time for STONIX to run in admin/" + \
             "root context once per week, and in user context once per day. NOTE: THIS RULE CANNOT BE REVERTED/UNDONE."
         self.guidance = ['']
+        self.conflictgroups = ['profile', 'crontab']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
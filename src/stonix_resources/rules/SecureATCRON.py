@@ -81,6 +81,7 @@ and enables and configures logging for these daemons.'''
         self.guidance = ['CIS', 'NSA(3.4)', 'CCE-4644-1', 'CCE-4543-5',
                          'CCE-4437-0', 'CCE-4693-8', 'CCE-4710-0',
                          'CCE-4230-9', 'CCE-4445-3']
+        self.conflictgroups = ['crontab']
         self.applicable = {'type': 'black',
                            'family': ['darwin']}
 
@@ -29,6 +29,8 @@ Created on May 20, 2013
 @change: 04/21/2014 dkennel Updated CI invocation
 @change: 2014/10/17 ekkehard OS X Yosemite 10.10 Update
 @change: 2015/04/17 dkennel updated for new isApplicable
+@change: 2026/10/18 Linux, Solaris and FreeBSD homes come from the shared home
+    inventory, unreachable homes are skipped
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import iterate, readFile
@@ -36,6 +38,7 @@ from ..rule import Rule
 from ..configurationitem import ConfigurationItem
 from ..logdispatcher import LogPriority
 from ..CommandHelper import CommandHelper
+from ..homeinventory import HOMES
 import traceback
 import os
 import stat
@@ -62,6 +65,7 @@ False.'''
         default = True
         self.ci = self.initCi(datatype, key, instructions, default)
         self.guidance = ['NSA 2.3.4.2']
+        self.conflictgroups = ['logindefs']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.11.10']}}
@@ -239,20 +243,17 @@ False.'''
         debug = ""
         uidmin = ""
         compliant = True
-        templist = []
         remove = []
-        grpvals = ("7", "2", "3", "6")
         unwanted = ["/root", "/", "/usr", "/var", "/lib", "/bin", "/sbin",
                     "/run", "/etc"]
-        #we will look for home directories in /etc/passwd and in /home
+        #we will look for home directories in the accounts and in /home
         if self.environ.getosfamily() == "solaris":
             homebase = "/export/home/"
         else:
             homebase = "/home/"
-        #read in /etc/passwd
-        contents = readFile("/etc/passwd", self.logger)
-        if not contents:
-            self.detailedresults += "the /etc/passwd file is blank.  This \
+        accounts = HOMES.getaccounts()
+        if not accounts:
+            self.detailedresults += "no user accounts were found.  This \
 rule cannot be run at all.\n"
             self.formatDetailedResults("report", False, self.detailedresults)
             compliant = False
@@ -273,34 +274,21 @@ rule cannot be run at all.\n"
                             debug = traceback.format_exc() + "\n"
                             debug += "Index out of range on line: " + line + "\n"
 
-            #add home directories found in /etc/passwd
+            #add home directories of the user accounts
             if not uidmin:
                 uidmin = 100
-            for line in contents:
-                if re.search("^#", line) or re.match("^\s*$", line):
-                    continue
-                if re.search(":", line):
-                    temp = line.split(":")
-                    try:
-                        if re.search("/", temp[5]):
-                            if int(temp[2]) >= uidmin and int(temp[2]) != 65534:
-                                self.homedirs.append(temp[5])
-                        else:
-                            debug = "the /etc/passwd file is not in the \
-correct format as of the line: " + line + "\n"
-                    except IndexError:
-                        compliant = False
-                        debug = traceback.format_exc() + "\n"
-                        debug += "Index out of range on line: " + line + "\n"
+            for account in HOMES.getuseraccounts(uidmin):
+                if account.pw_dir not in self.homedirs:
+                    self.homedirs.append(account.pw_dir)
 
             #add home directories found
-            output = os.listdir(homebase)
-            for item in output:
-                if item == "lost+found":
-                    continue
-                home = homebase + item
-                if home not in self.homedirs:
-                    self.homedirs.append(home)
+            if os.path.isdir(homebase):
+                for item in os.listdir(homebase):
+                    if item == "lost+found":
+                        continue
+                    home = homebase + item
+                    if home not in self.homedirs:
+                        self.homedirs.append(home)
 
             #clean up self.homedirs to not contain any of the root dirs
             for item in self.homedirs:
@@ -316,116 +304,58 @@ correct format as of the line: " + line + "\n"
                 self.homedirs.remove(item)
 
             #let's look at the home directories we found
-            if self.homedirs:
-                for home in self.homedirs:
-                    user = ""
-                    if not os.path.exists(home):
-                        compliant = False
-                        debug += "This home directory doesn't exist: " + home + "\n"
-                        continue
-
-                    #here we get just the username from the home directory
-                    temphome = home.split("/")
-                    try:
-                        if temphome[-1] == "":
-                            temphome.pop(-1)
-                        if temphome[0] == "":
-                            temphome.pop(0)
-                        user = str(temphome[-1])
-                    except IndexError:
-                        compliant = False
-                        debug += traceback.format_exc() + "\n"
-                        debug += "Index out of range on line: " + line + "\n"
-                        continue
-                    output = os.listdir(homebase)
-                    for directory in output:
-                        templist = []
-                        #we found the current user's home directory
-                        if (user == directory):
-                            try:
-                                #get info about user's directory
-                                statdata = os.stat(homebase + directory)
-
-                                #permission returns in integer format
-                                mode = stat.S_IMODE(statdata.st_mode)
-
-                                #convert permission to octal format
-                                octval = oct(mode)
-
-                                #remove leading 0
-                                octval = re.sub("^0", "", octval)
-
-                                #split numeric integer value of permissions
-                                #into separate numbers
-                                perms = list(octval)
-
-                                grpval = perms[1]
-                                world = perms[2]
-                                #if the group value equals any of the 
-                                #following numbers, it is group writeable
-                                if grpval in grpvals:
-                                    templist.append("gw")
-                                    compliant = False
-                                if world != "0":
-                                    templist.append("wr")
-                                    compliant = False
-                                if templist:
-                                    self.wrong[home] = templist
-                                    break
-                            except IndexError:
-                                compliant = False
-                                debug += traceback.format_exc() + "\n"
-                                debug += "Index out of range on line: " + line + "\n"
-                                break
+            homes = HOMES.gethomes(self.homedirs)
+            for home in self.homedirs:
+                homedir = homes[home]
+                if not homedir.reachable:
+                    debug += "Skipping unreachable home directory: " + \
+                        home + "\n"
+                    continue
+                if not homedir.exists():
+                    compliant = False
+                    debug += "This home directory doesn't exist: " + home + "\n"
+                    continue
+                templist = self.checkmode(homedir.stat)
+                if templist:
+                    self.wrong[home] = templist
+                    compliant = False
 
         else:
-            user = os.getlogin()
-            output = os.listdir(homebase)
-            for line in output:
+            for account in accounts:
+                if account.pw_uid != self.environ.geteuid():
+                    continue
+                homedir = HOMES.gethome(account.pw_dir)
                 #the current user has a home directory!
-                if line == user:
-                    home = homebase + line
-                    try:
-                        #get file information each file
-                        statdata = os.stat(home)
-
-                        #permission returns in integer format
-                        mode = stat.S_IMODE(statdata.st_mode)
-
-                        #convert permission to octal format
-                        octval = oct(mode)
-
-                        #remove leading 0
-                        octval = re.sub("^0", "", octval)
-
-                        #split numeric integer value of permissions
-                        #into separate numbers
-                        perms = list(octval)
-
-                        #group permissions
-                        grpval = perms[1]
-
-                        #other permissions(world)
-                        world = perms[2]
-                        #if the group value equals any of the 
-                        #following numbers, it is group writeable
-                        if grpval in grpvals:
-                            templist.append("gw")
-                            compliant = False
-                        if world != "0":
-                            templist.append("wr")
-                            compliant = False
-                        if templist:
-                            self.wrong[home] = templist
-                            break
-                    except IndexError:
+                if homedir.exists():
+                    templist = self.checkmode(homedir.stat)
+                    if templist:
+                        self.wrong[homedir.path] = templist
                         compliant = False
-                        debug += traceback.format_exc() + "\n"
-                        debug += "Index out of range on line: " + line + "\n"
+                break
         if debug:
             self.logger.log(LogPriority.DEBUG, debug)
         return compliant
 
+###############################################################################
+
+    def checkmode(self, statdata):
+        '''
+        check the permissions of a home directory
+
+        @param statdata: os.stat result of the home directory
+        @return: list containing "gw" if the directory is group writeable and
+            "wr" if it is accessible by others
+        @author: dwalker
+        '''
+        templist = []
+        #permission returns in integer format
+        mode = stat.S_IMODE(statdata.st_mode)
+        if mode & stat.S_IWGRP:
+            templist.append("gw")
+        if mode & stat.S_IRWXO:
+            templist.append("wr")
+        return templist
+
 ###############################################################################
 
     def fix(self):
@@ -477,6 +407,7 @@ correct format as of the line: " + line + "\n"
                             wr = True
                     else:
                         wr = True
+                    HOMES.invalidate(home)
                     if not gw or not wr:
                         unsuccessful.append(home)
                         continue
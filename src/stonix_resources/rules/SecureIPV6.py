@@ -27,6 +27,10 @@ Created on Jan 14, 2014
 @change: 04/21/2014 dkennel Updated CI invocation
 @change: 2015/04/17 dkennel updated for new isApplicable
 @change: 2015/10/08 eball Help text cleanup
+@change: 2026/10/18 Manage the kernel parameters through the shared sysctl
+    service instead of editing /etc/sysctl.conf. Corrected the
+    accept_redirects parameter name.
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 from ..stonixutilityfunctions import iterate, setPerms, checkPerms, writeFile
@@ -34,7 +38,7 @@ from ..stonixutilityfunctions import readFile, resetsecon, createFile
 from ..rule import Rule
 from ..logdispatcher import LogPriority
 from ..KVEditorStonix import KVEditorStonix
-from ..CommandHelper import CommandHelper
+from ..sysctlservice import SYSCTL
 from ..pkghelper import Pkghelper
 import traceback
 import os
@@ -81,10 +85,22 @@ False.'''
                          "CCE 4221-8", "CCE 4137-6", "CCE 4159-0",
                          "CCE 3895-0", "CCE 4287-9", "CCE 4058-4",
                          "CCE 4128-5"]
+        self.conflictgroups = ['sysctl']
         self.applicable = {'type': 'white',
                            'family': ['linux']}
         self.iditerator = 0
-        self.created = False
+        self.sysctls = {"net.ipv6.conf.default.router_solicitations": "0",
+                        "net.ipv6.conf.default.accept_ra_rtr_pref": "0",
+                        "net.ipv6.conf.default.accept_ra_pinfo": "0",
+                        "net.ipv6.conf.default.accept_ra_defrtr": "0",
+                        "net.ipv6.conf.default.autoconf": "0",
+                        "net.ipv6.conf.default.dad_transmits": "0",
+                        "net.ipv6.conf.default.max_addresses": "1",
+                        "net.ipv6.conf.default.accept_ra": "0",
+                        "net.ipv6.conf.default.accept_redirects": "0"}
+        if self.environ.getosfamily() == "linux":
+            SYSCTL.declare(self.rulename, self.sysctls)
+            self.watchedpaths = SYSCTL.getwatchedpaths()
 
     def report(self):
         try:
@@ -111,22 +127,12 @@ False.'''
     def reportLinux(self):
         netwrkfile = ""
         ifacefile = ""
-        sysctl = "/etc/sysctl.conf"
-        self.editor1, self.editor2 = "", ""
+        self.editor2 = ""
         compliant = True
         interface = {"IPV6_AUTOCONF": "no"}
         interface2 = {"IPV6_PRIVACY": "rfc3041"}
 #                       "IPV6_DEFAULTGW": self.gateway,
 #                       "IPV6ADDR":self.ipaddr}
-        sysctls = {"net.ipv6.conf.default.router_solicitations": "0",
-                   "net.ipv6.conf.default.accept_ra_rtr_pref": "0",
-                   "net.ipv6.conf.default.accept_ra_pinfo": "0",
-                   "net.ipv6.conf.default.accept_ra_defrtr": "0",
-                   "net.ipv6.conf.default.autoconf": "0",
-                   "net.ipv6.conf.default.dad_transmits": "0",
-                   "net.ipv6.conf.default.max_addresses": "1",
-                   "net.ipv6.conf.default.accept_ra": "0",
-                   "net.ipv6.conf.default.accept_redirect": "0"}
         self.ph = Pkghelper(self.logger, self.environ)
         if self.ph.manager == "yum":
             ifacefile = "/etc/sysconfig/network-scripts/"
@@ -140,35 +146,11 @@ False.'''
             if not os.path.exists(ifacefile):
                 ifacefile = ""
 
-        tmpfile = sysctl + ".tmp"
-        # check if sysctl file is present
-        if not os.path.exists(sysctl):
-            # if not, create it
-            if createFile(sysctl, self.logger):
-                self.created = True
-                setPerms(sysctl, [0, 0, 420], self.logger)
-                tmpfile = sysctl + ".tmp"
-                # create an editor to check file
-                self.editor1 = KVEditorStonix(self.statechglogger, self.logger,
-                                              "conf", sysctl, tmpfile, sysctls,
-                                              "present", "openeq")
-                if not self.editor1.report():
-                    self.detailedresults += "/etc/sysctl file doesn't " + \
-                        "contain the correct contents\n"
-                    compliant = False
-            else:
-                compliant = False
-        else:
-            if not checkPerms(sysctl, [0, 0, 420], self.logger):
-                compliant = False
-            tmpfile = sysctl + ".tmp"
-            self.editor1 = KVEditorStonix(self.statechglogger, self.logger,
-                                          "conf", sysctl, tmpfile, sysctls,
-                                          "present", "openeq")
-            if not self.editor1.report():
-                self.detailedresults += "/etc/sysctl file doesn't contain \
-the correct contents\n"
-                compliant = False
+        SYSCTL.declare(self.rulename, self.sysctls)
+        problems = SYSCTL.check(self.rulename)
+        if problems:
+            self.detailedresults += "\n".join(problems) + "\n"
+            compliant = False
         if netwrkfile:
             if os.path.exists(netwrkfile):
                 if not checkPerms(netwrkfile, [0, 0, 420], self.logger):
@@ -276,7 +258,6 @@ the correct contents\n"
         netwrkfile = ""
         tempstring1 = ""
         tempstring2 = ""
-        sysctl = "/etc/sysctl.conf"
         interface = {"IPV6_AUTOCONF": "no"}
         interface2 = {"IPV6_PRIVACY": "rfc3041"}
 #                     "IPV6_DEFAULTGW": self.gateway,
@@ -286,36 +267,12 @@ the correct contents\n"
             netwrkfile = "/etc/sysconfig/network"
         elif self.ph.manager == "zypper":
             ifacefile = "/etc/sysconfig/network/"
-        if self.created:
-            self.iditerator += 1
-            myid = iterate(self.iditerator, self.rulenumber)
-            event = {"eventtype": "creation",
-                     "filepath": self.editor1.getPath()}
-            self.statechglogger.recordchgevent(myid, event)
-        if os.path.exists(sysctl):
-            if not checkPerms(sysctl, [0, 0, 420], self.logger):
-                self.iditerator += 1
-                myid = iterate(self.iditerator, self.rulenumber)
-                if not setPerms(sysctl, [0, 0, 420], self.logger,
-                                self.statechglogger, myid):
-                    success = False
-            if self.editor1:
-                if self.editor1.fixables:
-                    self.iditerator += 1
-                    if not self.created:
-                        myid = iterate(self.iditerator, self.rulenumber)
-                        self.editor1.setEventID(myid)
-                    if not self.editor1.fix():
-                        success = False
-                    elif not self.editor1.commit():
-                        success = False
-                    os.chown(sysctl, 0, 0)
-                    os.chmod(sysctl, 420)
-                    resetsecon(sysctl)
-                    cmdhelper = CommandHelper(self.logger)
-                    cmd = ["/sbin/sysctl", "-q", "-e", "-p"]
-                    if not cmdhelper.executeCommand(cmd):
-                        success = False
+        failed = SYSCTL.fix(self.rulename, self.statechglogger,
+                            self.nexteventid)
+        if failed:
+            self.detailedresults += "Unable to set " + ", ".join(failed) + \
+                " in the running kernel\n"
+            success = False
         if netwrkfile:
             if not os.path.exists(netwrkfile):
                 if not createFile(netwrkfile, self.logger):
@@ -33,6 +33,7 @@ Created on Feb 19, 2013
 @change: 2015/09/23 eball Removed Banner setting to resolve InstallBanners conflict
 @change: 2015/10/08 eball Help text cleanup
 @change: 2015/11/09 ekkehard - make eligible of OS X El Capitan
+@change: 2026/10/18 Declare the watched configuration files
 '''
 from __future__ import absolute_import
 import os
@@ -42,6 +43,8 @@ from ..rule import Rule
 from ..stonixutilityfunctions import iterate, checkPerms, setPerms, resetsecon
 from ..stonixutilityfunctions import createFile
 from ..KVEditorStonix import KVEditorStonix
+from ..ServiceHelper import ServiceHelper
+from ..filetransaction import TRANSACTION
 from ..logdispatcher import LogPriority
 
 
@@ -81,6 +84,12 @@ appropriate contents in them whether installed or not.'''
                          'CCE 4475-0', 'CCE 4370-3', 'CCE 4387-7',
                          'CCE 3660-8', 'CCE 4431-3', 'CCE 14716-5',
                          'CCE 14491-5']
+        self.conflictgroups = ['sshd']
+        if self.environ.getostype() == "Mac OS X":
+            self.watchedpaths = ["/private/etc/sshd_config",
+                                 "/private/etc/ssh_config"]
+        else:
+            self.watchedpaths = ["/etc/ssh/sshd_config", "/etc/ssh/ssh_config"]
         self.ed1, self.ed2 = "", ""
 
 ###############################################################################
@@ -251,6 +260,10 @@ appropriate contents in them whether installed or not.'''
                         if self.ed1.commit():
                             self.detailedresults += "kveditor1 commit ran \
 successfully\n"
+                            if self.environ.getosfamily() != "darwin":
+                                TRANSACTION.reloadservice(ServiceHelper(self.environ,
+                                                                        self.logger),
+                                                          self.path1, "sshd")
                         else:
                             self.detailedresults += "kveditor1 commit did not run \
 successfully\n"
@@ -94,6 +94,8 @@ This rule will not configure su on Debian distros"""
         default = True
         self.ci = self.initCi(datatype, key, instructions, default)
         self.guidance = ['CIS', 'NSA 2.3.1.2', 'CCE 4274-7']
+        self.conflictgroups = ['pam']
+        self.runafter = ['ConfigureSystemAuthentication']
         self.iditerator = 0
         self.applicable = {'type': 'white',
                            'family': ['linux']}
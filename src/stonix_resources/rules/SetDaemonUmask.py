@@ -80,6 +80,7 @@ for each of the relevant config files and sets the process daemon umask to 022 \
         self.rootrequired = True
         self.detailedresults = 'The SetDaemonUmask rule has not yet been run'
         self.guidance = ['CCE 4220-0']
+        self.conflictgroups = ['pam', 'logindefs']
 
         # init CIs
         datatype = 'bool'
@@ -82,6 +82,7 @@ class SetDefaultUserUmask(Rule):
         self.rootrequired = True
         self.guidance = ['CIS', 'NSA(2.3.4.4)', 'CCE-3844-8', 'CCE-4227-5',
                          'CCE-3870-3', 'CCE-4737-6']
+        self.conflictgroups = ['profile']
 
         # set up which system types this rule will be applicable to
         self.applicable = {'type': 'white',
@@ -87,6 +87,7 @@ class SetFSMountOptions(Rule):
         self.guidance = ['CIS NSA(2.2.1.1)', 'cce4249-9', 'cce4368-7',
                          'cce4024-6', 'cce4526-0', 'CIS NSA(2.2.1.2)',
                          'cce3522-0', 'cce4042-8', 'cce4315-8']
+        self.conflictgroups = ['fstab']
 
         self.applicable = {'type': 'black',
                            'family': ['darwin', 'solaris', 'freebsd']}
@@ -60,6 +60,7 @@ Windows, as it will close terminal windows in the X environment.'''
         self.ci = self.initCi(datatype, key, instructions, default)
 
         self.guidance = ["NSA 2.3.5.5", "CCE 3689-7", "CCE 3707-7"]
+        self.conflictgroups = ['profile']
         self.applicable = {"type": "white",
                            "family": ["linux"]}
         self.iditerator = 0
@@ -33,6 +33,8 @@ updating automatically from a scheduled job where feasible.
 @change: 2015/04/20 dkennel updated to check rpmrc files for "nosignature"
          option per DISA STIG.
 @change: 2015/09/11 eball Fix apt-get compatibility
+@change: 2026/10/18 Read command output through CommandHelper, which drains
+         stderr as well
 '''
 from __future__ import absolute_import
 import os
@@ -122,10 +124,8 @@ class SoftwarePatching(Rule):
             elif os.path.exists('/usr/sbin/freebsd-update'):
                 self.logger.log(LogPriority.DEBUG, 'Found freebsd-update')
                 cmd = '/usr/sbin/freebsd-update fetch'
-                chk = subprocess.Popen(cmd, shell=True, close_fds=True,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
-                chkdata = chk.stdout.readlines()
+                self.ch.executeCommand(cmd)
+                chkdata = self.ch.getOutput()
                 self.logger.log(LogPriority.DEBUG,
                                 'Value of freebsd-update fetch: ' +
                                 str(chkdata))
@@ -169,10 +169,8 @@ class SoftwarePatching(Rule):
                 if ret != 0:
                     # we couldn't update the portage cache network problem?
                     return False
-                chk = subprocess.Popen(cmd2, shell=True, close_fds=True,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
-                chkdata = chk.stdout.readlines()
+                self.ch.executeCommand(cmd2)
+                chkdata = self.ch.getOutput()
                 updatecount = 0
                 self.logger.log(LogPriority.DEBUG,
                                 'Value of updatecount: ' + str(updatecount))
@@ -187,10 +185,8 @@ class SoftwarePatching(Rule):
                     os.environ["http_proxy"] = PROXY
                     os.environ["https_proxy"] = PROXY
                 cmd = '/usr/bin/zypper lp'
-                chk = subprocess.Popen(cmd, shell=True, close_fds=True,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
-                chkdata = chk.stdout.readlines()
+                self.ch.executeCommand(cmd)
+                chkdata = self.ch.getOutput()
                 updatecount = 0
                 self.logger.log(LogPriority.DEBUG,
                                 'Value of updatecount: ' + str(updatecount))
@@ -347,10 +343,8 @@ class SoftwarePatching(Rule):
         gpgcheckok = True
         if os.path.exists('/bin/rpm'):
             rpmcmd = '/bin/rpm -q --queryformat "%{SUMMARY}\n" gpg-pubkey'
-            cmd = subprocess.Popen(rpmcmd, stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE, shell=True,
-                                   close_fds=True)
-            cmddata = cmd.stdout.readlines()
+            self.ch.executeCommand(rpmcmd)
+            cmddata = self.ch.getOutput()
             for line in cmddata:
                 if re.search('security@redhat.com|security@suse|fedora@fedoraproject|security@centos', line) and re.search('gpg', line):
                     gpgok = True
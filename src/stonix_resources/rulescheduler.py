@@ -0,0 +1,297 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+The RuleScheduler runs the report/fix/undo actions of a list of rules on a
+bounded pool of worker threads. Results are always handed back to the caller
+in the original rule order so that logging, the XML report and the progress
+counters of the controller look the same as in a serial run.
+
+The scheduler also owns the rule ordering. Rules may declare the names of
+rules they must run after (Rule.getrunafter); orderrules() sorts the rules
+topologically with the rule number as tie breaker so that every host runs
+the rules in the same order regardless of directory listing order.
+'''
+import heapq
+import threading
+import time
+import traceback
+import types
+from logdispatcher import LogPriority
+
+
+class RuleScheduler(object):
+    '''
+    Bounded thread pool used by the controller to run rules concurrently.
+
+    Rules may declare conflict groups (see Rule.getconflictgroups). Two rules
+    sharing a conflict group are never executed at the same time, so rules
+    that edit the same file or drive the same subsystem stay serialized while
+    unrelated rules run in parallel. When dependencies are honored a rule is
+    only started once the rules it runs after have finished, which lets
+    independent branches of the dependency graph run concurrently.
+    '''
+
+    def __init__(self, logdispatcher, workers=1):
+        '''
+        Constructor
+
+        @param logdispatcher: LogDispatcher instance
+        @param workers: int - maximum number of rules to run at once. A value
+            of 1 runs every rule serially in the calling thread.
+        '''
+        if type(workers) is not types.IntType:
+            raise TypeError('Number of workers must be an integer')
+        if workers < 1:
+            raise ValueError('Number of workers must be 1 or more')
+        self.logdispatcher = logdispatcher
+        self.workers = workers
+        self.cond = threading.Condition()
+        self.pending = []
+        self.held = set()
+        self.done = {}
+        self.finished = set()
+        self.stopped = False
+
+    def getworkers(self):
+        '''
+        Return the maximum number of rules run at once.
+
+        @return: int
+        '''
+        return self.workers
+
+    def orderrules(self, rules):
+        '''
+        Return the rules sorted so that every rule comes after the rules it
+        declares it runs after. Rules without ordering constraints between
+        them are sorted by rule number. Dependencies on rules that are not in
+        the list (e.g. not applicable to this platform) are ignored. If the
+        declared dependencies contain a cycle an error is logged and the
+        rules in the cycle are appended in rule number order.
+
+        @param rules: list of Rule instances
+        @return: list of Rule instances
+        '''
+        byname = {}
+        for rule in rules:
+            byname[rule.getrulename()] = rule
+        children = {}
+        indegree = {}
+        for rule in rules:
+            name = rule.getrulename()
+            children.setdefault(name, [])
+            indegree.setdefault(name, 0)
+        for rule in rules:
+            for parent in set(rule.getrunafter()):
+                if parent in byname and parent != rule.getrulename():
+                    children[parent].append(rule.getrulename())
+                    indegree[rule.getrulename()] += 1
+        ready = []
+        for rule in rules:
+            if indegree[rule.getrulename()] == 0:
+                heapq.heappush(ready, (rule.getrulenum(), rule.getrulename()))
+        ordered = []
+        while ready:
+            _, name = heapq.heappop(ready)
+            ordered.append(byname[name])
+            for child in children[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    heapq.heappush(ready, (byname[child].getrulenum(), child))
+        if len(ordered) < len(byname):
+            leftover = [rule for rule in byname.values()
+                        if indegree[rule.getrulename()] > 0]
+            leftover.sort(key=lambda rule: (rule.getrulenum(),
+                                            rule.getrulename()))
+            self.logdispatcher.log(LogPriority.ERROR,
+                                   ['RuleScheduler',
+                                    'Dependency cycle involving rules: ' +
+                                    ', '.join([rule.getrulename()
+                                               for rule in leftover])])
+            ordered.extend(leftover)
+        return ordered
+
+    def run(self, rules, action, callback, honordeps=False):
+        '''
+        Call action(rule) for every rule in rules. Once a rule has been
+        processed callback(rule, elapsed, trace) is called from the calling
+        thread, in the same order as the rules list. elapsed is the wall time
+        in seconds spent in action and trace is the formatted traceback if the
+        action raised, None otherwise.
+
+        If honordeps is True a rule is not started before the rules it runs
+        after, and rules sharing a conflict group run in list order. The
+        rules list is expected to be in the order returned by orderrules;
+        dependencies pointing forward in the list are ignored.
+
+        @param rules: list of Rule instances
+        @param action: callable taking a rule
+        @param callback: callable taking a rule, a float and a string or None
+        @param honordeps: bool - whether to respect declared dependencies
+        @return: void
+        '''
+        if self.workers == 1 or len(rules) < 2:
+            for rule in rules:
+                elapsed, trace = self.__execute(rule, action)
+                callback(rule, elapsed, trace)
+            return
+
+        self.pending = range(len(rules))
+        self.held = set()
+        self.done = {}
+        self.finished = set()
+        self.stopped = False
+        groups = [set(rule.getconflictgroups()) for rule in rules]
+        if honordeps:
+            deps = self.__dependencies(rules)
+        else:
+            deps = [set() for rule in rules]
+        threads = []
+        for _ in range(min(self.workers, len(rules))):
+            worker = threading.Thread(target=self.__worker,
+                                      args=(rules, groups, deps, action))
+            worker.daemon = True
+            worker.start()
+            threads.append(worker)
+        try:
+            for index, rule in enumerate(rules):
+                self.cond.acquire()
+                try:
+                    while index not in self.done:
+                        # A timed wait keeps the main thread responsive to
+                        # KeyboardInterrupt under python 2.
+                        self.cond.wait(0.5)
+                    elapsed, trace = self.done.pop(index)
+                finally:
+                    self.cond.release()
+                callback(rule, elapsed, trace)
+        except (KeyboardInterrupt, SystemExit):
+            self.cond.acquire()
+            self.stopped = True
+            self.cond.notifyAll()
+            self.cond.release()
+            raise
+        for worker in threads:
+            worker.join()
+
+    def __dependencies(self, rules):
+        '''
+        Build the dependency graph for a rules list. Each rule depends on the
+        earlier rules it declares it runs after and on the previous rule of
+        each of its conflict groups, so that rules touching the same files
+        are applied in a reproducible order.
+
+        @param rules: list of Rule instances
+        @return: list of sets of indexes into rules
+        '''
+        position = {}
+        lastingroup = {}
+        deps = []
+        for index, rule in enumerate(rules):
+            ruledeps = set()
+            for parent in rule.getrunafter():
+                if parent in position:
+                    ruledeps.add(position[parent])
+                else:
+                    self.logdispatcher.log(LogPriority.DEBUG,
+                                           ['RuleScheduler',
+                                            rule.getrulename() + ': ignoring '
+                                            + 'dependency on ' + str(parent)])
+            for group in rule.getconflictgroups():
+                if group in lastingroup:
+                    ruledeps.add(lastingroup[group])
+                lastingroup[group] = index
+            position[rule.getrulename()] = index
+            deps.append(ruledeps)
+        return deps
+
+    def __worker(self, rules, groups, deps, action):
+        '''
+        Worker thread body. Repeatedly claims the first pending rule whose
+        dependencies have finished and whose conflict groups are not held by
+        another worker and runs it.
+
+        @param rules: list of Rule instances
+        @param groups: list of sets, the conflict groups of each rule
+        @param deps: list of sets, the indexes each rule depends on
+        @param action: callable taking a rule
+        '''
+        while True:
+            self.cond.acquire()
+            try:
+                index = None
+                while index is None:
+                    if self.stopped or not self.pending:
+                        return
+                    for candidate in self.pending:
+                        if not groups[candidate] & self.held and \
+                           deps[candidate] <= self.finished:
+                            index = candidate
+                            break
+                    if index is None:
+                        self.cond.wait(0.5)
+                self.pending.remove(index)
+                self.held.update(groups[index])
+            finally:
+                self.cond.release()
+            rule = rules[index]
+            self.logdispatcher.log(LogPriority.DEBUG,
+                                   ['RuleScheduler',
+                                    'Dispatching ' + rule.getrulename() +
+                                    ' on ' + threading.currentThread().getName()])
+            try:
+                elapsed, trace = self.__execute(rule, action)
+            except SystemExit:
+                # Only the controller may stop the program, a rule calling
+                # sys.exit() from a worker is treated like any other death.
+                elapsed, trace = 0.0, traceback.format_exc()
+            self.cond.acquire()
+            try:
+                self.held.difference_update(groups[index])
+                self.finished.add(index)
+                self.done[index] = (elapsed, trace)
+                self.cond.notifyAll()
+            finally:
+                self.cond.release()
+
+    def __execute(self, rule, action):
+        '''
+        Run action against a single rule, timing it and capturing any
+        exception raised.
+
+        @param rule: Rule instance
+        @param action: callable taking a rule
+        @return: tuple of (float elapsed seconds, string traceback or None)
+        '''
+        starttime = time.time()
+        trace = None
+        try:
+            action(rule)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            trace = traceback.format_exc()
+        return time.time() - starttime, trace
@@ -60,6 +60,7 @@ from environment import Environment
 from subprocess import call, Popen, PIPE, STDOUT
 import urllib2
 from logdispatcher import LogPriority
+from filecache import FILECACHE
 # from twisted.python.procutils import which
 
 # =========================================================================== #
@@ -1067,6 +1068,7 @@ def writeFile(tmpfile, contents, logger):
         logger.log(LogPriority.DEBUG, debug)
         return False
     w.close()
+    FILECACHE.invalidate(tmpfile)
     return True
 ###############################################################################
 
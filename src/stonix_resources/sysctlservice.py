@@ -0,0 +1,357 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Shared management of Linux kernel parameters. Rules declare the sysctl
+values they require with SYSCTL.declare instead of each editing
+/etc/sysctl.conf and running sysctl. The running values of every declared
+parameter are read from /proc/sys in one pass and checked, together with
+the values the configuration files set at boot, by SYSCTL.check. A fix
+writes one drop-in per rule in /etc/sysctl.d, comments out entries of files
+read after it that would override it, and writes the changed values
+straight to /proc/sys.
+'''
+import glob
+import os
+import threading
+from filecache import FILECACHE
+from stonixutilityfunctions import resetsecon
+
+PROCSYS = '/proc/sys'
+SYSCTLCONF = '/etc/sysctl.conf'
+SYSCTLDIR = '/etc/sysctl.d'
+SYSCTLCMD = '/sbin/sysctl'
+
+
+def keytopath(key, procsys=PROCSYS):
+    '''
+    Return the /proc/sys file of a parameter. As with sysctl, a '/' in the
+    key stands for a '.' in a path component, interface names for instance.
+
+    @param key: string - parameter name such as net.ipv4.ip_forward
+    @param procsys: string - root of the sysctl tree
+    @return: string
+    '''
+    parts = [part.replace('/', '.') for part in key.split('.')]
+    return os.path.join(procsys, *parts)
+
+
+def normalize(value):
+    '''
+    Return a parameter value the way it is compared: parameters holding
+    several numbers are tab separated in /proc/sys and usually space
+    separated in configuration files.
+
+    @param value: string
+    @return: string
+    '''
+    return ' '.join(str(value).split())
+
+
+class SysctlService(object):
+    '''
+    Kernel parameters declared by the rules, the running values read from
+    /proc/sys and the values set by the configuration files. Use the module
+    level SYSCTL.
+    '''
+
+    def __init__(self, procsys=PROCSYS, conffile=SYSCTLCONF,
+                 confdir=SYSCTLDIR):
+        '''
+        @param procsys: string - root of the sysctl tree
+        @param conffile: string - main configuration file, read last
+        @param confdir: string - directory of the drop-in files
+        '''
+        self.procsys = procsys
+        self.conffile = conffile
+        self.confdir = confdir
+        self.lock = threading.RLock()
+        self.declared = {}
+        self.live = {}
+
+    def declare(self, rulename, settings):
+        '''
+        Set the parameters a rule requires, replacing those it declared
+        before.
+
+        @param rulename: string
+        @param settings: dict of parameter name: value
+        '''
+        self.lock.acquire()
+        try:
+            self.declared[rulename] = dict([(key, normalize(value))
+                                            for key, value in
+                                            settings.items()])
+        finally:
+            self.lock.release()
+
+    def getdeclared(self, rulename):
+        '''
+        Return the parameters a rule declared.
+
+        @param rulename: string
+        @return: dict of parameter name: value
+        '''
+        self.lock.acquire()
+        try:
+            return dict(self.declared.get(rulename, {}))
+        finally:
+            self.lock.release()
+
+    def getdropin(self, rulename):
+        '''
+        Return the path of the drop-in file of a rule.
+
+        @param rulename: string
+        @return: string
+        '''
+        return os.path.join(self.confdir,
+                            'stonix-' + rulename.lower() + '.conf')
+
+    def getconffiles(self):
+        '''
+        Return the configuration files in the order they are applied at
+        boot, so that a value set by a later file wins.
+
+        @return: list of paths
+        '''
+        files = sorted(glob.glob(os.path.join(self.confdir, '*.conf')))
+        return files + [self.conffile]
+
+    def getwatchedpaths(self):
+        '''
+        Return the configuration file and directory, for the rules to watch.
+
+        @return: list of paths
+        '''
+        return [self.conffile, self.confdir]
+
+    def invalidate(self):
+        '''
+        Forget the running values read so far. The Controller calls this
+        before every report or fix pass.
+        '''
+        self.lock.acquire()
+        try:
+            self.live.clear()
+        finally:
+            self.lock.release()
+
+    def readlive(self):
+        '''
+        Read the running value of every declared parameter not read yet, in
+        one pass over /proc/sys.
+
+        @return: dict of parameter name: value, None for parameters the
+            running kernel does not have
+        '''
+        self.lock.acquire()
+        try:
+            for settings in self.declared.values():
+                for key in settings:
+                    if key in self.live:
+                        continue
+                    try:
+                        handle = open(keytopath(key, self.procsys))
+                        try:
+                            self.live[key] = normalize(handle.read())
+                        finally:
+                            handle.close()
+                    except (IOError, OSError):
+                        self.live[key] = None
+            return dict(self.live)
+        finally:
+            self.lock.release()
+
+    def getpersisted(self):
+        '''
+        Return the value each parameter gets at boot from the configuration
+        files.
+
+        @return: dict of parameter name: (value, path of the file setting it)
+        '''
+        persisted = {}
+        for path in self.getconffiles():
+            for key, values in FILECACHE.getkeyvalues(path, '=').items():
+                # A leading '-' tells sysctl to ignore a missing parameter
+                persisted[key.lstrip('-')] = (normalize(values[-1]), path)
+        return persisted
+
+    def check(self, rulename):
+        '''
+        Check the parameters declared by a rule against the running kernel
+        and the configuration files. Parameters the running kernel does not
+        have are only checked in the configuration.
+
+        @param rulename: string
+        @return: list of strings describing each problem, empty if the rule's
+            parameters are all set
+        '''
+        live = self.readlive()
+        persisted = self.getpersisted()
+        problems = []
+        for key, wanted in sorted(self.getdeclared(rulename).items()):
+            if live.get(key) is not None and live[key] != wanted:
+                problems.append(key + " is " + live[key] +
+                                " in the running kernel instead of " + wanted)
+            if key not in persisted:
+                problems.append(key + " is not set in the sysctl " +
+                                "configuration")
+            elif persisted[key][0] != wanted:
+                problems.append(key + " is set to " + persisted[key][0] +
+                                " by " + persisted[key][1] + " instead of " +
+                                wanted)
+        return problems
+
+    def fix(self, rulename, stchlgr=None, nextid=None):
+        '''
+        Make the parameters declared by a rule persistent with the rule's
+        drop-in file and set them in the running kernel.
+
+        @param rulename: string
+        @param stchlgr: StateChgLogger - records the changes for undo
+        @param nextid: function returning a new change event id of the rule,
+            required with stchlgr
+        @return: list of the parameters the running kernel refused
+        @raise IOError: if a configuration file cannot be written
+        @raise OSError: likewise
+        '''
+        settings = self.getdeclared(rulename)
+        self.lock.acquire()
+        try:
+            self.__writedropin(rulename, settings, stchlgr, nextid)
+            self.__removeoverrides(rulename, settings, stchlgr, nextid)
+            return self.apply(settings, stchlgr, nextid)
+        finally:
+            self.lock.release()
+
+    def apply(self, settings, stchlgr=None, nextid=None):
+        '''
+        Write parameter values to /proc/sys, skipping those already set and
+        those the running kernel does not have. The previous values are
+        recorded as a single sysctl command undoing the whole batch.
+
+        @param settings: dict of parameter name: value
+        @param stchlgr: StateChgLogger - records the change for undo
+        @param nextid: function returning a new change event id
+        @return: list of the parameters that could not be written
+        '''
+        self.lock.acquire()
+        try:
+            live = self.readlive()
+            undo = []
+            failed = []
+            for key, value in sorted(settings.items()):
+                value = normalize(value)
+                if live.get(key) is None or live[key] == value:
+                    continue
+                try:
+                    handle = open(keytopath(key, self.procsys), 'w')
+                    try:
+                        handle.write(value + '\n')
+                    finally:
+                        handle.close()
+                except (IOError, OSError):
+                    failed.append(key)
+                    continue
+                undo.append(key + '=' + live[key])
+                self.live.pop(key, None)
+            if undo and stchlgr is not None:
+                stchlgr.recordchgevent(nextid(),
+                                       {'eventtype': 'commandstring',
+                                        'command': [SYSCTLCMD, '-w'] + undo})
+            return failed
+        finally:
+            self.lock.release()
+
+    def __writedropin(self, rulename, settings, stchlgr, nextid):
+        '''
+        Private method to write the drop-in file of a rule if its contents
+        changed.
+        '''
+        path = self.getdropin(rulename)
+        lines = ['# Kernel parameters set by the stonix rule ' + rulename +
+                 '\n']
+        for key, value in sorted(settings.items()):
+            lines.append(key + ' = ' + value + '\n')
+        existed = os.path.exists(path)
+        if existed and FILECACHE.readlines(path) == lines:
+            return
+        if not os.path.isdir(self.confdir):
+            os.makedirs(self.confdir, 0755)
+        self.__replace(path, lines, stchlgr, nextid, existed)
+
+    def __removeoverrides(self, rulename, settings, stchlgr, nextid):
+        '''
+        Private method to comment out the entries of the configuration files
+        applied after the drop-in of a rule that set one of its parameters
+        to another value.
+        '''
+        dropin = self.getdropin(rulename)
+        files = self.getconffiles()
+        for path in files[files.index(dropin) + 1:]:
+            lines = FILECACHE.readlines(path)
+            newlines = []
+            for line in lines:
+                fields = line.split('=', 1)
+                key = fields[0].strip().lstrip('-')
+                if len(fields) == 2 and key in settings and \
+                   not line.lstrip().startswith(('#', ';')) and \
+                   normalize(fields[1]) != settings[key]:
+                    line = '#' + line
+                newlines.append(line)
+            if newlines != lines:
+                self.__replace(path, newlines, stchlgr, nextid, True)
+
+    def __replace(self, path, lines, stchlgr, nextid, existed):
+        '''
+        Private method to replace a configuration file with a rename,
+        recording its creation or the change to it.
+        '''
+        tmppath = path + '.stonixtmp'
+        handle = open(tmppath, 'w')
+        try:
+            handle.writelines(lines)
+        finally:
+            handle.close()
+        if stchlgr is not None:
+            myid = nextid()
+            if existed:
+                stchlgr.recordchgevent(myid, {'eventtype': 'conf',
+                                              'filepath': path})
+                stchlgr.recordfilechange(path, tmppath, myid)
+            else:
+                stchlgr.recordchgevent(myid, {'eventtype': 'creation',
+                                              'filepath': path})
+        os.chmod(tmppath, 0644)
+        if os.geteuid() == 0:
+            os.chown(tmppath, 0, 0)
+        os.rename(tmppath, path)
+        resetsecon(path)
+        FILECACHE.invalidate(path)
+
+
+# Shared by the rules that manage kernel parameters on Linux
+SYSCTL = SysctlService()
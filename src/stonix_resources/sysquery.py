@@ -0,0 +1,205 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Answers to questions about the running system that the rules used to get
+by forking ls, uname, id or ps. Everything here is read with system calls
+or from /proc, so asking costs no subprocess. Functions that depend on
+/proc return None where it is not available so that callers can fall back
+to the command they used before.
+'''
+import errno
+import grp
+import os
+import pwd
+
+PROCMOUNTS = '/proc/mounts'
+PROCMODULES = '/proc/modules'
+PROCDIR = '/proc'
+
+
+def readlink(path):
+    '''
+    Return the target of a symbolic link.
+
+    @param path: string - path of the link
+    @return: string - the target as stored in the link, None if path is not
+        a link
+    '''
+    try:
+        return os.readlink(path)
+    except OSError:
+        return None
+
+
+def uname():
+    '''
+    Return the uname of the system.
+
+    @return: tuple (sysname, nodename, release, version, machine)
+    '''
+    return os.uname()
+
+
+def getkernelrelease():
+    '''
+    Return the release of the running kernel, what uname -r prints.
+
+    @return: string
+    '''
+    return os.uname()[2]
+
+
+def getuid(username):
+    '''
+    Return the uid of a user, what id -u prints.
+
+    @param username: string
+    @return: int - None if there is no such user
+    '''
+    try:
+        return pwd.getpwnam(username).pw_uid
+    except KeyError:
+        return None
+
+
+def getgid(groupname):
+    '''
+    Return the gid of a group.
+
+    @param groupname: string
+    @return: int - None if there is no such group
+    '''
+    try:
+        return grp.getgrnam(groupname).gr_gid
+    except KeyError:
+        return None
+
+
+def getusername(uid):
+    '''
+    Return the name of the user with a uid.
+
+    @param uid: int
+    @return: string - None if no user has the uid
+    '''
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return None
+
+
+def getgroupname(gid):
+    '''
+    Return the name of the group with a gid.
+
+    @param gid: int
+    @return: string - None if no group has the gid
+    '''
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return None
+
+
+def pidalive(pid):
+    '''
+    Check whether a process exists. Signal 0 is sent, which only checks
+    that the process could be signalled.
+
+    @param pid: int
+    @return: bool
+    '''
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError, err:
+        # The process exists but belongs to someone else
+        return err.errno == errno.EPERM
+    return True
+
+
+def getcmdline(pid):
+    '''
+    Return the command line of a process.
+
+    @param pid: int
+    @return: list of strings - empty for kernel threads, None if the process
+        does not exist or /proc is not available
+    '''
+    try:
+        handle = open(os.path.join(PROCDIR, str(pid), 'cmdline'))
+        try:
+            data = handle.read()
+        finally:
+            handle.close()
+    except (IOError, OSError):
+        return None
+    return [arg for arg in data.split('\0') if arg]
+
+
+def getmounts():
+    '''
+    Return the mounted file systems as listed in /proc/mounts.
+
+    @return: list of tuples (device, mountpoint, fstype, options), options
+        being a list of strings. None if /proc/mounts is not available.
+    '''
+    try:
+        handle = open(PROCMOUNTS)
+        try:
+            lines = handle.readlines()
+        finally:
+            handle.close()
+    except (IOError, OSError):
+        return None
+    mounts = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        # Blanks in paths are written as octal escapes
+        device, mountpoint = [field.decode('string_escape')
+                              for field in fields[:2]]
+        mounts.append((device, mountpoint, fields[2], fields[3].split(',')))
+    return mounts
+
+
+def getmodules():
+    '''
+    Return the names of the loaded kernel modules, what lsmod lists.
+
+    @return: list of strings - None if /proc/modules is not available
+    '''
+    try:
+        handle = open(PROCMODULES)
+        try:
+            lines = handle.readlines()
+        finally:
+            handle.close()
+    except (IOError, OSError):
+        return None
+    return [line.split()[0] for line in lines if line.strip()]
@@ -25,6 +25,7 @@ import traceback
 from logdispatcher import LogPriority
 from re import search
 from CommandHelper import CommandHelper
+from pkgfiles import rpmfileinfo, rpmverifyfiles, rpminstalled
 
 
 class Zypper(object):
@@ -51,6 +52,7 @@ class Zypper(object):
         self.searchi = "/usr/bin/zypper --non-interactive search --match-exact -i "
         self.searchu = "/usr/bin/zypper --non-interactive search --match-exact -u "
         self.rpm = "/bin/rpm -q "
+        self.rpmpath = "/bin/rpm"
 
 ###############################################################################
     def installpackage(self, package):
@@ -165,6 +167,22 @@ misspelled\n"
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR, self.detailedresults)
 
+###############################################################################
+    def getInstalledPackages(self):
+        '''Returns the names of all installed packages, read with a single
+        rpm query.
+
+        @return: set of package names or None if the query failed
+        '''
+        try:
+            return rpminstalled(self.ch, self.rpmpath)
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+
 ###############################################################################
     def checkAvailable(self, package):
         '''
@@ -224,6 +242,47 @@ misspelled\n"
             self.logger.log(LogPriority.ERROR, self.detailedresults)
             raise(self.detailedresults)
 
+###############################################################################
+    def getPackagesFromFiles(self, filenames):
+        '''Returns the names of the packages that provide the given
+        filenames/paths, using one rpm query per batch of files.
+
+        @param: list filenames : The names or paths of the files to resolve
+        @return: dict of filename: name of package if found, None otherwise
+        '''
+        try:
+            info = rpmfileinfo(self.ch, self.rpmpath, filenames)
+            packages = {}
+            for filename in filenames:
+                if filename in info:
+                    packages[filename] = info[filename][0]
+                else:
+                    packages[filename] = None
+            return packages
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+
+###############################################################################
+    def verifyFiles(self, filenames):
+        '''Checks the mode of the given files against the rpm database.
+
+        @param: list filenames : The paths of the files to verify
+        @return: dict of filename: pkgfiles.VERIFYCHANGED, VERIFYOK or
+            VERIFYNOTFOUND
+        '''
+        try:
+            return rpmverifyfiles(self.ch, self.rpmpath, filenames)
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+
 ###############################################################################
     def getInstall(self):
         '''
@@ -28,11 +28,15 @@ Created on 11/27/2012
 @author: ekkehard
 '''
 from __future__ import absolute_import
+import os
+import signal
+import time
 import unittest
 from src.tests.lib.logdispatcher_lite import LogPriority
 from src.tests.lib.logdispatcher_lite import LogDispatcher
 from src.stonix_resources.environment import Environment
 from src.stonix_resources.CommandHelper import CommandHelper
+from src.stonix_resources.instrumentation import INSTRUMENTATION
 
 
 class zzzTestFrameworkCommandHelper(unittest.TestCase):
@@ -82,6 +86,76 @@ class zzzTestFrameworkCommandHelper(unittest.TestCase):
                         "Execute commandhelper.executeCommand(['ls','-l','/'])"
                         + " Command List Failed!")
 
+    def testLargeStderr(self):
+        # More than a pipe buffer on stderr must not block the command
+        command = "head -c 1000000 /dev/zero | tr '\\0' 'x' | fold -w 100 " + \
+            "1>&2; echo done"
+        self.assertTrue(self.commandhelper.executeCommand(command))
+        self.assertEqual(len(self.commandhelper.getError()), 10000)
+        self.assertEqual(self.commandhelper.getOutput(), ["done\n"])
+
+    def testTimeout(self):
+        self.commandhelper.setTimeout(1)
+        start = time.time()
+        self.assertFalse(self.commandhelper.executeCommand("sleep 30; true"))
+        self.assertTrue(time.time() - start < 10)
+        self.assertTrue(self.commandhelper.getTimedOut())
+        self.assertNotEqual(self.commandhelper.getReturnCode(), 0)
+        self.assertTrue(self.commandhelper.executeCommand(["true"]))
+        self.assertFalse(self.commandhelper.getTimedOut())
+
+    def testTimeoutEscapedChild(self):
+        # A child in its own session keeps stdout open after the kill
+        self.commandhelper.setTimeout(1)
+        start = time.time()
+        self.assertFalse(self.commandhelper.executeCommand(
+            "setsid sleep 30 & echo $!; sleep 30"))
+        self.assertTrue(time.time() - start < 10)
+        self.assertTrue(self.commandhelper.getTimedOut())
+        try:
+            os.kill(int(self.commandhelper.getOutput()[0]), signal.SIGKILL)
+        except (IndexError, ValueError, OSError):
+            pass
+
+    def testLineCallback(self):
+        lines = []
+        self.commandhelper.setLineCallback(lines.append, keepoutput=False)
+        self.assertTrue(self.commandhelper.executeCommand(["seq", "1", "500"]))
+        self.assertEqual(len(lines), 500)
+        self.assertEqual(lines[-1], "500\n")
+        self.assertEqual(self.commandhelper.getOutput(), [])
+        self.commandhelper.setLineCallback()
+        self.commandhelper.executeCommand(["seq", "1", "3"])
+        self.assertEqual(self.commandhelper.getOutput(), ["1\n", "2\n", "3\n"])
+
+    def testRunMany(self):
+        commands = [["echo", str(i)] for i in range(10)] + ["exit 3"]
+        start = time.time()
+        results = self.commandhelper.runMany(commands + ["sleep 1"] * 4,
+                                             workers=4)
+        self.assertTrue(time.time() - start < 3)
+        self.assertEqual(len(results), 15)
+        for i in range(10):
+            self.assertEqual(results[i].stdout, [str(i) + "\n"])
+            self.assertEqual(results[i].returncode, 0)
+        self.assertEqual(results[10].returncode, 3)
+        self.assertRaises(TypeError, self.commandhelper.runMany, [["ls", 0]])
+        self.assertEqual(self.commandhelper.runMany([]), [])
+
+    def testForkCount(self):
+        self.assertEqual(self.commandhelper.getForkCount(), 0)
+        self.assertRaises(ValueError, self.commandhelper.executeCommand, "")
+        self.assertEqual(self.commandhelper.getForkCount(), 0)
+        INSTRUMENTATION.begin("ForkCountTest")
+        try:
+            self.commandhelper.executeCommand(["true"])
+            self.commandhelper.runMany([["true"], ["true"]])
+        finally:
+            INSTRUMENTATION.end("report")
+        self.assertEqual(self.commandhelper.getForkCount(), 3)
+        stats = INSTRUMENTATION.getreport()["rules"]["ForkCountTest"]
+        self.assertEqual(stats["commands"], 3)
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
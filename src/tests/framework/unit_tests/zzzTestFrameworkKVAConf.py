@@ -29,6 +29,7 @@ Created on Jun 13, 2013
 '''
 import unittest
 import src.stonix_resources.KVEditorStonix as KVEditorStonix
+from src.stonix_resources.KVAConf import KVAConf
 from src.stonix_resources.environment import Environment
 from src.stonix_resources.logdispatcher import LogDispatcher
 from src.stonix_resources.StateChgLogger import StateChgLogger
@@ -74,6 +75,38 @@ class zzzTestFrameworkKVAConf(unittest.TestCase):
         self.assertTrue(self.editor.commit())
         self.assertTrue(self.editor.report())
 
+    def testIndex(self):
+        path = "/tmp/kvaconfindexUT"
+        open(path, "w").write("# comment\n\nkernel.a = 1\n" +
+                              "kernel.b=2\nkernel.a = 3\nkernelxc = 4\n")
+        conf = KVAConf(path, path + ".tmp", "present", "openeq",
+                       self.editor.logger)
+        self.assertFalse(conf.validate("kernel.a", "1"))
+        self.assertTrue(conf.validate("kernel.b", "2"))
+        self.assertFalse(conf.validate("kernel.d", "5"))
+        # keys are regular expressions matched against the whole key
+        self.assertTrue(conf.validate("kernel.c", "4"))
+        self.assertEqual(len(conf.getKeyEntries("kernel.*")), 4)
+        self.assertTrue(conf.update({"kernel.a": "1"}, {"kernel.b": "2"}))
+        self.assertTrue(conf.validate("kernel.a", "1"))
+        self.assertEqual(len(conf.getKeyEntries("kernel.b")), 0)
+        self.assertTrue(conf.commit())
+
+        open(path, "w").write("blacklist usb\nblacklist fw\n" +
+                              "Protocol 1\n#Banner none\n")
+        conf = KVAConf(path, path + ".tmp", "present", "space",
+                       self.editor.logger)
+        self.assertEqual(conf.validate("blacklist", ["usb", "bt"]), ["bt"])
+        self.assertFalse(conf.validate("Protocol", "2"))
+        self.assertFalse(conf.validate("Banner", "none"))
+        self.assertTrue(conf.update({"Protocol": "2"},
+                                    {"blacklist": ["usb", "fw"]}))
+        self.assertEqual(conf.contents[-1], "Protocol 2\n")
+        self.assertEqual(conf.getKeyEntries("blacklist"), [])
+        conf.setIntent("notpresent")
+        self.assertTrue(conf.validate("Protocol", "1"))
+        self.assertFalse(conf.validate("Banner", "none"))
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
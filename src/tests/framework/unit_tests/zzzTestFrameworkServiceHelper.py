@@ -34,7 +34,27 @@ import time
 import unittest
 from src.stonix_resources.environment import Environment
 from src.tests.lib.logdispatcher_lite import LogDispatcher
-from src.stonix_resources.ServiceHelper import ServiceHelper
+from src.stonix_resources.ServiceHelper import ServiceHelper, resetstates
+
+
+class FakeServiceHelper(object):
+    '''Service helper whose services change behind stonix's back.'''
+
+    def __init__(self):
+        self.enabled = {'fakesvc': False}
+        self.running = {'fakesvc': False}
+
+    def getstates(self):
+        return dict(self.enabled), dict(self.running)
+
+    def statekey(self, service):
+        return service
+
+    def auditservice(self, service):
+        return self.enabled.get(service, False)
+
+    def isrunning(self, service):
+        return self.running.get(service, False)
 
 
 class zzzTestFrameworkServiceHelper(unittest.TestCase):
@@ -93,6 +113,38 @@ class zzzTestFrameworkServiceHelper(unittest.TestCase):
                                                 self.myservicename),
                         'Service reload returned false')
 
+    def testServiceStates(self):
+        self.mysh.resetstates()
+        services = self.mysh.listservices()
+        other = ServiceHelper(self.enviro, self.logger)
+        self.assertEqual(other.listservices(), services)
+        for helper in [self.mysh.svchelper, self.mysh.secondary]:
+            if helper is None or not hasattr(helper, 'getstates'):
+                continue
+            enabled, running = helper.getstates()
+            if enabled is None:
+                continue
+            for service in sorted(enabled.keys())[:20]:
+                self.assertEqual(enabled[service],
+                                 helper.auditservice(service),
+                                 'Bulk audit differs for ' + service)
+
+    def testResetStates(self):
+        fake = FakeServiceHelper()
+        self.mysh.svchelper = fake
+        self.mysh.secondary = None
+        self.mysh.ishybrid = False
+        self.mysh.isdualparameterservice = False
+        resetstates()
+        self.assertFalse(self.mysh.auditservice('fakesvc'))
+        # enabled by someone else, the snapshot of this audit stays
+        fake.enabled['fakesvc'] = True
+        self.assertFalse(self.mysh.auditservice('fakesvc'))
+        # the next audit starts by resetting the snapshot
+        resetstates()
+        self.assertTrue(self.mysh.auditservice('fakesvc'))
+        resetstates()
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
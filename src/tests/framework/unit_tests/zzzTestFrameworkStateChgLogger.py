@@ -31,6 +31,8 @@ Created on Aug 24, 2012
 '''
 import os
 import shutil
+import stat
+import time
 import unittest
 import src.stonix_resources.environment as environment
 import src.tests.lib.logdispatcher_lite as logdispatcher
@@ -95,11 +97,11 @@ key4 = True
         self.mktestfiles()
         eventid = '9999001'
         patchpath = '/var/db/stonix/diffdir/etc/stonixtest.conf.patch-' + eventid
-        archivepath = '/var/db/stonix/archive/etc/stonixtest.conf.ovf'
         self.assertTrue(self.testobj.recordfilechange(self.srcfile,
                                                       self.dstfile, eventid))
         self.assertTrue(os.path.exists(patchpath), 'Patch not created')
-        self.assertTrue(os.path.exists(archivepath), 'Archive not created')
+        digest = self.testobj.eventlog.getarchive(self.srcfile)
+        self.assertTrue(self.testobj.blobs.exists(digest), 'Archive not created')
         shutil.copyfile(self.dstfile, self.srcfile)
         self.testobj.revertfilechanges(self.srcfile, eventid)
         rhandle = open(self.srcfile)
@@ -110,16 +112,48 @@ key4 = True
     def testRevertFileDelete(self):
         self.mktestfiles()
         eventid = '9999005'
-        archivepath = '/var/db/stonix/archive/etc/stonixtest.conf.ovf'
-        if os.path.exists(archivepath):
-            os.remove(archivepath)
         self.assertTrue(self.testobj.recordfiledelete(self.srcfile, eventid))
         shutil.copyfile(self.dstfile, self.srcfile)
         self.assertTrue(self.testobj.recordfiledelete(self.srcfile, eventid))
         self.assertTrue(self.testobj.recordfiledelete(self.srcfile, eventid))
-        self.assertTrue(os.path.exists(archivepath), 'Archive not created')
+        digest = self.testobj.eventlog.getarchive(self.srcfile)
+        self.assertTrue(self.testobj.blobs.exists(digest), 'Archive not created')
+        dstconf = open(self.dstfile).read()
         os.remove(self.srcfile)
         self.assertTrue(self.testobj.revertfiledelete(self.srcfile))
+        # the newest copy is restored
+        self.assertEqual(open(self.srcfile).read(), dstconf)
+
+    def testRevertFileDeleteMode(self):
+        os.chmod(self.srcfile, 0600)
+        owner = os.stat(self.srcfile).st_uid
+        if os.geteuid() == 0:
+            owner = 1
+            os.chown(self.srcfile, owner, owner)
+        self.assertTrue(self.testobj.recordfiledelete(self.srcfile, '9999009'))
+        os.remove(self.srcfile)
+        self.assertTrue(self.testobj.revertfiledelete(self.srcfile))
+        info = os.stat(self.srcfile)
+        self.assertEqual(stat.S_IMODE(info.st_mode), 0600)
+        self.assertEqual(info.st_uid, owner)
+        self.assertEqual(open(self.srcfile).read(), self.srcconf)
+        self.testobj.deleteentry('9999009')
+
+    def testRevertFileDeleteSetuid(self):
+        # Giving the file its owner back must not clear the set-user-ID bit
+        os.chmod(self.srcfile, 04755)
+        owner = os.stat(self.srcfile).st_uid
+        if os.geteuid() == 0:
+            owner = 1
+            os.chown(self.srcfile, owner, owner)
+            os.chmod(self.srcfile, 04755)
+        self.assertTrue(self.testobj.recordfiledelete(self.srcfile, '9999010'))
+        os.remove(self.srcfile)
+        self.assertTrue(self.testobj.revertfiledelete(self.srcfile))
+        info = os.stat(self.srcfile)
+        self.assertEqual(stat.S_IMODE(info.st_mode), 04755)
+        self.assertEqual(info.st_uid, owner)
+        self.testobj.deleteentry('9999010')
 
     def testEventStoreDelete(self):
         mytype = 'perm'
@@ -176,6 +210,57 @@ key4 = True
         self.failUnlessEqual(expected, myreturn2[0],
                              'Expected event id not returned')
 
+    def testEventRuns(self):
+        myid = '9999006'
+        self.testobj.recordchgevent(myid, {'eventtype': 'creation',
+                                           'filepath': self.srcfile})
+        runid = self.testobj.getrunid()
+        self.assertTrue(runid in self.testobj.getruns())
+        self.assertEqual(self.testobj.findrulechanges('9999', runid)[-1],
+                         myid)
+        self.assertEqual(self.testobj.findrulechanges('9999', 'none'), [])
+        # undo of a single run
+        self.testobj.eventlog.record('9999008', {'eventtype': 'creation',
+                                                 'filepath': self.dstfile},
+                                     'older')
+        self.assertEqual(self.testobj.setundorun('last'), 'older')
+        self.assertEqual(self.testobj.findrulechanges('9999'), ['9999008'])
+        self.assertEqual(self.testobj.setundorun(runid), runid)
+        self.assertTrue(myid in self.testobj.findrulechanges('9999'))
+        self.assertFalse('9999008' in self.testobj.findrulechanges('9999'))
+        self.assertRaises(ValueError, self.testobj.setundorun, 'none')
+        self.assertEqual(self.testobj.undorunid, runid)
+        self.assertEqual(self.testobj.setundorun(None), None)
+        self.assertTrue('9999008' in self.testobj.findrulechanges('9999'))
+        self.testobj.deleteentry('9999008')
+
+    def testArchiveGc(self):
+        # content unique to this run so that no other test references it
+        stamp = str(time.time())
+        self.testobj.recordchgevent('9999007', {'eventtype': 'deletion',
+                                                'filepath': self.srcfile})
+        self.assertTrue(self.testobj.archivefile(self.srcfile, '9999007'))
+        first = self.testobj.eventlog.getarchive(self.srcfile)
+        handle = open(self.srcfile, 'a')
+        handle.write('key5 = ' + stamp + '\n')
+        handle.close()
+        self.assertTrue(self.testobj.archivefile(self.srcfile, '9999008'))
+        middle = self.testobj.eventlog.getarchive(self.srcfile)
+        # the same content is only stored once
+        self.assertTrue(self.testobj.archivefile(self.srcfile, '9999008'))
+        self.assertEqual(self.testobj.eventlog.getarchive(self.srcfile),
+                         middle)
+        handle = open(self.srcfile, 'a')
+        handle.write('key6 = ' + stamp + '\n')
+        handle.close()
+        self.assertTrue(self.testobj.archivefile(self.srcfile, '9999009'))
+        newest = self.testobj.eventlog.getarchive(self.srcfile)
+        self.testobj.gcarchive()
+        # event 9999008 was never recorded, its copy is no longer needed
+        self.assertTrue(self.testobj.blobs.exists(first))
+        self.assertFalse(self.testobj.blobs.exists(middle))
+        self.assertTrue(self.testobj.blobs.exists(newest))
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
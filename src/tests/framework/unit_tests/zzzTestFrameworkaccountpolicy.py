@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the shadow file aging policy.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from src.stonix_resources import accountpolicy
+from src.stonix_resources.accountpolicy import AccountPolicy
+
+PASSWD = '''root:x:0:0:root:/root:/bin/bash
+alice:x:1000:1000::/home/alice:/bin/bash
+bob:x:1001:1001::/home/bob:/bin/bash
+carol:x:1002:1002::/home/carol:/bin/bash
+dave:x:1003:1003::/home/dave:/bin/bash
+'''
+
+SHADOW = '''root:$6$salt$hash:16000:0:99999:7:::
+alice:$6$salt$hash:16000:0:99999:7:::
+bob:$6$salt$hash:16000:7:180:28:7::
+carol:!:16000:0:99999:7:::
+dave:$6$salt$hash:16000
+stonixnosuchuser:$6$salt$hash:16000:0:99999:7:::
+'''
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def recordchgevent(self, eventid, event):
+        self.calls.append(('event', eventid, event))
+
+    def archivefile(self, path, eventid):
+        self.calls.append(('archive', eventid, path))
+
+    def recordfilediff(self, path, before, after, eventid):
+        self.calls.append(('diff', eventid, before, after))
+
+
+class zzzTestFrameworkaccountpolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.passwd = os.path.join(self.tmpdir, 'passwd')
+        self.shadow = os.path.join(self.tmpdir, 'shadow')
+        open(self.passwd, 'w').write(PASSWD)
+        open(self.shadow, 'w').write(SHADOW)
+        os.chmod(self.shadow, 0640)
+        self.policy = AccountPolicy(self.shadow, self.passwd)
+        self.timeout = accountpolicy.LOCKTIMEOUT
+
+    def tearDown(self):
+        accountpolicy.LOCKTIMEOUT = self.timeout
+        shutil.rmtree(self.tmpdir)
+
+    def testReport(self):
+        noncompliant = dict(self.policy.getnoncompliant())
+        self.assertEqual(sorted(noncompliant.keys()), ['alice', 'dave'])
+        self.assertEqual(len(noncompliant['alice']), 4)
+        self.assertEqual(noncompliant['dave'], ['malformed shadow entry'])
+
+    def testApply(self):
+        recorder = Recorder()
+        changed, leftover = self.policy.apply(recorder, '0042001')
+        self.assertEqual(changed, ['alice'])
+        self.assertEqual(leftover, ['dave'])
+        today = str(int(time.time() / 86400))
+        lines = open(self.shadow).readlines()
+        self.assertEqual(lines[1], 'alice:$6$salt$hash:' + today +
+                         ':7:180:28:7::\n')
+        original = SHADOW.splitlines(True)
+        self.assertEqual(lines[:1] + lines[2:], original[:1] + original[2:])
+        self.assertEqual(stat.S_IMODE(os.stat(self.shadow).st_mode), 0640)
+        self.assertFalse(os.path.exists(self.shadow + '.stonixtmp'))
+        self.assertEqual([call[0] for call in recorder.calls],
+                         ['event', 'archive', 'diff'])
+        self.assertEqual(recorder.calls[2][2], original)
+        self.assertEqual(recorder.calls[2][3], lines)
+        self.assertEqual(dict(self.policy.getnoncompliant()).keys(),
+                         ['dave'])
+        # Nothing left to change, nothing recorded
+        recorder = Recorder()
+        self.assertEqual(self.policy.apply(recorder, '0042002'),
+                         ([], ['dave']))
+        self.assertEqual(recorder.calls, [])
+
+    def testLocked(self):
+        accountpolicy.LOCKTIMEOUT = 0.5
+        readfd, writefd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(readfd)
+            self.policy.lock()
+            os.write(writefd, 'x')
+            time.sleep(30)
+            os._exit(0)
+        try:
+            os.close(writefd)
+            os.read(readfd, 1)
+            self.assertRaises(IOError, self.policy.apply)
+            self.assertEqual(open(self.shadow).read(), SHADOW)
+        finally:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            os.close(readfd)
+        self.assertEqual(self.policy.apply()[0], ['alice'])
+
+if __name__ == "__main__":
+    unittest.main()
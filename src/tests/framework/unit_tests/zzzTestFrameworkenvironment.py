@@ -128,6 +128,15 @@ class zzzTestFrameworkenvironment(unittest.TestCase):
         self.assertFalse(self.to.ismobile(),
                          'This should fail on mobile systems')
 
+    def testLazyFacts(self):
+        env = environment.Environment()
+        self.assertFalse('hostname' in env.__dict__)
+        self.assertFalse('operatingsystem' in env.__dict__)
+        self.assertEqual(env.getostype(), self.to.getostype())
+        self.assertTrue('operatingsystem' in env.__dict__)
+        self.assertEqual(env.hostname, self.to.gethostname())
+        self.assertRaises(AttributeError, getattr, env, 'nosuchfact')
+
     def testSetNumRules(self):
         num = 20
         self.to.setnumrules(num)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the SQLite change event store.
+'''
+from __future__ import absolute_import
+import os
+import shelve
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from src.stonix_resources.eventstore import EventStore, MIGRATEDRUN
+
+
+class zzzTestFrameworkeventstore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'eventlog.sqlite')
+        self.legacy = os.path.join(self.tmpdir, 'eventlog')
+        self.event = {'eventtype': 'perm',
+                      'startstate': [0, 0, 420],
+                      'endstate': [0, 0, 416]}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testRecord(self):
+        store = EventStore(self.path)
+        store.record('0010002', self.event, 'run1')
+        store.record('0010001', {'eventtype': 'creation'}, 'run1')
+        store.record('0020001', self.event, 'run2')
+        self.assertEqual(store.get('0010002'), self.event)
+        # events come back in the order they were recorded
+        self.assertEqual(store.findrule('0010'), ['0010002', '0010001'])
+        self.assertEqual(store.findrule('0010', 'run2'), [])
+        self.assertEqual(store.getruns(), ['run1', 'run2'])
+        self.assertTrue(store.delete('0010002'))
+        self.assertFalse(store.delete('0010002'))
+        self.assertRaises(KeyError, store.get, '0010002')
+        store.close()
+        store = EventStore(self.path)
+        self.assertEqual(store.findrule('0010'), ['0010001'])
+        store.close()
+
+    def testBatch(self):
+        store = EventStore(self.path)
+        store.beginbatch()
+        store.record('0010001', self.event, 'run1')
+        other = EventStore(self.path)
+        self.assertEqual(other.findrule('0010'), [])
+        store.endbatch()
+        self.assertEqual(other.findrule('0010'), ['0010001'])
+        other.close()
+        store.close()
+
+    def testMigrate(self):
+        legacy = shelve.open(self.legacy, 'c')
+        legacy['0010001'] = self.event
+        legacy['0020001'] = {'eventtype': 'creation'}
+        legacy.close()
+        store = EventStore(self.path, self.legacy)
+        self.assertEqual(store.get('0010001'), self.event)
+        self.assertEqual(store.findrule('0020'), ['0020001'])
+        self.assertEqual(store.getruns(), [MIGRATEDRUN])
+        # the shelve is only imported once
+        store.delete('0020001')
+        self.assertEqual(store.migrate(self.legacy), 0)
+        self.assertEqual(store.findrule('0020'), [])
+        store.close()
+
+    def testArchiveInfo(self):
+        # manifest written before the permissions were recorded
+        conn = sqlite3.connect(self.path)
+        conn.execute('''CREATE TABLE archive (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        path TEXT NOT NULL, eventid TEXT,
+                        digest TEXT NOT NULL, stamp REAL NOT NULL)''')
+        conn.execute("INSERT INTO archive (path, eventid, digest, stamp) "
+                     "VALUES ('/etc/old', NULL, 'aa', 0)")
+        conn.commit()
+        conn.close()
+        store = EventStore(self.path)
+        self.assertEqual(store.getarchiveinfo('/etc/old'),
+                         ('aa', None, None, None))
+        store.addarchive('/etc/netrc', 'bb', '0010001', 0600, 10, 20)
+        self.assertEqual(store.getarchiveinfo('/etc/netrc'),
+                         ('bb', 0600, 10, 20))
+        self.assertEqual(store.getarchive('/etc/netrc'), 'bb')
+        self.assertEqual(store.getarchiveinfo('/etc/none'), None)
+        store.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the on disk fact cache.
+'''
+from __future__ import absolute_import
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from src.stonix_resources.factcache import FactCache
+
+
+class zzzTestFrameworkfactcache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'facts', 'facts.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testPersist(self):
+        cache = FactCache(self.path)
+        self.assertRaises(KeyError, cache.get, 'serial')
+        cache.set('serial', 'ABC123')
+        cache.set('os', ['Debian', 'Debian 8', '8'], [1, None])
+        self.assertEqual(os.stat(self.path).st_mode & 0777, 0600)
+        cache = FactCache(self.path)
+        serial = cache.get('serial')
+        self.assertEqual(serial, 'ABC123')
+        self.assertTrue(isinstance(serial, str))
+        self.assertEqual(cache.get('os', [1, None]), ['Debian', 'Debian 8',
+                                                      '8'])
+        # A changed stamp means the source changed
+        self.assertRaises(KeyError, cache.get, 'os', [2, None])
+        self.assertRaises(KeyError, cache.get, 'os')
+
+    def testExpiry(self):
+        cache = FactCache(self.path, ttl=60)
+        cache.set('serial', 'ABC123')
+        cache.facts['serial'][1] = time.time() - 61
+        self.assertRaises(KeyError, cache.get, 'serial')
+        # Clocks going backwards expire facts as well
+        cache.facts['serial'][1] = time.time() + 61
+        self.assertRaises(KeyError, cache.get, 'serial')
+
+    def testReboot(self):
+        cache = FactCache(self.path)
+        cache.set('serial', 'ABC123')
+        data = json.load(open(self.path))
+        data['bootid'] = 'another boot'
+        json.dump(data, open(self.path, 'w'))
+        cache = FactCache(self.path)
+        self.assertRaises(KeyError, cache.get, 'serial')
+
+    def testCorrupt(self):
+        os.makedirs(os.path.dirname(self.path))
+        open(self.path, 'w').write('{not json')
+        cache = FactCache(self.path)
+        self.assertRaises(KeyError, cache.get, 'serial')
+        cache.set('serial', 'ABC123')
+        self.assertEqual(FactCache(self.path).get('serial'), 'ABC123')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the run scoped configuration file cache.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+from src.stonix_resources.filecache import FileCache, FILECACHE
+from src.stonix_resources.environment import Environment
+from src.stonix_resources.KVEditorStonix import KVEditorStonix
+from src.tests.lib.logdispatcher_lite import LogDispatcher
+
+
+class zzzTestFrameworkfilecache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.passwd = os.path.join(self.tmpdir, 'passwd')
+        self.write(self.passwd, "root:x:0:0:root:/root:/bin/bash\n" +
+                   "# comment\n\nbroken:x:1\n" +
+                   "daemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin\n")
+        self.cache = FileCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, path, data):
+        handle = open(path, 'w')
+        handle.write(data)
+        handle.close()
+
+    def testReadlines(self):
+        lines = self.cache.readlines(self.passwd)
+        self.assertEqual(len(lines), 5)
+        lines.append('modified by the caller\n')
+        self.assertEqual(len(self.cache.readlines(self.passwd)), 5)
+        self.assertEqual(self.cache.readlines('/nonexistent/file'), [])
+        self.assertRaises(IOError, self.cache.getlines, '/nonexistent/file')
+
+    def testRecords(self):
+        records = self.cache.getpasswd(self.passwd)
+        self.assertEqual([record[0] for record in records],
+                         ['root', 'daemon'])
+        self.assertEqual(records[1][6], '/usr/sbin/nologin')
+        records[0][0] = 'changed'
+        self.assertEqual(self.cache.getpasswd(self.passwd)[0][0], 'root')
+
+    def testKeyValues(self):
+        sshd = os.path.join(self.tmpdir, 'sshd_config')
+        self.write(sshd, "# comment\nPermitRootLogin no\n" +
+                   "Protocol 2\nPermitRootLogin yes\nSubsystem sftp  x y\n")
+        settings = self.cache.getkeyvalues(sshd)
+        self.assertEqual(settings['PermitRootLogin'], ['no', 'yes'])
+        self.assertEqual(settings['Subsystem'], ['sftp  x y'])
+        sysctl = os.path.join(self.tmpdir, 'sysctl.conf')
+        self.write(sysctl, "; comment\nkernel.sysrq = 0\nfs.suid_dumpable=0\n")
+        settings = self.cache.getkeyvalues(sysctl, '=')
+        self.assertEqual(settings, {'kernel.sysrq': ['0'],
+                                    'fs.suid_dumpable': ['0']})
+
+    def testInvalidation(self):
+        self.assertEqual(len(self.cache.getpasswd(self.passwd)), 2)
+        # Rewritten by rename, as the rules and KVEditorStonix do
+        tmpfile = self.passwd + '.tmp'
+        self.write(tmpfile, "root:x:0:0:root:/root:/bin/bash\n")
+        os.rename(tmpfile, self.passwd)
+        self.assertEqual(len(self.cache.getpasswd(self.passwd)), 1)
+        # Rewritten in place with the same size, caught by the mtime or by
+        # an explicit invalidation
+        self.write(self.passwd, "toor:x:0:0:root:/root:/bin/bash\n")
+        self.cache.invalidate(self.passwd)
+        self.assertEqual(self.cache.getpasswd(self.passwd)[0][0], 'toor')
+        os.remove(self.passwd)
+        self.assertEqual(self.cache.getpasswd(self.passwd), [])
+
+    def testKVEditorCommit(self):
+        enviro = Environment()
+        logger = LogDispatcher(enviro)
+        self.assertTrue(enviro.getfilecache() is FILECACHE)
+        sshd = os.path.join(self.tmpdir, 'sshd_config')
+        self.write(sshd, "Protocol 2\nPermitRootLogin yes\n")
+        self.assertEqual(FILECACHE.getkeyvalues(sshd)['PermitRootLogin'],
+                         ['yes'])
+        editor = KVEditorStonix(None, logger, 'conf', sshd, sshd + '.tmp',
+                                {'PermitRootLogin': 'no'}, 'present',
+                                'space')
+        self.assertFalse(editor.report())
+        self.assertTrue(editor.fix())
+        self.assertTrue(editor.commit())
+        self.assertEqual(FILECACHE.getkeyvalues(sshd)['PermitRootLogin'],
+                         ['no'])
+
+if __name__ == "__main__":
+    unittest.main()
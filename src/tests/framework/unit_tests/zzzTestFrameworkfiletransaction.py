@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the staged write-back of shared configuration files.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+from src.stonix_resources.filecache import FILECACHE
+from src.stonix_resources.filetransaction import TRANSACTION
+from src.stonix_resources.environment import Environment
+from src.stonix_resources.KVEditorStonix import KVEditorStonix
+from src.tests.lib.logdispatcher_lite import LogDispatcher
+
+
+class ServiceHelperRecorder(object):
+    '''Records reloads instead of reloading services.'''
+
+    def __init__(self):
+        self.reloads = []
+        self.running = True
+
+    def isrunning(self, service, servicename=""):
+        return self.running
+
+    def reloadservice(self, service, servicename=""):
+        # like ServiceHelper, stopped services are not reloaded
+        if not self.running:
+            return False
+        self.reloads.append(service)
+        return True
+
+
+class zzzTestFrameworkfiletransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'sshd_config')
+        handle = open(self.path, 'w')
+        handle.write("Protocol 1\nPermitRootLogin yes\n")
+        handle.close()
+        self.logger = LogDispatcher(Environment())
+        self.transaction = TRANSACTION
+        self.sh = ServiceHelperRecorder()
+
+    def tearDown(self):
+        if self.transaction.isactive():
+            self.transaction.commit(self.logger)
+        shutil.rmtree(self.tmpdir)
+
+    def edit(self, data):
+        editor = KVEditorStonix(None, self.logger, "conf", self.path,
+                                self.path + ".tmp", data, "present", "space")
+        self.assertFalse(editor.report())
+        self.assertTrue(editor.fix())
+        self.assertTrue(editor.commit())
+        self.transaction.reloadservice(self.sh, self.path, "sshd")
+
+    def testStageAndCommit(self):
+        self.transaction.begin([self.path])
+        self.assertTrue(self.transaction.isstaging(self.path))
+        self.edit({"Protocol": "2"})
+        self.edit({"PermitRootLogin": "no"})
+        # later editors and readers see the staged document
+        editor = KVEditorStonix(None, self.logger, "conf", self.path,
+                                self.path + ".tmp",
+                                {"Protocol": "2", "PermitRootLogin": "no"},
+                                "present", "space")
+        self.assertTrue(editor.report())
+        # the file on disk is untouched until the commit
+        self.assertEqual(open(self.path).read(),
+                         "Protocol 1\nPermitRootLogin yes\n")
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        self.assertEqual(self.sh.reloads, [])
+        self.assertTrue(self.transaction.commit(self.logger))
+        self.assertFalse(self.transaction.isactive())
+        self.assertFalse(FILECACHE.isstaged(self.path))
+        contents = open(self.path).read()
+        self.assertTrue("Protocol 2\n" in contents)
+        self.assertTrue("PermitRootLogin no\n" in contents)
+        self.assertFalse("Protocol 1\n" in contents)
+        self.assertEqual(self.sh.reloads, ["sshd"])
+
+    def testStoppedService(self):
+        self.sh.running = False
+        self.transaction.begin([self.path])
+        self.edit({"Protocol": "2"})
+        self.assertTrue(self.transaction.commit(self.logger))
+        self.assertTrue("Protocol 2\n" in open(self.path).read())
+        self.assertEqual(self.sh.reloads, [])
+
+    def testUnchanged(self):
+        self.transaction.begin([self.path])
+        self.transaction.reloadservice(self.sh, self.path, "sshd")
+        self.assertTrue(self.transaction.commit(self.logger))
+        self.assertEqual(self.sh.reloads, [])
+
+    def testInactive(self):
+        self.assertFalse(self.transaction.isstaging(self.path))
+        self.assertTrue(self.transaction.reloadservice(self.sh, self.path,
+                                                       "sshd"))
+        self.assertEqual(self.sh.reloads, ["sshd"])
+
+if __name__ == "__main__":
+    unittest.main()
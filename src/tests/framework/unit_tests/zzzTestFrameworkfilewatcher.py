@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the file watcher of the daemon mode.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+from src.stonix_resources.filewatcher import getwatcher, PollingWatcher, \
+    InotifyWatcher
+
+
+class zzzTestFrameworkfilewatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.conffile = os.path.join(self.tmpdir, 'sshd_config')
+        self.confdir = os.path.join(self.tmpdir, 'sysctl.d')
+        self.missing = os.path.join(self.tmpdir, 'missing', 'limits.conf')
+        open(self.conffile, 'w').write('PermitRootLogin no\n')
+        os.mkdir(self.confdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def watch(self, watcher):
+        watcher.add(self.conffile, 'SecureSSH')
+        watcher.add(self.confdir, 'NetworkTuning')
+        watcher.add(self.missing, 'NoCoreDumps')
+        return watcher
+
+    def checkwatcher(self, watcher, timeout):
+        try:
+            self.assertEqual(watcher.wait(0.1), set())
+            # an unrelated file next to a watched one is ignored
+            open(os.path.join(self.tmpdir, 'other'), 'w').write('x')
+            self.assertEqual(watcher.wait(timeout), set())
+            # files replaced by rename, as editors and stonix do
+            tmppath = self.conffile + '.tmp'
+            open(tmppath, 'w').write('PermitRootLogin yes\n')
+            os.rename(tmppath, self.conffile)
+            self.assertEqual(watcher.wait(timeout), set(['SecureSSH']))
+            open(os.path.join(self.confdir, '10-net.conf'), 'w').write('1\n')
+            self.assertEqual(watcher.wait(timeout), set(['NetworkTuning']))
+            # paths whose parent only appears later
+            os.mkdir(os.path.dirname(self.missing))
+            open(self.missing, 'w').write('* hard core 0\n')
+            self.assertEqual(watcher.wait(timeout), set(['NoCoreDumps']))
+        finally:
+            watcher.close()
+
+    def testInotify(self):
+        watcher = getwatcher()
+        if not isinstance(watcher, InotifyWatcher):
+            watcher.close()
+            return
+        self.checkwatcher(self.watch(watcher), 2)
+
+    def testPolling(self):
+        self.checkwatcher(self.watch(PollingWatcher(0.2)), 1)
+
+    def testGetKeys(self):
+        watcher = self.watch(PollingWatcher())
+        try:
+            self.assertEqual(watcher.getkeys([self.missing, self.confdir]),
+                             set(['NoCoreDumps', 'NetworkTuning']))
+            self.assertEqual(watcher.getkeys([self.tmpdir]), set())
+        finally:
+            watcher.close()
+
+if __name__ == "__main__":
+    unittest.main()
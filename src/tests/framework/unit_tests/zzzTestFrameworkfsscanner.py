@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the single pass file system scanner used by FilePermissions.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from src.stonix_resources.fsscanner import FSScanner, FSIndex, WW, SUID, \
+    UNOWNED
+
+BOGUSID = 54321
+
+
+class zzzTestFrameworkfsscanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.indexdir = tempfile.mkdtemp()
+        self.indexpath = os.path.join(self.indexdir, 'scanindex.db')
+        self.wwdir = os.path.join(self.tmpdir, 'wwdir')
+        os.mkdir(self.wwdir)
+        os.chmod(self.wwdir, 0777)
+        self.wwfile = os.path.join(self.wwdir, 'wwfile')
+        self.makefile(self.wwfile, 0666)
+        self.suidfile = os.path.join(self.tmpdir, 'suidfile')
+        self.makefile(self.suidfile, 04755)
+        self.plainfile = os.path.join(self.tmpdir, 'plainfile')
+        self.makefile(self.plainfile, 0644)
+        os.symlink(self.wwfile, os.path.join(self.tmpdir, 'wwlink'))
+        self.unowned = None
+        if os.geteuid() == 0:
+            self.unowned = os.path.join(self.tmpdir, 'unowned')
+            self.makefile(self.unowned, 0644)
+            os.chown(self.unowned, BOGUSID, BOGUSID)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        shutil.rmtree(self.indexdir)
+
+    def makefile(self, path, mode):
+        open(path, 'w').close()
+        os.chmod(path, mode)
+
+    def expected(self):
+        results = set([(WW, self.wwdir), (WW, self.wwfile),
+                       (SUID, self.suidfile)])
+        if self.unowned:
+            results.add((UNOWNED, self.unowned))
+        return results
+
+    def testScan(self):
+        scanner = FSScanner()
+        self.assertEqual(set(scanner.scan([self.tmpdir])), self.expected())
+        self.assertFalse(scanner.overrun)
+
+    def testParallelScan(self):
+        second = os.path.join(self.tmpdir, 'wwdir')
+        scanner = FSScanner(processes=2)
+        results = set(scanner.scan([self.tmpdir, second]))
+        self.assertEqual(results, self.expected())
+
+    def testLimit(self):
+        for num in range(5):
+            self.makefile(os.path.join(self.tmpdir, 'ww' + str(num)), 0666)
+        scanner = FSScanner(limit=3)
+        results = list(scanner.scan([self.tmpdir]))
+        self.assertTrue(scanner.overrun)
+        self.assertEqual(len([res for res in results if res[0] == WW]), 4)
+
+    def testOwnerCache(self):
+        scanner = FSScanner()
+        self.assertTrue(scanner.isknownuid(0))
+        self.assertTrue(scanner.isknowngid(0))
+        self.assertTrue(scanner.uids[0])
+        self.assertFalse(scanner.isknownuid(BOGUSID))
+        self.assertEqual(scanner.uids, {0: True, BOGUSID: False})
+
+    def testMissingFilesystem(self):
+        scanner = FSScanner()
+        missing = os.path.join(self.tmpdir, 'missing')
+        self.assertEqual(list(scanner.scan([missing])), [])
+
+    def indexscan(self, runid, full=False):
+        index = FSIndex(self.indexpath, runid, full)
+        try:
+            return set(FSScanner(index=index).scan([self.tmpdir]))
+        finally:
+            index.close()
+
+    def testIncrementalScan(self):
+        self.assertEqual(self.indexscan(1), self.expected())
+        # Mode changes of files in an unchanged directory are not seen
+        os.chmod(self.wwfile, 0644)
+        self.assertEqual(self.indexscan(2), self.expected())
+        # A new entry makes the directory get listed again, directory mode
+        # changes are always seen
+        newfile = os.path.join(self.wwdir, 'newsuid')
+        self.makefile(newfile, 02755)
+        os.chmod(self.wwdir, 0755)
+        expected = self.expected()
+        expected.remove((WW, self.wwdir))
+        expected.remove((WW, self.wwfile))
+        expected.add((SUID, newfile))
+        self.assertEqual(self.indexscan(3), expected)
+        self.assertEqual(self.indexscan(4, True), expected)
+        index = FSIndex(self.indexpath)
+        self.assertTrue(time.time() - index.getlastfull() < 60)
+        index.close()
+
+    def testIndexPrune(self):
+        self.indexscan(1)
+        shutil.rmtree(self.wwdir)
+        self.indexscan(2)
+        index = FSIndex(self.indexpath)
+        paths = [row[0] for row in
+                 index.conn.execute('SELECT path FROM dirs').fetchall()]
+        index.close()
+        self.assertEqual(paths, [self.tmpdir])
+
+    def testIndexSharedByWorkers(self):
+        # two workers of a parallel scan each record directories in turn,
+        # neither may keep the other waiting until its walk ends
+        first = FSIndex(self.indexpath, 1, timeout=0.1, batch=2)
+        second = FSIndex(self.indexpath, 1, timeout=0.1, batch=2)
+        dirstat = os.lstat(self.tmpdir)
+        try:
+            for num in range(3):
+                for index in [first, first, second, second]:
+                    index.store('/dir%d/%d' % (num, id(index)), dirstat,
+                                [], [], [0], [0])
+        finally:
+            first.close()
+            second.close()
+
+    def testParallelIndexScan(self):
+        second = os.path.join(self.tmpdir, 'wwdir')
+        index = FSIndex(self.indexpath, 1)
+        try:
+            scanner = FSScanner(processes=2, index=index)
+            results = set(scanner.scan([self.tmpdir, second]))
+        finally:
+            index.close()
+        self.assertEqual(results, self.expected())
+        self.assertEqual(self.indexscan(2), self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
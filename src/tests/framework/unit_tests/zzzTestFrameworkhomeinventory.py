@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the shared home directory inventory.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from src.stonix_resources import homeinventory
+from src.stonix_resources.homeinventory import HomeInventory, stathome
+
+
+class zzzTestFrameworkhomeinventory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.homes = []
+        for name in ['alice', 'bob', 'carol']:
+            home = os.path.join(self.tmpdir, name)
+            os.mkdir(home)
+            open(os.path.join(home, '.profile'), 'w').close()
+            open(os.path.join(home, 'notes'), 'w').close()
+            self.homes.append(home)
+        os.symlink('/dev/null', os.path.join(self.homes[0], '.netrc'))
+        self.inventory = HomeInventory(timeout=0.5, workers=2)
+        self.inventory.mounts = []
+        self.stathome = homeinventory.stathome
+        self.release = threading.Event()
+
+    def tearDown(self):
+        homeinventory.stathome = self.stathome
+        self.release.set()
+        shutil.rmtree(self.tmpdir)
+
+    def testStatHome(self):
+        homedir = stathome(self.homes[0])
+        self.assertTrue(homedir.reachable)
+        self.assertTrue(homedir.exists())
+        self.assertEqual(sorted(homedir.dotfiles), ['.netrc', '.profile'])
+        self.assertTrue(stat.S_ISLNK(homedir.dotfiles['.netrc'].st_mode))
+        missing = stathome(os.path.join(self.tmpdir, 'dave'))
+        self.assertTrue(missing.reachable)
+        self.assertFalse(missing.exists())
+
+    def testGetHomes(self):
+        homes = self.inventory.gethomes(self.homes)
+        self.assertEqual(sorted(homes), self.homes)
+        self.assertEqual(homes[self.homes[1]].getdotfiles(),
+                         [os.path.join(self.homes[1], '.profile')])
+        # Homes are scanned once until invalidated
+        open(os.path.join(self.homes[1], '.rhosts'), 'w').close()
+        self.assertEqual(self.inventory.gethome(self.homes[1]).dotfiles.keys(),
+                         ['.profile'])
+        self.inventory.invalidate(self.homes[1])
+        self.assertEqual(sorted(self.inventory.gethome(self.homes[1]).dotfiles),
+                         ['.profile', '.rhosts'])
+
+    def testMountKey(self):
+        self.inventory.mounts = [('/', 'ext4'), ('/home', 'autofs'),
+                                 ('/home/alice', 'nfs'), ('/export', 'nfs')]
+        self.assertEqual(self.inventory.getmountkey('/home/alice'),
+                         '/home/alice')
+        self.assertEqual(self.inventory.getmountkey('/home/bob'), '/home/bob')
+        self.assertEqual(self.inventory.getmountkey('/export/home/carol'),
+                         '/export')
+        self.assertEqual(self.inventory.getmountkey('/root'), '/')
+
+    def testUnreachable(self):
+        hung = self.homes[1]
+
+        def slowstat(path):
+            if path == hung:
+                self.release.wait(30)
+            return self.stathome(path)
+        homeinventory.stathome = slowstat
+        self.inventory.mounts = [('/', 'ext4'), (hung, 'nfs')]
+        start = time.time()
+        homes = self.inventory.gethomes(self.homes)
+        self.assertTrue(time.time() - start < 5)
+        self.assertFalse(homes[hung].reachable)
+        self.assertTrue(homes[self.homes[0]].reachable)
+        self.assertTrue(homes[self.homes[2]].exists())
+        # The dead mount is not waited for again during the run
+        self.inventory.invalidate(hung)
+        start = time.time()
+        self.assertFalse(self.inventory.gethome(hung).reachable)
+        self.assertTrue(time.time() - start < 0.4)
+
+if __name__ == "__main__":
+    unittest.main()
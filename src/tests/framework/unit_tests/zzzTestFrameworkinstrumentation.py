@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the run timing instrumentation.
+'''
+from __future__ import absolute_import
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from src.stonix_resources.instrumentation import Instrumentation
+
+
+class FakeRule(object):
+
+    def __init__(self, path):
+        self.path = path
+
+    def getrulename(self):
+        return 'FakeRule'
+
+    def isapplicable(self):
+        return True
+
+    def report(self):
+        '''Report docstring'''
+        os.path.exists(self.path)
+        os.stat(self.path)
+        subprocess.call(['/bin/true'])
+        return False
+
+    def fix(self):
+        open(self.path).read()
+        self.report()
+        return True
+
+
+class zzzTestFrameworkinstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'data')
+        open(self.path, 'w').write('x' * 4096)
+        self.inst = Instrumentation()
+        self.inst.install(countstats=True)
+
+    def tearDown(self):
+        self.inst.uninstall()
+        shutil.rmtree(self.tmpdir)
+
+    def testRuleCounters(self):
+        rule = FakeRule(self.path)
+        self.inst.instrument(rule)
+        self.assertEqual(rule.report.__doc__, 'Report docstring')
+        self.assertTrue(rule.isapplicable())
+        self.assertFalse(rule.report())
+        self.assertTrue(rule.fix())
+        # Calls made outside of a rule are not charged to it
+        os.stat(self.path)
+        stats = self.inst.getreport()['rules']['FakeRule']
+        self.assertEqual(stats['subprocesses'], 2)
+        self.assertEqual(stats['stats'], 4)
+        for phase in ['isapplicable', 'report', 'fix']:
+            self.assertTrue(stats[phase] >= 0, stats)
+        if os.path.exists('/proc/thread-self/io'):
+            self.assertTrue(stats['bytesread'] >= 4096, stats)
+
+    def testHelperThread(self):
+        rule = FakeRule(self.path)
+        rule.report = lambda: self.runthread(lambda: os.stat(self.path))
+        self.inst.instrument(rule)
+        rule.report()
+        self.assertEqual(self.inst.getreport()['rules']['FakeRule']['stats'],
+                         1)
+
+    def runthread(self, target):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+    def testUninstall(self):
+        self.inst.uninstall()
+        self.assertFalse(subprocess.Popen.__name__ == 'CountingPopen')
+        self.assertEqual(os.stat.__name__, 'stat')
+        self.inst.install()
+        self.assertEqual(subprocess.Popen.__name__, 'CountingPopen')
+        # stat calls are only counted when asked for
+        self.assertEqual(os.stat.__name__, 'stat')
+        rule = FakeRule(self.path)
+        self.inst.instrument(rule)
+        rule.report()
+        stats = self.inst.getreport()['rules']['FakeRule']
+        self.assertEqual(stats['subprocesses'], 1)
+        self.assertFalse('stats' in stats)
+        self.inst.install(countstats=True)
+        self.assertEqual(os.stat.__name__, 'countingstat')
+
+    def testWrite(self):
+        self.inst.addphase('import', 0.5)
+        self.inst.addphase('report', 1.25)
+        self.inst.addphase('import', 0.25)
+        self.inst.addrulephase('FakeRule', 'instantiate', 0.125)
+        path = os.path.join(self.tmpdir, 'timing.json')
+        self.inst.write(path, {'jobs': 2})
+        report = json.load(open(path))
+        self.assertEqual(report['phases'], [['import', 0.75],
+                                            ['report', 1.25]])
+        self.assertEqual(report['jobs'], 2)
+        self.assertEqual(report['rules']['FakeRule']['instantiate'], 0.125)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,8 +29,18 @@ Created on Sep 21, 2011
 @author: scmcleni
 @change: 2015/11/04 eball Refactored test to be functional
 '''
+import gzip
+import inspect
+import json
+import logging
+import os
+import shutil
+import tempfile
+import timeit
 import unittest
-from src.stonix_resources.logdispatcher import LogDispatcher, LogPriority
+import xml.etree.ElementTree as ET
+from src.stonix_resources.logdispatcher import LogDispatcher, LogPriority, \
+    MessageData, xmlReport
 import src.stonix_resources.environment as environment
 
 
@@ -89,5 +99,113 @@ class zzzTestFrameworklogdispatcher(unittest.TestCase):
         except:
             self.fail("Failed to write formatted ERROR message")
 
+    def testFormatArgs(self):
+        self.logger.log(self.priority.DEBUG, ["FormatTag", "%s of %d"],
+                        "one", 2)
+        self.assertEqual(self.logger.getconsolemessage().Detail, "one of 2")
+
+    def testCallerAttribution(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logging.getLogger('').addHandler(handler)
+        try:
+            self.logger.log(self.priority.INFO, "Attribution message")
+        finally:
+            logging.getLogger('').removeHandler(handler)
+        message = records[-1].getMessage()
+        self.assertTrue(message.startswith('INFO:'), message)
+        self.assertTrue('zzzTestFrameworklogdispatcher:' +
+                        'testCallerAttribution(' in message, message)
+        self.assertTrue(message.endswith('): Attribution message'), message)
+
+    def testFilteredDebugCost(self):
+        '''
+        Micro-benchmark: a DEBUG message outside of debug mode must cost less
+        than the inspect.stack() call the log method used to make for every
+        message.
+        '''
+        self.environ.setdebugmode(False)
+        quiet = LogDispatcher(self.environ)
+        try:
+            calls = 2000
+            filtered = min(timeit.repeat(
+                lambda: quiet.log(LogPriority.DEBUG,
+                                  ['Benchmark', 'path %s'], '/tmp'),
+                repeat=3, number=calls)) / calls
+            emitted = min(timeit.repeat(
+                lambda: self.logger.log(LogPriority.DEBUG,
+                                        ['Benchmark', 'path %s'], '/tmp'),
+                repeat=3, number=calls / 10)) / (calls / 10)
+            stack = min(timeit.repeat(inspect.stack, repeat=3,
+                                      number=calls / 10)) / (calls / 10)
+        finally:
+            quiet.closereports()
+        self.assertTrue(filtered * 10 < stack,
+                        'filtered DEBUG call %.2fus, inspect.stack %.2fus' %
+                        (filtered * 1e6, stack * 1e6))
+        self.assertTrue(emitted < stack,
+                        'emitted DEBUG call %.2fus, inspect.stack %.2fus' %
+                        (emitted * 1e6, stack * 1e6))
+
+    def testStreamingReport(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            xmlpath = os.path.join(tmpdir, 'report.xml')
+            jsonpath = os.path.join(tmpdir, 'report.jsonl')
+            report = xmlReport(xmlpath, False, jsonpath)
+
+            def entry(tag, detail):
+                msg = MessageData()
+                msg.Tag = tag
+                msg.Detail = detail
+                return msg
+            report.writeMetadata(entry('Hostname', 'host'))
+            report.writeFinding(entry('RuleOne', 'a < "b" & c'))
+            # The report must parse before it is closed
+            root = ET.parse(xmlpath).getroot()
+            self.assertEqual(root.find('findings/RuleOne').get('val'),
+                             'a < "b" & c')
+            # Late metadata stays in the metadata section
+            report.writeMetadata(entry('RuleCount', '2'))
+            report.writeFinding(entry('RuleTwo', 'line1\nline2'))
+            report.closeReport()
+            root = ET.parse(xmlpath).getroot()
+            self.assertEqual([child.tag for child in root],
+                             ['metadata', 'findings'])
+            self.assertEqual([child.tag for child in root.find('metadata')],
+                             ['Hostname', 'RuleCount'])
+            self.assertEqual([child.get('val') for child in
+                              root.find('findings')],
+                             ['a < "b" & c', 'line1\nline2'])
+            lines = [json.loads(line) for line in open(jsonpath)]
+            self.assertEqual([(line['section'], line['tag']) for line in
+                              lines],
+                             [('metadata', 'Hostname'),
+                              ('findings', 'RuleOne'),
+                              ('metadata', 'RuleCount'),
+                              ('findings', 'RuleTwo')])
+            gzpath = report.compressReport()
+            self.assertEqual(gzip.open(gzpath).read(), open(xmlpath).read())
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testLazyMetadata(self):
+        # Startup must not discover the OS and network facts, stonix -l
+        # never needs them
+        environ = environment.Environment()
+        logger = LogDispatcher(environ)
+        try:
+            for fact in ['hostname', 'ipaddress', 'osreportstring']:
+                self.assertFalse(fact in environ.__dict__, fact)
+            logger.logRuleCount()
+            self.assertTrue('hostname' in environ.__dict__)
+            root = ET.parse(logger.xmllog).getroot()
+            self.assertEqual(root.find('metadata/Hostname').get('val'),
+                             environ.hostname)
+            self.assertTrue(root.find('metadata/RuleCount') is not None)
+        finally:
+            logger.closereports()
+
 if __name__ == "__main__":
     unittest.main()
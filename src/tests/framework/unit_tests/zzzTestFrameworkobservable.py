@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for throttled Observable notifications.
+'''
+from __future__ import absolute_import
+import threading
+import time
+import unittest
+from src.stonix_resources.observable import Observable
+
+
+class Listener(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def update(self, subject):
+        self.calls.append((subject.value, threading.currentThread()))
+
+
+class Subject(Observable):
+
+    def __init__(self):
+        Observable.__init__(self)
+        self.value = 0
+
+    def change(self, value):
+        self.value = value
+        self.set_dirty()
+        self.notify_check()
+
+
+class zzzTestFrameworkobservable(unittest.TestCase):
+
+    def setUp(self):
+        self.subject = Subject()
+        self.listener = Listener()
+        self.subject.register_listener(self.listener)
+
+    def tearDown(self):
+        self.subject.stop_throttle()
+
+    def testSynchronous(self):
+        for value in range(5):
+            self.subject.change(value)
+        self.assertEqual([value for value, _ in self.listener.calls],
+                         range(5))
+
+    def testInterval(self):
+        self.subject.set_throttle(0.2)
+        for value in range(1000):
+            self.subject.change(value)
+        time.sleep(0.5)
+        # Updates are coalesced and delivered off the calling thread
+        self.assertTrue(0 < len(self.listener.calls) <= 3,
+                        self.listener.calls)
+        self.assertEqual(self.listener.calls[-1][0], 999)
+        self.assertNotEqual(self.listener.calls[-1][1],
+                            threading.currentThread())
+        # Stopping delivers anything still pending
+        self.subject.change(1000)
+        self.subject.stop_throttle()
+        self.assertEqual(self.listener.calls[-1][0], 1000)
+        self.subject.change(1001)
+        self.assertEqual(self.listener.calls[-1][0], 1001)
+
+    def testBatch(self):
+        self.subject.set_throttle(0, 10)
+        for value in range(25):
+            self.subject.change(value)
+        self.assertEqual([value for value, _ in self.listener.calls],
+                         [9, 19])
+        self.subject.flush_notifications()
+        self.assertEqual(self.listener.calls[-1][0], 24)
+
+if __name__ == "__main__":
+    unittest.main()
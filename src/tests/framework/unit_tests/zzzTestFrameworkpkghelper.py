@@ -32,10 +32,24 @@ Created on Jul 31, 2012
 
 import unittest
 import src.stonix_resources.pkghelper as pkghelper
+import src.stonix_resources.pkgfiles as pkgfiles
 from src.tests.lib.logdispatcher_lite import LogDispatcher
 import src.stonix_resources.environment as environment
 
 
+class FakeManager(object):
+    '''Package manager whose packages change behind stonix's back.'''
+
+    def __init__(self):
+        self.installed = set(["coreutils"])
+
+    def getInstalledPackages(self):
+        return set(self.installed)
+
+    def checkInstall(self, package):
+        return package in self.installed
+
+
 class zzzTestFrameworkpkghelper(unittest.TestCase):
 
     def setUp(self):
@@ -61,5 +75,59 @@ class zzzTestFrameworkpkghelper(unittest.TestCase):
             self.assertTrue(self.helper.remove(self.pkg))
             self.assertFalse(self.helper.check(self.pkg))
 
+    def testGetPackagesFromFiles(self):
+        files = ["/bin/ls", "/bin/cat", "/etc/hosts", "/nonexistent/file"]
+        packages = self.helper.getPackagesFromFiles(files)
+        self.assertEqual(sorted(packages.keys()), sorted(files))
+        self.assertEqual(packages["/nonexistent/file"], None)
+        for filename in files:
+            if self.helper.pckgr is None or \
+               not hasattr(self.helper.pckgr, "getPackageFromFile"):
+                self.assertEqual(packages[filename], None)
+                continue
+            single = self.helper.getPackageFromFile(filename)
+            if single is not None:
+                single = single.strip()
+            self.assertEqual(packages[filename], single)
+
+    def testVerifyFiles(self):
+        files = ["/bin/ls", "/nonexistent/file"]
+        results = self.helper.verifyFiles(files)
+        self.assertEqual(sorted(results.keys()), sorted(files))
+        for filename in files:
+            self.assertTrue(results[filename] in
+                            [pkgfiles.VERIFYCHANGED, pkgfiles.VERIFYOK,
+                             pkgfiles.VERIFYNOTFOUND,
+                             pkgfiles.VERIFYUNSUPPORTED])
+        if results["/nonexistent/file"] != pkgfiles.VERIFYUNSUPPORTED:
+            self.assertEqual(results["/nonexistent/file"],
+                             pkgfiles.VERIFYNOTFOUND)
+
+    def testInstalledPackages(self):
+        installed = self.helper.getInstalledPackages()
+        if installed is None:
+            return
+        self.assertTrue(pkghelper.INSTALLED is installed)
+        other = pkghelper.Pkghelper(self.logger, self.enviro)
+        self.assertTrue(other.getInstalledPackages() is installed)
+        for pkg in ["coreutils", "nonexistent-package-name"]:
+            self.assertEqual(self.helper.check(pkg),
+                             self.helper.pckgr.checkInstall(pkg))
+        self.helper.resetPackageCache()
+        self.assertEqual(pkghelper.INSTALLED, None)
+
+    def testResetInstalled(self):
+        manager = FakeManager()
+        self.helper.pckgr = manager
+        pkghelper.resetinstalled()
+        self.assertFalse(self.helper.check(self.pkg))
+        # installed by someone else, the snapshot of this audit stays
+        manager.installed.add(self.pkg)
+        self.assertFalse(self.helper.check(self.pkg))
+        # the next audit starts by resetting the snapshot
+        pkghelper.resetinstalled()
+        self.assertTrue(self.helper.check(self.pkg))
+        pkghelper.resetinstalled()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the report spool, run against a local HTTP server.
+'''
+from __future__ import absolute_import
+import BaseHTTPServer
+import cgi
+import gzip
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import xml.etree.ElementTree as ET
+from StringIO import StringIO
+from src.stonix_resources.reportspool import ReportSpool
+from src.stonix_resources.logdispatcher import LogDispatcher, LogPriority
+import src.stonix_resources.environment as environment
+
+
+class ReportHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.getheader('content-length'))
+        form = cgi.FieldStorage(fp=StringIO(self.rfile.read(length)),
+                                headers=self.headers,
+                                environ={'REQUEST_METHOD': 'POST'})
+        answer = ''
+        if self.server.fail:
+            self.server.fail -= 1
+            status = 500
+        elif self.server.reject:
+            # like results.php, failed uploads answer 200 with the error
+            # code, here UPLOAD_ERR_INI_SIZE
+            self.server.reject -= 1
+            status = 200
+            answer = '1\n'
+        else:
+            self.server.reports.append((self.path, form['file'].filename,
+                                        form['file'].value))
+            status = 200
+            answer = 'ok results/127.0.0.1-1.xml.gz\n'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, *args):
+        pass
+
+
+class zzzTestFrameworkreportspool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.spooldir = os.path.join(self.tmpdir, 'spool')
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                ReportHandler)
+        self.server.connections = 0
+        self.server.reports = []
+        self.server.fail = 0
+        self.server.reject = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/stonix/results.php' % \
+            self.server.server_address[1]
+
+    def tearDown(self):
+        if self.thread.isAlive():
+            self.server.shutdown()
+            self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def makereport(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        handle = open(path, 'wb')
+        handle.write(data)
+        handle.close()
+        return path
+
+    def testFlush(self):
+        spool = ReportSpool(self.spooldir, self.url, backoff=0)
+        for num in range(3):
+            spool.add(self.makereport('report%d.xml.gz' % num, str(num)))
+        self.assertEqual(len(spool.reports()), 3)
+        sent, left = spool.flush()
+        self.assertEqual((len(sent), left), (3, []))
+        self.assertEqual(spool.reports(), [])
+        self.assertEqual([data for _, _, data in self.server.reports],
+                         ['0', '1', '2'])
+        self.assertEqual(self.server.reports[0][0], '/stonix/results.php')
+        # All three reports went over one kept alive connection
+        self.assertEqual(self.server.connections, 1)
+
+    def testRetry(self):
+        spool = ReportSpool(self.spooldir, self.url, attempts=3, backoff=0)
+        spool.add(self.makereport('report.xml.gz', 'data'))
+        self.server.fail = 2
+        sent, left = spool.flush()
+        self.assertEqual((len(sent), left), (1, []))
+        # The server is down: the report is kept for the next run
+        spool.add(self.makereport('report.xml.gz', 'again'))
+        self.server.fail = 3
+        sent, left = spool.flush()
+        self.assertEqual((sent, left), ([], spool.reports()))
+        self.assertEqual(len(left), 1)
+        sent, left = spool.flush()
+        self.assertEqual((len(sent), left), (1, []))
+        self.assertEqual(self.server.reports[-1][2], 'again')
+
+    def testRejected(self):
+        spool = ReportSpool(self.spooldir, self.url, attempts=2, backoff=0)
+        spool.add(self.makereport('report.xml.gz', 'data'))
+        self.server.reject = 2
+        sent, left = spool.flush()
+        self.assertEqual(sent, [])
+        self.assertEqual(len(left), 1)
+        self.assertEqual(self.server.reports, [])
+        sent, left = spool.flush()
+        self.assertEqual((len(sent), left), (1, []))
+
+    def testUnreachable(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        spool = ReportSpool(self.spooldir, self.url, attempts=2, backoff=0,
+                            timeout=1)
+        spool.add(self.makereport('report.xml.gz', 'data'))
+        sent, left = spool.flush()
+        self.assertEqual(sent, [])
+        self.assertEqual(len(left), 1)
+
+    def testUnansweredStart(self):
+        # A server that takes the connection but never answers must not
+        # keep the process alive nor lose the report
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        url = 'http://127.0.0.1:%d/stonix/results.php' % \
+            listener.getsockname()[1]
+        try:
+            spool = ReportSpool(self.spooldir, url, attempts=1, timeout=5)
+            spooled = spool.add(self.makereport('report.xml.gz', 'data'))
+            thread = spool.start()
+            self.assertTrue(thread.daemon)
+            self.assertFalse(spool.wait(0.2))
+            self.assertEqual(spool.reports(), [spooled])
+        finally:
+            listener.close()
+
+    def testTrim(self):
+        spool = ReportSpool(self.spooldir, self.url, maxreports=3,
+                            maxbytes=25)
+        for num in range(5):
+            spool.add(self.makereport('%d.xml.gz' % num, 'x' * 10))
+        # Both bounds apply: three reports would be 30 bytes
+        reports = spool.reports()
+        self.assertEqual(len(reports), 2)
+        self.assertTrue(reports[-1].endswith('4.xml.gz'), reports)
+        self.assertTrue(reports[0].endswith('3.xml.gz'), reports)
+
+    def testPostReport(self):
+        environ = environment.Environment()
+        environ.setdebugmode(True)
+        logger = LogDispatcher(environ)
+        if environ.geteuid() != 0:
+            logger.closereports()
+            return
+        logger.spooldir = self.spooldir
+        logger.reporturl = self.url
+        logger.log(LogPriority.WARNING, ['SpoolTest', 'spooled finding'])
+        logger.postreport()
+        self.assertTrue(logger.spool.wait(30))
+        self.assertEqual(logger.spool.reports(), [])
+        _, filename, data = self.server.reports[-1]
+        self.assertTrue(filename.endswith('.xml.gz'), filename)
+        tmp = self.makereport('upload.xml.gz', data)
+        root = ET.fromstring(gzip.open(tmp).read())
+        self.assertEqual(root.find('.//SpoolTest').get('val'),
+                         'spooled finding')
+
+if __name__ == "__main__":
+    unittest.main()
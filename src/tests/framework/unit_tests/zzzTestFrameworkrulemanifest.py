@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the RuleManifest used by the controller to avoid importing
+rules that do not apply to the current platform.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from src.tests.lib.logdispatcher_lite import LogDispatcher
+from src.stonix_resources.environment import Environment
+from src.stonix_resources.rulemanifest import RuleManifest, MANIFESTNAME
+
+STATICRULE = """
+from ..rule import Rule
+
+
+class StaticRule(Rule):
+
+    def __init__(self, config, environ, logger, statechglogger):
+        Rule.__init__(self, config, environ, logger, statechglogger)
+        self.rulenumber = 9001
+        self.rulename = 'StaticRule'
+        self.rootrequired = False
+        self.helptext = 'First half ' + \\
+            'second half'
+        self.applicable = {'type': 'white',
+                           'family': [%s]}
+"""
+
+DYNAMICRULE = """
+from ..rule import Rule
+
+
+class DynamicRule(Rule):
+
+    def __init__(self, config, environ, logger, statechglogger):
+        Rule.__init__(self, config, environ, logger, statechglogger)
+        self.rulenumber = 9002
+        self.rulename = 'DynamicRule'
+        self.helptext = 'Dynamic'
+
+    def isapplicable(self):
+        return False
+"""
+
+
+class zzzTestFrameworkrulemanifest(unittest.TestCase):
+
+    def setUp(self):
+        self.environ = Environment()
+        self.logdispatch = LogDispatcher(self.environ)
+        self.rulesdir = tempfile.mkdtemp()
+        self.writerule('StaticRule', STATICRULE %
+                       repr(self.environ.getosfamily()))
+        self.writerule('DynamicRule', DYNAMICRULE)
+        open(os.path.join(self.rulesdir, '__init__.py'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.rulesdir)
+
+    def writerule(self, name, source):
+        fhandle = open(os.path.join(self.rulesdir, name + '.py'), 'w')
+        fhandle.write(source)
+        fhandle.close()
+
+    def testStaticEntry(self):
+        manifest = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertEqual(manifest.listmodules(), ['DynamicRule', 'StaticRule'])
+        entry = manifest.getentry('StaticRule')
+        self.assertTrue(entry['static'])
+        self.assertEqual(entry['rulenumber'], 9001)
+        self.assertEqual(entry['rulename'], 'StaticRule')
+        self.assertFalse(entry['rootrequired'])
+        self.assertEqual(entry['helptext'], 'First half second half')
+        self.assertTrue(manifest.isapplicable('StaticRule', self.environ))
+
+    def testDynamicEntry(self):
+        manifest = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertFalse(manifest.getentry('DynamicRule')['static'])
+        self.assertEqual(manifest.isapplicable('DynamicRule', self.environ),
+                         None)
+        self.assertEqual(manifest.isapplicable('Missing', self.environ),
+                         None)
+
+    def testPersistAndRefresh(self):
+        manifest = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertTrue(os.path.exists(os.path.join(self.rulesdir,
+                                                    MANIFESTNAME)))
+        reloaded = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertFalse(reloaded.changed)
+        self.assertEqual(reloaded.getentry('StaticRule'),
+                         manifest.getentry('StaticRule'))
+        self.assertTrue(isinstance(reloaded.getentry('StaticRule')['rulename'],
+                                   str))
+        self.writerule('StaticRule', STATICRULE % "'NotARealFamily'")
+        later = time.time() + 10
+        os.utime(os.path.join(self.rulesdir, 'StaticRule.py'), (later, later))
+        os.remove(os.path.join(self.rulesdir, 'DynamicRule.py'))
+        refreshed = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertEqual(refreshed.getentry('DynamicRule'), None)
+        self.assertFalse(refreshed.isapplicable('StaticRule', self.environ))
+
+    def testRootRequired(self):
+        self.writerule('StaticRule', (STATICRULE %
+                       repr(self.environ.getosfamily())).replace(
+                       'self.rootrequired = False', 'self.rootrequired = True'))
+        manifest = RuleManifest(self.rulesdir, self.logdispatch)
+        self.assertEqual(manifest.isapplicable('StaticRule', self.environ),
+                         self.environ.geteuid() == 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
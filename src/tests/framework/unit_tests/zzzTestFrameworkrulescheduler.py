@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the RuleScheduler used by the controller to run rules
+concurrently.
+'''
+from __future__ import absolute_import
+import threading
+import time
+import unittest
+from src.tests.lib.logdispatcher_lite import LogDispatcher
+from src.stonix_resources.environment import Environment
+from src.stonix_resources.rulescheduler import RuleScheduler
+from src.stonix_resources.rule import Rule
+
+
+class FakeRule(object):
+    '''
+    Minimal stand in for a Rule exposing only what the scheduler uses.
+    '''
+
+    def __init__(self, name, conflictgroups=None, delay=0.0, rulenum=0,
+                 runafter=None):
+        self.name = name
+        self.conflictgroups = conflictgroups or []
+        self.delay = delay
+        self.rulenum = rulenum
+        self.runafter = runafter or []
+
+    def getrulename(self):
+        return self.name
+
+    def getrulenum(self):
+        return self.rulenum
+
+    def getrunafter(self):
+        return self.runafter
+
+    def getconflictgroups(self):
+        return self.conflictgroups
+
+
+class GroupedRule(Rule):
+    '''
+    Real Rule declaring its conflict groups the way the rules do.
+    '''
+
+    def __init__(self, name, conflictgroups, logger):
+        Rule.__init__(self, None, None, logger, None)
+        self.rulename = name
+        self.conflictgroups = conflictgroups
+        self.delay = 0.05
+
+
+class zzzTestFrameworkrulescheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.enviro = Environment()
+        self.logger = LogDispatcher(self.enviro)
+        self.lock = threading.Lock()
+        self.running = {}
+        self.maxrunning = {}
+        self.completed = []
+        self.events = []
+
+    def tearDown(self):
+        pass
+
+    def action(self, rule):
+        self.lock.acquire()
+        self.events.append(('start', rule.getrulename()))
+        for group in ['all'] + rule.getconflictgroups():
+            self.running[group] = self.running.get(group, 0) + 1
+            self.maxrunning[group] = max(self.maxrunning.get(group, 0),
+                                         self.running[group])
+        self.lock.release()
+        time.sleep(rule.delay)
+        self.lock.acquire()
+        for group in ['all'] + rule.getconflictgroups():
+            self.running[group] = self.running[group] - 1
+        self.events.append(('end', rule.getrulename()))
+        self.lock.release()
+        if rule.getrulename() == 'Broken':
+            raise RuntimeError('rule died')
+
+    def callback(self, rule, elapsed, trace):
+        self.completed.append((rule.getrulename(), trace))
+
+    def testInvalidWorkers(self):
+        self.assertRaises(TypeError, RuleScheduler, self.logger, '2')
+        self.assertRaises(ValueError, RuleScheduler, self.logger, 0)
+
+    def testSerialRunKeepsOrder(self):
+        rules = [FakeRule('Rule' + str(num)) for num in range(5)]
+        scheduler = RuleScheduler(self.logger, 1)
+        scheduler.run(rules, self.action, self.callback)
+        self.assertEqual([name for name, _ in self.completed],
+                         [rule.getrulename() for rule in rules])
+        self.assertEqual(self.maxrunning['all'], 1)
+
+    def testConcurrentRunKeepsOrder(self):
+        # Earlier rules are slower so they finish last, the callbacks must
+        # still arrive in list order.
+        rules = [FakeRule('Rule' + str(num), delay=0.05 * (5 - num))
+                 for num in range(5)]
+        scheduler = RuleScheduler(self.logger, 4)
+        scheduler.run(rules, self.action, self.callback)
+        self.assertEqual([name for name, _ in self.completed],
+                         [rule.getrulename() for rule in rules])
+        self.assertTrue(self.maxrunning['all'] > 1)
+
+    def testConflictGroupsAreSerialized(self):
+        rules = [FakeRule('SSH1', ['sshd'], 0.05),
+                 FakeRule('SSH2', ['sshd'], 0.05),
+                 FakeRule('Sysctl1', ['sysctl', 'sshd'], 0.05),
+                 FakeRule('Other1', [], 0.05),
+                 FakeRule('Other2', [], 0.05)]
+        scheduler = RuleScheduler(self.logger, 4)
+        scheduler.run(rules, self.action, self.callback)
+        self.assertEqual(len(self.completed), 5)
+        self.assertEqual(self.maxrunning['sshd'], 1)
+        self.assertTrue(self.maxrunning['all'] > 1)
+
+    def testRuleConflictGroups(self):
+        rule = Rule(None, None, self.logger, None)
+        self.assertEqual(rule.getconflictgroups(), [])
+        rules = [GroupedRule('SSH1', ['sshd'], self.logger),
+                 GroupedRule('SSH2', ['sshd'], self.logger),
+                 GroupedRule('Other1', [], self.logger)]
+        self.assertEqual(rules[0].getconflictgroups(), ['sshd'])
+        scheduler = RuleScheduler(self.logger, 3)
+        scheduler.run(rules, self.action, self.callback)
+        self.assertEqual(len(self.completed), 3)
+        self.assertEqual(self.maxrunning['sshd'], 1)
+        self.assertTrue(self.maxrunning['all'] > 1)
+
+    def testRuleDeathIsReported(self):
+        rules = [FakeRule('Good'), FakeRule('Broken'), FakeRule('Good2')]
+        scheduler = RuleScheduler(self.logger, 2)
+        scheduler.run(rules, self.action, self.callback)
+        self.assertEqual(self.completed[0], ('Good', None))
+        self.assertEqual(self.completed[1][0], 'Broken')
+        self.assertTrue('rule died' in self.completed[1][1])
+        self.assertEqual(self.completed[2], ('Good2', None))
+
+    def testOrderRules(self):
+        rules = [FakeRule('Banners', rulenum=51, runafter=['SSH']),
+                 FakeRule('Timeout', rulenum=5, runafter=['SSH', 'Missing']),
+                 FakeRule('SSH', rulenum=8),
+                 FakeRule('Patching', rulenum=3)]
+        scheduler = RuleScheduler(self.logger, 1)
+        ordered = scheduler.orderrules(rules)
+        self.assertEqual([rule.getrulename() for rule in ordered],
+                         ['Patching', 'SSH', 'Timeout', 'Banners'])
+
+    def testOrderRulesCycle(self):
+        rules = [FakeRule('A', rulenum=2, runafter=['B']),
+                 FakeRule('B', rulenum=1, runafter=['A']),
+                 FakeRule('C', rulenum=3)]
+        scheduler = RuleScheduler(self.logger, 1)
+        ordered = scheduler.orderrules(rules)
+        self.assertEqual([rule.getrulename() for rule in ordered],
+                         ['C', 'B', 'A'])
+        # Forward edges left by the cycle must not hang a concurrent run
+        scheduler = RuleScheduler(self.logger, 2)
+        scheduler.run(ordered, self.action, self.callback, honordeps=True)
+        self.assertEqual(len(self.completed), 3)
+
+    def testDependenciesHonored(self):
+        rules = [FakeRule('SSH', rulenum=1, delay=0.1),
+                 FakeRule('Other', rulenum=2, delay=0.1),
+                 FakeRule('Timeout', rulenum=3, runafter=['SSH']),
+                 FakeRule('Banners', ['sshd'], rulenum=4),
+                 FakeRule('Admin', ['sshd'], rulenum=5)]
+        scheduler = RuleScheduler(self.logger, 4)
+        ordered = scheduler.orderrules(rules)
+        scheduler.run(ordered, self.action, self.callback, honordeps=True)
+        self.assertTrue(self.events.index(('end', 'SSH')) <
+                        self.events.index(('start', 'Timeout')))
+        self.assertTrue(self.events.index(('end', 'Banners')) <
+                        self.events.index(('start', 'Admin')))
+        # Independent branches still run concurrently
+        self.assertTrue(self.events.index(('start', 'Other')) <
+                        self.events.index(('end', 'SSH')))
+
+if __name__ == "__main__":
+    unittest.main()
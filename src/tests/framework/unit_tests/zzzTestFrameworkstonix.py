@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the Controller of stonix.py. The Controller is built without
+running its constructor, which would start a full stonix run.
+'''
+from __future__ import absolute_import
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', '..'))
+import stonix
+from stonix_resources.observable import Observable
+
+
+class Watcher(object):
+    '''Watcher recording how long the daemon waits, then stopping it.'''
+
+    def __init__(self):
+        self.timeouts = []
+
+    def add(self, path, key):
+        pass
+
+    def wait(self, timeout):
+        self.timeouts.append(timeout)
+        raise KeyboardInterrupt
+
+    def close(self):
+        pass
+
+
+class Logger(object):
+
+    def log(self, priority, message):
+        pass
+
+    def postreport(self):
+        pass
+
+    def openreports(self):
+        pass
+
+
+class TestController(stonix.Controller):
+
+    def __init__(self):
+        Observable.__init__(self)
+        self.logger = Logger()
+        self.installedrules = []
+        self.daemoninterval = 1440
+
+    def auditsystem(self):
+        pass
+
+
+class zzzTestFrameworkstonix(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = TestController()
+        self.watcher = Watcher()
+        self.getwatcher = stonix.getwatcher
+        stonix.getwatcher = lambda: self.watcher
+
+    def tearDown(self):
+        stonix.getwatcher = self.getwatcher
+        self.controller.stop_throttle()
+
+    def testDaemonInterval(self):
+        # the CLI throttles notifications before starting the daemon
+        self.controller.set_throttle(0.25)
+        self.assertEqual(self.controller.daemoninterval, 1440)
+        self.controller.daemonrun()
+        self.assertEqual(len(self.watcher.timeouts), 1)
+        self.assertTrue(self.watcher.timeouts[0] > 1439 * 60,
+                        self.watcher.timeouts)
+
+if __name__ == "__main__":
+    unittest.main()
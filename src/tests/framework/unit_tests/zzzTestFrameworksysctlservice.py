@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the shared sysctl service.
+'''
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import unittest
+from src.stonix_resources.sysctlservice import SysctlService, keytopath
+
+SYSCTLCONF = '''# System tunables
+net.ipv4.ip_forward = 0
+kernel.randomize_va_space=0
+-fs.suid_dumpable = 1
+'''
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.calls = []
+        self.eventid = 0
+
+    def nextid(self):
+        self.eventid += 1
+        return '%07d' % self.eventid
+
+    def recordchgevent(self, eventid, event):
+        self.calls.append((eventid, event))
+
+    def recordfilechange(self, path, tmppath, eventid):
+        pass
+
+
+class zzzTestFrameworksysctlservice(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.procsys = os.path.join(self.tmpdir, 'proc', 'sys')
+        self.conffile = os.path.join(self.tmpdir, 'sysctl.conf')
+        self.confdir = os.path.join(self.tmpdir, 'sysctl.d')
+        self.setlive('kernel.randomize_va_space', '0')
+        self.setlive('fs.suid_dumpable', '1')
+        self.setlive('kernel.exec-shield', '1')
+        open(self.conffile, 'w').write(SYSCTLCONF)
+        self.sysctl = SysctlService(self.procsys, self.conffile,
+                                    self.confdir)
+        self.sysctl.declare('Test', {'kernel.randomize_va_space': '2',
+                                     'fs.suid_dumpable': '0',
+                                     'net.ipv6.conf.all.disable_ipv6': '1'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def setlive(self, key, value):
+        path = keytopath(key, self.procsys)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, 'w').write(value + '\n')
+
+    def getlive(self, key):
+        return open(keytopath(key, self.procsys)).read().strip()
+
+    def testKeyToPath(self):
+        self.assertEqual(keytopath('net.ipv4.ip_forward', '/proc/sys'),
+                         '/proc/sys/net/ipv4/ip_forward')
+        self.assertEqual(keytopath('net.ipv4.conf.eth0/1.rp_filter',
+                                   '/proc/sys'),
+                         '/proc/sys/net/ipv4/conf/eth0.1/rp_filter')
+
+    def testCheck(self):
+        problems = self.sysctl.check('Test')
+        self.assertEqual(len(problems), 5)
+        self.assertEqual(self.sysctl.check('Other'), [])
+        # Parameters are read only when declared
+        self.assertFalse('kernel.exec-shield' in self.sysctl.readlive())
+        # Running values are cached until invalidated
+        self.setlive('kernel.randomize_va_space', '2')
+        self.assertEqual(len(self.sysctl.check('Test')), 5)
+        self.sysctl.invalidate()
+        self.assertEqual(len(self.sysctl.check('Test')), 4)
+
+    def testFix(self):
+        recorder = Recorder()
+        failed = self.sysctl.fix('Test', recorder, recorder.nextid)
+        self.assertEqual(failed, [])
+        self.assertEqual(self.getlive('kernel.randomize_va_space'), '2')
+        self.assertEqual(self.getlive('fs.suid_dumpable'), '0')
+        dropin = os.path.join(self.confdir, 'stonix-test.conf')
+        self.assertEqual(open(dropin).readlines()[1:],
+                         ['fs.suid_dumpable = 0\n',
+                          'kernel.randomize_va_space = 2\n',
+                          'net.ipv6.conf.all.disable_ipv6 = 1\n'])
+        self.assertEqual(open(self.conffile).read(),
+                         '''# System tunables
+net.ipv4.ip_forward = 0
+#kernel.randomize_va_space=0
+#-fs.suid_dumpable = 1
+''')
+        self.assertEqual(self.sysctl.check('Test'), [])
+        events = [event for eventid, event in recorder.calls]
+        self.assertEqual([eventid for eventid, event in recorder.calls],
+                         ['0000001', '0000002', '0000003'])
+        self.assertEqual(events[0], {'eventtype': 'creation',
+                                     'filepath': dropin})
+        self.assertEqual(events[1], {'eventtype': 'conf',
+                                     'filepath': self.conffile})
+        self.assertEqual(events[2]['eventtype'], 'commandstring')
+        self.assertEqual(events[2]['command'][1:],
+                         ['-w', 'fs.suid_dumpable=1',
+                          'kernel.randomize_va_space=0'])
+        # Nothing left to change, nothing recorded
+        recorder = Recorder()
+        self.assertEqual(self.sysctl.fix('Test', recorder, recorder.nextid),
+                         [])
+        self.assertEqual(recorder.calls, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+Created on Oct 18, 2026
+
+Test suite for the native system queries.
+'''
+from __future__ import absolute_import
+import os
+import pwd
+import shutil
+import tempfile
+import unittest
+from src.stonix_resources import sysquery
+from src.stonix_resources.instrumentation import Instrumentation
+
+
+class zzzTestFrameworksysquery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.procmounts = sysquery.PROCMOUNTS
+        self.procmodules = sysquery.PROCMODULES
+
+    def tearDown(self):
+        sysquery.PROCMOUNTS = self.procmounts
+        sysquery.PROCMODULES = self.procmodules
+        shutil.rmtree(self.tmpdir)
+
+    def testReadlink(self):
+        link = os.path.join(self.tmpdir, 'link')
+        os.symlink('/etc/init.d/S70ndd-nettune', link)
+        self.assertEqual(sysquery.readlink(link),
+                         '/etc/init.d/S70ndd-nettune')
+        self.assertEqual(sysquery.readlink(self.tmpdir), None)
+        self.assertEqual(sysquery.readlink(os.path.join(self.tmpdir, 'no')),
+                         None)
+
+    def testUsers(self):
+        user = pwd.getpwuid(os.getuid())
+        self.assertEqual(sysquery.getuid(user.pw_name), user.pw_uid)
+        self.assertEqual(sysquery.getusername(user.pw_uid), user.pw_name)
+        self.assertEqual(sysquery.getuid('stonix-no-such-user'), None)
+        self.assertEqual(sysquery.getgid('stonix-no-such-group'), None)
+        self.assertEqual(sysquery.getgroupname(sysquery.getgid('root')),
+                         'root')
+        self.assertEqual(sysquery.getkernelrelease(), os.uname()[2])
+
+    def testProcesses(self):
+        self.assertTrue(sysquery.pidalive(os.getpid()))
+        self.assertFalse(sysquery.pidalive(0))
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertFalse(sysquery.pidalive(pid))
+        if os.path.exists('/proc/self/cmdline'):
+            self.assertTrue('python' in
+                            ' '.join(sysquery.getcmdline(os.getpid())))
+            self.assertEqual(sysquery.getcmdline(pid), None)
+
+    def testMounts(self):
+        sysquery.PROCMOUNTS = os.path.join(self.tmpdir, 'mounts')
+        self.assertEqual(sysquery.getmounts(), None)
+        open(sysquery.PROCMOUNTS, 'w').write(
+            '/dev/sda1 / ext4 rw,relatime 0 0\n' +
+            '/dev/sdb1 /mnt/usb\\040key vfat rw,nosuid,nodev 0 0\n')
+        self.assertEqual(sysquery.getmounts(),
+                         [('/dev/sda1', '/', 'ext4', ['rw', 'relatime']),
+                          ('/dev/sdb1', '/mnt/usb key', 'vfat',
+                           ['rw', 'nosuid', 'nodev'])])
+
+    def testModules(self):
+        sysquery.PROCMODULES = os.path.join(self.tmpdir, 'modules')
+        self.assertEqual(sysquery.getmodules(), None)
+        open(sysquery.PROCMODULES, 'w').write(
+            'usb_storage 61440 1 uas, Live 0x0000000000000000\n' +
+            'vfat 20480 1 - Live 0x0000000000000000\n')
+        self.assertEqual(sysquery.getmodules(), ['usb_storage', 'vfat'])
+
+    def testNoSubprocesses(self):
+        instrumentation = Instrumentation()
+        instrumentation.install()
+        try:
+            instrumentation.begin('SysQueryTest')
+            try:
+                sysquery.readlink('/proc/self/exe')
+                sysquery.uname()
+                sysquery.getkernelrelease()
+                sysquery.getuid('root')
+                sysquery.getgid('root')
+                sysquery.pidalive(os.getpid())
+                sysquery.getcmdline(os.getpid())
+                sysquery.getmounts()
+                sysquery.getmodules()
+            finally:
+                instrumentation.end('report')
+        finally:
+            instrumentation.uninstall()
+        stats = instrumentation.getreport()['rules']['SysQueryTest']
+        self.assertEqual(stats['subprocesses'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -185,7 +185,7 @@ class LogDispatcher ():
 
     ##########################################################################
 
-    def log(self, priority, msg_data):
+    def log(self, priority, msg_data, *args):
         """
         Handles all writing of logger data to files. `msg_data` should be
         passed as an array of [tag, message_details] where tag is a
@@ -207,6 +207,11 @@ class LogDispatcher ():
         @author scmcleni
         @author: dkennel
         """
+        if args:
+            if isinstance(msg_data, list):
+                msg_data = [msg_data[0], str(msg_data[1]) % args]
+            else:
+                msg_data = msg_data % args
 
         entry = self.formatMessageData(msg_data)
 